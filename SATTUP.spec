@@ -1,67 +1,176 @@
 # -*- mode: python ; coding: utf-8 -*-
+#
+# Paketleme modu: SATTUP_BUILD_MODE
+#   fast    (varsayılan) one-dir -> dist\SATTUP\ (installer\SATTUP.iss bunu paketler)
+#           Kullanılmayan Qt eklentileri / çevirileri ve asset'ler ayıklanır, formlar önceden derlenir.
+#   full    one-dir, ayıklama ve form derleme yok -> dist\SATTUP_full\ (eski paket, karşılaştırma için)
+#   onefile tek EXE, her açılışta geçici klasöre açılır -> dist\SATTUP_onefile.exe (karşılaştırma için)
+# Açılış süreleri: python startup_benchmark.py dist\SATTUP\SATTUP.exe dist\SATTUP_full\SATTUP.exe ...
 
 import os
-from PyInstaller.utils.hooks import collect_submodules
+import sys
 
 block_cipher = None
 
 project_dir = os.path.abspath(os.getcwd())
+sys.path.insert(0, project_dir)
 
-hiddenimports = []
-hiddenimports += collect_submodules('PyQt6.QtMultimedia')
+BUILD_MODE = (os.environ.get('SATTUP_BUILD_MODE') or 'fast').strip().lower()
+if BUILD_MODE not in ('fast', 'full', 'onefile'):
+    raise SystemExit(f"SATTUP_BUILD_MODE bilinmiyor: {BUILD_MODE}")
+TRIM = BUILD_MODE == 'fast'
 
+# QtMultimedia main_menu içinde ilk kullanımda import ediliyor
+hiddenimports = ['PyQt6.QtMultimedia']
+
+datas = [
+    (os.path.join(project_dir, 'ui', 'ui_files'), os.path.join('ui', 'ui_files')),
+    (os.path.join(project_dir, 'ui', 'styles'), os.path.join('ui', 'styles')),
+    (os.path.join(project_dir, 'ui', 'icons'), os.path.join('ui', 'icons')),
+]
+_seed_db = os.path.join(project_dir, 'database', 'asil_system.db')
+if os.path.exists(_seed_db):
+    datas.append((_seed_db, 'database'))
+
+if TRIM:
+    # Formlar pyuic ile ui/compiled altına derlenir; app.core.forms.load_ui bunları kullanır.
+    from app.core.forms import COMPILED_PACKAGE, compile_forms
+
+    hiddenimports += [f'{COMPILED_PACKAGE}.{name}' for name in compile_forms()]
+
+    # Yalnızca çalışma zamanında okunan asset'ler: PDF fontları (DejaVu + .pkl metrikleri),
+    # uyarı / giriş sesleri, görseller ve eski (göreli yollu) personel fotoğrafları.
+    _assets = os.path.join(project_dir, 'assets')
+    for name in sorted(os.listdir(os.path.join(_assets, 'fonts'))):
+        if name.startswith('DejaVuSans'):
+            datas.append((os.path.join(_assets, 'fonts', name), os.path.join('assets', 'fonts')))
+    for name in ('offline_clock.wav', 'viss.wav'):
+        datas.append((os.path.join(_assets, 'sounds', name), os.path.join('assets', 'sounds')))
+    datas.append((os.path.join(_assets, 'images'), os.path.join('assets', 'images')))
+    datas.append((os.path.join(_assets, 'photos'), os.path.join('assets', 'photos')))
+else:
+    datas.append((os.path.join(project_dir, 'assets'), 'assets'))
+
+excludes = [
+    'PySide6',
+    'PySide6_Addons',
+    'PySide6_Essentials',
+    'shiboken6',
+]
+if TRIM:
+    excludes += [
+        'tkinter',
+        'unittest',
+        'pydoc_data',
+        'PyQt6.QtBluetooth',
+        'PyQt6.QtDBus',
+        'PyQt6.QtDesigner',
+        'PyQt6.QtHelp',
+        'PyQt6.QtNfc',
+        'PyQt6.QtOpenGL',
+        'PyQt6.QtOpenGLWidgets',
+        'PyQt6.QtPdf',
+        'PyQt6.QtPdfWidgets',
+        'PyQt6.QtPositioning',
+        'PyQt6.QtQml',
+        'PyQt6.QtQuick',
+        'PyQt6.QtQuick3D',
+        'PyQt6.QtQuickWidgets',
+        'PyQt6.QtRemoteObjects',
+        'PyQt6.QtSensors',
+        'PyQt6.QtSerialPort',
+        'PyQt6.QtSpatialAudio',
+        'PyQt6.QtSql',
+        'PyQt6.QtTest',
+        'PyQt6.QtTextToSpeech',
+        'PyQt6.QtWebChannel',
+        'PyQt6.QtWebSockets',
+    ]
 
 a = Analysis(
     ['main.py'],
     pathex=[project_dir],
     binaries=[],
-    datas=[
-        (os.path.join(project_dir, 'ui', 'ui_files'), os.path.join('ui', 'ui_files')),
-        (os.path.join(project_dir, 'ui', 'styles'), os.path.join('ui', 'styles')),
-        (os.path.join(project_dir, 'ui', 'icons'), os.path.join('ui', 'icons')),
-        (os.path.join(project_dir, 'assets'), 'assets'),
-        (os.path.join(project_dir, 'database', 'asil_system.db'), 'database'),
-    ],
+    datas=datas,
     hiddenimports=hiddenimports,
     hookspath=[],
     hooksconfig={},
     runtime_hooks=[],
-    excludes=[
-        'PySide6',
-        'PySide6_Addons',
-        'PySide6_Essentials',
-        'shiboken6',
-    ],
+    excludes=excludes,
     win_no_prefer_redirects=False,
     win_private_assemblies=False,
     cipher=block_cipher,
     noarchive=False,
 )
 
+# Uygulamanın kullandığı Qt eklenti grupları; resim biçimlerinden yalnızca ikon / fotoğraf için gerekenler
+QT_PLUGIN_GROUPS = {'platforms', 'platformthemes', 'styles', 'imageformats', 'iconengines', 'multimedia'}
+QT_IMAGE_FORMATS = ('qsvg', 'qico', 'qjpeg', 'qgif')
+# Yazılım OpenGL'i (~20 MB): widget arayüzü raster ile çizildiği için gerekmez
+QT_DROP_FILES = {'opengl32sw.dll'}
+
+
+def _keep_qt_file(dest_name):
+    path = dest_name.replace('\\', '/')
+    base = os.path.basename(path)
+    if base.lower() in QT_DROP_FILES:
+        return False
+    if '/Qt6/translations/' in path:
+        return base.endswith('_tr.qm')
+    if '/Qt6/plugins/' in path:
+        parts = path.split('/Qt6/plugins/', 1)[1].split('/')
+        if parts[0] not in QT_PLUGIN_GROUPS:
+            return False
+        if parts[0] == 'imageformats':
+            return base.startswith(QT_IMAGE_FORMATS)
+    return True
+
+
+if TRIM:
+    a.binaries = [entry for entry in a.binaries if _keep_qt_file(entry[0])]
+    a.datas = [entry for entry in a.datas if _keep_qt_file(entry[0])]
+
 pyz = PYZ(a.pure, a.zipped_data, cipher=block_cipher)
 
-exe = EXE(
-    pyz,
-    a.scripts,
-    a.binaries,
-    a.datas,
-    [],
-    name='SATTUP',
-    debug=False,
-    bootloader_ignore_signals=False,
-    strip=False,
-    upx=False,
-    console=False,
-    exclude_binaries=True,
-    icon=os.path.join(project_dir, 'ui', 'icons', 'ekle.ico') if os.path.exists(os.path.join(project_dir, 'ui', 'icons', 'ekle.ico')) else None,
-)
+_icon = os.path.join(project_dir, 'ui', 'icons', 'ekle.ico')
+_icon = _icon if os.path.exists(_icon) else None
 
-coll = COLLECT(
-    exe,
-    a.binaries,
-    a.zipfiles,
-    a.datas,
-    strip=False,
-    upx=False,
-    name='SATTUP',
-)
+if BUILD_MODE == 'onefile':
+    exe = EXE(
+        pyz,
+        a.scripts,
+        a.binaries,
+        a.datas,
+        [],
+        name='SATTUP_onefile',
+        debug=False,
+        bootloader_ignore_signals=False,
+        strip=False,
+        upx=False,
+        console=False,
+        icon=_icon,
+    )
+else:
+    exe = EXE(
+        pyz,
+        a.scripts,
+        [],
+        name='SATTUP',
+        debug=False,
+        bootloader_ignore_signals=False,
+        strip=False,
+        upx=False,
+        console=False,
+        exclude_binaries=True,
+        icon=_icon,
+    )
+
+    coll = COLLECT(
+        exe,
+        a.binaries,
+        a.zipfiles,
+        a.datas,
+        strip=False,
+        upx=False,
+        name='SATTUP' if BUILD_MODE == 'fast' else 'SATTUP_full',
+    )
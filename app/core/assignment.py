@@ -0,0 +1,252 @@
+"""Araç / şoför otomatik atama motoru.
+
+Aylık trip_plan slotları her gün tekrar ettiği için gün, 1440 dakikalık bir çember olarak
+ele alınır; gece yarısını geçen aralıklar (23:30-00:30) iki parçaya bölünür. Atama, aralık
+grafiği renklendirmesinin açgözlü (başlangıca göre sıralı) hâlidir: her slot, kapasitesi
+yeten ve o saatte boş olan, en az ölü zaman bırakan kullanılmış araca verilir; yoksa
+kapasitesi yeten en küçük yeni araç açılır. Şoförler aynı şekilde, mümkünse aracın önceki
+şoförü tercih edilerek atanır. Saat dilimleri app.core.time_blocks ile ayrıştırılır; çakışma
+tanımı DatabaseManager.find_allocation_conflict ile aynıdır.
+"""
+
+from bisect import bisect_left
+from dataclasses import dataclass, field
+
+from app.core.time_blocks import DAY_MINUTES, day_segments, parse_time_block
+
+
+class _Timeline:
+    """Bir kaynağın (araç/şoför) günlük dolu parçaları; sıralı ve çakışmasız tutulur."""
+
+    __slots__ = ("starts", "ends")
+
+    def __init__(self):
+        self.starts: list[int] = []
+        self.ends: list[int] = []
+
+    def is_free(self, segments) -> bool:
+        for s, e in segments:
+            i = bisect_left(self.starts, e)
+            # i-1: e'den önce başlayan son parça; s'den sonra bitiyorsa çakışır.
+            if i > 0 and self.ends[i - 1] > s:
+                return False
+        return True
+
+    def add(self, segments) -> None:
+        for s, e in segments:
+            i = bisect_left(self.starts, s)
+            self.starts.insert(i, s)
+            self.ends.insert(i, e)
+
+    def idle_before(self, start: int) -> int:
+        """start'tan önce biten son işten bu yana geçen dakika (çember üzerinde)."""
+        if not self.ends:
+            return 0
+        i = bisect_left(self.starts, start)
+        prev_end = self.ends[i - 1] if i > 0 else self.ends[-1] - DAY_MINUTES
+        return max(0, int(start) - int(prev_end))
+
+
+@dataclass
+class Slot:
+    route_params_id: int
+    time_block: str
+    required_capacity: float = 0.0
+    vehicle_id: str | None = None
+    driver_id: str | None = None
+    route_name: str = ""
+    start: int = 0
+    end: int = 0
+    segments: list = field(default_factory=list)
+
+
+@dataclass
+class AssignmentResult:
+    # (route_params_id, time_block) -> (vehicle_id, driver_id)
+    assignments: dict = field(default_factory=dict)
+    # (route_params_id, time_block, sebep)
+    unassigned: list = field(default_factory=list)
+    # (route_params_id, time_block, sebep): korunamayıp yeniden atanan mevcut araç/şoför
+    replaced: list = field(default_factory=list)
+    vehicles_used: int = 0
+    drivers_used: int = 0
+    dead_minutes: int = 0
+
+
+def propose_assignments(
+    slots,
+    vehicles,
+    drivers,
+    busy_vehicles=None,
+    busy_drivers=None,
+    keep_existing: bool = True,
+    turnaround_minutes: int = 0,
+) -> AssignmentResult:
+    """Çakışmasız araç/şoför ataması önerir.
+
+    slots: Slot listesi (ya da aynı alanlara sahip dict'ler).
+    vehicles: (vehicle_code, plate, capacity) listesi; get_araclar_list_with_capacity() çıktısı.
+    drivers: (driver_code, ad) listesi.
+    busy_vehicles / busy_drivers: {kod: [(start, end), ...]} başka sözleşmelerdeki dolu saatler.
+    keep_existing: slotta araç/şoför zaten varsa sabit kabul edilir; araç aktif listede yoksa
+        (pasife alınmış / silinmiş), şoför listede yoksa ya da o saatte başka bir işle çakışıyorsa
+        korunmaz, yeniden atanır ve sebebi result.replaced'e yazılır.
+    """
+    result = AssignmentResult()
+    gap = max(0, int(turnaround_minutes or 0))
+
+    norm: list[Slot] = []
+    for sl in slots or []:
+        if isinstance(sl, dict):
+            sl = Slot(**{k: sl.get(k) for k in ("route_params_id", "time_block", "required_capacity",
+                                                 "vehicle_id", "driver_id", "route_name") if k in sl})
+        blk = parse_time_block(sl.time_block)
+        if blk is None:
+            result.unassigned.append((int(sl.route_params_id or 0), str(sl.time_block or ""), "saat okunamadı"))
+            continue
+        sl.start, sl.end = blk.start, blk.end
+        sl.segments = blk.segments(gap)
+        sl.required_capacity = float(sl.required_capacity or 0)
+        norm.append(sl)
+
+    veh_cap: dict[str, float] = {}
+    for row in vehicles or []:
+        code = str(row[0])
+        try:
+            veh_cap[code] = float(row[2] or 0) if len(row) > 2 else 0.0
+        except Exception:
+            veh_cap[code] = 0.0
+    driver_codes = [str(r[0]) for r in (drivers or [])]
+
+    v_line: dict[str, _Timeline] = {c: _Timeline() for c in veh_cap}
+    d_line: dict[str, _Timeline] = {c: _Timeline() for c in driver_codes}
+    for lines, busy in ((v_line, busy_vehicles), (d_line, busy_drivers)):
+        for code, ranges in (busy or {}).items():
+            tl = lines.get(str(code))
+            if tl is None:
+                continue
+            for s, e in ranges or []:
+                segs = day_segments(s, e, gap)
+                if tl.is_free(segs):
+                    tl.add(segs)
+
+    used_v: list[str] = []
+    used_d: list[str] = []
+    used_v_set: set[str] = set()
+    used_d_set: set[str] = set()
+    last_driver_of_vehicle: dict[str, str] = {}
+
+    def _fits(code: str, need: float) -> bool:
+        cap = veh_cap.get(code, 0.0)
+        return need <= 0 or cap <= 0 or cap >= need
+
+    def _mark_v(code: str):
+        if code not in used_v_set:
+            used_v_set.add(code)
+            used_v.append(code)
+
+    def _mark_d(code: str):
+        if code not in used_d_set:
+            used_d_set.add(code)
+            used_d.append(code)
+
+    # Sabit atamalar önce yerleşir ki öneriler onlarla çakışmasın.
+    pending: list[Slot] = []
+    for sl in norm:
+        vid = str(sl.vehicle_id) if keep_existing and sl.vehicle_id not in (None, "") else None
+        did = str(sl.driver_id) if keep_existing and sl.driver_id not in (None, "") else None
+        why: list[str] = []
+        if vid is not None:
+            if vid not in v_line:
+                why.append("araç aktif değil")
+                vid = None
+            elif not v_line[vid].is_free(sl.segments):
+                why.append("araç çakışıyor")
+                vid = None
+            else:
+                v_line[vid].add(sl.segments)
+                _mark_v(vid)
+        if did is not None:
+            if did not in d_line:
+                why.append("şoför listede yok")
+                did = None
+            elif not d_line[did].is_free(sl.segments):
+                why.append("şoför çakışıyor")
+                did = None
+            else:
+                d_line[did].add(sl.segments)
+                _mark_d(did)
+        if why:
+            result.replaced.append((int(sl.route_params_id), str(sl.time_block), ", ".join(why)))
+        if vid is not None and did is not None:
+            result.assignments[(int(sl.route_params_id), str(sl.time_block))] = (vid, did)
+            last_driver_of_vehicle.setdefault(vid, did)
+            continue
+        sl.vehicle_id, sl.driver_id = vid, did
+        pending.append(sl)
+
+    # Büyük kapasite isteyenler aynı başlangıçta önce yerleşsin.
+    pending.sort(key=lambda x: (x.start, -x.required_capacity, x.end))
+    spare_v = sorted(veh_cap, key=lambda c: (veh_cap[c] if veh_cap[c] > 0 else float("inf"), c))
+
+    for sl in pending:
+        key = (int(sl.route_params_id), str(sl.time_block))
+        vid = sl.vehicle_id
+        if vid is None:
+            best = None
+            for code in used_v:
+                if not _fits(code, sl.required_capacity):
+                    continue
+                tl = v_line[code]
+                if not tl.is_free(sl.segments):
+                    continue
+                score = (tl.idle_before(sl.start), veh_cap.get(code, 0.0))
+                if best is None or score < best[0]:
+                    best = (score, code)
+            if best is None:
+                for code in spare_v:
+                    if code in used_v_set or not _fits(code, sl.required_capacity):
+                        continue
+                    if v_line[code].is_free(sl.segments):
+                        best = ((0, veh_cap.get(code, 0.0)), code)
+                        break
+            if best is None:
+                result.unassigned.append((key[0], key[1], "uygun araç yok"))
+                continue
+            vid = best[1]
+            result.dead_minutes += int(best[0][0]) if vid in used_v_set else 0
+            v_line[vid].add(sl.segments)
+            _mark_v(vid)
+
+        did = sl.driver_id
+        if did is None:
+            prev = last_driver_of_vehicle.get(vid)
+            if prev is not None and d_line[prev].is_free(sl.segments):
+                did = prev
+            else:
+                best_d = None
+                for code in used_d:
+                    tl = d_line[code]
+                    if not tl.is_free(sl.segments):
+                        continue
+                    score = tl.idle_before(sl.start)
+                    if best_d is None or score < best_d[0]:
+                        best_d = (score, code)
+                if best_d is None:
+                    for code in driver_codes:
+                        if code not in used_d_set and d_line[code].is_free(sl.segments):
+                            best_d = (0, code)
+                            break
+                did = best_d[1] if best_d is not None else None
+            if did is None:
+                result.assignments[key] = (vid, None)
+                result.unassigned.append((key[0], key[1], "uygun şoför yok"))
+                continue
+            d_line[did].add(sl.segments)
+            _mark_d(did)
+        last_driver_of_vehicle.setdefault(vid, did)
+        result.assignments[key] = (vid, did)
+
+    result.vehicles_used = len(used_v)
+    result.drivers_used = len(used_d)
+    return result
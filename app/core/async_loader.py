@@ -0,0 +1,102 @@
+from PyQt6.QtCore import QObject, QRunnable, QThreadPool, QTimer, pyqtSignal
+
+
+class _LoadSignals(QObject):
+    # generation, result, error
+    finished = pyqtSignal(int, object, object)
+
+
+class _LoadTask(QRunnable):
+    def __init__(self, generation: int, fn):
+        super().__init__()
+        self.generation = int(generation)
+        self.fn = fn
+        self.signals = _LoadSignals()
+        self.setAutoDelete(False)
+
+    def run(self):
+        try:
+            result = self.fn()
+        except Exception as e:
+            self.signals.finished.emit(self.generation, None, e)
+            return
+        self.signals.finished.emit(self.generation, result, None)
+
+
+class AsyncLoader(QObject):
+    """Ekran verisini arka planda yükleyen, iptal edilebilir tek kanallı yükleyici.
+
+    Her request() yeni bir nesil (generation) numarası alır; sonuç GUI thread'ine döndüğünde
+    yalnızca en son isteğe aitse on_done çağrılır, araya giren eski yüklemeler sessizce atılır.
+    debounce_ms > 0 ise art arda gelen istekler birleştirilir ve sadece sonuncusu çalıştırılır
+    (combo box'lar hızlıca değiştirilirken gereksiz sorgular kuyruğa girmez).
+
+    fn worker thread'inde çalışır; widget'lara dokunmamalı, sadece veri döndürmelidir.
+    """
+
+    def __init__(self, parent=None, debounce_ms: int = 0, pool: QThreadPool | None = None):
+        super().__init__(parent)
+        self._pool = pool or QThreadPool.globalInstance()
+        self._generation = 0
+        self._running: dict[int, _LoadTask] = {}
+        self._callbacks: dict[int, tuple] = {}
+        self._pending = None
+
+        self._timer = QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.setInterval(max(0, int(debounce_ms or 0)))
+        self._timer.timeout.connect(self._start_pending)
+
+    @property
+    def generation(self) -> int:
+        return int(self._generation)
+
+    def is_current(self, generation: int) -> bool:
+        return int(generation) == int(self._generation)
+
+    def is_busy(self) -> bool:
+        return bool(self._running) or self._pending is not None
+
+    def request(self, fn, on_done, on_error=None) -> int:
+        self._generation += 1
+        gen = int(self._generation)
+        self._pending = (gen, fn, on_done, on_error)
+        if self._timer.interval() > 0:
+            self._timer.start()
+        else:
+            self._start_pending()
+        return gen
+
+    def cancel(self) -> None:
+        # Devam eden iş durdurulamaz; nesil ilerletilince sonucu yok sayılır.
+        self._generation += 1
+        self._pending = None
+        self._timer.stop()
+
+    def _start_pending(self) -> None:
+        pending = self._pending
+        self._pending = None
+        if pending is None:
+            return
+        gen, fn, on_done, on_error = pending
+        if not self.is_current(gen):
+            return
+        task = _LoadTask(gen, fn)
+        task.signals.finished.connect(self._on_finished)
+        self._running[gen] = task
+        self._callbacks[gen] = (on_done, on_error)
+        self._pool.start(task)
+
+    def _on_finished(self, generation: int, result, error) -> None:
+        self._running.pop(int(generation), None)
+        on_done, on_error = self._callbacks.pop(int(generation), (None, None))
+        if not self.is_current(generation):
+            return
+        if error is not None:
+            if on_error is not None:
+                on_error(error)
+            else:
+                print(f"AsyncLoader error: {error}")
+            return
+        if on_done is not None:
+            on_done(result)
@@ -0,0 +1,54 @@
+import threading
+from collections import OrderedDict
+
+
+class LRUCache:
+    """Küçük, thread-safe LRU önbellek; isabet/ıska sayaçlarıyla.
+
+    DatabaseManager her modülde ayrı oluşturulduğu için önbellekler modül seviyesinde
+    tutulur ve tüm ekranlar arasında paylaşılır.
+    """
+
+    def __init__(self, maxsize: int = 64):
+        self.maxsize = max(1, int(maxsize or 1))
+        self._data: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key, default=None):
+        with self._lock:
+            if key in self._data:
+                self._data.move_to_end(key)
+                self.hits += 1
+                return self._data[key]
+            self.misses += 1
+            return default
+
+    def put(self, key, value) -> None:
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def keys(self) -> list:
+        with self._lock:
+            return list(self._data.keys())
+
+    def invalidate(self, key) -> None:
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "hits": int(self.hits),
+                "misses": int(self.misses),
+                "size": len(self._data),
+                "maxsize": int(self.maxsize),
+            }
@@ -1,18 +1,41 @@
 import sqlite3
 import os
 import json
+import calendar
 from datetime import datetime
-from typing import Optional
-from config import DB_PATH, BASE_DIR
+from config import DB_PATH, BASE_DIR, STOP_DISTANCES_PATH
+from app.core import profiler
+from app.core.cache import LRUCache
+from app.core.puantaj_snapshot import invalidate_puantaj_snapshots
+from app.core.route_directory import get_route_directory, invalidate_route_directory
+from app.core.route_catalog import load_distance_file, normalize_stop_name, split_stops
+from app.core.route_names import route_key_for
+from app.core.time_blocks import parse_time_block
+
+# Süreç genelinde paylaşılan önbellekler (her ekran kendi DatabaseManager'ını oluşturuyor).
+_PRICE_ITEMS_CACHE = LRUCache(maxsize=64)
+# route_params şema/indeks kontrolü süreç başına (DB yolu başına) bir kez yapılır.
+_ROUTE_PARAMS_READY: set[str] = set()
+# Durak kataloğu tabloları (stops / route_stops / stop_distances) için aynı kontrol.
+_ROUTE_CATALOG_READY: set[str] = set()
+# hakedis tabloları / tekil anahtar indeksi için aynısı.
+_HAKEDIS_READY: set[str] = set()
+# Eski (mutlak yollu) hakediş belgelerinin depoya taşınması süreç başına (DB yolu başına) bir kez denenir.
+_HAKEDIS_DOCS_ADOPTED: set[str] = set()
+# contract_price_items tablosu / tek seferlik backfill kontrolü için aynısı.
+_PRICE_ITEMS_READY: set[str] = set()
 
 class DatabaseManager:
     def __init__(self):
         self.db_path = DB_PATH
         self.create_tables()
         self.migrate_contracts_table()
+        self._ensure_contract_price_items_table()
         self.migrate_trip_plan_table()
         self.migrate_trip_period_lock_table()
         self.create_trip_entries_tables()
+        self._ensure_trip_allocation_time_index()
+        self._ensure_trip_daily_agg_table()
         self._ensure_trip_prices_table()
         self.create_hakedis_tables()
         self.create_customers_table()
@@ -26,6 +49,9 @@ class DatabaseManager:
     def connect(self):
         try:
             # check_same_thread=False ekliyoruz ki farklı modüllerden erişirken sorun çıkmasın
+            factory = profiler.connection_factory()
+            if factory is not None:
+                return sqlite3.connect(self.db_path, check_same_thread=False, factory=factory)
             conn = sqlite3.connect(self.db_path, check_same_thread=False)
             return conn
         except Exception as e:
@@ -272,6 +298,7 @@ class DatabaseManager:
                 ),
             )
             conn.commit()
+            invalidate_puantaj_snapshots(int(contract_id), str(month))
             return True
         except Exception:
             try:
@@ -335,6 +362,7 @@ class DatabaseManager:
                 (int(contract_id), str(service_type), str(eff)),
             )
             conn.commit()
+            invalidate_puantaj_snapshots(int(contract_id))
             return True
         except Exception:
             try:
@@ -531,62 +559,6 @@ class DatabaseManager:
         finally:
             conn.close()
 
-    def _parse_hhmm_to_minutes(self, s: str) -> Optional[int]:
-        try:
-            txt = str(s or "").strip()
-            if not txt:
-                return None
-            parts = txt.split(":")
-            if len(parts) != 2:
-                return None
-            if (not parts[0].isdigit()) or (not parts[1].isdigit()):
-                return None
-            hh = int(parts[0])
-            mm = int(parts[1])
-            if hh < 0 or hh > 23 or mm < 0 or mm > 59:
-                return None
-            return hh * 60 + mm
-        except Exception:
-            return None
-
-    def _parse_time_range_minutes(self, time_block: str, time_text: str = "") -> tuple[Optional[int], Optional[int]]:
-        t = str(time_text or "").strip()
-        if not t:
-            t = str(time_block or "").strip()
-        if not t:
-            return None, None
-
-        if "-" in t:
-            left, right = (t.split("-", 1) + [""])[:2]
-            m1 = self._parse_hhmm_to_minutes(left.strip())
-            m2 = self._parse_hhmm_to_minutes(right.strip())
-            if m1 is None or m2 is None:
-                return None, None
-            if m2 == m1:
-                return m1, (m1 + 15) % 1440
-            return m1, m2
-
-        m = self._parse_hhmm_to_minutes(t)
-        if m is None:
-            return None, None
-        return m, (m + 15) % 1440
-
-    def _ranges_overlap(self, a_start: int, a_end: int, b_start: int, b_end: int) -> bool:
-        def _segments(s: int, e: int):
-            if s < 0 or e < 0:
-                return []
-            if s == e:
-                return [(s, (s + 1) % 1440)]
-            if s < e:
-                return [(s, e)]
-            return [(s, 1440), (0, e)]
-
-        for s1, e1 in _segments(int(a_start), int(a_end)):
-            for s2, e2 in _segments(int(b_start), int(b_end)):
-                if max(s1, s2) < min(e1, e2):
-                    return True
-        return False
-
     def get_vehicle_movements_for_day(self, contract_id: int, trip_date: str, vehicle_id) -> int:
         conn = self.connect()
         if not conn:
@@ -627,70 +599,312 @@ class DatabaseManager:
         exclude_time_block: str | None = None,
         exclude_line_no: int | None = None,
     ) -> dict | None:
-        start_m, end_m = self._parse_time_range_minutes(str(time_block or ""), str(time_text or ""))
-        if start_m is None or end_m is None:
+        has_vehicle = vehicle_id is not None and str(vehicle_id).strip() != ""
+        has_driver = driver_id is not None and str(driver_id).strip() != ""
+        if not has_vehicle and not has_driver:
             return None
+        busy = self.find_busy_allocations(
+            trip_date=str(trip_date),
+            time_block=str(time_block or ""),
+            time_text=str(time_text or ""),
+            vehicle_id=vehicle_id,
+            driver_id=driver_id,
+            contract_id=int(contract_id),
+            service_type=str(service_type),
+        )
+        for rec in busy:
+            try:
+                if exclude_route_params_id is not None and int(rec["route_params_id"]) == int(exclude_route_params_id):
+                    if exclude_time_block is not None and rec["time_block"] == str(exclude_time_block or ""):
+                        if exclude_line_no is not None and int(rec["line_no"]) == int(exclude_line_no or 0):
+                            continue
+            except Exception:
+                pass
+            return rec
+        return None
 
+    # ------------------------- Saat aralığı indeksi (trip_allocations) -------------------------
+    # time_block/time_text metni bir kez dakikaya çevrilip start_min/end_min/wraps kolonlarında
+    # tutulur; çakışma sorguları string ayrıştırmak yerine (trip_date, araç/şoför, start_min) indeksini kullanır.
+    # Kolonları yazmayan eski kod yolları için satır NULL kalır ve ilk sorguda doldurulur.
+    def _ensure_trip_allocation_time_index(self):
         conn = self.connect()
         if not conn:
-            return None
+            return
         try:
             cur = conn.cursor()
+            cur.execute("PRAGMA table_info(trip_allocations)")
+            cols = {row[1] for row in (cur.fetchall() or [])}
+            if not cols:
+                return
+            for col in ("start_min", "end_min", "wraps"):
+                if col not in cols:
+                    cur.execute(f"ALTER TABLE trip_allocations ADD COLUMN {col} INTEGER")
+            cur.execute(
+                "CREATE INDEX IF NOT EXISTS idx_trip_allocations_vehicle_time ON trip_allocations(trip_date, vehicle_id, start_min)"
+            )
             cur.execute(
+                "CREATE INDEX IF NOT EXISTS idx_trip_allocations_driver_time ON trip_allocations(trip_date, driver_id, start_min)"
+            )
+            cur.execute(
+                "CREATE INDEX IF NOT EXISTS idx_trip_allocations_time_pending ON trip_allocations(id) WHERE start_min IS NULL"
+            )
+            # Saat metni dakikaları yazmadan değiştirilirse kayıt yeniden hesaplanmak üzere boşaltılır.
+            cur.execute(
+                """
+                CREATE TRIGGER IF NOT EXISTS trg_trip_allocations_time_reset
+                AFTER UPDATE OF time_block, time_text ON trip_allocations
+                WHEN (OLD.time_block IS NOT NEW.time_block OR OLD.time_text IS NOT NEW.time_text)
+                 AND NEW.start_min IS OLD.start_min AND NEW.end_min IS OLD.end_min
+                BEGIN
+                    UPDATE trip_allocations SET start_min=NULL, end_min=NULL, wraps=NULL WHERE id=NEW.id;
+                END
                 """
-                SELECT route_params_id, time_block, line_no, vehicle_id, driver_id, COALESCE(time_text,''), COALESCE(qty,0)
+            )
+            self._fill_trip_allocation_minutes(cur)
+            conn.commit()
+        except Exception as e:
+            conn.rollback()
+            print(f"Trip allocation saat indeksi hatası: {e}")
+        finally:
+            conn.close()
+
+    @staticmethod
+    def time_block_columns(time_block: str, time_text: str = "") -> tuple:
+        """(start_min, end_min, wraps); ayrıştırılamayan saatler -1 ile işaretlenir."""
+        blk = parse_time_block(time_block, time_text)
+        if blk is None:
+            return -1, -1, 0
+        return int(blk.start), int(blk.end), int(bool(blk.wraps))
+
+    def _fill_trip_allocation_minutes(self, cur) -> int:
+        cur.execute(
+            "SELECT id, time_block, COALESCE(time_text,'') FROM trip_allocations WHERE start_min IS NULL"
+        )
+        rows = cur.fetchall() or []
+        if not rows:
+            return 0
+        cur.executemany(
+            "UPDATE trip_allocations SET start_min=?, end_min=?, wraps=? WHERE id=?",
+            [(*self.time_block_columns(str(tb or ""), str(tt or "")), int(rid)) for rid, tb, tt in rows],
+        )
+        return len(rows)
+
+    @staticmethod
+    def _time_overlap_sql(block) -> tuple[str, list]:
+        """Verilen aralıkla kesişen satırlar için WHERE parçası (gece yarısı taşması dahil)."""
+        parts = []
+        params: list = []
+        for qs, qe in block.segments():
+            parts.append("((wraps=0 AND start_min < ? AND end_min > ?) OR (wraps=1 AND (start_min < ? OR end_min > ?)))")
+            params.extend([qe, qs, qe, qs])
+        return "(start_min >= 0 AND (" + " OR ".join(parts) + "))", params
+
+    def find_busy_allocations(
+        self,
+        trip_date: str,
+        time_block: str,
+        time_text: str = "",
+        vehicle_id=None,
+        driver_id=None,
+        contract_id: int | None = None,
+        service_type: str | None = None,
+    ) -> list[dict]:
+        """trip_date gününde verilen saat aralığında dolu olan (qty > 0) atamalar.
+
+        vehicle_id/driver_id verilirse yalnızca o araç ya da şoförün kayıtları döner; ikisi de
+        boşsa aralıktaki tüm dolu atamalar listelenir. contract_id/service_type isteğe bağlı daraltmadır.
+        """
+        block = parse_time_block(str(time_block or ""), str(time_text or ""))
+        if block is None:
+            return []
+        conn = self.connect()
+        if not conn:
+            return []
+        try:
+            # start_min/end_min/wraps yazan her kayıtta doldurulur; eski satırlar
+            # _ensure_trip_allocation_time_index'te bir kez doldurulduğu için burada yalnızca okunur.
+            cur = conn.cursor()
+            overlap_sql, params = self._time_overlap_sql(block)
+            where = ["trip_date=?", "COALESCE(qty,0) > 0", overlap_sql]
+            args: list = [str(trip_date), *params]
+            who = []
+            if vehicle_id is not None and str(vehicle_id).strip():
+                who.append("vehicle_id = ?")
+                args.append(vehicle_id)
+            if driver_id is not None and str(driver_id).strip():
+                who.append("driver_id = ?")
+                args.append(driver_id)
+            if who:
+                where.append("(" + " OR ".join(who) + ")")
+            if contract_id is not None:
+                where.append("contract_id=?")
+                args.append(int(contract_id))
+            if service_type is not None:
+                where.append("service_type=?")
+                args.append(str(service_type))
+            cur.execute(
+                f"""
+                SELECT contract_id, route_params_id, time_block, line_no, vehicle_id, driver_id,
+                       COALESCE(time_text,''), COALESCE(qty,0), start_min, end_min
                 FROM trip_allocations
-                WHERE contract_id=?
-                  AND trip_date=?
-                  AND service_type=?
-                  AND COALESCE(qty,0) > 0
-                  AND (
-                        (? IS NOT NULL AND vehicle_id = ?)
-                     OR (? IS NOT NULL AND driver_id = ?)
-                  )
+                WHERE {' AND '.join(where)}
+                ORDER BY start_min, id
                 """,
-                (
-                    int(contract_id),
-                    str(trip_date),
-                    str(service_type),
-                    vehicle_id,
-                    vehicle_id,
-                    driver_id,
-                    driver_id,
-                ),
+                args,
             )
             rows = cur.fetchall() or []
-        except Exception:
+        except Exception as e:
+            print(f"Dolu atama sorgu hatası: {e}")
             rows = []
         finally:
-            try:
-                conn.close()
-            except Exception:
-                pass
+            conn.close()
 
-        for rid, tb, ln, vid, did, tt, qty in rows:
+        return [
+            {
+                "contract_id": int(cid or 0),
+                "route_params_id": int(rid or 0),
+                "time_block": str(tb or ""),
+                "line_no": int(ln or 0),
+                "vehicle_id": vid,
+                "driver_id": did,
+                "time_text": str(tt or ""),
+                "qty": float(qty or 0),
+                "start_min": int(sm),
+                "end_min": int(em),
+            }
+            for cid, rid, tb, ln, vid, did, tt, qty, sm, em in rows
+        ]
+
+    def get_plan_slots_for_assignment(self, contract_id: int, month: str, service_types) -> list[dict]:
+        """Otomatik atama için bağlamdaki plan slotları (rota kapasitesiyle birlikte)."""
+        sts = [str(s) for s in (service_types or []) if str(s or "").strip()]
+        if not sts:
+            return []
+        conn = self.connect()
+        if not conn:
+            return []
+        try:
+            cur = conn.cursor()
+            ph = ",".join(["?"] * len(sts))
+            params = (int(contract_id), str(month), *sts)
             try:
-                if exclude_route_params_id is not None and int(rid or 0) == int(exclude_route_params_id):
-                    if exclude_time_block is not None and str(tb or "") == str(exclude_time_block or ""):
-                        if exclude_line_no is not None and int(ln or 0) == int(exclude_line_no or 0):
-                            continue
-            except Exception:
-                pass
+                cur.execute(
+                    f"""
+                    SELECT p.route_params_id, p.time_block, p.vehicle_id, p.driver_id,
+                           COALESCE(rp.vehicle_capacity,0), COALESCE(rp.route_name,'')
+                    FROM trip_plan p
+                    LEFT JOIN route_params rp ON rp.id = p.route_params_id
+                    WHERE p.contract_id=? AND p.month=? AND p.service_type IN ({ph})
+                    ORDER BY p.route_params_id, p.time_block
+                    """,
+                    params,
+                )
+            except sqlite3.OperationalError:
+                # route_params henüz oluşturulmamış olabilir; kapasitesiz devam et.
+                cur.execute(
+                    f"""
+                    SELECT route_params_id, time_block, vehicle_id, driver_id, 0, ''
+                    FROM trip_plan
+                    WHERE contract_id=? AND month=? AND service_type IN ({ph})
+                    ORDER BY route_params_id, time_block
+                    """,
+                    params,
+                )
+            out = []
+            for rid, tb, vid, did, cap, rname in cur.fetchall() or []:
+                out.append(
+                    {
+                        "route_params_id": int(rid or 0),
+                        "time_block": str(tb or ""),
+                        "vehicle_id": (str(vid) if vid not in (None, "") else None),
+                        "driver_id": (str(did) if did not in (None, "") else None),
+                        "required_capacity": float(cap or 0),
+                        "route_name": str(rname or ""),
+                    }
+                )
+            return out
+        except Exception as e:
+            print(f"Plan slot okuma hatası: {e}")
+            return []
+        finally:
+            conn.close()
+
+    def get_plan_busy_resources(self, month: str, contract_id: int, service_types) -> tuple[dict, dict]:
+        """Aynı ayda başka sözleşme/servis tiplerinde planlı araç ve şoförlerin dolu saatleri.
+
+        Dönüş: ({vehicle_id: [(start, end), ...]}, {driver_id: [(start, end), ...]}) dakika cinsinden.
+        """
+        sts = [str(s) for s in (service_types or []) if str(s or "").strip()] or [""]
+        busy_v: dict = {}
+        busy_d: dict = {}
+        conn = self.connect()
+        if not conn:
+            return busy_v, busy_d
+        try:
+            cur = conn.cursor()
+            ph = ",".join(["?"] * len(sts))
+            cur.execute(
+                f"""
+                SELECT time_block, vehicle_id, driver_id
+                FROM trip_plan
+                WHERE month=?
+                  AND (COALESCE(vehicle_id,'') <> '' OR COALESCE(driver_id,'') <> '')
+                  AND NOT (contract_id=? AND service_type IN ({ph}))
+                """,
+                (str(month), int(contract_id), *sts),
+            )
+            rows = cur.fetchall() or []
+        except Exception as e:
+            print(f"Plan doluluk okuma hatası: {e}")
+            rows = []
+        finally:
+            conn.close()
 
-            s2, e2 = self._parse_time_range_minutes(str(tb or ""), str(tt or ""))
-            if s2 is None or e2 is None:
+        for tb, vid, did in rows:
+            blk = parse_time_block(str(tb or ""))
+            if blk is None:
                 continue
-            if self._ranges_overlap(int(start_m), int(end_m), int(s2), int(e2)):
-                return {
-                    "route_params_id": int(rid or 0),
-                    "time_block": str(tb or ""),
-                    "line_no": int(ln or 0),
-                    "vehicle_id": vid,
-                    "driver_id": did,
-                    "time_text": str(tt or ""),
-                    "qty": float(qty or 0),
-                }
-        return None
+            if vid not in (None, ""):
+                busy_v.setdefault(str(vid), []).append((blk.start, blk.end))
+            if did not in (None, ""):
+                busy_d.setdefault(str(did), []).append((blk.start, blk.end))
+        return busy_v, busy_d
+
+    def apply_plan_assignments(self, contract_id: int, month: str, service_type: str, assignments: dict) -> int:
+        """Önerilen atamaları tek transaction'da trip_plan'a yazar.
+
+        assignments: {(route_params_id, time_block): (vehicle_id, driver_id)}. Güncellenen satır sayısı döner.
+        """
+        if not assignments:
+            return 0
+        conn = self.connect()
+        if not conn:
+            return 0
+        now = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        try:
+            cur = conn.cursor()
+            cur.executemany(
+                """
+                UPDATE trip_plan
+                SET vehicle_id=?, driver_id=?, updated_at=?
+                WHERE contract_id=? AND route_params_id=? AND month=? AND service_type=? AND time_block=?
+                """,
+                [
+                    (vid, did, now, int(contract_id), int(rid), str(month), str(service_type), str(tb))
+                    for (rid, tb), (vid, did) in assignments.items()
+                ],
+            )
+            n = int(cur.rowcount or 0)
+            conn.commit()
+            invalidate_puantaj_snapshots(int(contract_id), str(month))
+            return n
+        except Exception as e:
+            conn.rollback()
+            print(f"Plan atama yazma hatası: {e}")
+            return 0
+        finally:
+            conn.close()
 
     def _month_keys_in_range(self, start_date: str, end_date: str) -> list[str]:
         try:
@@ -920,6 +1134,442 @@ class DatabaseManager:
         finally:
             conn2.close()
 
+    # ------------------------- Plan / gerçekleşen günlük özet -------------------------
+    # trip_daily_agg trigger'larla güncel tutulur; plan takip ve sapma raporu
+    # trip_entries/trip_allocations üzerinde GROUP BY yapmak yerine buradan okur.
+    _TRIP_DAILY_AGG_TRIGGERS = {
+        "trg_trip_daily_agg_entries_ins": """
+            CREATE TRIGGER IF NOT EXISTS trg_trip_daily_agg_entries_ins AFTER INSERT ON trip_entries
+            BEGIN
+                INSERT INTO trip_daily_agg (
+                    contract_id, service_type, route_params_id, time_block, trip_date, entry_qty, is_planned
+                ) VALUES (
+                    NEW.contract_id, NEW.service_type, NEW.route_params_id, NEW.time_block, NEW.trip_date,
+                    COALESCE(NEW.qty,0),
+                    EXISTS (
+                        SELECT 1 FROM trip_plan p
+                        WHERE p.contract_id = NEW.contract_id AND p.month = substr(NEW.trip_date,1,7)
+                          AND p.route_params_id = NEW.route_params_id AND p.time_block = NEW.time_block
+                    )
+                )
+                ON CONFLICT(contract_id, service_type, route_params_id, time_block, trip_date)
+                DO UPDATE SET entry_qty = entry_qty + excluded.entry_qty;
+            END
+        """,
+        "trg_trip_daily_agg_entries_del": """
+            CREATE TRIGGER IF NOT EXISTS trg_trip_daily_agg_entries_del AFTER DELETE ON trip_entries
+            BEGIN
+                UPDATE trip_daily_agg SET entry_qty = entry_qty - COALESCE(OLD.qty,0)
+                WHERE contract_id = OLD.contract_id AND service_type = OLD.service_type
+                  AND route_params_id = OLD.route_params_id AND time_block = OLD.time_block AND trip_date = OLD.trip_date;
+                DELETE FROM trip_daily_agg
+                WHERE contract_id = OLD.contract_id AND service_type = OLD.service_type
+                  AND route_params_id = OLD.route_params_id AND time_block = OLD.time_block AND trip_date = OLD.trip_date
+                  AND entry_qty = 0 AND alloc_count = 0;
+            END
+        """,
+        "trg_trip_daily_agg_entries_upd": """
+            CREATE TRIGGER IF NOT EXISTS trg_trip_daily_agg_entries_upd AFTER UPDATE OF
+                contract_id, service_type, route_params_id, time_block, trip_date, qty ON trip_entries
+            BEGIN
+                UPDATE trip_daily_agg SET entry_qty = entry_qty - COALESCE(OLD.qty,0)
+                WHERE contract_id = OLD.contract_id AND service_type = OLD.service_type
+                  AND route_params_id = OLD.route_params_id AND time_block = OLD.time_block AND trip_date = OLD.trip_date;
+                INSERT INTO trip_daily_agg (
+                    contract_id, service_type, route_params_id, time_block, trip_date, entry_qty, is_planned
+                ) VALUES (
+                    NEW.contract_id, NEW.service_type, NEW.route_params_id, NEW.time_block, NEW.trip_date,
+                    COALESCE(NEW.qty,0),
+                    EXISTS (
+                        SELECT 1 FROM trip_plan p
+                        WHERE p.contract_id = NEW.contract_id AND p.month = substr(NEW.trip_date,1,7)
+                          AND p.route_params_id = NEW.route_params_id AND p.time_block = NEW.time_block
+                    )
+                )
+                ON CONFLICT(contract_id, service_type, route_params_id, time_block, trip_date)
+                DO UPDATE SET entry_qty = entry_qty + excluded.entry_qty;
+                DELETE FROM trip_daily_agg
+                WHERE contract_id = OLD.contract_id AND service_type = OLD.service_type
+                  AND route_params_id = OLD.route_params_id AND time_block = OLD.time_block AND trip_date = OLD.trip_date
+                  AND entry_qty = 0 AND alloc_count = 0;
+            END
+        """,
+        "trg_trip_daily_agg_alloc_ins": """
+            CREATE TRIGGER IF NOT EXISTS trg_trip_daily_agg_alloc_ins AFTER INSERT ON trip_allocations
+            BEGIN
+                INSERT INTO trip_daily_agg (
+                    contract_id, service_type, route_params_id, time_block, trip_date, alloc_qty, alloc_count, is_planned
+                ) VALUES (
+                    NEW.contract_id, NEW.service_type, NEW.route_params_id, NEW.time_block, NEW.trip_date,
+                    COALESCE(NEW.qty,0), 1,
+                    EXISTS (
+                        SELECT 1 FROM trip_plan p
+                        WHERE p.contract_id = NEW.contract_id AND p.month = substr(NEW.trip_date,1,7)
+                          AND p.route_params_id = NEW.route_params_id AND p.time_block = NEW.time_block
+                    )
+                )
+                ON CONFLICT(contract_id, service_type, route_params_id, time_block, trip_date)
+                DO UPDATE SET alloc_qty = alloc_qty + excluded.alloc_qty, alloc_count = alloc_count + 1;
+            END
+        """,
+        "trg_trip_daily_agg_alloc_del": """
+            CREATE TRIGGER IF NOT EXISTS trg_trip_daily_agg_alloc_del AFTER DELETE ON trip_allocations
+            BEGIN
+                UPDATE trip_daily_agg SET alloc_qty = alloc_qty - COALESCE(OLD.qty,0), alloc_count = alloc_count - 1
+                WHERE contract_id = OLD.contract_id AND service_type = OLD.service_type
+                  AND route_params_id = OLD.route_params_id AND time_block = OLD.time_block AND trip_date = OLD.trip_date;
+                DELETE FROM trip_daily_agg
+                WHERE contract_id = OLD.contract_id AND service_type = OLD.service_type
+                  AND route_params_id = OLD.route_params_id AND time_block = OLD.time_block AND trip_date = OLD.trip_date
+                  AND entry_qty = 0 AND alloc_count = 0;
+            END
+        """,
+        "trg_trip_daily_agg_alloc_upd": """
+            CREATE TRIGGER IF NOT EXISTS trg_trip_daily_agg_alloc_upd AFTER UPDATE OF
+                contract_id, service_type, route_params_id, time_block, trip_date, qty ON trip_allocations
+            BEGIN
+                UPDATE trip_daily_agg SET alloc_qty = alloc_qty - COALESCE(OLD.qty,0), alloc_count = alloc_count - 1
+                WHERE contract_id = OLD.contract_id AND service_type = OLD.service_type
+                  AND route_params_id = OLD.route_params_id AND time_block = OLD.time_block AND trip_date = OLD.trip_date;
+                INSERT INTO trip_daily_agg (
+                    contract_id, service_type, route_params_id, time_block, trip_date, alloc_qty, alloc_count, is_planned
+                ) VALUES (
+                    NEW.contract_id, NEW.service_type, NEW.route_params_id, NEW.time_block, NEW.trip_date,
+                    COALESCE(NEW.qty,0), 1,
+                    EXISTS (
+                        SELECT 1 FROM trip_plan p
+                        WHERE p.contract_id = NEW.contract_id AND p.month = substr(NEW.trip_date,1,7)
+                          AND p.route_params_id = NEW.route_params_id AND p.time_block = NEW.time_block
+                    )
+                )
+                ON CONFLICT(contract_id, service_type, route_params_id, time_block, trip_date)
+                DO UPDATE SET alloc_qty = alloc_qty + excluded.alloc_qty, alloc_count = alloc_count + 1;
+                DELETE FROM trip_daily_agg
+                WHERE contract_id = OLD.contract_id AND service_type = OLD.service_type
+                  AND route_params_id = OLD.route_params_id AND time_block = OLD.time_block AND trip_date = OLD.trip_date
+                  AND entry_qty = 0 AND alloc_count = 0;
+            END
+        """,
+        "trg_trip_daily_agg_plan_ins": """
+            CREATE TRIGGER IF NOT EXISTS trg_trip_daily_agg_plan_ins AFTER INSERT ON trip_plan
+            BEGIN
+                UPDATE trip_daily_agg SET is_planned = 1
+                WHERE contract_id = NEW.contract_id AND route_params_id = NEW.route_params_id
+                  AND time_block = NEW.time_block AND substr(trip_date,1,7) = NEW.month;
+            END
+        """,
+        "trg_trip_daily_agg_plan_del": """
+            CREATE TRIGGER IF NOT EXISTS trg_trip_daily_agg_plan_del AFTER DELETE ON trip_plan
+            BEGIN
+                UPDATE trip_daily_agg
+                SET is_planned = EXISTS (
+                    SELECT 1 FROM trip_plan p
+                    WHERE p.contract_id = OLD.contract_id AND p.month = OLD.month
+                      AND p.route_params_id = OLD.route_params_id AND p.time_block = OLD.time_block
+                )
+                WHERE contract_id = OLD.contract_id AND route_params_id = OLD.route_params_id
+                  AND time_block = OLD.time_block AND substr(trip_date,1,7) = OLD.month;
+            END
+        """,
+        "trg_trip_daily_agg_plan_upd": """
+            CREATE TRIGGER IF NOT EXISTS trg_trip_daily_agg_plan_upd AFTER UPDATE OF
+                contract_id, route_params_id, month, time_block ON trip_plan
+            BEGIN
+                UPDATE trip_daily_agg
+                SET is_planned = EXISTS (
+                    SELECT 1 FROM trip_plan p
+                    WHERE p.contract_id = OLD.contract_id AND p.month = OLD.month
+                      AND p.route_params_id = OLD.route_params_id AND p.time_block = OLD.time_block
+                )
+                WHERE contract_id = OLD.contract_id AND route_params_id = OLD.route_params_id
+                  AND time_block = OLD.time_block AND substr(trip_date,1,7) = OLD.month;
+                UPDATE trip_daily_agg SET is_planned = 1
+                WHERE contract_id = NEW.contract_id AND route_params_id = NEW.route_params_id
+                  AND time_block = NEW.time_block AND substr(trip_date,1,7) = NEW.month;
+            END
+        """,
+    }
+
+    def _ensure_trip_daily_agg_table(self):
+        conn = self.connect()
+        if not conn:
+            return
+        try:
+            cur = conn.cursor()
+            cur.execute(
+                """
+                CREATE TABLE IF NOT EXISTS trip_daily_agg (
+                    contract_id INTEGER NOT NULL,
+                    service_type TEXT NOT NULL,
+                    route_params_id INTEGER NOT NULL,
+                    time_block TEXT NOT NULL,
+                    trip_date TEXT NOT NULL,
+                    entry_qty REAL NOT NULL DEFAULT 0,
+                    alloc_qty REAL NOT NULL DEFAULT 0,
+                    alloc_count INTEGER NOT NULL DEFAULT 0,
+                    is_planned INTEGER NOT NULL DEFAULT 0,
+                    PRIMARY KEY (contract_id, service_type, route_params_id, time_block, trip_date)
+                )
+                """
+            )
+            cur.execute(
+                "CREATE INDEX IF NOT EXISTS idx_trip_daily_agg_contract_date ON trip_daily_agg(contract_id, trip_date)"
+            )
+            cur.execute("CREATE INDEX IF NOT EXISTS idx_trip_daily_agg_date ON trip_daily_agg(trip_date)")
+
+            # Trigger eksikse (ilk kurulum ya da tabloyu yeniden oluşturan migration) özet güvenilir değildir.
+            cur.execute("SELECT name FROM sqlite_master WHERE type='trigger' AND name LIKE 'trg_trip_daily_agg_%'")
+            existing = {str(r[0]) for r in (cur.fetchall() or [])}
+            missing = [name for name in self._TRIP_DAILY_AGG_TRIGGERS if name not in existing]
+            for name in missing:
+                cur.execute(self._TRIP_DAILY_AGG_TRIGGERS[name])
+            if missing:
+                self._rebuild_trip_daily_agg(cur)
+            conn.commit()
+        except Exception as e:
+            try:
+                conn.rollback()
+            except Exception:
+                pass
+            print(f"_ensure_trip_daily_agg_table error: {e}")
+        finally:
+            conn.close()
+
+    def _rebuild_trip_daily_agg(self, cur) -> None:
+        """trip_daily_agg'i kaynak tablolardan baştan üretir (commit etmez)."""
+        cur.execute("DELETE FROM trip_daily_agg")
+        cur.execute(
+            """
+            INSERT INTO trip_daily_agg (contract_id, service_type, route_params_id, time_block, trip_date, entry_qty)
+            SELECT contract_id, service_type, route_params_id, time_block, trip_date, COALESCE(SUM(qty),0)
+            FROM trip_entries
+            GROUP BY contract_id, service_type, route_params_id, time_block, trip_date
+            """
+        )
+        cur.execute(
+            """
+            INSERT INTO trip_daily_agg (
+                contract_id, service_type, route_params_id, time_block, trip_date, alloc_qty, alloc_count
+            )
+            SELECT contract_id, service_type, route_params_id, time_block, trip_date, COALESCE(SUM(qty),0), COUNT(*)
+            FROM trip_allocations
+            GROUP BY contract_id, service_type, route_params_id, time_block, trip_date
+            ON CONFLICT(contract_id, service_type, route_params_id, time_block, trip_date)
+            DO UPDATE SET alloc_qty = excluded.alloc_qty, alloc_count = excluded.alloc_count
+            """
+        )
+        cur.execute(
+            """
+            UPDATE trip_daily_agg
+            SET is_planned = EXISTS (
+                SELECT 1 FROM trip_plan p
+                WHERE p.contract_id = trip_daily_agg.contract_id
+                  AND p.month = substr(trip_daily_agg.trip_date,1,7)
+                  AND p.route_params_id = trip_daily_agg.route_params_id
+                  AND p.time_block = trip_daily_agg.time_block
+            )
+            """
+        )
+
+    def rebuild_trip_daily_agg(self) -> bool:
+        conn = self.connect()
+        if not conn:
+            return False
+        try:
+            cur = conn.cursor()
+            self._rebuild_trip_daily_agg(cur)
+            conn.commit()
+            return True
+        except Exception as e:
+            try:
+                conn.rollback()
+            except Exception:
+                pass
+            print(f"rebuild_trip_daily_agg error: {e}")
+            return False
+        finally:
+            conn.close()
+
+    def get_plan_tracking_daily(self, contract_id: int, month: str, service_types: list[str]):
+        """Plan takip: (günlük planlanan adet, {gün: gerçekleşen adet}).
+
+        Planlı anahtar varsa yalnızca plana ait girişler sayılır; plan yoksa tüm girişler.
+        """
+        ms = str(month or "").strip()
+        try:
+            y, m = (int(x) for x in ms.split("-", 1))
+            days = calendar.monthrange(y, m)[1]
+            ms = f"{y:04d}-{m:02d}"
+        except Exception:
+            return 0.0, {}
+        actual = {d: 0.0 for d in range(1, days + 1)}
+        st = [str(x) for x in (service_types or []) if str(x).strip()]
+        if not st:
+            return 0.0, actual
+
+        conn = self.connect()
+        if not conn:
+            return 0.0, actual
+        try:
+            cur = conn.cursor()
+            placeholders = ",".join(["?"] * len(st))
+            cur.execute(
+                f"""
+                SELECT COUNT(*) FROM (
+                    SELECT DISTINCT route_params_id, time_block
+                    FROM trip_plan
+                    WHERE contract_id = ? AND month = ? AND service_type IN ({placeholders})
+                      AND route_params_id > 0 AND time_block <> ''
+                )
+                """,
+                (int(contract_id), ms, *st),
+            )
+            planned = int((cur.fetchone() or [0])[0] or 0)
+            if planned == 0:
+                cur.execute(
+                    """
+                    SELECT COUNT(*) FROM (
+                        SELECT DISTINCT route_params_id, time_block
+                        FROM trip_plan
+                        WHERE contract_id = ? AND month = ?
+                          AND route_params_id > 0 AND time_block <> ''
+                    )
+                    """,
+                    (int(contract_id), ms),
+                )
+                planned = int((cur.fetchone() or [0])[0] or 0)
+
+            cur.execute(
+                f"""
+                SELECT trip_date, COALESCE(SUM(entry_qty),0)
+                FROM trip_daily_agg
+                WHERE contract_id = ?
+                  AND trip_date BETWEEN ? AND ?
+                  AND service_type IN ({placeholders})
+                  AND (? = 0 OR is_planned = 1)
+                GROUP BY trip_date
+                """,
+                (int(contract_id), f"{ms}-01", f"{ms}-{days:02d}", *st, int(planned > 0)),
+            )
+            for trip_date, qty in cur.fetchall() or []:
+                try:
+                    day = int(str(trip_date or "")[8:10])
+                except Exception:
+                    continue
+                if day in actual:
+                    actual[day] += float(qty or 0)
+            return float(planned), actual
+        except Exception as e:
+            print(f"get_plan_tracking_daily error: {e}")
+            return 0.0, actual
+        finally:
+            conn.close()
+
+    def get_plan_variance_report(self, month: str) -> list[dict]:
+        """Tüm sözleşmeler için ay bazında plan / gerçekleşen sapma özeti.
+
+        Hizmet tipi yazım varyantları (PERSONEL TAŞIMA / PERSONEL_TASIMA ...) tek satırda toplanır.
+        """
+        ms = str(month or "").strip()
+        try:
+            y, m = (int(x) for x in ms.split("-", 1))
+            days = calendar.monthrange(y, m)[1]
+            ms = f"{y:04d}-{m:02d}"
+        except Exception:
+            return []
+
+        def _st_group(s: str) -> str:
+            t = str(s or "").strip().upper().replace("_", " ")
+            for a, b in (("Ş", "S"), ("İ", "I"), ("Ç", "C"), ("Ğ", "G"), ("Ö", "O"), ("Ü", "U")):
+                t = t.replace(a, b)
+            return " ".join(t.split())
+
+        conn = self.connect()
+        if not conn:
+            return []
+        try:
+            cur = conn.cursor()
+            out: dict[tuple[int, str], dict] = {}
+
+            def _rec(cid: int, st: str) -> dict:
+                key = (int(cid), _st_group(st))
+                rec = out.get(key)
+                if rec is None:
+                    rec = {
+                        "contract_id": int(cid),
+                        "service_type": str(st or ""),
+                        "plan_keys": 0,
+                        "planned": 0.0,
+                        "actual": 0.0,
+                        "unplanned": 0.0,
+                        "allocated": 0.0,
+                    }
+                    out[key] = rec
+                return rec
+
+            cur.execute(
+                """
+                SELECT contract_id, service_type, COUNT(*)
+                FROM trip_plan
+                WHERE month = ?
+                GROUP BY contract_id, service_type
+                """,
+                (ms,),
+            )
+            for cid, st, cnt in cur.fetchall() or []:
+                _rec(cid, st)["plan_keys"] += int(cnt or 0)
+
+            cur.execute(
+                """
+                SELECT contract_id, service_type,
+                       COALESCE(SUM(CASE WHEN is_planned = 1 THEN entry_qty ELSE 0 END),0),
+                       COALESCE(SUM(CASE WHEN is_planned = 1 THEN 0 ELSE entry_qty END),0),
+                       COALESCE(SUM(alloc_qty),0)
+                FROM trip_daily_agg
+                WHERE trip_date BETWEEN ? AND ?
+                GROUP BY contract_id, service_type
+                """,
+                (f"{ms}-01", f"{ms}-{days:02d}"),
+            )
+            for cid, st, act, unplanned, alloc in cur.fetchall() or []:
+                rec = _rec(cid, st)
+                rec["actual"] += float(act or 0)
+                rec["unplanned"] += float(unplanned or 0)
+                rec["allocated"] += float(alloc or 0)
+
+            names: dict[int, tuple[str, str]] = {}
+            cids = sorted({k[0] for k in out})
+            if cids:
+                placeholders = ",".join(["?"] * len(cids))
+                cur.execute(
+                    f"""
+                    SELECT c.id, COALESCE(c.contract_number,''), COALESCE(cu.title,'')
+                    FROM contracts c
+                    LEFT JOIN customers cu ON cu.id = c.customer_id
+                    WHERE c.id IN ({placeholders})
+                    """,
+                    tuple(cids),
+                )
+                names = {int(r[0]): (str(r[1]), str(r[2])) for r in (cur.fetchall() or [])}
+
+            rows = []
+            for rec in out.values():
+                planned = float(rec["plan_keys"] * days)
+                actual = float(rec["actual"])
+                rec["planned"] = planned
+                rec["missing"] = max(0.0, planned - actual)
+                rec["variance"] = actual - planned
+                rec["variance_pct"] = ((actual - planned) / planned * 100.0) if planned else 0.0
+                rec["contract_number"], rec["customer_title"] = names.get(int(rec["contract_id"]), ("", ""))
+                rows.append(rec)
+            rows.sort(key=lambda r: (r["customer_title"], r["contract_number"], r["service_type"]))
+            return rows
+        except Exception as e:
+            print(f"get_plan_variance_report error: {e}")
+            return []
+        finally:
+            conn.close()
+
     def create_contract_links_table(self):
         conn = self.connect()
         if not conn:
@@ -1082,7 +1732,7 @@ class DatabaseManager:
                     status, total_amount, deduction_amount, net_amount,
                     created_at, updated_at
                 ) VALUES (?, ?, ?, ?, ?, 0, 0, 0, ?, ?)
-                ON CONFLICT(contract_id, period, service_type, route_params_id)
+                ON CONFLICT(contract_id, period, COALESCE(service_type,''), COALESCE(route_params_id,0))
                 DO UPDATE SET
                     status=excluded.status,
                     updated_at=excluded.updated_at
@@ -1225,6 +1875,9 @@ class DatabaseManager:
             conn.close()
 
     def create_hakedis_tables(self):
+        # Okuma metotlarının hepsi bunu çağırıyor; şema ve tekil indeks süreç başına bir kez kontrol edilir.
+        if self.db_path in _HAKEDIS_READY:
+            return
         conn = self.connect()
         if not conn:
             return
@@ -1325,20 +1978,53 @@ class DatabaseManager:
                     cursor.execute("ALTER TABLE hakedis_docs ADD COLUMN created_at TEXT")
                 if "updated_at" not in cols:
                     cursor.execute("ALTER TABLE hakedis_docs ADD COLUMN updated_at TEXT")
+                # Belge deposu (app.core.doc_store): içerik özeti ve boyut
+                if "sha256" not in cols:
+                    cursor.execute("ALTER TABLE hakedis_docs ADD COLUMN sha256 TEXT")
+                if "file_size" not in cols:
+                    cursor.execute("ALTER TABLE hakedis_docs ADD COLUMN file_size INTEGER")
             except Exception:
                 pass
 
+            # Aynı içerik bir hakedişe bir kez eklenir (sha256 NULL olan eski satırlar serbest).
+            # Tekil indeks yoksa önce tekrarlar (ilk eklenen kalır) silinir.
+            try:
+                cursor.execute(
+                    "SELECT 1 FROM sqlite_master WHERE type='index' AND name='idx_hakedis_docs_sha_unique'"
+                )
+                if cursor.fetchone() is None:
+                    cursor.execute(
+                        """
+                        DELETE FROM hakedis_docs
+                        WHERE sha256 IS NOT NULL
+                          AND id NOT IN (
+                              SELECT MIN(id) FROM hakedis_docs WHERE sha256 IS NOT NULL GROUP BY hakedis_id, sha256
+                          )
+                        """
+                    )
+                    cursor.execute("DROP INDEX IF EXISTS idx_hakedis_docs_sha")
+                    cursor.execute(
+                        "CREATE UNIQUE INDEX idx_hakedis_docs_sha_unique ON hakedis_docs(hakedis_id, sha256)"
+                    )
+            except Exception as e:
+                print(f"hakedis_docs tekil özet indeksi hatası: {e}")
+
             conn.commit()
 
-            # NULL route_params_id alanında UNIQUE çalışmadığı için aynı anahtar tekrarı oluşabiliyor.
-            # Genel hakediş için route_params_id'yi 0 normalize ediyoruz.
-            self._migrate_hakedis_route_params_default(conn)
+            # NULL service_type / route_params_id alanlarında UNIQUE çalışmadığı için aynı anahtar
+            # tekrarı oluşabiliyordu. Anahtar artık COALESCE ifadeli tekil indeksle korunuyor;
+            # indeks yoksa (eski db) tekrarlar bir kez birleştirilip indeks oluşturulur.
+            if self._migrate_hakedis_route_params_default(conn):
+                _HAKEDIS_READY.add(self.db_path)
         finally:
             conn.close()
 
-    def _migrate_hakedis_route_params_default(self, conn) -> None:
+    def _migrate_hakedis_route_params_default(self, conn) -> bool:
         try:
             cur = conn.cursor()
+            cur.execute("SELECT 1 FROM sqlite_master WHERE type='index' AND name='ux_hakedis_key'")
+            if cur.fetchone():
+                return True
 
             # Duplicate kayıtları birleştir (NULL ve 0 aynı kabul).
             cur.execute(
@@ -1403,15 +2089,23 @@ class DatabaseManager:
 
             # NULL olanları 0'a çek.
             cur.execute("UPDATE hakedis SET route_params_id=0 WHERE route_params_id IS NULL")
+            cur.execute(
+                """
+                CREATE UNIQUE INDEX IF NOT EXISTS ux_hakedis_key
+                ON hakedis(contract_id, period, COALESCE(service_type,''), COALESCE(route_params_id,0))
+                """
+            )
             conn.commit()
+            return True
         except Exception as e:
             print(f"_migrate_hakedis_route_params_default error: {e}")
             try:
                 conn.rollback()
             except Exception:
                 pass
+            return False
 
-    def list_hakedis(
+    def _hakedis_list_query(
         self,
         contract_id: int | None = None,
         period: str | None = None,
@@ -1419,60 +2113,87 @@ class DatabaseManager:
         route_params_id: int | None = None,
         status: str | None = None,
         only_missing_docs: bool = False,
-    ):
+    ) -> tuple[str, tuple]:
+        where = []
+        params = []
+
+        if contract_id is not None:
+            where.append("h.contract_id = ?")
+            params.append(int(contract_id))
+        if period:
+            where.append("h.period = ?")
+            params.append(str(period))
+        if service_type:
+            where.append("COALESCE(h.service_type,'') = ?")
+            params.append(str(service_type))
+        if route_params_id is not None:
+            where.append("COALESCE(h.route_params_id, 0) = ?")
+            params.append(int(route_params_id))
+        if status and str(status).strip() and str(status).strip().upper() != "TÜMÜ" and str(status).strip().upper() != "TUMU":
+            where.append("COALESCE(h.status,'') = ?")
+            params.append(str(status))
+        if only_missing_docs:
+            where.append(
+                "NOT EXISTS (SELECT 1 FROM hakedis_docs d WHERE d.hakedis_id = h.id LIMIT 1)"
+            )
+
+        where_sql = ("WHERE " + " AND ".join(where)) if where else ""
+        sql = f"""
+            SELECT
+                h.id,
+                COALESCE(h.period,''),
+                COALESCE(c.contract_number,''),
+                COALESCE(h.service_type,''),
+                COALESCE(rp.route_name,''),
+                COALESCE(h.total_amount,0),
+                COALESCE(h.deduction_amount,0),
+                COALESCE(h.net_amount,0),
+                COALESCE(h.status,''),
+                COALESCE(h.updated_at, COALESCE(h.created_at,''))
+            FROM hakedis h
+            LEFT JOIN contracts c ON c.id = h.contract_id
+            LEFT JOIN route_params rp ON rp.id = h.route_params_id
+            {where_sql}
+            ORDER BY h.period DESC, h.id DESC
+        """
+        return sql, tuple(params)
+
+    def list_hakedis(self, **filters):
+        """Hakediş listesi; filtreler: contract_id, period, service_type, route_params_id, status, only_missing_docs."""
         self.create_hakedis_tables()
         conn = self.connect()
         if not conn:
             return []
         try:
-            where = []
-            params = []
+            sql, params = self._hakedis_list_query(**filters)
+            cur = conn.cursor()
+            cur.execute(sql, params)
+            return cur.fetchall() or []
+        finally:
+            conn.close()
 
-            if contract_id is not None:
-                where.append("h.contract_id = ?")
-                params.append(int(contract_id))
-            if period:
-                where.append("h.period = ?")
-                params.append(str(period))
-            if service_type:
-                where.append("COALESCE(h.service_type,'') = ?")
-                params.append(str(service_type))
-            if route_params_id is not None:
-                where.append("COALESCE(h.route_params_id, 0) = ?")
-                params.append(int(route_params_id))
-            if status and str(status).strip() and str(status).strip().upper() != "TÜMÜ" and str(status).strip().upper() != "TUMU":
-                where.append("COALESCE(h.status,'') = ?")
-                params.append(str(status))
-            if only_missing_docs:
-                where.append(
-                    "NOT EXISTS (SELECT 1 FROM hakedis_docs d WHERE d.hakedis_id = h.id LIMIT 1)"
-                )
+    def iter_hakedis_rows(self, chunk_size: int = 500, **filters):
+        """list_hakedis ile aynı satırlar, parça parça (dışa aktarım thread'inde tüketilir)."""
+        self.create_hakedis_tables()
+        sql, params = self._hakedis_list_query(**filters)
+        return self._iter_query(sql, params, chunk_size)
 
-            where_sql = ("WHERE " + " AND ".join(where)) if where else ""
+    def _iter_query(self, sql: str, params: tuple = (), chunk_size: int = 500):
+        """Sorgu satırlarını fetchmany ile üreten generator; bağlantı tükenince / kapatılınca kapanır.
 
+        Kendi bağlantısını açtığı için satırları tüketen thread'de (ör. Excel dışa aktarımı) çağrılabilir.
+        """
+        conn = self.connect()
+        if not conn:
+            return
+        try:
             cur = conn.cursor()
-            cur.execute(
-                f"""
-                SELECT
-                    h.id,
-                    COALESCE(h.period,''),
-                    COALESCE(c.contract_number,''),
-                    COALESCE(h.service_type,''),
-                    COALESCE(rp.route_name,''),
-                    COALESCE(h.total_amount,0),
-                    COALESCE(h.deduction_amount,0),
-                    COALESCE(h.net_amount,0),
-                    COALESCE(h.status,''),
-                    COALESCE(h.updated_at, COALESCE(h.created_at,''))
-                FROM hakedis h
-                LEFT JOIN contracts c ON c.id = h.contract_id
-                LEFT JOIN route_params rp ON rp.id = h.route_params_id
-                {where_sql}
-                ORDER BY h.period DESC, h.id DESC
-                """,
-                tuple(params),
-            )
-            return cur.fetchall() or []
+            cur.execute(sql, params)
+            while True:
+                rows = cur.fetchmany(max(1, int(chunk_size or 500)))
+                if not rows:
+                    break
+                yield from rows
         finally:
             conn.close()
 
@@ -1694,7 +2415,9 @@ class DatabaseManager:
                         COALESCE(file_name,''),
                         COALESCE(file_path,''),
                         COALESCE(uploaded_at,''),
-                        COALESCE(description,'')
+                        COALESCE(description,''),
+                        COALESCE(sha256,''),
+                        COALESCE(file_size,0)
                     FROM hakedis_docs
                     WHERE hakedis_id = ?
                     ORDER BY id
@@ -1716,6 +2439,14 @@ class DatabaseManager:
                         cur.execute("ALTER TABLE hakedis_docs ADD COLUMN updated_at TEXT")
                     except Exception:
                         pass
+                    try:
+                        cur.execute("ALTER TABLE hakedis_docs ADD COLUMN sha256 TEXT")
+                    except Exception:
+                        pass
+                    try:
+                        cur.execute("ALTER TABLE hakedis_docs ADD COLUMN file_size INTEGER")
+                    except Exception:
+                        pass
                     try:
                         conn.commit()
                     except Exception:
@@ -1728,7 +2459,9 @@ class DatabaseManager:
                             COALESCE(file_name,''),
                             COALESCE(file_path,''),
                             COALESCE(uploaded_at,''),
-                            COALESCE(description,'')
+                            COALESCE(description,''),
+                            COALESCE(sha256,''),
+                            COALESCE(file_size,0)
                         FROM hakedis_docs
                         WHERE hakedis_id = ?
                         ORDER BY id
@@ -1749,7 +2482,10 @@ class DatabaseManager:
         file_path: str,
         uploaded_at: str,
         description: str = "",
+        sha256: str | None = None,
+        file_size: int | None = None,
     ) -> int | None:
+        """Yeni belge id'si; aynı içerik (sha256) bu hakedişe zaten ekliyse ya da hata olursa None."""
         self.create_hakedis_tables()
         conn = self.connect()
         if not conn:
@@ -1760,8 +2496,9 @@ class DatabaseManager:
             cur.execute(
                 """
                 INSERT INTO hakedis_docs (
-                    hakedis_id, doc_type, file_name, file_path, uploaded_at, description, created_at, updated_at
-                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                    hakedis_id, doc_type, file_name, file_path, uploaded_at, description,
+                    sha256, file_size, created_at, updated_at
+                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
                 """,
                 (
                     int(hakedis_id),
@@ -1770,12 +2507,18 @@ class DatabaseManager:
                     str(file_path or "").strip(),
                     str(uploaded_at or "").strip(),
                     str(description or "").strip(),
+                    (str(sha256).strip() or None) if sha256 else None,
+                    int(file_size) if file_size is not None else None,
                     now,
                     now,
                 ),
             )
             conn.commit()
             return int(cur.lastrowid) if cur.lastrowid is not None else None
+        except sqlite3.IntegrityError:
+            # idx_hakedis_docs_sha_unique: aynı belge iki kez eklenmeye çalışıldı
+            conn.rollback()
+            return None
         except Exception as e:
             try:
                 conn.rollback()
@@ -1786,6 +2529,93 @@ class DatabaseManager:
         finally:
             conn.close()
 
+    def find_hakedis_doc_by_hash(self, hakedis_id: int, sha256: str) -> int | None:
+        """Aynı içerik bu hakedişe daha önce eklendiyse belge id'si."""
+        if not sha256:
+            return None
+        self.create_hakedis_tables()
+        conn = self.connect()
+        if not conn:
+            return None
+        try:
+            cur = conn.cursor()
+            cur.execute(
+                "SELECT id FROM hakedis_docs WHERE hakedis_id = ? AND sha256 = ? ORDER BY id LIMIT 1",
+                (int(hakedis_id), str(sha256)),
+            )
+            row = cur.fetchone()
+            return int(row[0]) if row else None
+        except Exception as e:
+            print(f"find_hakedis_doc_by_hash error: {e}")
+            return None
+        finally:
+            conn.close()
+
+    def adopt_legacy_hakedis_docs(self) -> int:
+        """Depo dışındaki (eski, mutlak yollu) belgeleri dosya hâlâ yerindeyse depoya alır.
+
+        Süreç başına bir kez, hakediş ekranı açılınca arka planda çalışır; belge listesi yalnızca okur.
+        Taşınan belge sayısı döner.
+        """
+        if self.db_path in _HAKEDIS_DOCS_ADOPTED:
+            return 0
+        _HAKEDIS_DOCS_ADOPTED.add(self.db_path)
+        from app.core import doc_store
+
+        self.create_hakedis_tables()
+        conn = self.connect()
+        if not conn:
+            return 0
+        try:
+            cur = conn.cursor()
+            cur.execute(
+                "SELECT id, COALESCE(file_path,'') FROM hakedis_docs WHERE COALESCE(file_path,'') NOT LIKE ?",
+                (doc_store.STORE_PREFIX + "%",),
+            )
+            rows = cur.fetchall() or []
+        finally:
+            conn.close()
+
+        adopted = 0
+        for doc_id, path in rows:
+            try:
+                stored = doc_store.adopt(path)
+            except Exception as e:
+                print(f"Hakediş belgesi depoya alınamadı ({doc_id}): {e}")
+                continue
+            if stored is not None and self.update_hakedis_doc_storage(doc_id, stored.path, stored.sha256, stored.size):
+                adopted += 1
+        return adopted
+
+    def update_hakedis_doc_storage(self, doc_id: int, file_path: str, sha256: str, file_size: int) -> bool:
+        """Eski (mutlak yollu) belgeyi depoya taşındıktan sonra yeni yol / özet ile günceller."""
+        self.create_hakedis_tables()
+        conn = self.connect()
+        if not conn:
+            return False
+        now = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        try:
+            cur = conn.cursor()
+            cur.execute(
+                "UPDATE hakedis_docs SET file_path = ?, sha256 = ?, file_size = ?, updated_at = ? WHERE id = ?",
+                (str(file_path or "").strip(), str(sha256 or "").strip() or None, int(file_size or 0), now, int(doc_id)),
+            )
+            conn.commit()
+            return cur.rowcount > 0
+        except sqlite3.IntegrityError:
+            # Aynı içerik bu hakedişe depodan zaten ekli; eski satır olduğu gibi kalır.
+            conn.rollback()
+            return False
+        except Exception as e:
+            try:
+                conn.rollback()
+            except Exception:
+                pass
+            print(f"update_hakedis_doc_storage error: {e}")
+            return False
+        finally:
+            conn.close()
+
     def delete_hakedis_doc(self, doc_id: int) -> bool:
         self.create_hakedis_tables()
         conn = self.connect()
@@ -1982,6 +2812,7 @@ class DatabaseManager:
             )
 
             conn.commit()
+            invalidate_puantaj_snapshots()
             return True
         except Exception as e:
             try:
@@ -2086,8 +2917,9 @@ class DatabaseManager:
                 """
                 INSERT INTO trip_allocations (
                     contract_id, route_params_id, trip_date, service_type, time_block, line_no,
-                    vehicle_id, driver_id, qty, time_text, note, created_at, updated_at
-                ) VALUES (?,?,?,?,?,?,?,?,?,?,?,?,?)
+                    vehicle_id, driver_id, qty, time_text, note, created_at, updated_at,
+                    start_min, end_min, wraps
+                ) VALUES (?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?)
                 ON CONFLICT(contract_id, route_params_id, trip_date, service_type, time_block, line_no)
                 DO UPDATE SET
                     vehicle_id=excluded.vehicle_id,
@@ -2095,7 +2927,10 @@ class DatabaseManager:
                     qty=excluded.qty,
                     time_text=excluded.time_text,
                     note=excluded.note,
-                    updated_at=excluded.updated_at
+                    updated_at=excluded.updated_at,
+                    start_min=excluded.start_min,
+                    end_min=excluded.end_min,
+                    wraps=excluded.wraps
                 """
             ,
                 (
@@ -2112,9 +2947,11 @@ class DatabaseManager:
                     str(note or ""),
                     now,
                     now,
+                    *self.time_block_columns(str(time_block), str(time_text or "")),
                 ),
             )
             conn.commit()
+            invalidate_puantaj_snapshots(int(contract_id), str(trip_date or "")[:7])
             return True
         except Exception:
             try:
@@ -2146,6 +2983,23 @@ class DatabaseManager:
         finally:
             conn.close()
 
+    def iter_trip_entry_rows(self, contract_id: int, service_type: str, start_date: str, end_date: str, chunk_size: int = 500):
+        """Dönemin puantaj satırları (tarih, hat, hareket, zaman, sıra, sefer, saat, not), parça parça.
+
+        Excel dışa aktarımı için; satırlar thread'de, kendi bağlantısıyla okunur.
+        """
+        sql = """
+            SELECT te.trip_date, COALESCE(rp.route_name,''), COALESCE(rp.movement_type,''), te.time_block,
+                   te.line_no, te.qty, COALESCE(te.time_text,''), COALESCE(te.note,'')
+            FROM trip_entries te
+            LEFT JOIN route_params rp ON rp.id = te.route_params_id
+            WHERE te.contract_id = ?
+              AND te.service_type = ?
+              AND te.trip_date BETWEEN ? AND ?
+            ORDER BY te.trip_date, rp.route_name, te.time_block, te.line_no
+        """
+        return self._iter_query(sql, (int(contract_id), str(service_type), str(start_date), str(end_date)), chunk_size)
+
     def _ensure_trip_prices_table(self):
         conn = self.connect()
         if not conn:
@@ -2396,6 +3250,7 @@ class DatabaseManager:
                 ),
             )
             conn.commit()
+            invalidate_puantaj_snapshots(int(contract_id), str(month))
             return True
         except Exception:
             try:
@@ -2505,22 +3360,143 @@ class DatabaseManager:
         if not isinstance(parsed, list):
             return []
 
-        out: list[dict] = []
-        st_filter = str(service_type or "").strip().lower()
+        out: list[dict] = []
+        st_filter = str(service_type or "").strip().lower()
+
+        for rec in parsed:
+            if not isinstance(rec, dict):
+                continue
+
+            st = str(rec.get("_service_type") or rec.get("service_type") or "").strip().lower()
+            if st_filter and st and st != st_filter:
+                continue
+
+            # Determine movement source in order of preference.
+            raw_mov = (
+                rec.get("movement_type_norm")
+                or rec.get("pricing_category")
+                or rec.get("gidis_gelis")
+                or rec.get("movement_type")
+                or rec.get("hareket_turu")
+                or rec.get("hareket")
+                or rec.get("hareketTuru")
+                or rec.get("hareket_tipi")
+                or rec.get("tip")
+                or ""
+            )
+            cat, mt_norm = self._normalize_price_matrix_movement_type(str(raw_mov))
+
+            # Create a shallow copy and fill canonical fields.
+            rr = dict(rec)
+            if not str(rr.get("pricing_category") or "").strip():
+                rr["pricing_category"] = cat
+            if not str(rr.get("movement_type_norm") or "").strip():
+                rr["movement_type_norm"] = mt_norm
+
+            # Normalize subcontractor price legacy key.
+            if rr.get("alt_yuklenici_fiyat") is None and rr.get("ay_fiyati") is not None:
+                rr["alt_yuklenici_fiyat"] = rr.get("ay_fiyati")
+
+            out.append(rr)
+
+        return out
+
+    def _ensure_contract_price_items_table(self):
+        if self.db_path in _PRICE_ITEMS_READY:
+            return
+        conn = self.connect()
+        if not conn:
+            return
+        try:
+            cur = conn.cursor()
+            cur.execute(
+                """
+                CREATE TABLE IF NOT EXISTS contract_price_items (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    contract_id INTEGER NOT NULL,
+                    line_no INTEGER NOT NULL DEFAULT 0,
+                    service_type TEXT NOT NULL DEFAULT '',
+                    service_type_key TEXT NOT NULL DEFAULT '',
+                    guzergah TEXT NOT NULL DEFAULT '',
+                    guzergah_key TEXT NOT NULL DEFAULT '',
+                    movement_raw TEXT NOT NULL DEFAULT '',
+                    movement_type_norm TEXT NOT NULL DEFAULT '',
+                    pricing_category TEXT NOT NULL DEFAULT '',
+                    km REAL,
+                    fiyat REAL NOT NULL DEFAULT 0,
+                    alt_yuklenici_fiyat REAL,
+                    start_point TEXT NOT NULL DEFAULT '',
+                    stops TEXT NOT NULL DEFAULT '',
+                    created_at TEXT,
+                    FOREIGN KEY (contract_id) REFERENCES contracts (id)
+                )
+                """
+            )
+            cur.execute(
+                "CREATE INDEX IF NOT EXISTS idx_contract_price_items_key ON contract_price_items(contract_id, service_type_key, pricing_category)"
+            )
+            # Tek seferlik veri taşımalarının kaydı (bir kez çalışınca tekrar denenmez)
+            cur.execute(
+                """
+                CREATE TABLE IF NOT EXISTS schema_migrations (
+                    name TEXT PRIMARY KEY,
+                    applied_at TEXT
+                )
+                """
+            )
+            conn.commit()
+
+            # Tek seferlik backfill: fiyat matrisi olup henüz normalize edilmemiş sözleşmeler.
+            # Sonraki kayıtlar save_contract içinde yazılır; matrisi boş listeye çözülen sözleşmeler
+            # satır üretmediği için her açılışta yeniden seçilmesin diye çalıştığı işaretlenir.
+            cur.execute("SELECT 1 FROM schema_migrations WHERE name='contract_price_items_backfill'")
+            if not cur.fetchone():
+                cur.execute(
+                    """
+                    SELECT c.id, COALESCE(c.price_matrix_json,'')
+                    FROM contracts c
+                    WHERE COALESCE(c.price_matrix_json,'') NOT IN ('', '[]')
+                      AND NOT EXISTS (SELECT 1 FROM contract_price_items i WHERE i.contract_id = c.id LIMIT 1)
+                    """
+                )
+                for cid, pm_json in cur.fetchall() or []:
+                    self._write_contract_price_items(cur, int(cid), str(pm_json or ""))
+                cur.execute(
+                    "INSERT OR IGNORE INTO schema_migrations (name, applied_at) VALUES (?, ?)",
+                    ("contract_price_items_backfill", datetime.now().strftime("%Y-%m-%d %H:%M:%S")),
+                )
+                conn.commit()
+            _PRICE_ITEMS_READY.add(self.db_path)
+        except Exception as e:
+            try:
+                conn.rollback()
+            except Exception:
+                pass
+            print(f"_ensure_contract_price_items_table error: {e}")
+        finally:
+            conn.close()
 
-        for rec in parsed:
-            if not isinstance(rec, dict):
-                continue
+    def _write_contract_price_items(self, cur, contract_id: int, price_matrix_json: str) -> None:
+        """contract_price_items satırlarını verilen JSON'dan yeniden üretir (commit etmez)."""
+        cur.execute("DELETE FROM contract_price_items WHERE contract_id=?", (int(contract_id),))
+        now = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
 
-            st = str(rec.get("_service_type") or rec.get("service_type") or "").strip().lower()
-            if st_filter and st and st != st_filter:
-                continue
+        def _opt_float(v):
+            if v is None or str(v).strip() == "":
+                return None
+            try:
+                return float(v)
+            except Exception:
+                try:
+                    return float(str(v).strip().replace(",", "."))
+                except Exception:
+                    return None
 
-            # Determine movement source in order of preference.
+        for line_no, rec in enumerate(self.parse_contract_price_matrix_rows(price_matrix_json)):
+            st = str(rec.get("_service_type") or rec.get("service_type") or "").strip()
+            guz = str(rec.get("guzergah") or "").strip()
             raw_mov = (
-                rec.get("movement_type_norm")
-                or rec.get("pricing_category")
-                or rec.get("gidis_gelis")
+                rec.get("gidis_gelis")
                 or rec.get("movement_type")
                 or rec.get("hareket_turu")
                 or rec.get("hareket")
@@ -2529,26 +3505,136 @@ class DatabaseManager:
                 or rec.get("tip")
                 or ""
             )
-            cat, mt_norm = self._normalize_price_matrix_movement_type(str(raw_mov))
+            cur.execute(
+                """
+                INSERT INTO contract_price_items (
+                    contract_id, line_no, service_type, service_type_key, guzergah, guzergah_key,
+                    movement_raw, movement_type_norm, pricing_category, km, fiyat,
+                    alt_yuklenici_fiyat, start_point, stops, created_at
+                ) VALUES (?,?,?,?,?,?,?,?,?,?,?,?,?,?,?)
+                """,
+                (
+                    int(contract_id),
+                    int(line_no),
+                    st,
+                    st.lower(),
+                    guz,
+                    guz.lower(),
+                    str(raw_mov or "").strip(),
+                    str(rec.get("movement_type_norm") or "").strip(),
+                    str(rec.get("pricing_category") or "").strip().upper(),
+                    _opt_float(rec.get("km")),
+                    float(_opt_float(rec.get("fiyat")) or 0.0),
+                    _opt_float(rec.get("alt_yuklenici_fiyat")),
+                    str(rec.get("_start_point") or "").strip(),
+                    str(rec.get("_stops") or "").strip(),
+                    now,
+                ),
+            )
 
-            # Create a shallow copy and fill canonical fields.
-            rr = dict(rec)
-            if not str(rr.get("pricing_category") or "").strip():
-                rr["pricing_category"] = cat
-            if not str(rr.get("movement_type_norm") or "").strip():
-                rr["movement_type_norm"] = mt_norm
+    def _contract_price_items_version(self, cur, contract_id: int) -> tuple[int, int]:
+        # Kalemler her kayıtta silinip yeniden yazıldığı için (AUTOINCREMENT) MAX(id) sürüm gibi davranır.
+        cur.execute(
+            "SELECT COUNT(*), COALESCE(MAX(id),0) FROM contract_price_items WHERE contract_id=?",
+            (int(contract_id),),
+        )
+        row = cur.fetchone() or (0, 0)
+        return (int(row[0] or 0), int(row[1] or 0))
 
-            # Normalize subcontractor price legacy key.
-            if rr.get("alt_yuklenici_fiyat") is None and rr.get("ay_fiyati") is not None:
-                rr["alt_yuklenici_fiyat"] = rr.get("ay_fiyati")
+    def get_contract_price_items(
+        self,
+        contract_id: int,
+        service_type: str | None = None,
+        pricing_category: str | None = None,
+    ) -> list[dict]:
+        """contract_price_items tablosundan normalize iş kalemlerini döndürür.
 
-            out.append(rr)
+        Dönen dict'ler parse_contract_price_matrix_rows() çıktısıyla aynı anahtarları taşır
+        (guzergah, gidis_gelis, km, fiyat, alt_yuklenici_fiyat, pricing_category,
+        movement_type_norm, _service_type, _start_point, _stops).
+        service_type filtresi: hizmet tipi boş olan kalemler her filtrede döner.
 
-        return out
+        Sonuçlar sözleşme sürümüne göre LRU önbellekte tutulur; dict'ler ekranlar arasında
+        paylaşılır, çağıran taraf değiştirmemeli (gerekirse kopyalamalı).
+        """
+        conn = self.connect()
+        if not conn:
+            return []
+        try:
+            cur = conn.cursor()
+            cid = int(contract_id)
+            version = self._contract_price_items_version(cur, cid)
+            entry = _PRICE_ITEMS_CACHE.get(cid)
+            if entry is None or entry["version"] != version:
+                entry = {"version": version, "rows": self._load_contract_price_items(cur, cid), "views": {}}
+                _PRICE_ITEMS_CACHE.put(cid, entry)
+        except Exception as e:
+            print(f"get_contract_price_items error: {e}")
+            return []
+        finally:
+            conn.close()
+
+        st_key = str(service_type or "").strip().lower()
+        pc = str(pricing_category or "").strip().upper()
+        view_key = (st_key, pc)
+        view = entry["views"].get(view_key)
+        if view is None:
+            view = tuple(
+                rec
+                for rec_st_key, rec in entry["rows"]
+                if (not st_key or rec_st_key in ("", st_key))
+                and (not pc or rec.get("pricing_category") == pc)
+            )
+            entry["views"][view_key] = view
+        return list(view)
+
+    def _load_contract_price_items(self, cur, contract_id: int) -> tuple:
+        """(service_type_key, kalem dict) çiftlerini döndürür."""
+        cur.execute(
+            """
+            SELECT guzergah, movement_raw, km, fiyat, alt_yuklenici_fiyat,
+                   pricing_category, movement_type_norm, service_type, service_type_key, start_point, stops
+            FROM contract_price_items
+            WHERE contract_id = ?
+            ORDER BY line_no ASC
+            """,
+            (int(contract_id),),
+        )
+        out: list[tuple[str, dict]] = []
+        for guz, mov, km, fiyat, ay, pc_v, mt_norm, st, st_key, sp, stops in cur.fetchall() or []:
+            rec = {
+                "guzergah": guz or "",
+                "gidis_gelis": mov or "",
+                "km": km,
+                "fiyat": float(fiyat or 0.0),
+                "pricing_category": pc_v or "",
+                "movement_type_norm": mt_norm or "",
+            }
+            if ay is not None:
+                rec["alt_yuklenici_fiyat"] = float(ay)
+            if st:
+                rec["_service_type"] = st
+            if sp:
+                rec["_start_point"] = sp
+            if stops:
+                rec["_stops"] = stops
+            out.append((str(st_key or ""), rec))
+        return tuple(out)
+
+    @staticmethod
+    def invalidate_contract_price_items_cache(contract_id: int | None = None) -> None:
+        if contract_id is None:
+            _PRICE_ITEMS_CACHE.clear()
+        else:
+            _PRICE_ITEMS_CACHE.invalidate(int(contract_id))
+
+    @staticmethod
+    def get_price_items_cache_stats() -> dict:
+        """Fiyat kalemi önbelleği isabet/ıska sayaçları: {'hits', 'misses', 'size', 'maxsize'}."""
+        return _PRICE_ITEMS_CACHE.stats()
 
     def get_contract_price_matrix_rows(self, contract_id: int, service_type: str | None = None) -> list[dict]:
-        raw = self.get_contract_price_matrix_json(int(contract_id))
-        return self.parse_contract_price_matrix_rows(raw, service_type=service_type)
+        return self.get_contract_price_items(int(contract_id), service_type=service_type)
 
     def resolve_subcontract_contract_id(
         self,
@@ -2686,6 +3772,7 @@ class DatabaseManager:
                 (int(contract_id), str(month), str(service_type), int(user_id)),
             )
             conn.commit()
+            invalidate_puantaj_snapshots(int(contract_id), str(month))
             return True
         except Exception:
             try:
@@ -2726,6 +3813,7 @@ class DatabaseManager:
                 (int(contract_id), str(month), str(service_type), int(admin_user_id), (reason or "").strip()),
             )
             conn.commit()
+            invalidate_puantaj_snapshots(int(contract_id), str(month))
             return True
         except Exception:
             try:
@@ -2894,9 +3982,24 @@ class DatabaseManager:
                 placeholders = ", ".join(["?" for _ in data.keys()])
                 query = f"INSERT INTO contracts ({columns}) VALUES ({placeholders})"
                 cursor.execute(query, tuple(list(data.values())))
+
+            # Fiyat matrisi değiştiyse normalize kalem tablosunu aynı transaction'da güncelle.
+            if "price_matrix_json" in data:
+                cursor.execute(
+                    "SELECT id FROM contracts WHERE contract_number = ? LIMIT 1",
+                    (data.get("contract_number"),),
+                )
+                row = cursor.fetchone()
+                if row and row[0] is not None:
+                    self._write_contract_price_items(cursor, int(row[0]), str(data.get("price_matrix_json") or ""))
+                    self.invalidate_contract_price_items_cache(int(row[0]))
             conn.commit()
             return True
         except Exception as e:
+            try:
+                conn.rollback()
+            except Exception:
+                pass
             print(f"Sözleşme Kayıt Hatası: {e}")
             return False
         finally:
@@ -2969,6 +4072,8 @@ class DatabaseManager:
             conn.close()
 
     def _ensure_route_params_table(self):
+        if self.db_path in _ROUTE_PARAMS_READY:
+            return
         conn = self.connect()
         if not conn:
             return
@@ -3002,12 +4107,64 @@ class DatabaseManager:
                     cursor.execute("ALTER TABLE route_params ADD COLUMN movement_type TEXT")
                 if "vehicle_capacity" not in cols:
                     cursor.execute("ALTER TABLE route_params ADD COLUMN vehicle_capacity REAL")
+                if "route_key" not in cols:
+                    cursor.execute("ALTER TABLE route_params ADD COLUMN route_key TEXT")
             except Exception:
                 pass
+
+            # Tüm ekranlar route_params'ı sözleşme + hizmet tipiyle süzüyor.
+            cursor.execute(
+                "CREATE INDEX IF NOT EXISTS idx_route_params_contract_service ON route_params(contract_id, service_type)"
+            )
+
+            # route_key: normalize edilmiş güzergah adı (app.core.route_names.route_key_for).
+            # Adı değişen ya da anahtarı yazılmadan eklenen satırlar NULL kalır; _fill_route_keys doldurur.
+            try:
+                cursor.execute(
+                    "CREATE INDEX IF NOT EXISTS idx_route_params_contract_key ON route_params(contract_id, route_key)"
+                )
+                cursor.execute(
+                    "CREATE INDEX IF NOT EXISTS idx_route_params_key_pending ON route_params(id) WHERE route_key IS NULL"
+                )
+                cursor.execute(
+                    """
+                    CREATE TRIGGER IF NOT EXISTS trg_route_params_key_reset
+                    AFTER UPDATE OF route_name, movement_type ON route_params
+                    WHEN (OLD.route_name IS NOT NEW.route_name OR OLD.movement_type IS NOT NEW.movement_type)
+                     AND NEW.route_key IS OLD.route_key
+                    BEGIN
+                        UPDATE route_params SET route_key=NULL WHERE id=NEW.id;
+                    END
+                    """
+                )
+                self._fill_route_keys(cursor)
+            except Exception as e:
+                print(f"route_params route_key hatası: {e}")
             conn.commit()
+            _ROUTE_PARAMS_READY.add(self.db_path)
+        except Exception as e:
+            try:
+                conn.rollback()
+            except Exception:
+                pass
+            print(f"route_params tablo hatası: {e}")
         finally:
             conn.close()
 
+    @staticmethod
+    def _fill_route_keys(cursor) -> int:
+        """route_key'i NULL kalan satırları doldurur (kısmi indeks sayesinde boşken ucuzdur)."""
+        cursor.execute(
+            "SELECT id, COALESCE(route_name,''), COALESCE(movement_type,'') FROM route_params WHERE route_key IS NULL"
+        )
+        pending = cursor.fetchall() or []
+        if pending:
+            cursor.executemany(
+                "UPDATE route_params SET route_key=? WHERE id=?",
+                [(route_key_for(rn, mt), int(rid)) for rid, rn, mt in pending],
+            )
+        return len(pending)
+
     def replace_route_params_for_contract(
         self,
         contract_id: int,
@@ -3050,8 +4207,8 @@ class DatabaseManager:
                     """
                     INSERT INTO route_params (
                         contract_id, contract_number, start_date, end_date, service_type,
-                        route_name, movement_type, stops, distance_km, vehicle_capacity, created_at
-                    ) VALUES (?,?,?,?,?,?,?,?,?,?,?)
+                        route_name, movement_type, stops, distance_km, vehicle_capacity, created_at, route_key
+                    ) VALUES (?,?,?,?,?,?,?,?,?,?,?,?)
                     """,
                     (
                         int(contract_id),
@@ -3065,11 +4222,13 @@ class DatabaseManager:
                         float(distance_km or 0.0),
                         vehicle_capacity,
                         now,
+                        route_key_for(route_name, movement_type),
                     ),
                 )
 
             conn.commit()
-            return True
+            invalidate_route_directory(int(contract_id))
+            invalidate_puantaj_snapshots(int(contract_id))
         except Exception as e:
             try:
                 conn.rollback()
@@ -3079,44 +4238,333 @@ class DatabaseManager:
             return False
         finally:
             conn.close()
+        # Durak satırları ve silinen güzergahların kalıntıları (bağlantı kapandıktan sonra, ayrı işlem)
+        self.sync_route_stops(contract_id=int(contract_id))
+        return True
 
     def get_route_params_for_contract(self, contract_id: int, service_type: str):
+        """(id, route_name, stops, distance_km, movement_type, vehicle_capacity, route_key) satırları.
+
+        Sözleşmenin güzergah dizininden (app.core.route_directory) okunur; dizin sözleşme başına
+        bir kez yüklenir ve route_params'a yazıldığında düşürülür.
+        """
+        self._ensure_route_params_table()
+        return self.get_route_directory(contract_id).params_rows(service_type)
+
+    def get_route_directory(self, contract_id: int):
+        self._ensure_route_params_table()
+        return get_route_directory(self, int(contract_id))
+
+    def find_route_params_by_key(self, contract_id: int, route_name: str, movement_type: str = ""):
+        """route_key indeksi üzerinden ada göre güzergah satırları: (id, stops, movement_type, route_name)."""
         self._ensure_route_params_table()
+        key = route_key_for(route_name, movement_type)
+        if not key:
+            return []
         conn = self.connect()
         if not conn:
             return []
         try:
             cursor = conn.cursor()
-            try:
-                cursor.execute(
-                    """
-                    SELECT id,
-                           COALESCE(route_name,''),
-                           COALESCE(stops,''),
-                           COALESCE(distance_km,0),
-                           COALESCE(movement_type,''),
-                           COALESCE(vehicle_capacity,0)
-                    FROM route_params
-                    WHERE contract_id = ? AND service_type = ?
-                    ORDER BY id ASC
-                    """,
-                    (int(contract_id), (service_type or "").strip()),
+            if self._fill_route_keys(cursor):
+                conn.commit()
+            cursor.execute(
+                """
+                SELECT id, COALESCE(stops,''), COALESCE(movement_type,''), COALESCE(route_name,'')
+                FROM route_params
+                WHERE contract_id = ? AND route_key = ?
+                ORDER BY id DESC
+                """,
+                (int(contract_id), key),
+            )
+            return cursor.fetchall() or []
+        except Exception as e:
+            print(f"Güzergah anahtar sorgu hatası: {e}")
+            return []
+        finally:
+            conn.close()
+
+    # ------------------------- Durak kataloğu / mesafe matrisi -------------------------
+    # route_params.start_point + stops metni sıralı route_stops satırlarına çevrilir; güzergah km'si
+    # ardışık durak çiftlerinin stop_distances matrisindeki mesafelerinin toplamıdır.
+    def _ensure_route_catalog_tables(self):
+        if self.db_path in _ROUTE_CATALOG_READY:
+            return
+        conn = self.connect()
+        if not conn:
+            return
+        try:
+            cur = conn.cursor()
+            cur.execute(
+                """
+                CREATE TABLE IF NOT EXISTS stops (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    name TEXT NOT NULL,
+                    name_key TEXT NOT NULL UNIQUE,
+                    created_at TEXT
+                )
+                """
+            )
+            cur.execute(
+                """
+                CREATE TABLE IF NOT EXISTS route_stops (
+                    route_params_id INTEGER NOT NULL,
+                    seq INTEGER NOT NULL,
+                    stop_id INTEGER NOT NULL,
+                    PRIMARY KEY (route_params_id, seq),
+                    FOREIGN KEY (stop_id) REFERENCES stops (id)
                 )
-                return cursor.fetchall()
+                """
+            )
+            cur.execute("CREATE INDEX IF NOT EXISTS idx_route_stops_stop ON route_stops(stop_id)")
+            cur.execute(
+                """
+                CREATE TABLE IF NOT EXISTS route_stop_sig (
+                    route_params_id INTEGER PRIMARY KEY,
+                    sig TEXT NOT NULL
+                )
+                """
+            )
+            # Simetrik matris: from_stop_id < to_stop_id olacak şekilde tek satır tutulur.
+            cur.execute(
+                """
+                CREATE TABLE IF NOT EXISTS stop_distances (
+                    from_stop_id INTEGER NOT NULL,
+                    to_stop_id INTEGER NOT NULL,
+                    km REAL NOT NULL,
+                    PRIMARY KEY (from_stop_id, to_stop_id)
+                )
+                """
+            )
+            cur.execute(
+                """
+                CREATE TABLE IF NOT EXISTS stop_distance_source (
+                    path TEXT PRIMARY KEY,
+                    mtime REAL,
+                    size INTEGER,
+                    row_count INTEGER,
+                    loaded_at TEXT
+                )
+                """
+            )
+            conn.commit()
+            _ROUTE_CATALOG_READY.add(self.db_path)
+        except Exception as e:
+            try:
+                conn.rollback()
             except Exception:
-                cursor.execute(
-                    """
-                    SELECT id,
-                           COALESCE(route_name,''),
-                           COALESCE(stops,''),
-                           COALESCE(distance_km,0)
-                    FROM route_params
-                    WHERE contract_id = ? AND service_type = ?
-                    ORDER BY id ASC
-                    """,
-                    (int(contract_id), (service_type or "").strip()),
+                pass
+            print(f"Durak kataloğu tablo hatası: {e}")
+        finally:
+            conn.close()
+
+    def _stop_ids_for_names(self, cur, names) -> dict:
+        """{name_key: stop_id}; katalogda olmayan duraklar eklenir."""
+        now = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        by_key = {}
+        for name in names or []:
+            key = normalize_stop_name(name)
+            if key and key not in by_key:
+                by_key[key] = str(name).strip()
+        if not by_key:
+            return {}
+        cur.executemany(
+            "INSERT OR IGNORE INTO stops (name, name_key, created_at) VALUES (?,?,?)",
+            [(name, key, now) for key, name in by_key.items()],
+        )
+        out = {}
+        keys = list(by_key.keys())
+        for i in range(0, len(keys), 500):
+            chunk = keys[i:i + 500]
+            cur.execute(
+                f"SELECT name_key, id FROM stops WHERE name_key IN ({','.join(['?'] * len(chunk))})",
+                chunk,
+            )
+            out.update({str(k): int(v) for k, v in cur.fetchall() or []})
+        return out
+
+    def sync_stop_distance_matrix(self, path: str | None = None, force: bool = False) -> int:
+        """Mesafe dosyası değiştiyse (mtime/boyut) stop_distances'a yükler; yüklenen satır sayısı döner."""
+        self._ensure_route_catalog_tables()
+        path = str(path or STOP_DISTANCES_PATH)
+        try:
+            st = os.stat(path)
+        except OSError:
+            return 0
+        conn = self.connect()
+        if not conn:
+            return 0
+        try:
+            cur = conn.cursor()
+            cur.execute("SELECT mtime, size FROM stop_distance_source WHERE path=?", (path,))
+            row = cur.fetchone()
+            if not force and row is not None and float(row[0] or 0) == float(st.st_mtime) and int(row[1] or 0) == int(st.st_size):
+                return 0
+
+            pairs = load_distance_file(path)
+            ids = self._stop_ids_for_names(cur, [n for a, b, _km in pairs for n in (a, b)])
+            data = {}
+            for a, b, km in pairs:
+                ia, ib = ids.get(normalize_stop_name(a)), ids.get(normalize_stop_name(b))
+                if ia is None or ib is None or ia == ib:
+                    continue
+                data[(min(ia, ib), max(ia, ib))] = float(km)
+            cur.execute("DELETE FROM stop_distances")
+            cur.executemany(
+                "INSERT INTO stop_distances (from_stop_id, to_stop_id, km) VALUES (?,?,?)",
+                [(a, b, km) for (a, b), km in data.items()],
+            )
+            cur.execute(
+                """
+                INSERT INTO stop_distance_source (path, mtime, size, row_count, loaded_at) VALUES (?,?,?,?,?)
+                ON CONFLICT(path) DO UPDATE SET mtime=excluded.mtime, size=excluded.size,
+                    row_count=excluded.row_count, loaded_at=excluded.loaded_at
+                """,
+                (path, float(st.st_mtime), int(st.st_size), len(data), datetime.now().strftime("%Y-%m-%d %H:%M:%S")),
+            )
+            conn.commit()
+            return len(data)
+        except Exception as e:
+            conn.rollback()
+            print(f"Mesafe matrisi yükleme hatası: {e}")
+            return 0
+        finally:
+            conn.close()
+
+    def sync_route_stops(self, contract_id: int | None = None, route_ids=None) -> int:
+        """route_params durak metnini route_stops'a işler; yalnızca metni değişen güzergahlar yazılır.
+
+        route_params'a yazan yerler (kaydet / sil) çağırır: route_ids verilirse yalnızca o satırlar
+        (silinmişse durak satırları da) işlenir; contract_id verilirse sözleşmenin güzergahları,
+        hiçbiri verilmezse tümü. get_route_km_map senkron yapmaz, yalnızca okur.
+        """
+        self._ensure_route_params_table()
+        self._ensure_route_catalog_tables()
+        conn = self.connect()
+        if not conn:
+            return 0
+        try:
+            cur = conn.cursor()
+            sql = """
+                SELECT rp.id, COALESCE(rp.start_point,''), COALESCE(rp.stops,''), s.sig
+                FROM route_params rp
+                LEFT JOIN route_stop_sig s ON s.route_params_id = rp.id
+            """
+            params: list = []
+            ids = sorted({int(r) for r in (route_ids or []) if str(r or "").strip()})
+            if ids:
+                sql += f" WHERE rp.id IN ({','.join(['?'] * len(ids))})"
+                params = list(ids)
+            elif contract_id is not None:
+                sql += " WHERE rp.contract_id=?"
+                params = [int(contract_id)]
+            cur.execute(sql, params)
+            changed = []
+            seen = set()
+            for rid, sp, stops_txt, sig in cur.fetchall() or []:
+                seen.add(int(rid))
+                new_sig = f"{sp}\x1f{stops_txt}"
+                if sig != new_sig:
+                    changed.append((int(rid), split_stops(sp, stops_txt), new_sig))
+            # Silinmiş güzergahların durak satırlarını da temizle.
+            if ids:
+                missing = [rid for rid in ids if rid not in seen]
+                orphans = []
+                if missing:
+                    cur.execute(
+                        f"SELECT route_params_id FROM route_stop_sig WHERE route_params_id IN ({','.join(['?'] * len(missing))})",
+                        missing,
+                    )
+                    orphans = [int(r[0]) for r in cur.fetchall() or []]
+            else:
+                cur.execute(
+                    "SELECT route_params_id FROM route_stop_sig WHERE route_params_id NOT IN (SELECT id FROM route_params)"
                 )
-                return cursor.fetchall()
+                orphans = [int(r[0]) for r in cur.fetchall() or []]
+            if not changed and not orphans:
+                return 0
+
+            ids = self._stop_ids_for_names(cur, [n for _rid, names, _sig in changed for n in names])
+            for rid in orphans + [rid for rid, _names, _sig in changed]:
+                cur.execute("DELETE FROM route_stops WHERE route_params_id=?", (rid,))
+                cur.execute("DELETE FROM route_stop_sig WHERE route_params_id=?", (rid,))
+            rows = []
+            for rid, names, _sig in changed:
+                for seq, name in enumerate(names):
+                    rows.append((rid, seq, ids[normalize_stop_name(name)]))
+            cur.executemany("INSERT INTO route_stops (route_params_id, seq, stop_id) VALUES (?,?,?)", rows)
+            cur.executemany(
+                "INSERT INTO route_stop_sig (route_params_id, sig) VALUES (?,?)",
+                [(rid, sig) for rid, _names, sig in changed],
+            )
+            conn.commit()
+            return len(changed)
+        except Exception as e:
+            conn.rollback()
+            print(f"Güzergah durak senkron hatası: {e}")
+            return 0
+        finally:
+            conn.close()
+
+    def refresh_route_catalog(self) -> None:
+        """Mesafe dosyası değiştiyse matrisi yükler ve durak satırı olmayan / metni değişen güzergahları işler.
+
+        Güzergah ekranı açılırken çağrılır; değişiklik yoksa yalnızca dosya stat'ı ve imza karşılaştırmasıdır.
+        """
+        self.sync_stop_distance_matrix()
+        self.sync_route_stops()
+
+    def get_route_km_map(self, contract_id: int | None = None, route_ids=None) -> dict:
+        """Durak matrisinden türetilen güzergah km'leri (toplu).
+
+        Dönüş: {route_params_id: {"km": toplam, "legs": ardışık çift sayısı, "missing_legs": matriste
+        olmayan çift sayısı, "complete": bool}}. Durak sırası ya da matris eksikse complete False olur.
+        Yalnızca okur; route_stops / stop_distances yazıldıkları yerde güncellenir (sync_route_stops,
+        refresh_route_catalog).
+        """
+        self._ensure_route_catalog_tables()
+        conn = self.connect()
+        if not conn:
+            return {}
+        try:
+            cur = conn.cursor()
+            where = []
+            params: list = []
+            if contract_id is not None:
+                where.append("a.route_params_id IN (SELECT id FROM route_params WHERE contract_id=?)")
+                params.append(int(contract_id))
+            ids = [int(r) for r in (route_ids or []) if str(r or "").strip()]
+            if ids:
+                where.append(f"a.route_params_id IN ({','.join(['?'] * len(ids))})")
+                params.extend(ids)
+            cur.execute(
+                f"""
+                SELECT a.route_params_id,
+                       COUNT(*),
+                       COALESCE(SUM(d.km),0),
+                       SUM(CASE WHEN d.km IS NULL THEN 1 ELSE 0 END)
+                FROM route_stops a
+                JOIN route_stops b ON b.route_params_id = a.route_params_id AND b.seq = a.seq + 1
+                LEFT JOIN stop_distances d
+                       ON d.from_stop_id = MIN(a.stop_id, b.stop_id)
+                      AND d.to_stop_id = MAX(a.stop_id, b.stop_id)
+                {('WHERE ' + ' AND '.join(where)) if where else ''}
+                GROUP BY a.route_params_id
+                """,
+                params,
+            )
+            out = {}
+            for rid, legs, km, missing in cur.fetchall() or []:
+                out[int(rid)] = {
+                    "km": round(float(km or 0), 2),
+                    "legs": int(legs or 0),
+                    "missing_legs": int(missing or 0),
+                    "complete": int(legs or 0) > 0 and int(missing or 0) == 0,
+                }
+            return out
+        except Exception as e:
+            print(f"Güzergah km hesaplama hatası: {e}")
+            return {}
         finally:
             conn.close()
 
@@ -3198,6 +4646,7 @@ class DatabaseManager:
                 ),
             )
             conn.commit()
+            invalidate_puantaj_snapshots(int(contract_id), str(trip_date or "")[:7])
             return True
         except Exception:
             try:
@@ -3214,6 +4663,10 @@ class DatabaseManager:
             return False
         try:
             cursor = conn.cursor()
+            cursor.execute(
+                "DELETE FROM contract_price_items WHERE contract_id IN (SELECT id FROM contracts WHERE contract_number = ?)",
+                (number,),
+            )
             cursor.execute("DELETE FROM contracts WHERE contract_number = ?", (number,))
             conn.commit()
             return cursor.rowcount > 0
@@ -4139,3 +5592,7 @@ class DatabaseManager:
         cursor.execute("DELETE FROM constants WHERE id = ? OR parent_id = ?", (constant_id, constant_id))
         conn.commit()
         conn.close()
+
+
+# SATTUP_PROFILE açıksa metot çağrıları ölçülür (kapalıyken sınıf değişmez).
+profiler.instrument_class(DatabaseManager)
@@ -0,0 +1,219 @@
+"""İçerik adresli belge deposu.
+
+Dosyalar DOC_STORE_DIR/ab/<sha256><uzantı> altında saklanır; aynı içerik yalnızca bir kez kopyalanır.
+Veritabanına mutlak yol yerine "store:ab/<sha256>.pdf" biçiminde depo yolu yazılır; kullanıcı özgün
+dosyayı taşısa / silse de belge açılabilir, veritabanı klasörü taşınsa da yol geçerli kalır.
+Görüntü dosyaları için küçük resimler CACHE_DIR/thumbs altına ilk istendiğinde üretilir; klasör
+THUMB_DIR_MAX_BYTES'ı aşınca en uzun süredir kullanılmayanlar silinir.
+
+Qt'ye bağlı değildir; put_file / thumbnail_for arka plan thread'inde çalıştırılabilir.
+"""
+
+import hashlib
+import os
+import tempfile
+import threading
+from typing import NamedTuple
+
+from config import CACHE_DIR, DOC_STORE_DIR
+
+STORE_PREFIX = "store:"
+CHUNK_SIZE = 1024 * 1024
+THUMB_SIZE = 96
+# Küçük resim klasörü bu boyutu aşınca en uzun süredir kullanılmayanlar silinir
+THUMB_DIR_MAX_BYTES = 64 * 1024 * 1024
+IMAGE_EXTS = {".png", ".jpg", ".jpeg", ".bmp", ".gif", ".webp", ".tif", ".tiff"}
+
+THUMB_DIR = os.path.join(CACHE_DIR, "thumbs")
+_THUMB_PRUNE_LOCK = threading.Lock()
+_THUMB_PRUNED = False
+
+
+class StoredFile(NamedTuple):
+    # Veritabanına yazılacak depo yolu ("store:ab/<sha256>.pdf")
+    path: str
+    sha256: str
+    size: int
+    # İçerik depoda zaten vardı, kopyalanmadı
+    deduplicated: bool
+
+
+def is_stored(path: str) -> bool:
+    return str(path or "").startswith(STORE_PREFIX)
+
+
+def resolve_path(path: str, legacy_base: str | None = None) -> str:
+    """Depo yolunu diskteki mutlak yola çevirir; eski mutlak yollar olduğu gibi döner.
+
+    legacy_base verilirse göreli eski yollar (örn. assets/photos/...) bu klasöre göre çözülür.
+    """
+    path = str(path or "").strip()
+    if not path:
+        return ""
+    if is_stored(path):
+        rel = path[len(STORE_PREFIX):]
+        return os.path.join(DOC_STORE_DIR, *rel.split("/"))
+    if os.path.isabs(path) or not legacy_base:
+        return path
+    return os.path.join(legacy_base, path)
+
+
+def hash_file(path: str) -> tuple[str, int]:
+    """(sha256, boyut) döner; dosya parça parça okunur."""
+    h = hashlib.sha256()
+    size = 0
+    with open(path, "rb") as fh:
+        while True:
+            chunk = fh.read(CHUNK_SIZE)
+            if not chunk:
+                break
+            h.update(chunk)
+            size += len(chunk)
+    return h.hexdigest(), size
+
+
+def put_file(src: str) -> StoredFile:
+    """src'yi depoya ekler. Dosya tek geçişte okunur: özet hesaplanırken geçici dosyaya yazılır,
+    aynı içerik depoda varsa geçici dosya atılır, yoksa atomik olarak yerine taşınır.
+    """
+    src = os.path.abspath(str(src or ""))
+    ext = os.path.splitext(src)[1].lower()
+    os.makedirs(DOC_STORE_DIR, exist_ok=True)
+
+    h = hashlib.sha256()
+    size = 0
+    fd, tmp = tempfile.mkstemp(dir=DOC_STORE_DIR, suffix=".part")
+    try:
+        with open(src, "rb") as fin, os.fdopen(fd, "wb") as fout:
+            while True:
+                chunk = fin.read(CHUNK_SIZE)
+                if not chunk:
+                    break
+                h.update(chunk)
+                fout.write(chunk)
+                size += len(chunk)
+        sha = h.hexdigest()
+        rel = f"{sha[:2]}/{sha}{ext}"
+        dest = resolve_path(STORE_PREFIX + rel)
+        if os.path.exists(dest) and os.path.getsize(dest) == size:
+            return StoredFile(STORE_PREFIX + rel, sha, size, True)
+        os.makedirs(os.path.dirname(dest), exist_ok=True)
+        os.replace(tmp, dest)
+        return StoredFile(STORE_PREFIX + rel, sha, size, False)
+    finally:
+        if os.path.exists(tmp):
+            try:
+                os.remove(tmp)
+            except Exception:
+                pass
+
+
+def adopt(path: str, legacy_base: str | None = None) -> StoredFile | None:
+    """Depo dışındaki (eski) bir yolu depoya alır; zaten depodaysa ya da dosya yoksa None."""
+    if not path or is_stored(path):
+        return None
+    src = resolve_path(path, legacy_base)
+    if not os.path.isfile(src):
+        return None
+    return put_file(src)
+
+
+def sha_of(path: str) -> str:
+    """Depo yolundan sha256 (dosya adı); depo dışı yollar için boş."""
+    if not is_stored(path):
+        return ""
+    name = os.path.basename(str(path))
+    return os.path.splitext(name)[0]
+
+
+def is_image(path: str) -> bool:
+    return os.path.splitext(str(path or ""))[1].lower() in IMAGE_EXTS
+
+
+def thumbnail_for(path: str, sha256: str = "", size: int = THUMB_SIZE, legacy_base: str | None = None) -> str | None:
+    """Görüntü belgesi için önbellekteki PNG küçük resim yolu; yoksa üretir.
+
+    Görüntü olmayan belgeler (PDF vb.) ve okunamayan dosyalar için None döner.
+    """
+    src = resolve_path(path, legacy_base)
+    if not src or not is_image(src) or not os.path.isfile(src):
+        return None
+    key = sha256 or sha_of(path)
+    if not key:
+        # Depo dışı dosya: yol + değişiklik zamanı + boyut anahtar olur
+        st = os.stat(src)
+        key = hashlib.sha1(f"{src}|{st.st_mtime_ns}|{st.st_size}".encode("utf-8")).hexdigest()
+    target = os.path.join(THUMB_DIR, f"{key}_{int(size)}.png")
+    if os.path.exists(target):
+        # Erişim zamanı yerine mtime güncellenir (Windows'ta atime güvenilir değil); budama buna göre
+        try:
+            os.utime(target)
+        except Exception:
+            pass
+        return target
+
+    tmp = None
+    try:
+        from PIL import Image
+
+        os.makedirs(THUMB_DIR, exist_ok=True)
+        with Image.open(src) as im:
+            # JPEG'lerde tam çözünürlük yerine 1/2..1/8 ölçekli çözme (çok MB'lık fotoğraflarda asıl kazanç)
+            im.draft("RGB", (int(size), int(size)))
+            im.thumbnail((int(size), int(size)))
+            if im.mode not in ("RGB", "RGBA"):
+                im = im.convert("RGBA")
+            fd, tmp = tempfile.mkstemp(dir=THUMB_DIR, suffix=".part")
+            os.close(fd)
+            im.save(tmp, format="PNG")
+        os.replace(tmp, target)
+        _prune_thumbnails_once()
+        return target
+    except Exception as e:
+        print(f"Küçük resim üretilemedi ({os.path.basename(src)}): {e}")
+        if tmp and os.path.exists(tmp):
+            try:
+                os.remove(tmp)
+            except Exception:
+                pass
+        return None
+
+
+def prune_thumbnails(max_bytes: int = THUMB_DIR_MAX_BYTES) -> int:
+    """Küçük resim klasörü max_bytes'ı aşarsa en eski (son kullanımı en eski) dosyaları siler."""
+    try:
+        entries = []
+        total = 0
+        with os.scandir(THUMB_DIR) as it:
+            for e in it:
+                if not e.is_file():
+                    continue
+                st = e.stat()
+                entries.append((st.st_mtime, st.st_size, e.path))
+                total += st.st_size
+    except FileNotFoundError:
+        return 0
+    removed = 0
+    if total <= max_bytes:
+        return 0
+    entries.sort()
+    for _mtime, size, path in entries:
+        if total <= max_bytes * 0.8:
+            break
+        try:
+            os.remove(path)
+            total -= size
+            removed += 1
+        except Exception:
+            pass
+    return removed
+
+
+def _prune_thumbnails_once() -> None:
+    # Süreç başına bir kez (ilk yeni küçük resim üretildiğinde) budanır.
+    global _THUMB_PRUNED
+    with _THUMB_PRUNE_LOCK:
+        if _THUMB_PRUNED:
+            return
+        _THUMB_PRUNED = True
+    prune_thumbnails()
@@ -0,0 +1,102 @@
+"""Designer formlarının (.ui) yüklenmesi.
+
+uic.loadUi her ekran açılışında XML'i ayrıştırıp widget'ları yansıma ile kurar. Paketleme sırasında
+(SATTUP.spec) formlar pyuic ile ui/compiled altına Python modülü olarak derlenir; load_ui önce
+derlenmiş formu kullanır:
+- paketlenmiş uygulamada derlenmiş modül varsa her zaman,
+- kaynaktan çalışırken yalnızca derlenmiş dosya .ui'dan yeniyse (Designer'da düzenlenen form
+  yeniden derlenene kadar loadUi ile okunur).
+Derlenmiş form da loadUi gibi alt widget'ları verilen widget'ın özniteliği yapar.
+"""
+
+import importlib
+import os
+import re
+import sys
+
+from config import BASE_DIR, UI_FILES_PATH, get_ui_path
+
+COMPILED_PACKAGE = "ui.compiled"
+COMPILED_DIR = os.path.join(BASE_DIR, "ui", "compiled")
+
+_FROZEN = bool(getattr(sys, "frozen", False))
+# .ui dosya adı -> Ui_* sınıfı (derlenmiş form yoksa None)
+_FORM_CLASSES: dict[str, type | None] = {}
+
+
+def module_name(file_name: str) -> str:
+    stem = os.path.splitext(os.path.basename(str(file_name)))[0]
+    return re.sub(r"\W", "_", stem)
+
+
+def _is_fresh(compiled_path: str, ui_path: str) -> bool:
+    try:
+        return os.path.getmtime(compiled_path) >= os.path.getmtime(ui_path)
+    except OSError:
+        return False
+
+
+def _form_class(file_name: str) -> type | None:
+    if file_name in _FORM_CLASSES:
+        return _FORM_CLASSES[file_name]
+    cls = None
+    name = module_name(file_name)
+    try:
+        if _FROZEN or _is_fresh(os.path.join(COMPILED_DIR, name + ".py"), get_ui_path(file_name)):
+            mod = importlib.import_module(f"{COMPILED_PACKAGE}.{name}")
+            cls = next((v for k, v in vars(mod).items() if k.startswith("Ui_") and isinstance(v, type)), None)
+    except ImportError:
+        cls = None
+    _FORM_CLASSES[file_name] = cls
+    return cls
+
+
+def load_ui(file_name: str, widget):
+    """file_name (ui/ui_files altındaki ad) formunu widget üzerine kurar."""
+    cls = _form_class(file_name)
+    if cls is None:
+        # uic (XML ayrıştırıcı + widget fabrikası) yalnızca derlenmiş form yoksa yüklenir
+        from PyQt6 import uic
+
+        return uic.loadUi(get_ui_path(file_name), widget)
+    form = cls()
+    form.setupUi(widget)
+    for attr, value in vars(form).items():
+        setattr(widget, attr, value)
+    return widget
+
+
+def compile_forms(out_dir: str = COMPILED_DIR) -> list[str]:
+    """ui/ui_files altındaki formları out_dir'e derler; derlenen modül adlarını döner."""
+    from PyQt6.uic import compileUi
+
+    os.makedirs(out_dir, exist_ok=True)
+    init_path = os.path.join(out_dir, "__init__.py")
+    if not os.path.exists(init_path):
+        with open(init_path, "w", encoding="utf-8") as fh:
+            fh.write("# pyuic ile üretilir (app.core.forms.compile_forms); elle düzenlemeyin.\n")
+
+    names = []
+    for entry in sorted(os.listdir(UI_FILES_PATH)):
+        if not entry.lower().endswith(".ui"):
+            continue
+        name = module_name(entry)
+        target = os.path.join(out_dir, name + ".py")
+        try:
+            with open(os.path.join(UI_FILES_PATH, entry), "r", encoding="utf-8") as src, open(
+                target, "w", encoding="utf-8"
+            ) as dst:
+                compileUi(src, dst)
+            names.append(name)
+        except Exception as e:
+            print(f"Form derlenemedi ({entry}): {e}")
+            try:
+                os.remove(target)
+            except OSError:
+                pass
+    return names
+
+
+if __name__ == "__main__":
+    compiled = compile_forms()
+    print(f"{len(compiled)} form derlendi -> {COMPILED_DIR}")
@@ -0,0 +1,115 @@
+import time
+
+from PyQt6.QtCore import QEvent, QObject, QTimer, pyqtSignal
+
+# Oturumu canlı tutan kullanıcı girdileri (fare hareketi sayılmaz)
+_INPUT_EVENTS = frozenset(
+    {
+        QEvent.Type.MouseButtonPress,
+        QEvent.Type.MouseButtonRelease,
+        QEvent.Type.KeyPress,
+        QEvent.Type.Wheel,
+    }
+)
+
+
+class IdleMonitor(QObject):
+    """Uygulama geneli boşta kalma takibi.
+
+    QApplication'a event filter olarak bir kez kurulur. Her girdi olayında yalnızca son girdi
+    zamanı (monotonic) yazılır; zamanlayıcı yeniden başlatılmaz. Tek bir single-shot QTimer en
+    yakın eşik (uyarı / zaman aşımı) için kurulur, tetiklendiğinde geçen süre yeniden hesaplanır:
+    arada girdi olduysa kalan süreye göre tekrar kurulur, olmadıysa sinyal yayılır.
+
+    Uyarı yayıldıktan sonra girdiler süreyi uzatmaz (kullanıcı uyarıdaki "Ek Süre" ile touch()
+    çağırmalıdır); zaman aşımından sonra izleme durur.
+    """
+
+    warning = pyqtSignal()
+    timeout = pyqtSignal()
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._timeout_ms = 0
+        self._warning_ms = 0
+        self._last_input = time.monotonic()
+        self._running = False
+        self._warned = False
+        self._installed = None
+
+        self._timer = QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.timeout.connect(self._check)
+
+    def install(self, app) -> None:
+        if app is None or self._installed is app:
+            return
+        app.installEventFilter(self)
+        self._installed = app
+
+    def eventFilter(self, obj, event):
+        if self._running and not self._warned and event.type() in _INPUT_EVENTS:
+            self._last_input = time.monotonic()
+        return False
+
+    @property
+    def is_running(self) -> bool:
+        return self._running
+
+    @property
+    def is_warning(self) -> bool:
+        return self._warned
+
+    def start(self, timeout_ms: int, warning_ms: int = 0) -> None:
+        """timeout_ms boşta kalınca timeout, (timeout_ms - warning_ms) sonunda warning yayılır."""
+        self._timeout_ms = max(0, int(timeout_ms or 0))
+        self._warning_ms = min(max(0, int(warning_ms or 0)), self._timeout_ms)
+        if self._timeout_ms <= 0:
+            self.stop()
+            return
+        self._running = True
+        self.touch()
+
+    def stop(self) -> None:
+        self._running = False
+        self._warned = False
+        self._timer.stop()
+
+    def touch(self) -> None:
+        """Süreyi sıfırlar (ek süre / oturum açılışı)."""
+        self._last_input = time.monotonic()
+        self._warned = False
+        if self._running:
+            self._arm()
+
+    def idle_ms(self) -> int:
+        return int((time.monotonic() - self._last_input) * 1000)
+
+    def remaining_ms(self) -> int:
+        if not self._running:
+            return 0
+        return max(0, self._timeout_ms - self.idle_ms())
+
+    def _arm(self) -> None:
+        idle = self.idle_ms()
+        if self._warned:
+            due = self._timeout_ms - idle
+        else:
+            due = (self._timeout_ms - self._warning_ms) - idle
+        self._timer.start(max(0, int(due)))
+
+    def _check(self) -> None:
+        if not self._running:
+            return
+        idle = self.idle_ms()
+        if idle >= self._timeout_ms:
+            self.stop()
+            self.timeout.emit()
+            return
+        if not self._warned and idle >= self._timeout_ms - self._warning_ms:
+            self._warned = True
+            self._arm()
+            self.warning.emit()
+            return
+        # Arada girdi olmuş: eşik ileri kaydı, kalan süre için yeniden kur.
+        self._arm()
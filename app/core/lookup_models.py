@@ -0,0 +1,108 @@
+from PyQt6.QtCore import QAbstractListModel, QModelIndex, Qt
+from PyQt6.QtWidgets import QComboBox, QCompleter, QStyledItemDelegate
+
+
+class LookupListModel(QAbstractListModel):
+    """(kod, etiket) listesini tutan paylaşımlı model; araç/şoför combo'ları için.
+
+    Aynı model birden fazla combo box ve delegate editörü tarafından kullanılır; satır başına
+    combo doldurmak yerine tek kopya tutulur. İlk satır her zaman boş seçim ("Seçiniz...").
+    """
+
+    def __init__(self, parent=None, placeholder: str = "Seçiniz..."):
+        super().__init__(parent)
+        self._placeholder = str(placeholder or "")
+        self._items: list[tuple[str, str]] = []
+        self._row_by_code: dict[str, int] = {}
+
+    def rowCount(self, parent=QModelIndex()):
+        if parent.isValid():
+            return 0
+        return len(self._items) + 1
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid():
+            return None
+        row = int(index.row())
+        if row == 0:
+            if role in (Qt.ItemDataRole.DisplayRole, Qt.ItemDataRole.EditRole):
+                return self._placeholder
+            return None
+        try:
+            code, label = self._items[row - 1]
+        except IndexError:
+            return None
+        if role in (Qt.ItemDataRole.DisplayRole, Qt.ItemDataRole.EditRole):
+            return label
+        if role == Qt.ItemDataRole.UserRole:
+            return code
+        return None
+
+    def set_items(self, items) -> bool:
+        """items: {kod: etiket} ya da (kod, etiket) listesi. Değişiklik yoksa model sıfırlanmaz."""
+        if isinstance(items, dict):
+            items = items.items()
+        new_items = [(str(code), str(label or "")) for code, label in (items or [])]
+        if new_items == self._items:
+            return False
+        self.beginResetModel()
+        self._items = new_items
+        self._row_by_code = {code: i + 1 for i, (code, _label) in enumerate(new_items)}
+        self.endResetModel()
+        return True
+
+    def row_for_code(self, code) -> int:
+        if code in (None, ""):
+            return 0
+        return int(self._row_by_code.get(str(code), -1))
+
+    def label_for(self, code) -> str:
+        row = self.row_for_code(code)
+        if row <= 0:
+            return ""
+        return self._items[row - 1][1]
+
+
+def bind_lookup_combo(cmb: QComboBox, model: LookupListModel) -> None:
+    """Combo'yu paylaşımlı modele bağlar ve yazarak arama (içeren, büyük/küçük harf duyarsız) ekler."""
+    cmb.setModel(model)
+    cmb.setEditable(True)
+    cmb.setInsertPolicy(QComboBox.InsertPolicy.NoInsert)
+    completer = QCompleter(model, cmb)
+    completer.setCaseSensitivity(Qt.CaseSensitivity.CaseInsensitive)
+    completer.setFilterMode(Qt.MatchFlag.MatchContains)
+    completer.setCompletionMode(QCompleter.CompletionMode.PopupCompletion)
+    cmb.setCompleter(completer)
+
+
+class LookupComboDelegate(QStyledItemDelegate):
+    """Hücre düzenlenirken açılan combo editörü; kalıcı cell widget yerine kullanılır.
+
+    Seçilen kod hücrenin UserRole verisine, etiket DisplayRole'a yazılır.
+    """
+
+    def __init__(self, model: LookupListModel, parent=None):
+        super().__init__(parent)
+        self._model = model
+
+    def createEditor(self, parent, option, index):
+        cmb = QComboBox(parent)
+        bind_lookup_combo(cmb, self._model)
+        return cmb
+
+    def setEditorData(self, editor, index):
+        row = self._model.row_for_code(index.data(Qt.ItemDataRole.UserRole))
+        editor.setCurrentIndex(max(0, row))
+
+    def setModelData(self, editor, model, index):
+        # Yazılan metin listede birebir varsa onu seç; yoksa mevcut seçim geçerli.
+        txt = (editor.currentText() or "").strip()
+        row = editor.findText(txt, Qt.MatchFlag.MatchFixedString) if txt else 0
+        if row < 0:
+            row = editor.currentIndex()
+        code = editor.itemData(row, Qt.ItemDataRole.UserRole) if row > 0 else None
+        model.setData(index, code, Qt.ItemDataRole.UserRole)
+        model.setData(index, self._model.label_for(code), Qt.ItemDataRole.DisplayRole)
+
+    def updateEditorGeometry(self, editor, option, index):
+        editor.setGeometry(option.rect)
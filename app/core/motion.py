@@ -0,0 +1,144 @@
+import os
+import sys
+import time
+
+from PyQt6.QtCore import QObject, QTimer, pyqtSignal
+
+MODE_AUTO = "auto"
+MODE_FULL = "full"
+MODE_REDUCED = "reduced"
+_MODES = (MODE_AUTO, MODE_FULL, MODE_REDUCED)
+
+# constants tablosundaki grup adları (Sabitler ekranından değiştirilebilir)
+CONST_MODE = "ui_motion_mode"
+CONST_SLOW_FRAME_MS = "ui_slow_frame_ms"
+
+DEFAULT_SLOW_FRAME_MS = 50
+PROBE_WINDOW_MS = 600
+PROBE_TICK_MS = 16
+PROBE_ROUNDS = 3
+# Sayfa açılışındaki tek seferlik yükler yanıltmasın: en az bu kadar turun yavaş çıkması gerekir
+PROBE_SLOW_ROUNDS = 2
+
+_SM_REMOTESESSION = 0x1000
+
+
+def is_remote_session() -> bool:
+    """Uzak masaüstü (RDP) oturumu mu? Windows dışında False."""
+    if not sys.platform.startswith("win"):
+        return False
+    if str(os.environ.get("SESSIONNAME") or "").upper().startswith("RDP-"):
+        return True
+    try:
+        import ctypes
+
+        return bool(ctypes.windll.user32.GetSystemMetrics(_SM_REMOTESESSION))
+    except Exception:
+        return False
+
+
+def _env_mode() -> str:
+    # SATTUP_REDUCED_MOTION=1 / 0 constants ayarını ezer (test / destek için).
+    v = str(os.environ.get("SATTUP_REDUCED_MOTION") or "").strip().lower()
+    if v in ("1", "true", "yes", "on"):
+        return MODE_REDUCED
+    if v in ("0", "false", "no", "off"):
+        return MODE_FULL
+    return ""
+
+
+class MotionPolicy(QObject):
+    """Ana pencere animasyon bütçesi.
+
+    mode:
+    - "full": tüm animasyonlar,
+    - "reduced": geçişler anında, efekt (blur / colorize / opacity) yok,
+    - "auto": RDP oturumunda reduced; değilse ilk birkaç sayfa geçişinde kare aralığı ölçülür,
+      ortalama PROBE_SLOW_ROUNDS turda slow_frame_ms'i aşarsa oturum boyunca reduced'a düşülür.
+
+    Kare ölçümü: animasyonlar çalışırken PROBE_TICK_MS'lik bir QTimer'ın gerçek tik aralıkları
+    toplanır; GUI thread'i boyamaya yetişemiyorsa tikler gecikir.
+    """
+
+    changed = pyqtSignal(bool)
+
+    def __init__(self, parent=None, mode: str = MODE_AUTO, slow_frame_ms: int = DEFAULT_SLOW_FRAME_MS):
+        super().__init__(parent)
+        self._mode = MODE_AUTO
+        self._slow_frame_ms = DEFAULT_SLOW_FRAME_MS
+        self._reduced = False
+        self.reason = ""
+        self._probe_rounds = 0
+        self._slow_rounds = 0
+        self._probe_started = 0.0
+        self._probe_last = 0.0
+        self._probe_gaps: list[float] = []
+
+        self._probe_timer = QTimer(self)
+        self._probe_timer.setInterval(PROBE_TICK_MS)
+        self._probe_timer.timeout.connect(self._on_probe_tick)
+
+        self.configure(mode, slow_frame_ms)
+
+    @property
+    def reduced(self) -> bool:
+        return self._reduced
+
+    @property
+    def mode(self) -> str:
+        return self._mode
+
+    def configure(self, mode: str = MODE_AUTO, slow_frame_ms: int | None = None) -> None:
+        mode = str(mode or "").strip().lower()
+        self._mode = _env_mode() or (mode if mode in _MODES else MODE_AUTO)
+        try:
+            if slow_frame_ms is not None and int(slow_frame_ms) > 0:
+                self._slow_frame_ms = int(slow_frame_ms)
+        except Exception:
+            pass
+        self._probe_timer.stop()
+        self._probe_rounds = 0
+        self._slow_rounds = 0
+
+        if self._mode == MODE_REDUCED:
+            self._set_reduced(True, "ayar")
+        elif self._mode == MODE_FULL:
+            self._set_reduced(False, "ayar")
+        elif is_remote_session():
+            self._set_reduced(True, "uzak masaüstü")
+        else:
+            self._set_reduced(False, "")
+
+    def probe(self) -> None:
+        """Bir animasyon başlarken çağrılır; auto modda kare aralığını ölçer."""
+        if self._mode != MODE_AUTO or self._reduced:
+            return
+        if self._probe_rounds >= PROBE_ROUNDS or self._probe_timer.isActive():
+            return
+        self._probe_rounds += 1
+        self._probe_gaps = []
+        self._probe_started = self._probe_last = time.perf_counter()
+        self._probe_timer.start()
+
+    def _on_probe_tick(self) -> None:
+        now = time.perf_counter()
+        self._probe_gaps.append((now - self._probe_last) * 1000.0)
+        self._probe_last = now
+        if (now - self._probe_started) * 1000.0 < PROBE_WINDOW_MS:
+            return
+        self._probe_timer.stop()
+        gaps = self._probe_gaps
+        avg = sum(gaps) / max(1, len(gaps))
+        if avg >= self._slow_frame_ms:
+            self._slow_rounds += 1
+            if self._slow_rounds >= PROBE_SLOW_ROUNDS:
+                self._set_reduced(True, f"yavaş kare ({avg:.0f} ms)")
+
+    def _set_reduced(self, reduced: bool, reason: str) -> None:
+        changed = bool(reduced) != self._reduced
+        self._reduced = bool(reduced)
+        self.reason = reason
+        if changed:
+            if self._reduced:
+                print(f"Azaltılmış hareket modu açık: {reason}")
+            self.changed.emit(self._reduced)
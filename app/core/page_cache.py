@@ -0,0 +1,158 @@
+"""Ana pencere sayfa önbelleği.
+
+Menüden açılan modül ekranları (.ui yükleme, DatabaseManager, combo sorguları) her girişte yeniden
+kurulmaz; mainStack içinde gizli tutulur, en uzun süredir açılmayan sayfa MAX_PAGES aşılınca silinir.
+
+Yeniden girişte sayfa yalnızca veritabanı o sayfadan çıkıldıktan sonra değiştiyse tazelenir:
+- modülde refresh_on_enter() varsa o çağrılır (liste / combo yeniden okunur, form korunur),
+- yoksa sayfa atılıp yeniden kurulur.
+Değişiklik damgası SQLite "PRAGMA data_version"dır: açık tutulan izleme bağlantısı dışındaki
+herhangi bir bağlantı commit ettiğinde değer değişir (ekranlar her işlemde yeni bağlantı açıyor).
+
+Hangi sayfaların ne sıklıkla açıldığı CACHE_DIR/page_usage.json'da tutulur; oturum açılınca en çok
+kullanılanlar boşta kurulabilir (bkz. MainMenuApp._schedule_page_warmup).
+"""
+
+import json
+import os
+import sqlite3
+from collections import OrderedDict
+
+from config import CACHE_DIR, DB_PATH
+
+MAX_PAGES = 6
+USAGE_PATH = os.path.join(CACHE_DIR, "page_usage.json")
+
+_WATCH_CONN = None
+_USAGE: dict[str, int] | None = None
+
+
+def data_version() -> int:
+    """Veritabanı değişiklik damgası; okunamazsa -1 (her girişte tazelenir)."""
+    global _WATCH_CONN
+    try:
+        if _WATCH_CONN is None:
+            _WATCH_CONN = sqlite3.connect(DB_PATH, check_same_thread=False)
+        return int(_WATCH_CONN.execute("PRAGMA data_version").fetchone()[0])
+    except Exception:
+        _WATCH_CONN = None
+        return -1
+
+
+def _usage() -> dict[str, int]:
+    global _USAGE
+    if _USAGE is None:
+        try:
+            with open(USAGE_PATH, "r", encoding="utf-8") as fh:
+                _USAGE = {str(k): int(v) for k, v in dict(json.load(fh)).items()}
+        except Exception:
+            _USAGE = {}
+    return _USAGE
+
+
+def record_open(name: str) -> None:
+    usage = _usage()
+    usage[name] = int(usage.get(name, 0)) + 1
+    try:
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        tmp = USAGE_PATH + ".part"
+        with open(tmp, "w", encoding="utf-8") as fh:
+            json.dump(usage, fh)
+        os.replace(tmp, USAGE_PATH)
+    except Exception:
+        pass
+
+
+def most_used(candidates, n: int, default=()) -> list[str]:
+    """candidates içinden en çok açılan n sayfa; geçmiş yoksa default sırası."""
+    usage = _usage()
+    used = sorted((c for c in candidates if usage.get(c)), key=lambda c: -usage[c])
+    out = used[:n]
+    for c in default:
+        if len(out) >= n:
+            break
+        if c in candidates and c not in out:
+            out.append(c)
+    return out
+
+
+class CachedPage:
+    def __init__(self, key: str, container, module):
+        self.key = key
+        # mainStack'e eklenen widget (çoğunlukla modülü saran QScrollArea)
+        self.container = container
+        self.module = module
+        self.stamp = data_version()
+
+
+class PageCache:
+    """mainStack içindeki modül sayfaları için LRU; gösterilen sayfa hiçbir zaman atılmaz."""
+
+    def __init__(self, stack, maxsize: int = MAX_PAGES):
+        self._stack = stack
+        self.maxsize = max(1, int(maxsize or 1))
+        self._pages: OrderedDict[str, CachedPage] = OrderedDict()
+
+    def __contains__(self, key) -> bool:
+        return key in self._pages
+
+    def __len__(self) -> int:
+        return len(self._pages)
+
+    def keys(self) -> list[str]:
+        return list(self._pages.keys())
+
+    def get(self, key: str) -> CachedPage | None:
+        page = self._pages.get(key)
+        if page is not None:
+            self._pages.move_to_end(key)
+        return page
+
+    def find(self, widget) -> CachedPage | None:
+        for page in self._pages.values():
+            if page.container is widget:
+                return page
+        return None
+
+    def put(self, key: str, container, module) -> CachedPage:
+        self.drop(key)
+        page = CachedPage(key, container, module)
+        self._pages[key] = page
+        self._stack.addWidget(container)
+        self._evict()
+        return page
+
+    def is_stale(self, page: CachedPage) -> bool:
+        current = data_version()
+        return current < 0 or current != page.stamp
+
+    def mark_fresh(self, page: CachedPage) -> None:
+        page.stamp = data_version()
+
+    def drop(self, key: str) -> None:
+        page = self._pages.pop(key, None)
+        if page is not None:
+            self._discard(page.container)
+
+    def clear(self) -> None:
+        pages = list(self._pages.values())
+        self._pages.clear()
+        for page in pages:
+            self._discard(page.container)
+
+    def _evict(self) -> None:
+        current = self._stack.currentWidget()
+        for key in list(self._pages.keys()):
+            if len(self._pages) <= self.maxsize:
+                break
+            if self._pages[key].container is current:
+                continue
+            self.drop(key)
+
+    def _discard(self, widget) -> None:
+        try:
+            self._stack.removeWidget(widget)
+            widget.setParent(None)
+            widget.deleteLater()
+        except Exception:
+            pass
@@ -0,0 +1,523 @@
+"""İsteğe bağlı performans ölçümü (SATTUP_PROFILE=1).
+
+Açıkken DatabaseManager.connect() ProfiledConnection döndürür: her SQL ifadesi (parmak izine göre)
+sayılır, süresi ve döndürdüğü satır sayısı histogramlara işlenir; trace callback tetikleyici ve
+BEGIN/COMMIT dahil çalışan tüm ifadeleri sayar. DatabaseManager metotları ve ana ekran işlemleri
+(sayfa açma, kaydet, hakediş hesapla, dışa aktar) çerçeve olarak ölçülür; bir çerçeve içinde aynı
+sorgu N_PLUS_ONE_THRESHOLD kez ve üzerinde çalışırsa N+1 şüphesi olarak kaydedilir. Sonuçlar dönen
+(rotating) bir günlüğe ve tanılama paneline (app.modules.diagnostics) gider.
+
+Yavaş sorgu günlüğü (SATTUP_SLOW_QUERY_MS=<ms>, profil açıkken varsayılan 100 ms) tek başına da
+açılabilir: eşiği aşan her ifade parametreleri, çağrıldığı yer (modül.fonksiyon:satır) ve
+EXPLAIN QUERY PLAN çıktısıyla JSON satırı olarak SLOW_QUERY_LOG_PATH'e yazılır. Özet: db_slow_queries.py
+
+İkisi de kapalıyken bağlantılar düz sqlite3 bağlantısıdır ve dekoratörler fonksiyonu olduğu gibi döndürür.
+"""
+
+import atexit
+import inspect
+import json
+import logging
+import os
+import re
+import sqlite3
+import sys
+import threading
+import time
+import types
+from contextlib import contextmanager
+from functools import wraps
+from logging.handlers import RotatingFileHandler
+
+from app.core.cache import LRUCache
+from config import BASE_DIR, PROFILE_LOG_PATH, SLOW_QUERY_LOG_PATH
+
+ENABLED = str(os.environ.get("SATTUP_PROFILE") or "").strip().lower() in ("1", "true", "yes", "on")
+
+
+
+def _env_ms(name: str, default: float) -> float:
+    try:
+        return max(0.0, float(str(os.environ.get(name) or "").strip() or default))
+    except Exception:
+        return default
+
+
+# 0 ise yavaş sorgu günlüğü kapalı.
+SLOW_QUERY_MS = _env_ms("SATTUP_SLOW_QUERY_MS", 100.0 if ENABLED else 0.0)
+
+N_PLUS_ONE_THRESHOLD = 20
+# Histogram üst sınırları (ms); son kova bunların üstü.
+BUCKETS_MS = (1, 5, 10, 50, 100, 500, 1000)
+
+_LOCK = threading.Lock()
+_LOCAL = threading.local()
+_LOGGER = None
+_SLOW_LOGGER = None
+# parmak izi -> EXPLAIN QUERY PLAN satırları (aynı sorgu için planı bir kez çıkar)
+_PLAN_CACHE = LRUCache(256)
+_EXPLAINABLE = ("SELECT", "WITH", "INSERT", "UPDATE", "DELETE", "REPLACE")
+_APP_ROOT = os.path.normcase(os.path.abspath(BASE_DIR))
+
+_STR_RE = re.compile(r"'(?:[^']|'')*'")
+_NUM_RE = re.compile(r"\b\d+(?:\.\d+)?\b")
+_IN_RE = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+_WS_RE = re.compile(r"\s+")
+
+
+def fingerprint_sql(sql: str) -> str:
+    """Parametre / sabit farklarını atan sorgu anahtarı: IN (?,?,?) -> IN (?+), 'x' / 12 -> ?."""
+    s = _WS_RE.sub(" ", str(sql or "")).strip()
+    s = _STR_RE.sub("?", s)
+    s = _NUM_RE.sub("?", s)
+    return _IN_RE.sub("(?+)", s)
+
+
+class _Stat:
+    __slots__ = ("count", "total_ms", "max_ms", "rows", "hist")
+
+    def __init__(self):
+        self.count = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self.rows = 0
+        self.hist = [0] * (len(BUCKETS_MS) + 1)
+
+    def add(self, ms: float, count: int = 1):
+        self.count += count
+        self.total_ms += ms
+        if ms > self.max_ms:
+            self.max_ms = ms
+        if count:
+            i = 0
+            while i < len(BUCKETS_MS) and ms > BUCKETS_MS[i]:
+                i += 1
+            self.hist[i] += 1
+
+    def as_dict(self) -> dict:
+        return {
+            "count": self.count,
+            "total_ms": round(self.total_ms, 2),
+            "avg_ms": round(self.total_ms / self.count, 2) if self.count else 0.0,
+            "max_ms": round(self.max_ms, 2),
+            "rows": self.rows,
+            "hist": list(self.hist),
+        }
+
+
+_METHODS: dict[str, _Stat] = {}
+_ACTIONS: dict[str, _Stat] = {}
+_QUERIES: dict[str, _Stat] = {}
+_QUERY_METHODS: dict[str, set] = {}
+_STATEMENTS: dict[str, int] = {}
+# (çerçeve adı, parmak izi) -> tek çerçevedeki en yüksek tekrar
+_N_PLUS_ONE: dict[tuple[str, str], int] = {}
+
+
+def _stack() -> list:
+    st = getattr(_LOCAL, "stack", None)
+    if st is None:
+        st = []
+        _LOCAL.stack = st
+    return st
+
+
+def _current_name() -> str:
+    st = _stack()
+    return st[-1]["name"] if st else "-"
+
+
+def _make_logger(name: str, path: str, fmt: str):
+    log = logging.getLogger(name)
+    log.setLevel(logging.INFO)
+    log.propagate = False
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        handler = RotatingFileHandler(path, maxBytes=2 * 1024 * 1024, backupCount=5, encoding="utf-8")
+        handler.setFormatter(logging.Formatter(fmt))
+        log.addHandler(handler)
+    except Exception as e:
+        print(f"Profil günlüğü açılamadı: {e}")
+        log.addHandler(logging.NullHandler())
+    return log
+
+
+def _logger():
+    global _LOGGER
+    if _LOGGER is None:
+        _LOGGER = _make_logger("sattup.profile", PROFILE_LOG_PATH, "%(asctime)s %(message)s")
+    return _LOGGER
+
+
+def _slow_logger():
+    # Satır başına bir JSON kaydı; db_slow_queries.py bunu okur.
+    global _SLOW_LOGGER
+    if _SLOW_LOGGER is None:
+        _SLOW_LOGGER = _make_logger("sattup.slow_query", SLOW_QUERY_LOG_PATH, "%(message)s")
+    return _SLOW_LOGGER
+
+
+# ------------------------- kayıt -------------------------
+def record_query(sql: str, ms: float, rows: int = 0) -> str:
+    fp = fingerprint_sql(sql)
+    st = _stack()
+    name = st[-1]["name"] if st else "-"
+    for frame in st:
+        fps = frame["fps"]
+        fps[fp] = fps.get(fp, 0) + 1
+    with _LOCK:
+        stat = _QUERIES.get(fp)
+        if stat is None:
+            stat = _QUERIES[fp] = _Stat()
+        stat.add(ms)
+        stat.rows += int(rows or 0)
+        _QUERY_METHODS.setdefault(fp, set()).add(name)
+    return fp
+
+
+def record_fetch(fp: str, ms: float, rows: int) -> None:
+    """Sonuç satırları okunurken geçen süre ve satır sayısı aynı sorguya eklenir."""
+    with _LOCK:
+        stat = _QUERIES.get(fp)
+        if stat is not None:
+            stat.total_ms += ms
+            stat.rows += int(rows or 0)
+
+
+def _origin(limit: int = 4) -> list[str]:
+    """Sorguyu çalıştıran uygulama çerçeveleri, içten dışa: ["app.core.db_manager.get_x:120", ...]."""
+    out = []
+    f = sys._getframe(1)
+    while f is not None and len(out) < limit:
+        code = f.f_code
+        path = os.path.normcase(os.path.abspath(code.co_filename))
+        if code.co_filename != __file__ and path.startswith(_APP_ROOT):
+            out.append(f"{f.f_globals.get('__name__', '?')}.{code.co_name}:{f.f_lineno}")
+        f = f.f_back
+    return out
+
+
+def _short_params(params, limit: int = 300) -> str:
+    try:
+        text = repr(params)
+    except Exception:
+        text = "?"
+    return text if len(text) <= limit else text[:limit] + "..."
+
+
+def _explain(conn, sql: str, params, fp: str) -> list[str]:
+    plan = _PLAN_CACHE.get(fp)
+    if plan is not None:
+        return plan
+    plan = []
+    if str(sql or "").lstrip().upper().startswith(_EXPLAINABLE):
+        try:
+            # Düz cursor: EXPLAIN'in kendisi ölçülmesin.
+            cur = sqlite3.Cursor(conn)
+            cur.execute("EXPLAIN QUERY PLAN " + str(sql), params if params is not None else ())
+            plan = [str(r[3]) for r in cur.fetchall() or []]
+            cur.close()
+        except Exception as e:
+            plan = [f"EXPLAIN hatası: {e}"]
+    _PLAN_CACHE.put(fp, plan)
+    return plan
+
+
+def record_slow_query(conn, sql: str, params, ms: float, rows: int = 0, many: int = 0) -> None:
+    fp = fingerprint_sql(sql)
+    entry = {
+        "ts": time.strftime("%Y-%m-%d %H:%M:%S"),
+        "ms": round(ms, 2),
+        "fp": fp,
+        "sql": _WS_RE.sub(" ", str(sql or "")).strip()[:2000],
+        "params": _short_params(params),
+        "rows": int(rows or 0),
+        "method": _current_name(),
+        "origin": _origin(),
+        "plan": _explain(conn, sql, params, fp),
+    }
+    if many:
+        entry["many"] = int(many)
+    try:
+        _slow_logger().info(json.dumps(entry, ensure_ascii=False))
+    except Exception:
+        pass
+
+
+def _trace(_sql: str) -> None:
+    name = _current_name()
+    with _LOCK:
+        _STATEMENTS[name] = _STATEMENTS.get(name, 0) + 1
+
+
+@contextmanager
+def _frame(name: str, table: dict, log: bool = False):
+    st = _stack()
+    frame = {"name": name, "fps": {}}
+    st.append(frame)
+    t0 = time.perf_counter()
+    try:
+        yield frame
+    finally:
+        ms = (time.perf_counter() - t0) * 1000.0
+        st.pop()
+        n_queries = sum(frame["fps"].values())
+        with _LOCK:
+            stat = table.get(name)
+            if stat is None:
+                stat = table[name] = _Stat()
+            stat.add(ms)
+            stat.rows += n_queries
+            for fp, cnt in frame["fps"].items():
+                if cnt >= N_PLUS_ONE_THRESHOLD and cnt > _N_PLUS_ONE.get((name, fp), 0):
+                    _N_PLUS_ONE[(name, fp)] = cnt
+        if log:
+            _logger().info("action %s %.1fms queries=%d", name, ms, n_queries)
+
+
+# ------------------------- sqlite3 katmanı -------------------------
+class ProfiledCursor(sqlite3.Cursor):
+    _fp = None
+    # Yavaş sorgu takibi: son ifade, parametreleri ve execute + fetch toplam süresi
+    _sql = None
+    _params = None
+    _many = 0
+    _ms = 0.0
+    _rows = 0
+    _slow_logged = True
+
+    def _executed(self, sql, params, t0: float, rows: int = 0, many: int = 0):
+        ms = (time.perf_counter() - t0) * 1000.0
+        if ENABLED:
+            self._fp = record_query(sql, ms, rows)
+        if SLOW_QUERY_MS:
+            self._sql, self._params, self._many = sql, params, many
+            self._ms, self._rows, self._slow_logged = ms, rows, False
+            self._check_slow()
+
+    def _check_slow(self):
+        if not self._slow_logged and self._ms >= SLOW_QUERY_MS:
+            self._slow_logged = True
+            record_slow_query(self.connection, self._sql, self._params, self._ms, self._rows, self._many)
+
+    def execute(self, sql, parameters=(), /):
+        t0 = time.perf_counter()
+        try:
+            return super().execute(sql, parameters)
+        finally:
+            self._executed(sql, parameters, t0)
+
+    def executemany(self, sql, seq_of_parameters, /):
+        if SLOW_QUERY_MS and not isinstance(seq_of_parameters, (list, tuple)):
+            seq_of_parameters = list(seq_of_parameters)
+        t0 = time.perf_counter()
+        try:
+            return super().executemany(sql, seq_of_parameters)
+        finally:
+            first = seq_of_parameters[0] if SLOW_QUERY_MS and seq_of_parameters else None
+            many = len(seq_of_parameters) if SLOW_QUERY_MS else 0
+            self._executed(sql, first, t0, max(0, int(self.rowcount or 0)), many)
+
+    def executescript(self, sql_script, /):
+        t0 = time.perf_counter()
+        try:
+            return super().executescript(sql_script)
+        finally:
+            self._executed(sql_script, None, t0)
+
+    def _fetched(self, t0: float, rows: int):
+        ms = (time.perf_counter() - t0) * 1000.0
+        if ENABLED and self._fp is not None:
+            record_fetch(self._fp, ms, rows)
+        if SLOW_QUERY_MS and not self._slow_logged:
+            # Tablo taraması çoğunlukla fetch sırasında yapılır.
+            self._ms += ms
+            self._rows += rows
+            self._check_slow()
+
+    def fetchone(self):
+        t0 = time.perf_counter()
+        row = super().fetchone()
+        self._fetched(t0, 1 if row is not None else 0)
+        return row
+
+    def fetchmany(self, size=None):
+        t0 = time.perf_counter()
+        rows = super().fetchmany(self.arraysize if size is None else size)
+        self._fetched(t0, len(rows))
+        return rows
+
+    def fetchall(self):
+        t0 = time.perf_counter()
+        rows = super().fetchall()
+        self._fetched(t0, len(rows))
+        return rows
+
+    def __next__(self):
+        t0 = time.perf_counter()
+        row = super().__next__()
+        self._fetched(t0, 1)
+        return row
+
+
+class ProfiledConnection(sqlite3.Connection):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        if ENABLED:
+            self.set_trace_callback(_trace)
+
+    def cursor(self, factory=ProfiledCursor):
+        return super().cursor(factory)
+
+    def execute(self, sql, parameters=(), /):
+        return self.cursor().execute(sql, parameters)
+
+    def executemany(self, sql, seq_of_parameters, /):
+        return self.cursor().executemany(sql, seq_of_parameters)
+
+    def executescript(self, sql_script, /):
+        return self.cursor().executescript(sql_script)
+
+
+def connection_factory():
+    """sqlite3.connect(factory=...) için bağlantı sınıfı; ölçüm ve yavaş sorgu günlüğü kapalıysa None."""
+    return ProfiledConnection if (ENABLED or SLOW_QUERY_MS) else None
+
+
+# ------------------------- metot / ekran işlemi ölçümü -------------------------
+def _wrap_method(name: str, fn):
+    @wraps(fn)
+    def wrapper(*args, **kwargs):
+        with _frame(name, _METHODS):
+            return fn(*args, **kwargs)
+
+    return wrapper
+
+
+def instrument_class(cls, skip=("connect",)):
+    """Sınıfın kendi fonksiyonlarını (dunder ve skip hariç) çağrı ölçümüyle sarar."""
+    if not ENABLED:
+        return cls
+    for attr, fn in list(vars(cls).items()):
+        if attr.startswith("__") or attr in skip or not isinstance(fn, types.FunctionType):
+            continue
+        setattr(cls, attr, _wrap_method(f"{cls.__name__}.{attr}", fn))
+    return cls
+
+
+def _positional_limit(fn) -> int | None:
+    """fn'in alabileceği en fazla konumsal argüman sayısı; *args alıyorsa None."""
+    try:
+        params = inspect.signature(fn).parameters.values()
+    except (TypeError, ValueError):
+        return None
+    n = 0
+    for p in params:
+        if p.kind is p.VAR_POSITIONAL:
+            return None
+        if p.kind in (p.POSITIONAL_ONLY, p.POSITIONAL_OR_KEYWORD):
+            n += 1
+    return n
+
+
+def profiled(name: str):
+    """Ekran işlemi dekoratörü: @profiled("ui.open_trips").
+
+    Sarmalayıcının imzası *args olduğundan PyQt, clicked'e doğrudan bağlı slota checked
+    argümanını da geçirir; fn'in almadığı fazla konumsal argümanlar atılır.
+    """
+
+    def deco(fn):
+        if not ENABLED:
+            return fn
+        limit = _positional_limit(fn)
+
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            if limit is not None and len(args) > limit:
+                args = args[:limit]
+            with _frame(name, _ACTIONS, log=True):
+                return fn(*args, **kwargs)
+
+        return wrapper
+
+    return deco
+
+
+@contextmanager
+def profile_block(name: str):
+    if not ENABLED:
+        yield None
+        return
+    with _frame(name, _ACTIONS, log=True) as frame:
+        yield frame
+
+
+# ------------------------- rapor -------------------------
+def _frame_dict(st: _Stat) -> dict:
+    # Çerçevelerde rows alanı çerçeve içinde çalışan sorgu sayısını tutar.
+    d = st.as_dict()
+    d["queries"] = d.pop("rows")
+    return d
+
+
+def snapshot(top: int = 50) -> dict:
+    """Tanılama paneli için sıralı kopyalar."""
+    with _LOCK:
+        queries = [
+            dict(fingerprint=fp, methods=sorted(_QUERY_METHODS.get(fp) or ()), **st.as_dict())
+            for fp, st in _QUERIES.items()
+        ]
+        methods = [dict(name=n, statements=_STATEMENTS.get(n, 0), **_frame_dict(st)) for n, st in _METHODS.items()]
+        actions = [dict(name=n, **_frame_dict(st)) for n, st in _ACTIONS.items()]
+        n_plus_one = [
+            {"frame": frame, "fingerprint": fp, "count": cnt} for (frame, fp), cnt in _N_PLUS_ONE.items()
+        ]
+    queries.sort(key=lambda d: (d["max_ms"], d["total_ms"]), reverse=True)
+    methods.sort(key=lambda d: d["total_ms"], reverse=True)
+    actions.sort(key=lambda d: d["max_ms"], reverse=True)
+    n_plus_one.sort(key=lambda d: d["count"], reverse=True)
+    return {
+        "enabled": ENABLED,
+        "queries": queries[:top],
+        "methods": methods[:top],
+        "actions": actions[:top],
+        "n_plus_one": n_plus_one[:top],
+        "buckets_ms": list(BUCKETS_MS),
+    }
+
+
+def reset() -> None:
+    with _LOCK:
+        for table in (_METHODS, _ACTIONS, _QUERIES, _QUERY_METHODS, _STATEMENTS, _N_PLUS_ONE):
+            table.clear()
+
+
+def summary_lines(top: int = 15) -> list[str]:
+    snap = snapshot(top)
+    out = ["--- en yavaş sorgular ---"]
+    for q in snap["queries"]:
+        out.append(f"{q['max_ms']:>9.1f}ms max {q['avg_ms']:>8.2f}ms avg x{q['count']:<6} rows={q['rows']:<7} {q['fingerprint'][:160]}")
+    out.append("--- metotlar ---")
+    for m in snap["methods"]:
+        out.append(f"{m['total_ms']:>9.1f}ms top x{m['count']:<6} sorgu={m['queries']:<6} {m['name']}")
+    out.append("--- ekran işlemleri ---")
+    for a in snap["actions"]:
+        out.append(f"{a['max_ms']:>9.1f}ms max x{a['count']:<6} sorgu={a['queries']:<6} {a['name']}")
+    if snap["n_plus_one"]:
+        out.append("--- N+1 şüphesi ---")
+        for n in snap["n_plus_one"]:
+            out.append(f"x{n['count']:<6} {n['frame']}: {n['fingerprint'][:160]}")
+    return out
+
+
+def dump_summary() -> None:
+    if not ENABLED:
+        return
+    log = _logger()
+    for line in summary_lines():
+        log.info(line)
+
+
+if ENABLED:
+    atexit.register(dump_summary)
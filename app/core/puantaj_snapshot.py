@@ -0,0 +1,232 @@
+import calendar
+
+from app.core.cache import LRUCache
+
+
+# (contract_id, month, service_type) -> PuantajSnapshot
+_SNAPSHOT_CACHE = LRUCache(maxsize=16)
+# Her invalidation'da artar; arka planda yüklenirken yazma olduysa eski kopya önbelleğe konmaz.
+_SNAPSHOT_EPOCH = [0]
+
+
+def _norm_month(month: str) -> str:
+    ms = str(month or "").strip()
+    try:
+        a, b = ms.split("-", 1)
+        return f"{int(a):04d}-{int(b):02d}"
+    except Exception:
+        return ms
+
+
+def _fetch(cur, sql: str, params: tuple) -> list[tuple]:
+    # Tablolar ilgili ekran ilk açıldığında oluşturuluyor; eksik tablo boş sonuç sayılır.
+    try:
+        cur.execute(sql, params)
+        return cur.fetchall() or []
+    except Exception:
+        return []
+
+
+def _month_range(month: str) -> tuple[str, str]:
+    try:
+        y, m = (int(x) for x in month.split("-", 1))
+        last = calendar.monthrange(y, m)[1]
+        return f"{y:04d}-{m:02d}-01", f"{y:04d}-{m:02d}-{last:02d}"
+    except Exception:
+        return "", ""
+
+
+class PuantajSnapshot:
+    """Bir (sözleşme, ay, hizmet tipi) bağlamının puantaj verisinin tek okumalık kopyası.
+
+    trip_entries, trip_allocations, trip_prices, trip_plan ve dönem kilidi tek bir okuma
+    transaction'ında yüklenir. Hizmet tipi varyantlarının (PERSONEL TAŞIMA / PERSONEL_TASIMA ...)
+    hepsi okunur; satırlar service_type ile saklandığı için hem birebir filtre (toplu puantaj)
+    hem de varyant toplamı (özet / plan takip) aynı kopyadan üretilir.
+    """
+
+    def __init__(self, contract_id: int, month: str, service_type: str, service_types: list[str]):
+        self.contract_id = int(contract_id)
+        self.month = _norm_month(month)
+        self.service_type = str(service_type or "").strip()
+        self.service_types = [str(x) for x in (service_types or []) if str(x).strip()] or [self.service_type]
+        self.start_date, self.end_date = _month_range(self.month)
+
+        # (service_type, route_params_id, trip_date, time_block, line_no, qty, time_text)
+        self._entries: list[tuple] = []
+        # (service_type, route_params_id, trip_date, time_block, line_no, vehicle_id, driver_id, qty, time_text, note)
+        self._allocations: list[tuple] = []
+        # (service_type, route_params_id, time_block, price)
+        self._prices: list[tuple] = []
+        # (service_type, route_params_id, time_block, vehicle_id, driver_id, route_name) — ayın tüm hizmet tipleri
+        self._plan: list[tuple] = []
+        self.locked = False
+
+    # ------------------------- loading -------------------------
+    @classmethod
+    def load(cls, db, contract_id: int, month: str, service_type: str, service_types: list[str] | None = None):
+        snap = cls(contract_id, month, service_type, list(service_types or []))
+        conn = db.connect()
+        if not conn:
+            return snap
+        try:
+            cur = conn.cursor()
+            cur.execute("BEGIN")
+            st_values = snap.service_types
+            ph = ",".join(["?"] * len(st_values))
+
+            snap._entries = _fetch(
+                cur,
+                f"""
+                SELECT service_type, route_params_id, trip_date, time_block, line_no, qty, COALESCE(time_text,'')
+                FROM trip_entries
+                WHERE contract_id = ?
+                  AND service_type IN ({ph})
+                  AND trip_date BETWEEN ? AND ?
+                ORDER BY route_params_id, time_block, trip_date, line_no
+                """,
+                (snap.contract_id, *st_values, snap.start_date, snap.end_date),
+            )
+
+            snap._allocations = _fetch(
+                cur,
+                f"""
+                SELECT service_type, route_params_id, trip_date, time_block, line_no, vehicle_id, driver_id, qty,
+                       COALESCE(time_text,''), COALESCE(note,'')
+                FROM trip_allocations
+                WHERE contract_id = ?
+                  AND service_type IN ({ph})
+                  AND trip_date BETWEEN ? AND ?
+                ORDER BY route_params_id, time_block, trip_date, line_no
+                """,
+                (snap.contract_id, *st_values, snap.start_date, snap.end_date),
+            )
+
+            snap._prices = _fetch(
+                cur,
+                f"""
+                SELECT service_type, route_params_id, time_block, price
+                FROM trip_prices
+                WHERE contract_id = ? AND month = ? AND service_type IN ({ph})
+                """,
+                (snap.contract_id, snap.month, *st_values),
+            )
+
+            snap._plan = _fetch(
+                cur,
+                """
+                SELECT p.service_type, p.route_params_id, p.time_block, p.vehicle_id, p.driver_id,
+                       COALESCE(r.route_name,'')
+                FROM trip_plan p
+                LEFT JOIN route_params r ON r.id = p.route_params_id
+                WHERE p.contract_id = ? AND p.month = ?
+                """,
+                (snap.contract_id, snap.month),
+            )
+            if not snap._plan:
+                # route_params henüz yoksa JOIN'siz dene.
+                snap._plan = [
+                    tuple(r) + ("",)
+                    for r in _fetch(
+                        cur,
+                        """
+                        SELECT service_type, route_params_id, time_block, vehicle_id, driver_id
+                        FROM trip_plan
+                        WHERE contract_id = ? AND month = ?
+                        """,
+                        (snap.contract_id, snap.month),
+                    )
+                ]
+
+            snap.locked = bool(_fetch(
+                cur,
+                f"""
+                SELECT 1
+                FROM trip_period_lock
+                WHERE contract_id = ? AND month = ? AND service_type IN ({ph}) AND COALESCE(locked,0) = 1
+                LIMIT 1
+                """,
+                (snap.contract_id, snap.month, *st_values),
+            ))
+        except Exception as e:
+            print(f"PuantajSnapshot.load error: {e}")
+        finally:
+            try:
+                conn.rollback()
+            except Exception:
+                pass
+            conn.close()
+        return snap
+
+    # ------------------------- accessors -------------------------
+    def _st_match(self, st, service_type: str | None) -> bool:
+        if service_type is None:
+            return True
+        return str(st or "") == str(service_type)
+
+    def entries(self, service_type: str | None = None) -> list[tuple]:
+        """(route_params_id, trip_date, time_block, line_no, qty, time_text)"""
+        return [r[1:] for r in self._entries if self._st_match(r[0], service_type)]
+
+    def allocations(self, service_type: str | None = None) -> list[tuple]:
+        """get_trip_allocations_for_range() ile aynı kolonlar."""
+        return [r[1:] for r in self._allocations if self._st_match(r[0], service_type)]
+
+    def prices(self, service_type: str | None = None) -> list[tuple]:
+        """(route_params_id, time_block, price)"""
+        return [r[1:] for r in self._prices if self._st_match(r[0], service_type)]
+
+    def plan_rows(self, service_type: str | None = None, all_service_types: bool = False) -> list[tuple]:
+        """(route_params_id, time_block, vehicle_id, driver_id, route_name)"""
+        out = []
+        for r in self._plan:
+            if all_service_types:
+                out.append(r[1:])
+            elif service_type is not None:
+                if str(r[0] or "") == str(service_type):
+                    out.append(r[1:])
+            elif str(r[0] or "") in self.service_types:
+                out.append(r[1:])
+        return out
+
+    def planned_keys(self, service_type: str | None = None, fallback_any: bool = False) -> set[tuple[int, str]]:
+        rows = self.plan_rows(service_type)
+        if not rows and fallback_any:
+            rows = self.plan_rows(all_service_types=True)
+        return {(int(r[0] or 0), str(r[1] or "")) for r in rows if int(r[0] or 0) and str(r[1] or "")}
+
+    def plan_map(self, service_type: str | None = None) -> dict[tuple[int, str], tuple[str, str]]:
+        out = {}
+        for rid, tb, vid, did, _rn in self.plan_rows(service_type):
+            out[(int(rid or 0), str(tb or ""))] = (str(vid) if vid is not None else "", str(did) if did is not None else "")
+        return out
+
+    def total_qty(self, service_type: str | None = None) -> float:
+        return float(sum(float(r[5] or 0) for r in self._entries if self._st_match(r[0], service_type)))
+
+
+def get_puantaj_snapshot(db, contract_id: int, month: str, service_type: str, service_types: list[str] | None = None):
+    key = (int(contract_id), _norm_month(month), str(service_type or "").strip())
+    snap = _SNAPSHOT_CACHE.get(key)
+    if snap is None:
+        epoch = _SNAPSHOT_EPOCH[0]
+        snap = PuantajSnapshot.load(db, contract_id, month, service_type, service_types)
+        if epoch == _SNAPSHOT_EPOCH[0]:
+            _SNAPSHOT_CACHE.put(key, snap)
+    return snap
+
+
+def invalidate_puantaj_snapshots(contract_id: int | None = None, month: str | None = None) -> None:
+    """Yazma sonrası ilgili kopyaları düşürür. Parametresiz çağrı tüm önbelleği temizler."""
+    _SNAPSHOT_EPOCH[0] += 1
+    if contract_id is None:
+        _SNAPSHOT_CACHE.clear()
+        return
+    mk = _norm_month(month) if month else None
+    for key in _SNAPSHOT_CACHE.keys():
+        if key[0] == int(contract_id) and (mk is None or key[1] == mk):
+            _SNAPSHOT_CACHE.invalidate(key)
+
+
+def puantaj_snapshot_cache_stats() -> dict:
+    return _SNAPSHOT_CACHE.stats()
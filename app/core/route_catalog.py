@@ -0,0 +1,78 @@
+"""Durak kataloğu yardımcıları ve durak-durak mesafe matrisi dosyası okuyucu.
+
+route_params.start_point / stops serbest metindir ("A, B, C" ya da "A - B > C"); burada sıralı
+durak adlarına bölünür ve karşılaştırma için normalize edilir. Mesafe matrisi çevrimdışı hesaplanıp
+yerel bir dosya olarak bırakılır (CSV: kaynak;hedef;km ya da JSON); DatabaseManager bu dosyayı
+değiştiğinde stop_distances tablosuna yükler.
+"""
+
+import csv
+import json
+import os
+import re
+
+_STOP_SPLIT_RE = re.compile(r"\s*(?:[,;|\n>→]|\s-\s)\s*")
+_SPACE_RE = re.compile(r"\s+")
+_TR_UPPER = str.maketrans({"i": "İ", "ı": "I"})
+
+
+def normalize_stop_name(name) -> str:
+    """Karşılaştırma anahtarı: Türkçe büyük harf, tek boşluk."""
+    s = _SPACE_RE.sub(" ", str(name or "")).strip()
+    return s.translate(_TR_UPPER).upper()
+
+
+def split_stops(start_point: str = "", stops: str = "") -> list[str]:
+    """Başlangıç noktası + durak metnini sıralı durak adlarına böler; art arda tekrarlar atılır."""
+    out: list[str] = []
+    last_key = None
+    for part in [str(start_point or "")] + _STOP_SPLIT_RE.split(str(stops or "")):
+        name = _SPACE_RE.sub(" ", part or "").strip()
+        if not name:
+            continue
+        key = normalize_stop_name(name)
+        if key == last_key:
+            continue
+        out.append(name)
+        last_key = key
+    return out
+
+
+def _to_km(val):
+    try:
+        km = float(str(val).strip().replace(",", "."))
+    except Exception:
+        return None
+    return km if km >= 0 else None
+
+
+def load_distance_file(path: str) -> list[tuple[str, str, float]]:
+    """Mesafe dosyasını (kaynak, hedef, km) listesine çevirir; dosya yoksa boş liste.
+
+    CSV: ';' ya da ',' ayraçlı, başlık satırı isteğe bağlı. JSON: {"A": {"B": 12.5}} ya da
+    [{"from": "A", "to": "B", "km": 12.5}, ...].
+    """
+    if not path or not os.path.isfile(path):
+        return []
+    out: list[tuple[str, str, float]] = []
+    if str(path).lower().endswith(".json"):
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        if isinstance(data, dict):
+            for a, targets in data.items():
+                for b, km in (targets or {}).items():
+                    out.append((str(a), str(b), _to_km(km)))
+        elif isinstance(data, list):
+            for rec in data:
+                rec = rec or {}
+                out.append((str(rec.get("from") or ""), str(rec.get("to") or ""), _to_km(rec.get("km"))))
+    else:
+        with open(path, "r", encoding="utf-8-sig", newline="") as f:
+            sample = f.read(2048)
+            f.seek(0)
+            delim = ";" if sample.count(";") >= sample.count(",") else ","
+            for row in csv.reader(f, delimiter=delim):
+                if len(row) < 3:
+                    continue
+                out.append((row[0], row[1], _to_km(row[2])))
+    return [(a.strip(), b.strip(), km) for a, b, km in out if a.strip() and b.strip() and km is not None]
@@ -0,0 +1,170 @@
+"""Sözleşme bazlı güzergah dizini (route_params'ın süreç genelinde paylaşılan kopyası).
+
+Puantaj, toplu puantaj, güzergah ve hakediş ekranları aynı sözleşmenin route_params satırlarını
+her seçimde ayrı ayrı sorguluyordu. Dizin, sözleşmenin tüm hizmet tiplerini tek sorguda yükler;
+ekranlar hizmet tipi / id / anahtar bazlı erişimi bu kopyadan yapar. route_params'a yazan her yol
+invalidate_route_directory() çağırır.
+"""
+
+from typing import NamedTuple
+
+from app.core.cache import LRUCache
+from app.core.route_names import norm_route_key
+
+# contract_id -> RouteDirectory
+_DIRECTORY_CACHE = LRUCache(maxsize=32)
+# Yükleme sürerken yazma olduysa eski kopya önbelleğe konmaz.
+_DIRECTORY_EPOCH = [0]
+
+
+class RouteEntry(NamedTuple):
+    id: int
+    service_type: str
+    route_name: str
+    movement_type: str
+    stops: str
+    distance_km: float | None
+    vehicle_capacity: float
+    route_key: str
+    start_point: str
+
+    def params_row(self) -> tuple:
+        """get_route_params_for_contract() satır biçimi."""
+        return (
+            self.id,
+            self.route_name,
+            self.stops,
+            self.distance_km or 0,
+            self.movement_type,
+            self.vehicle_capacity,
+            self.route_key,
+        )
+
+
+class RouteDirectory:
+    """Bir sözleşmenin route_params satırları; id sırasıyla, hizmet tipine göre gruplanmış."""
+
+    def __init__(self, contract_id: int, entries: list[RouteEntry] | None = None):
+        self.contract_id = int(contract_id)
+        self._entries: list[RouteEntry] = list(entries or [])
+        self._by_id: dict[int, RouteEntry] = {}
+        self._by_service: dict[str, list[RouteEntry]] = {}
+        self._by_key: dict[str, list[RouteEntry]] = {}
+        for e in self._entries:
+            self._by_id[e.id] = e
+            self._by_service.setdefault(e.service_type, []).append(e)
+            if e.route_key:
+                self._by_key.setdefault(e.route_key, []).append(e)
+
+    # ------------------------- loading -------------------------
+    @classmethod
+    def load(cls, db, contract_id: int):
+        conn = db.connect()
+        if not conn:
+            return cls(contract_id)
+        try:
+            cur = conn.cursor()
+            db._fill_route_keys(cur)
+            cur.execute(
+                """
+                SELECT id,
+                       COALESCE(service_type,''),
+                       COALESCE(route_name,''),
+                       COALESCE(movement_type,''),
+                       COALESCE(stops,''),
+                       distance_km,
+                       COALESCE(vehicle_capacity,0),
+                       COALESCE(route_key,''),
+                       COALESCE(start_point,'')
+                FROM route_params
+                WHERE contract_id = ?
+                ORDER BY id ASC
+                """,
+                (int(contract_id),),
+            )
+            entries = []
+            for rid, st, rn, mt, stops, km, cap, rk, sp in cur.fetchall() or []:
+                entries.append(
+                    RouteEntry(
+                        int(rid),
+                        str(st).strip(),
+                        str(rn),
+                        str(mt),
+                        str(stops),
+                        None if km is None else float(km),
+                        float(cap or 0),
+                        str(rk or "") or norm_route_key(rn),
+                        str(sp),
+                    )
+                )
+            conn.commit()
+            return cls(contract_id, entries)
+        except Exception as e:
+            print(f"Güzergah dizini yükleme hatası: {e}")
+            return cls(contract_id)
+        finally:
+            conn.close()
+
+    # ------------------------- accessors -------------------------
+    def __len__(self):
+        return len(self._entries)
+
+    def service_types(self) -> list[str]:
+        return sorted(st for st in self._by_service if st)
+
+    def routes(self, service_types=None) -> list[RouteEntry]:
+        """service_types: None (tümü), tek hizmet tipi ya da varyant listesi."""
+        if service_types is None:
+            return list(self._entries)
+        if isinstance(service_types, str):
+            return list(self._by_service.get(service_types.strip(), []))
+        wanted = {str(x or "").strip() for x in service_types}
+        return [e for e in self._entries if e.service_type in wanted]
+
+    def params_rows(self, service_type: str) -> list[tuple]:
+        return [e.params_row() for e in self._by_service.get(str(service_type or "").strip(), [])]
+
+    def get(self, route_params_id) -> RouteEntry | None:
+        try:
+            return self._by_id.get(int(route_params_id))
+        except Exception:
+            return None
+
+    def name(self, route_params_id, default: str = "") -> str:
+        e = self.get(route_params_id)
+        return e.route_name if e is not None else default
+
+    def movement_type(self, route_params_id) -> str:
+        e = self.get(route_params_id)
+        return e.movement_type.strip() if e is not None else ""
+
+    def capacity(self, route_params_id) -> float:
+        e = self.get(route_params_id)
+        return e.vehicle_capacity if e is not None else 0.0
+
+    def by_key(self, route_key: str) -> list[RouteEntry]:
+        return list(self._by_key.get(str(route_key or ""), []))
+
+
+def get_route_directory(db, contract_id: int) -> RouteDirectory:
+    key = int(contract_id)
+    directory = _DIRECTORY_CACHE.get(key)
+    if directory is None:
+        epoch = _DIRECTORY_EPOCH[0]
+        directory = RouteDirectory.load(db, key)
+        if epoch == _DIRECTORY_EPOCH[0]:
+            _DIRECTORY_CACHE.put(key, directory)
+    return directory
+
+
+def invalidate_route_directory(contract_id: int | None = None) -> None:
+    """route_params yazımı sonrası çağrılır. Parametresiz çağrı tüm dizinleri düşürür."""
+    _DIRECTORY_EPOCH[0] += 1
+    if contract_id is None:
+        _DIRECTORY_CACHE.clear()
+        return
+    _DIRECTORY_CACHE.invalidate(int(contract_id))
+
+
+def route_directory_cache_stats() -> dict:
+    return _DIRECTORY_CACHE.stats()
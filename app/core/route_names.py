@@ -0,0 +1,79 @@
+"""Güzergah adı / hareket türü normalizasyonu (süreç genelinde önbellekli).
+
+Sözleşme fiyat matrisi ile route_params eşleştirmesi aynı adları iç içe döngülerde tekrar tekrar
+normalize ediyordu; burada her farklı metin bir kez hesaplanır. route_params.route_key kolonu
+norm_route_key() çıktısını kalıcı olarak tutar.
+"""
+
+import re
+from functools import lru_cache
+
+_SPACE_RE = re.compile(r"\s+")
+_NON_KEY_RE = re.compile(r"[^0-9a-zçğıöşü]")
+_TR_LOWER = str.maketrans({"I": "ı", "İ": "i"})
+
+_MOVEMENT_KEYS_RAW = ("gidis_gelis", "movement_type", "hareket_turu", "hareket", "hareketTuru", "hareket_tipi", "tip")
+_MOVEMENT_KEYS_NORM = ("movement_type_norm", "pricing_category") + _MOVEMENT_KEYS_RAW
+
+
+@lru_cache(maxsize=8192)
+def norm_route_key(name: str) -> str:
+    """Karşılaştırma anahtarı: Türkçe küçük harf (I->ı, İ->i), boşluksuz, yalnızca harf/rakam."""
+    txt = str(name or "").strip().translate(_TR_LOWER).lower()
+    if not txt:
+        return ""
+    return _NON_KEY_RE.sub("", _SPACE_RE.sub("", txt))
+
+
+@lru_cache(maxsize=8192)
+def route_key_variants(name: str) -> tuple[str, ...]:
+    """Anahtar ve sonundaki 'v' eki eklenmiş/çıkarılmış hâli (ör. "hat1v" <-> "hat1")."""
+    base = norm_route_key(name)
+    if not base:
+        return ()
+    alt = base[:-1] if (base.endswith("v") and len(base) > 1) else base + "v"
+    return (base, alt) if alt and alt != base else (base,)
+
+
+def split_legacy_route_name(route_name: str, movement_type: str = "") -> tuple[str, str]:
+    """Eski kayıtlarda hareket türü route_name içine "hat - hareket" olarak gömülü olabilir."""
+    rn = str(route_name or "").strip()
+    mt = str(movement_type or "").strip()
+    if not mt and " - " in rn:
+        p1, p2 = rn.split(" - ", 1)
+        rn, mt = p1.strip(), p2.strip()
+    return rn, mt
+
+
+def route_key_for(route_name: str, movement_type: str = "") -> str:
+    """route_params satırı için kalıcı anahtar (eski "hat - hareket" biçimi ayrıştırılarak)."""
+    return norm_route_key(split_legacy_route_name(route_name, movement_type)[0])
+
+
+@lru_cache(maxsize=1024)
+def movement_type_key(raw: str) -> str:
+    s = str(raw or "").strip().lower()
+    if "mesai" in s:
+        return "fazla mesai"
+    if "paket" in s or (("sabah" in s) and ("akşam" in s or "aksam" in s)):
+        return "sabah-akşam"
+    if "cift" in s or "çift" in s:
+        return "tek servis"
+    if "tek" in s:
+        return "tek servis"
+    return s
+
+
+def extract_movement_type(rec: dict, normalize: bool = True) -> str:
+    """Fiyat matrisi kaydından hareket türü; normalize=False ise ham metin döner."""
+    if not isinstance(rec, dict):
+        return ""
+    keys = _MOVEMENT_KEYS_NORM if normalize else _MOVEMENT_KEYS_RAW
+    raw = ""
+    for k in keys:
+        raw = rec.get(k)
+        if raw:
+            break
+    if not normalize:
+        return str(raw or "").strip()
+    return movement_type_key(str(raw or ""))
@@ -0,0 +1,195 @@
+"""Açılış zaman çizelgesi ve aşamalı açılış.
+
+Pencere önce gösterilir; ilk ekran için gerekmeyen işler (Qt kaynakları, çevrimdışı uyarı sesi,
+PDF font metrikleri) olay döngüsü başladıktan sonra StartupPipeline ile sırayla yapılır:
+- GUI aşamaları (widget / QMediaPlayer gibi GUI thread'ine bağlı işler) her biri ayrı bir
+  zamanlayıcı turunda çalışır, arada olaylar işlenir,
+- arka plan aşamaları QThreadPool'da çalışır (Qt nesnesine dokunmamalı).
+
+mark() ile işaretlenen anlar ve aşama süreleri, tüm aşamalar bitince STARTUP_LOG_PATH'e bir JSON
+satırı olarak yazılır (her açılışta, sürüm bilgisiyle). config yollarının çözüm süresi de
+"config_<cache/probe/source>" aşaması olarak eklenir. Sürümlere göre özet: startup_report.py
+"""
+
+import json
+import os
+import sys
+import threading
+import time
+from datetime import datetime
+
+from PyQt6.QtCore import QObject, QRunnable, QThreadPool, QTimer, pyqtSignal
+
+import config
+
+# Süreçteki ilk import (main.py'nin en başı) sıfır noktasıdır.
+_T0 = time.perf_counter()
+_LOCK = threading.Lock()
+_MARKS: list[tuple[str, float]] = []
+_STAGES: list[dict] = []
+_REPORTED = False
+
+
+def elapsed_ms() -> float:
+    return (time.perf_counter() - _T0) * 1000.0
+
+
+def mark(name: str) -> float:
+    ms = elapsed_ms()
+    with _LOCK:
+        _MARKS.append((str(name), ms))
+    return ms
+
+
+def mark_time(name: str) -> float | None:
+    with _LOCK:
+        for n, ms in _MARKS:
+            if n == name:
+                return ms
+    return None
+
+
+def build_mode() -> str:
+    """"source" (python main.py), "onedir" ya da "onefile" (PyInstaller)."""
+    if not getattr(sys, "frozen", False):
+        return "source"
+    exe_dir = os.path.normcase(os.path.dirname(os.path.abspath(sys.executable)))
+    bundle_dir = os.path.normcase(os.path.abspath(getattr(sys, "_MEIPASS", exe_dir)))
+    # onefile paket her açılışta geçici bir klasöre açılır; onedir'de içerik EXE'nin yanındadır
+    return "onedir" if bundle_dir.startswith(exe_dir) else "onefile"
+
+
+def ensure_resources() -> None:
+    """Qt kaynak dosyasını (":/..." yolları) kaydeder; ilk çağrıdan sonra maliyetsizdir."""
+    import ui.icons.context_rc  # noqa: F401
+
+
+def report() -> dict:
+    """Zaman çizelgesini günlüğe yazar (süreç başına bir kez) ve kaydı döner."""
+    global _REPORTED
+    with _LOCK:
+        if _REPORTED:
+            return {}
+        _REPORTED = True
+        resolved = config.settings.timing()
+        stages = list(_STAGES) + [{"name": f"config_{resolved['source']}", "kind": "config", "ms": resolved["ms"]}]
+        entry = {
+            "ts": datetime.now().isoformat(timespec="seconds"),
+            "version": config.APP_VERSION,
+            "build": build_mode(),
+            "marks": {n: round(ms, 1) for n, ms in _MARKS},
+            "stages": stages,
+        }
+    interactive = entry["marks"].get("interactive")
+    done = entry["marks"].get("deferred_done")
+    print(f"Açılış: etkileşime hazır {interactive or 0:.0f} ms, ertelenen işler {done or 0:.0f} ms'de bitti")
+    try:
+        log_path = config.STARTUP_LOG_PATH
+        os.makedirs(os.path.dirname(log_path), exist_ok=True)
+        with open(log_path, "a", encoding="utf-8") as fh:
+            fh.write(json.dumps(entry, ensure_ascii=False) + "\n")
+    except Exception as e:
+        print(f"Açılış günlüğü yazılamadı: {e}")
+    return entry
+
+
+def _record_stage(name: str, kind: str, start_ms: float, ms: float, error: Exception | None) -> None:
+    row = {"name": name, "kind": kind, "start_ms": round(start_ms, 1), "ms": round(ms, 1)}
+    if error is not None:
+        row["error"] = str(error)
+        print(f"Açılış aşaması hatası ({name}): {error}")
+    with _LOCK:
+        _STAGES.append(row)
+
+
+class _StageSignals(QObject):
+    # aşama adı, başlangıç ms, süre ms, hata
+    finished = pyqtSignal(str, float, float, object)
+
+
+class _StageTask(QRunnable):
+    def __init__(self, name: str, fn):
+        super().__init__()
+        self.name = name
+        self.fn = fn
+        self.signals = _StageSignals()
+        self.setAutoDelete(False)
+
+    def run(self):
+        start = elapsed_ms()
+        error = None
+        try:
+            self.fn()
+        except Exception as e:
+            error = e
+        self.signals.finished.emit(self.name, start, elapsed_ms() - start, error)
+
+
+class StartupPipeline(QObject):
+    """Pencere gösterildikten sonra çalışan ertelenmiş açılış işleri.
+
+    add(ad, fn) GUI aşaması, add(ad, fn, background=True) arka plan aşaması ekler. start() ile
+    olay döngüsünün ilk turunda "interactive" işaretlenir; GUI aşamaları step_ms aralıklarla tek
+    tek çalışır, arka plan aşamaları hemen havuza verilir. Hepsi bitince report() çağrılır.
+    """
+
+    done = pyqtSignal()
+
+    def __init__(self, parent=None, step_ms: int = 0, pool: QThreadPool | None = None):
+        super().__init__(parent)
+        self._pool = pool or QThreadPool.globalInstance()
+        self._step_ms = max(0, int(step_ms or 0))
+        self._gui: list[tuple[str, object]] = []
+        self._background: list[tuple[str, object]] = []
+        self._tasks: list[_StageTask] = []
+        self._pending = 0
+
+    def add(self, name: str, fn, background: bool = False) -> None:
+        (self._background if background else self._gui).append((str(name), fn))
+
+    def start(self, delay_ms: int = 0) -> None:
+        QTimer.singleShot(max(0, int(delay_ms or 0)), self._begin)
+
+    def _begin(self) -> None:
+        mark("interactive")
+        self._pending = len(self._gui) + len(self._background)
+        for name, fn in self._background:
+            task = _StageTask(name, fn)
+            task.signals.finished.connect(self._on_background_done)
+            self._tasks.append(task)
+            self._pool.start(task)
+        self._background = []
+        if self._pending == 0:
+            self._finish()
+            return
+        QTimer.singleShot(self._step_ms, self._run_next_gui)
+
+    def _run_next_gui(self) -> None:
+        if not self._gui:
+            return
+        name, fn = self._gui.pop(0)
+        start = elapsed_ms()
+        error = None
+        try:
+            fn()
+        except Exception as e:
+            error = e
+        _record_stage(name, "gui", start, elapsed_ms() - start, error)
+        self._stage_done()
+        if self._gui:
+            QTimer.singleShot(self._step_ms, self._run_next_gui)
+
+    def _on_background_done(self, name: str, start_ms: float, ms: float, error) -> None:
+        _record_stage(name, "background", start_ms, ms, error)
+        self._tasks = [t for t in self._tasks if t.name != name]
+        self._stage_done()
+
+    def _stage_done(self) -> None:
+        self._pending -= 1
+        if self._pending <= 0:
+            self._finish()
+
+    def _finish(self) -> None:
+        mark("deferred_done")
+        report()
+        self.done.emit()
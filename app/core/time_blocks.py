@@ -0,0 +1,142 @@
+"""Saat dilimi (time_block / time_text) kayıt defteri ve aralık sorguları.
+
+"HH:MM-HH:MM" (giriş-çıkış) ya da tek "HH:MM" metinleri bir kez ayrıştırılıp (start, end, wraps)
+kaydına çevrilir; aynı metin için hep aynı nesne döner. Kurallar DB'deki çakışma kontrolüyle aynıdır:
+tek saat 15 dakikalık dilim sayılır, başı ve sonu aynı olan aralık da 15 dakikaya genişletilir,
+end <= start ise aralık gece yarısını geçer (wraps).
+"""
+
+from bisect import bisect_left
+from functools import lru_cache
+from typing import NamedTuple, Optional
+
+DAY_MINUTES = 1440
+SINGLE_TIME_MINUTES = 15
+DAY_START_MINUTES = 7 * 60
+
+
+class TimeBlock(NamedTuple):
+    start: int
+    end: int
+    wraps: bool
+
+    def segments(self, gap: int = 0) -> list[tuple[int, int]]:
+        """[0, 1440) içinde yarı açık parçalar; gap kadar dönüş payı sona eklenir."""
+        return day_segments(self.start, self.end, gap)
+
+    def overlaps(self, other: "TimeBlock") -> bool:
+        for s1, e1 in self.segments():
+            for s2, e2 in other.segments():
+                if max(s1, s2) < min(e1, e2):
+                    return True
+        return False
+
+
+def parse_hhmm(txt: str) -> Optional[int]:
+    """"HH:MM" -> gün içi dakika; geçersizse None."""
+    t = str(txt or "").strip()
+    parts = t.split(":")
+    if len(parts) != 2 or not parts[0].isdigit() or not parts[1].isdigit():
+        return None
+    hh, mm = int(parts[0]), int(parts[1])
+    if hh < 0 or hh > 23 or mm < 0 or mm > 59:
+        return None
+    return hh * 60 + mm
+
+
+@lru_cache(maxsize=4096)
+def _intern(text: str) -> Optional[TimeBlock]:
+    if not text:
+        return None
+    if "-" in text:
+        left, right = (text.split("-", 1) + [""])[:2]
+        s, e = parse_hhmm(left), parse_hhmm(right)
+        if s is None or e is None:
+            return None
+        if s == e:
+            e = (s + SINGLE_TIME_MINUTES) % DAY_MINUTES
+    else:
+        s = parse_hhmm(text)
+        if s is None:
+            return None
+        e = (s + SINGLE_TIME_MINUTES) % DAY_MINUTES
+    return TimeBlock(s, e, e <= s)
+
+
+def parse_time_block(time_block: str, time_text: str = "") -> Optional[TimeBlock]:
+    """time_text doluysa o, değilse time_block ayrıştırılır. Geçersizse None."""
+    return _intern(str(time_text or "").strip() or str(time_block or "").strip())
+
+
+def day_segments(start: int, end: int, gap: int = 0) -> list[tuple[int, int]]:
+    s = int(start) % DAY_MINUTES
+    length = (int(end) - int(start)) % DAY_MINUTES or DAY_MINUTES
+    length = min(DAY_MINUTES, length + max(0, int(gap or 0)))
+    e = s + length
+    if e <= DAY_MINUTES:
+        return [(s, e)]
+    return [(s, DAY_MINUTES), (0, e - DAY_MINUTES)]
+
+
+def split_time_block(tb: str) -> tuple[str, str]:
+    """"08:00-16:00" -> ("08:00", "16:00"); tek saat -> ("08:00", "")."""
+    tbs = str(tb or "").strip()
+    if not tbs:
+        return "", ""
+    if "-" in tbs:
+        a, b = (tbs.split("-", 1) + [""])[:2]
+        return a.strip(), b.strip()
+    return tbs, ""
+
+
+def tb_sort_key(tb_val: str, day_start: int = DAY_START_MINUTES):
+    """Saat dilimi sıralama anahtarı; gün day_start'ta (07:00) başlar, G1/C1 kodları en önde."""
+    tbs = str(tb_val or "").strip().upper()
+    if len(tbs) == 2 and tbs[0] in ("G", "C") and tbs[1].isdigit():
+        return (0, int(tbs[1]), 0 if tbs[0] == "G" else 1)
+    m = parse_hhmm(split_time_block(tbs)[0])
+    if m is None:
+        return (2, 999999, 0)
+    if m < int(day_start):
+        m += DAY_MINUTES
+    return (1, m, 0)
+
+
+class IntervalIndex:
+    """Gün içi aralıklar için sorgulanabilir indeks (başlangıca göre sıralı parça listesi).
+
+    Parçalar başlangıç dakikasına göre sıralı tutulur; sorguda yalnızca [qs - en uzun parça, qe)
+    aralığında başlayanlar taranır, bu yüzden her sorgu tüm listeyi dolaşmaz.
+    """
+
+    __slots__ = ("_starts", "_items", "_max_len", "_count")
+
+    def __init__(self):
+        self._starts: list[int] = []
+        self._items: list[tuple[int, int, int, object]] = []
+        self._max_len = 0
+        self._count = 0
+
+    def __len__(self):
+        return int(self._count)
+
+    def add(self, block: TimeBlock, payload=None) -> None:
+        seq = self._count
+        self._count += 1
+        for s, e in block.segments():
+            i = bisect_left(self._starts, s)
+            self._starts.insert(i, s)
+            self._items.insert(i, (s, e, seq, payload))
+            self._max_len = max(self._max_len, e - s)
+
+    def overlapping(self, block: TimeBlock) -> list:
+        out = []
+        seen = set()
+        for qs, qe in block.segments():
+            lo = bisect_left(self._starts, qs - self._max_len)
+            hi = bisect_left(self._starts, qe)
+            for _s, e, seq, payload in self._items[lo:hi]:
+                if e > qs and seq not in seen:
+                    seen.add(seq)
+                    out.append(payload)
+        return out
@@ -4,9 +4,7 @@ from __future__ import annotations
 from dataclasses import dataclass
 import json
 import re
-from datetime import datetime
 
-from PyQt6 import uic
 from PyQt6.QtCore import Qt, QDate, QTimer, QSignalBlocker
 from PyQt6.QtGui import QColor, QFont
 from PyQt6.QtWidgets import (
@@ -31,9 +29,16 @@ from PyQt6.QtWidgets import (
     QWidget,
 )
 
+from app.core.async_loader import AsyncLoader
 from app.core.db_manager import DatabaseManager
-from app.utils.excel_utils import create_excel
-from config import get_ui_path
+from app.core.profiler import profiled
+from app.core.puantaj_snapshot import get_puantaj_snapshot
+from app.core.route_names import extract_movement_type, norm_route_key, route_key_variants
+from app.core.time_blocks import tb_sort_key
+from app.services.periods import close_period
+from app.services.puantaj import VEHICLE_MOVEMENT_LIMIT, PuantajRow, PuantajSaveResult, save_puantaj
+from app.utils.excel_utils import ask_excel_file, create_excel, start_excel_export
+from app.core.forms import load_ui
 
 
 def _norm_month_key(m: str) -> str:
@@ -49,42 +54,6 @@ def _norm_month_key(m: str) -> str:
         return ms
 
 
-def _parse_hhmm(txt: str):
-    m = re.match(r"^(\d{1,2}):(\d{2})$", (txt or "").strip())
-    if not m:
-        return None
-    hh = int(m.group(1))
-    mm = int(m.group(2))
-    if hh < 0 or hh > 23 or mm < 0 or mm > 59:
-        return None
-    return hh, mm
-
-
-def _tb_sort_key_0700(tb_val: str):
-    tbs = str(tb_val or "").strip().upper()
-    m = re.match(r"^([GC])(\d)$", tbs)
-    if m:
-        gc = 0 if m.group(1) == "G" else 1
-        return (0, int(m.group(2)), gc)
-
-    t0 = tbs
-    if "-" in t0:
-        t0 = (t0.split("-", 1) + [""])[0].strip()
-
-    parsed = _parse_hhmm(t0)
-    if parsed is not None:
-        hh, mm = parsed
-        try:
-            minutes = int(hh) * 60 + int(mm)
-        except Exception:
-            minutes = 999999
-        if minutes < (7 * 60):
-            minutes += 24 * 60
-        return (1, minutes, 0)
-
-    return (2, 999999, 0)
-
-
 @dataclass(frozen=True)
 class AttendanceContext:
     contract_id: int
@@ -95,7 +64,7 @@ class AttendanceContext:
 class AttendanceApp(QWidget):
     def __init__(self, parent=None, user_data=None, db: DatabaseManager | None = None):
         super().__init__(parent)
-        uic.loadUi(get_ui_path("attendance_window.ui"), self)
+        load_ui("attendance_window.ui", self)
         self.setObjectName("main_form")
 
         self.user_data = user_data or {}
@@ -108,6 +77,8 @@ class AttendanceApp(QWidget):
         self._active_month = ""
         self._embedded_bulk = None
         self._embedded_bulk_ctx = None
+        # Sekme verileri arka planda yüklenir; combo değişimleri birleştirilir, eski sonuçlar atılır.
+        self._loader = AsyncLoader(self, debounce_ms=80)
 
         self._init_filters()
         self._apply_active_month_defaults()
@@ -188,6 +159,12 @@ class AttendanceApp(QWidget):
             except Exception:
                 pass
 
+        if hasattr(self, "btn_plan_sapma"):
+            try:
+                self.btn_plan_sapma.clicked.connect(self._open_plan_variance)
+            except Exception:
+                pass
+
         if hasattr(self, "sekmeli_form"):
             try:
                 self.sekmeli_form.currentChanged.connect(self._on_tab_changed)
@@ -212,67 +189,29 @@ class AttendanceApp(QWidget):
 
         self._reload_summary()
 
+    @profiled("puantaj.close_month")
     def _close_month(self):
         month = str(self._selected_month_key() or "").strip()
         if not month or "-" not in month:
             QMessageBox.warning(self, "Uyarı", "Ay kapatma için dönem seçiniz.")
             return
 
-        try:
-            from app.core.db_manager import DatabaseManager
-
-            db = DatabaseManager()
-            conn = db.connect()
-            if not conn:
-                QMessageBox.critical(self, "Hata", "Veritabanına bağlanılamadı.")
-                return
-
-            cur = conn.cursor()
-            cur.execute(
-                """
-                SELECT COUNT(1)
-                FROM trip_period_lock
-                WHERE month = ? AND COALESCE(locked,0) = 0
-                """,
-                (str(month),),
-            )
-            unlocked_cnt = int((cur.fetchone() or [0])[0] or 0)
-
-            cur.execute(
-                """
-                SELECT COUNT(1)
-                FROM hakedis
-                WHERE period = ?
-                  AND UPPER(COALESCE(status,'')) NOT IN ('ONAYLANDI','FATURALANDI')
-                """,
-                (str(month),),
-            )
-            pending_hakedis_cnt = int((cur.fetchone() or [0])[0] or 0)
-
-            conn.close()
-        except Exception:
-            try:
-                conn.close()
-            except Exception:
-                pass
+        user_id = int((self.user_data or {}).get("id") or 0)
+        ok, check = close_period(self.db, str(month), user_id)
+        if not check.ok:
             QMessageBox.critical(self, "Hata", "Ay kapatma kontrolü sırasında hata oluştu.")
             return
 
-        if unlocked_cnt > 0 or pending_hakedis_cnt > 0:
+        if not check.can_close:
             msg = (
                 f"Ay kapatılamaz: {month}\n\n"
-                f"- Kilitlenmemiş dönem kaydı: {unlocked_cnt}\n"
-                f"- Onaylanmamış/Faturalanmamış hakediş: {pending_hakedis_cnt}\n\n"
+                f"- Kilitlenmemiş dönem kaydı: {check.unlocked_locks}\n"
+                f"- Onaylanmamış/Faturalanmamış hakediş: {check.pending_hakedis}\n\n"
                 "Eksikleri tamamlayıp tekrar deneyiniz."
             )
             QMessageBox.warning(self, "Uyarı", msg)
             return
 
-        user_id = int((self.user_data or {}).get("id") or 0)
-        try:
-            ok = self.db.set_period_closed(str(month), user_id)
-        except Exception:
-            ok = False
         if not ok:
             QMessageBox.critical(self, "Hata", "Ay kapatma işlemi kaydedilemedi.")
             return
@@ -307,10 +246,14 @@ class AttendanceApp(QWidget):
             return
 
     def _render_toplu_puantaj_tab(self):
+        if not hasattr(self, "tbl_toplu_puantaj"):
+            return
+        self._schedule_context_load()
+
+    def _fill_toplu_puantaj_tab(self, ctx: AttendanceContext | None, snap):
         if not hasattr(self, "tbl_toplu_puantaj"):
             return
 
-        ctx = self._current_context()
         tbl = self.tbl_toplu_puantaj
 
         try:
@@ -333,61 +276,15 @@ class AttendanceApp(QWidget):
         except Exception:
             return
 
-        if ctx is None:
+        if ctx is None or snap is None:
             tbl.setRowCount(0)
             return
 
-        st_values = self._service_type_values(ctx.service_type) or [str(ctx.service_type)]
-        placeholders = ",".join(["?"] * len(st_values))
-
-        rows = []
-        try:
-            conn = self.db.connect()
-            cur = conn.cursor()
-            cur.execute(
-                f"""
-                SELECT p.route_params_id,
-                       p.time_block,
-                       COALESCE(r.route_name,'')
-                FROM trip_plan p
-                LEFT JOIN route_params r ON r.id = p.route_params_id
-                WHERE p.contract_id = ?
-                  AND p.month = ?
-                  AND p.service_type IN ({placeholders})
-                GROUP BY p.route_params_id, p.time_block
-                ORDER BY COALESCE(r.route_name,''), p.time_block
-                """,
-                (int(ctx.contract_id), str(_norm_month_key(ctx.month)), *st_values),
-            )
-            rows = cur.fetchall() or []
-
-            if not rows:
-                try:
-                    cur.execute(
-                        """
-                        SELECT p.route_params_id,
-                               p.time_block,
-                               COALESCE(r.route_name,'')
-                        FROM trip_plan p
-                        LEFT JOIN route_params r ON r.id = p.route_params_id
-                        WHERE p.contract_id = ?
-                          AND p.month = ?
-                        GROUP BY p.route_params_id, p.time_block
-                        ORDER BY COALESCE(r.route_name,''), p.time_block
-                        """,
-                        (int(ctx.contract_id), str(_norm_month_key(ctx.month))),
-                    )
-                    rows = cur.fetchall() or []
-                except Exception:
-                    rows = []
-
-            conn.close()
-        except Exception:
-            try:
-                conn.close()
-            except Exception:
-                pass
-            rows = []
+        plan_rows = snap.plan_rows() or snap.plan_rows(all_service_types=True)
+        grouped: dict[tuple[int, str], str] = {}
+        for rid, tb, _vid, _did, rn in plan_rows:
+            grouped.setdefault((int(rid or 0), str(tb or "")), str(rn or ""))
+        rows = [(rid, tb, rn) for (rid, tb), rn in grouped.items()]
 
         # Ensure deterministic ordering for multiple time_blocks per route:
         # 07:00 is treated as day start, so 08:00.. comes before 00:00..
@@ -396,7 +293,7 @@ class AttendanceApp(QWidget):
                 rows,
                 key=lambda x: (
                     str(x[2] or ""),
-                    _tb_sort_key_0700(str(x[1] or "")),
+                    tb_sort_key(str(x[1] or "")),
                     int(x[0] or 0),
                 ),
             )
@@ -477,9 +374,13 @@ class AttendanceApp(QWidget):
     def _render_plan_tracking_tab(self):
         if not hasattr(self, "tbl_plan_takip"):
             return
+        self._schedule_context_load()
 
-        ctx = self._current_context()
-        if ctx is None:
+    def _fill_plan_tracking_tab(self, ctx: AttendanceContext | None, tracking):
+        if not hasattr(self, "tbl_plan_takip"):
+            return
+
+        if ctx is None or tracking is None:
             try:
                 self.tbl_plan_takip.setRowCount(0)
                 self.tbl_plan_takip.setColumnCount(0)
@@ -489,117 +390,8 @@ class AttendanceApp(QWidget):
 
         y, m = self._selected_year_month()
         days_in_month = QDate(y, m, 1).daysInMonth()
-        start_date = QDate(y, m, 1).toString("yyyy-MM-dd")
-        end_date = QDate(y, m, days_in_month).toString("yyyy-MM-dd")
-
-        month_key = _norm_month_key(str(ctx.month))
-
-        st_values = self._service_type_values(ctx.service_type) or [str(ctx.service_type)]
 
-        planned_keys: set[tuple[int, str]] = set()
-        try:
-            conn = self.db.connect()
-            cur = conn.cursor()
-            placeholders = ",".join(["?"] * len(st_values))
-            cur.execute(
-                f"""
-                SELECT route_params_id, time_block
-                FROM trip_plan
-                WHERE contract_id = ?
-                  AND month = ?
-                  AND service_type IN ({placeholders})
-                """,
-                (int(ctx.contract_id), str(month_key), *st_values),
-            )
-            rows = cur.fetchall() or []
-
-            if not rows:
-                try:
-                    cur.execute(
-                        """
-                        SELECT route_params_id, time_block
-                        FROM trip_plan
-                        WHERE contract_id = ?
-                          AND month = ?
-                        """,
-                        (int(ctx.contract_id), str(month_key)),
-                    )
-                    rows = cur.fetchall() or []
-                except Exception:
-                    rows = []
-
-            conn.close()
-            planned_keys = {
-                (int(r[0] or 0), str(r[1] or ""))
-                for r in rows
-                if int(r[0] or 0) and str(r[1] or "")
-            }
-        except Exception:
-            try:
-                conn.close()
-            except Exception:
-                pass
-            planned_keys = set()
-
-        planned_per_day = float(len(planned_keys))
-        actual_per_day = {d: 0.0 for d in range(1, days_in_month + 1)}
-
-        try:
-            conn2 = self.db.connect()
-            cur2 = conn2.cursor()
-            placeholders = ",".join(["?"] * len(st_values))
-            if planned_keys:
-                cur2.execute(
-                    f"""
-                    SELECT trip_date, route_params_id, time_block, COALESCE(SUM(qty),0)
-                    FROM trip_entries
-                    WHERE contract_id = ?
-                      AND service_type IN ({placeholders})
-                      AND trip_date BETWEEN ? AND ?
-                    GROUP BY trip_date, route_params_id, time_block
-                    """,
-                    (int(ctx.contract_id), *st_values, start_date, end_date),
-                )
-                for trip_date, rid, tb, qty_sum in (cur2.fetchall() or []):
-                    try:
-                        rid_i = int(rid or 0)
-                        tb_s = str(tb or "")
-                        if (rid_i, tb_s) not in planned_keys:
-                            continue
-                        qd = QDate.fromString(str(trip_date or ""), "yyyy-MM-dd")
-                        if not qd.isValid():
-                            continue
-                        day = int(qd.day())
-                        actual_per_day[day] = float(actual_per_day.get(day, 0) or 0) + float(qty_sum or 0)
-                    except Exception:
-                        continue
-            else:
-                cur2.execute(
-                    f"""
-                    SELECT trip_date, COALESCE(SUM(qty),0)
-                    FROM trip_entries
-                    WHERE contract_id = ?
-                      AND service_type IN ({placeholders})
-                      AND trip_date BETWEEN ? AND ?
-                    GROUP BY trip_date
-                    """,
-                    (int(ctx.contract_id), *st_values, start_date, end_date),
-                )
-                for trip_date, qty_sum in (cur2.fetchall() or []):
-                    try:
-                        qd = QDate.fromString(str(trip_date or ""), "yyyy-MM-dd")
-                        if not qd.isValid():
-                            continue
-                        day = int(qd.day())
-                        actual_per_day[day] = float(actual_per_day.get(day, 0) or 0) + float(qty_sum or 0)
-                    except Exception:
-                        continue
-            conn2.close()
-        except Exception:
-            try:
-                conn2.close()
-            except Exception:
-                pass
+        planned_per_day, actual_per_day = tracking
 
         tbl = self.tbl_plan_takip
         try:
@@ -721,20 +513,22 @@ class AttendanceApp(QWidget):
 
         return AttendanceContext(contract_id=int(contract_id), month=month, service_type=service_type)
 
+    def _snapshot(self, ctx: AttendanceContext):
+        st_values = self._service_type_values(ctx.service_type) or [str(ctx.service_type)]
+        return get_puantaj_snapshot(self.db, ctx.contract_id, ctx.month, ctx.service_type, st_values)
+
     def _is_period_locked(self) -> bool:
         ctx = self._current_context()
         if ctx is None:
             return False
-        for st in self._service_type_values(ctx.service_type) or [ctx.service_type]:
-            state = self.db.get_trip_period_lock(ctx.contract_id, ctx.month, st)
-            if bool((state or {}).get("locked")):
-                return True
-        return False
+        return bool(self._snapshot(ctx).locked)
 
     # ------------------------- Lock / unlock -------------------------
     def _refresh_lock_ui(self):
-        ctx = self._current_context()
-        if ctx is None:
+        self._schedule_context_load()
+
+    def _fill_lock_ui(self, ctx: AttendanceContext | None, snap):
+        if ctx is None or snap is None:
             if hasattr(self, "btn_onayla_kilitle"):
                 self.btn_onayla_kilitle.setEnabled(False)
             if hasattr(self, "btn_onay_kaldir"):
@@ -746,12 +540,7 @@ class AttendanceApp(QWidget):
                 self.btn_yazdir.setEnabled(False)
             return
 
-        locked = False
-        for st in self._service_type_values(ctx.service_type) or [ctx.service_type]:
-            state = self.db.get_trip_period_lock(ctx.contract_id, ctx.month, st)
-            if bool((state or {}).get("locked")):
-                locked = True
-                break
+        locked = bool(snap.locked)
 
         if hasattr(self, "btn_onayla_kilitle"):
             self.btn_onayla_kilitle.setVisible(not locked)
@@ -807,8 +596,31 @@ class AttendanceApp(QWidget):
             user_txt = ""
 
         report_title = f"{tab_name} - {ctx.month}"
+        if tbl is getattr(self, "tbl_toplu_puantaj", None):
+            # Toplu puantaj sekmesi yalnızca hat listesidir; dışa aktarılan dönemin puantaj satırlarıdır
+            # (çok satırlı olabilir: veritabanından thread'de, parça parça okunur).
+            self._export_puantaj_entries(ctx, report_title)
+            return
         create_excel(tbl, report_title=report_title, username=user_txt or "", parent=self)
 
+    def _export_puantaj_entries(self, ctx: AttendanceContext, report_title: str):
+        file_name = ask_excel_file(self, report_title)
+        if not file_name:
+            return
+        snap = self._snapshot(ctx)
+        headers = ["Tarih", "Hat", "Hareket", "Zaman", "Sıra", "Sefer", "Saat", "Not"]
+        start_excel_export(
+            self,
+            file_name,
+            headers,
+            lambda: self.db.iter_trip_entry_rows(ctx.contract_id, ctx.service_type, snap.start_date, snap.end_date),
+            report_title=report_title,
+            total_rows=len(snap.entries(ctx.service_type)),
+            widths={1: 12, 2: 30, 3: 15, 4: 12, 5: 8, 6: 10, 7: 10, 8: 30},
+            left_columns=(1, 7),
+            column_types=("date",),
+        )
+
     def _lock_period(self):
         ctx = self._current_context()
         if ctx is None:
@@ -913,24 +725,9 @@ class AttendanceApp(QWidget):
 
         route_names = {}
         try:
-            conn3 = self.db.connect()
-            cur3 = conn3.cursor()
             st_values = self._service_type_values(ctx.service_type) or [str(ctx.service_type)]
-            placeholders = ",".join(["?"] * len(st_values))
-            cur3.execute(
-                f"""
-                SELECT id, COALESCE(route_name,'')
-                FROM route_params
-                WHERE contract_id = ? AND service_type IN ({placeholders})
-                """,
-                (int(ctx.contract_id), *st_values),
-            )
-            for rid, rn in cur3.fetchall() or []:
-                try:
-                    route_names[int(rid)] = str(rn or "")
-                except Exception:
-                    pass
-            conn3.close()
+            for e in self.db.get_route_directory(int(ctx.contract_id)).routes(st_values):
+                route_names[e.id] = e.route_name
         except Exception:
             route_names = {}
 
@@ -974,46 +771,55 @@ class AttendanceApp(QWidget):
 
     # ------------------------- Data actions (placeholder) -------------------------
     def _reload_summary(self):
+        if hasattr(self, "lbl_ozet"):
+            try:
+                self.lbl_ozet.setText("Yükleniyor...")
+            except Exception:
+                pass
+        self._schedule_context_load()
+
+    def _fill_summary(self, ctx: AttendanceContext | None, snap):
         if not hasattr(self, "lbl_ozet"):
             return
-        try:
-            self.lbl_ozet.setText("Yükleniyor...")
-        except Exception:
-            pass
+        if ctx is None or snap is None:
+            self.lbl_ozet.setText("Müşteri / Sözleşme / Hizmet seçiniz")
+            return
+
+        total = snap.total_qty()
+        lock_txt = "KİLİTLİ" if bool(snap.locked) else "AÇIK"
+        self.lbl_ozet.setText(f"Toplam Sefer: {total} | Durum: {lock_txt}")
+
+    # ------------------------- Async loading -------------------------
+    def _schedule_context_load(self):
         ctx = self._current_context()
         if ctx is None:
-            self.lbl_ozet.setText("Müşteri / Sözleşme / Hizmet seçiniz")
+            self._loader.cancel()
+            self._apply_context_snapshot(None, None)
             return
 
-        y, m = self._selected_year_month()
-        days_in_month = QDate(y, m, 1).daysInMonth()
-        start_date = QDate(y, m, 1).toString("yyyy-MM-dd")
-        end_date = QDate(y, m, days_in_month).toString("yyyy-MM-dd")
-        total = 0
-        try:
-            conn = self.db.connect()
-            cursor = conn.cursor()
-            st_values = self._service_type_values(ctx.service_type) or [str(ctx.service_type)]
-            placeholders = ",".join(["?"] * len(st_values))
-            cursor.execute(
-                f"""
-                SELECT COALESCE(SUM(qty),0)
-                FROM trip_entries
-                WHERE contract_id = ?
-                  AND service_type IN ({placeholders})
-                  AND trip_date BETWEEN ? AND ?
-                """,
-                (int(ctx.contract_id), *st_values, start_date, end_date),
-            )
-            row = cursor.fetchone()
-            conn.close()
-            total = float((row or [0])[0] or 0)
-        except Exception:
-            total = 0
+        db = self.db
+        st_values = self._service_type_values(ctx.service_type) or [str(ctx.service_type)]
+        self._loader.request(
+            lambda: (
+                get_puantaj_snapshot(db, ctx.contract_id, ctx.month, ctx.service_type, st_values),
+                db.get_plan_tracking_daily(ctx.contract_id, ctx.month, st_values),
+            ),
+            lambda res: self._apply_context_snapshot(ctx, res),
+        )
 
-        locked = self._is_period_locked()
-        lock_txt = "KİLİTLİ" if locked else "AÇIK"
-        self.lbl_ozet.setText(f"Toplam Sefer: {total} | Durum: {lock_txt}")
+    def _apply_context_snapshot(self, ctx: AttendanceContext | None, res):
+        # Yükleme sürerken seçim değiştiyse sonuç uygulanmaz; yeni istek zaten yolda.
+        if ctx is not None and ctx != self._current_context():
+            return
+        snap, tracking = res if res is not None else (None, None)
+        self.setUpdatesEnabled(False)
+        try:
+            self._fill_summary(ctx, snap)
+            self._fill_lock_ui(ctx, snap)
+            self._fill_plan_tracking_tab(ctx, tracking)
+            self._fill_toplu_puantaj_tab(ctx, snap)
+        finally:
+            self.setUpdatesEnabled(True)
 
     def _open_bulk_attendance(self, in_tab: bool = False):
         if self._is_period_locked():
@@ -1137,6 +943,18 @@ class AttendanceApp(QWidget):
         )
         dlg.exec()
 
+    def _open_plan_variance(self):
+        month = _norm_month_key(self._selected_month_key())
+        if not month or "-" not in month:
+            QMessageBox.warning(self, "Uyarı", "Dönem seçiniz.")
+            return
+        try:
+            user_txt = str((self.user_data or {}).get("full_name") or (self.user_data or {}).get("username") or "")
+        except Exception:
+            user_txt = ""
+        dlg = PlanVarianceDialog(parent=self, db=self.db, month=month, user_text=user_txt)
+        dlg.exec()
+
 
 
     # ------------------------- Navigation -------------------------
@@ -1154,6 +972,22 @@ class AttendanceApp(QWidget):
             p = p.parent()
 
     # ------------------------- Filters -------------------------
+    def refresh_on_enter(self):
+        """Ana menüden önbellekteki sayfaya dönülürken (veri değiştiyse) çağrılır; seçimler korunur."""
+        if hasattr(self, "cmb_musteri"):
+            selected = self.cmb_musteri.currentData()
+            self.cmb_musteri.blockSignals(True)
+            try:
+                self.cmb_musteri.clear()
+                self.cmb_musteri.addItem("Seçiniz...", None)
+                for cid, title in self.db.get_active_customers_list():
+                    self.cmb_musteri.addItem(title or "", int(cid))
+                idx = self.cmb_musteri.findData(selected)
+                self.cmb_musteri.setCurrentIndex(max(0, idx))
+            finally:
+                self.cmb_musteri.blockSignals(False)
+        self._reload_summary()
+
     def _init_filters(self):
         if hasattr(self, "cmb_hizmet_turu"):
             self.cmb_hizmet_turu.blockSignals(True)
@@ -1652,34 +1486,6 @@ class BulkAttendanceDialog(QDialog):
                 pass
 
         self._apply_route_group_spans()
-    def _extract_movement_type(self, rec: dict) -> str:
-        if not isinstance(rec, dict):
-            return ""
-        raw = (
-            rec.get("movement_type_norm")
-            or rec.get("pricing_category")
-            or rec.get("gidis_gelis")
-            or rec.get("movement_type")
-            or rec.get("hareket_turu")
-            or rec.get("hareket")
-            or rec.get("hareketTuru")
-            or rec.get("hareket_tipi")
-            or rec.get("tip")
-            or ""
-        )
-        s = str(raw or "").strip().lower()
-        if "mesai" in s:
-            return "fazla mesai"
-        if "paket" in s or (("sabah" in s) and ("akşam" in s or "aksam" in s)):
-            return "sabah-akşam"
-        if "cift" in s or "çift" in s:
-            return "tek servis"
-        if "tek" in s:
-            return "tek servis"
-        if s == "teks" or s == "tekservis":
-            return "tek servis"
-        return s
-
     def __init__(
         self,
         parent,
@@ -1842,6 +1648,7 @@ class BulkAttendanceDialog(QDialog):
             st_values = AttendanceApp._service_type_values(self, self.service_type) or [self.service_type]
         except Exception:
             st_values = [self.service_type]
+        self._st_values = list(st_values)
         for st in st_values:
             try:
                 rows = self.db.get_route_params_for_contract(self.contract_id, str(st))
@@ -1941,45 +1748,18 @@ class BulkAttendanceDialog(QDialog):
             return uniq
 
         def _legacy_time_blocks_for_month(start_date: str, end_date: str):
-            try:
-                conn = self.db.connect()
-                cursor = conn.cursor()
-                cursor.execute(
-                    """
-                    SELECT DISTINCT time_block
-                    FROM trip_entries
-                    WHERE contract_id = ?
-                      AND service_type = ?
-                      AND trip_date BETWEEN ? AND ?
-                    """,
-                    (int(self.contract_id), str(self.service_type), start_date, end_date),
-                )
-                out = [str(r[0] or "").strip() for r in (cursor.fetchall() or [])]
-                conn.close()
-                return [x for x in out if x]
-            except Exception:
-                return []
+            out = []
+            for _rid, _d, tb, _ln, _q, _tt in self._snapshot().entries(str(self.service_type)):
+                tb_s = str(tb or "").strip()
+                if tb_s and tb_s not in out:
+                    out.append(tb_s)
+            return out
 
         def _planned_keys_for_context(contract_id: int, month: str, service_type: str):
-            try:
-                conn = self.db.connect()
-                cursor = conn.cursor()
-                cursor.execute(
-                    """
-                    SELECT route_params_id, time_block
-                    FROM trip_plan
-                    WHERE contract_id = ? AND month = ? AND service_type = ?
-                    """,
-                    (int(contract_id), str(month), str(service_type)),
-                )
-                rows = cursor.fetchall() or []
-                conn.close()
-                return {(int(r[0] or 0), str(r[1] or "")) for r in rows if int(r[0] or 0) and str(r[1] or "")}
-            except Exception:
-                return set()
+            return self._snapshot().planned_keys(str(service_type))
 
         def _tb_sort_key(tb_val: str):
-            return _tb_sort_key_0700(tb_val)
+            return tb_sort_key(tb_val)
 
         def _split_time_range(tb_val: str, max_minutes: int = 30) -> tuple[str, str] | None:
             t = str(tb_val or "").strip()
@@ -2026,26 +1806,10 @@ class BulkAttendanceDialog(QDialog):
                 return f"{hh:02d}:{mm:02d}"
             return str(tb_val or "")
 
+        route_dir = self.db.get_route_directory(self.contract_id)
+
         def _route_movement_type_by_id(route_params_id: int) -> str:
-            try:
-                conn = self.db.connect()
-                if not conn:
-                    return ""
-                cur = conn.cursor()
-                try:
-                    cur.execute(
-                        "SELECT COALESCE(movement_type,'') FROM route_params WHERE id = ? LIMIT 1",
-                        (int(route_params_id),),
-                    )
-                    row = cur.fetchone()
-                    return str((row[0] if row else "") or "").strip()
-                finally:
-                    try:
-                        conn.close()
-                    except Exception:
-                        pass
-            except Exception:
-                return ""
+            return route_dir.movement_type(route_params_id)
 
         def _route_is_tek(route_row) -> bool:
             try:
@@ -3171,10 +2935,12 @@ class BulkAttendanceDialog(QDialog):
         except Exception:
             pass
 
-    def _load_existing_entries(self):
-        start_date = QDate(self.year, self.month, 1).toString("yyyy-MM-dd")
-        end_date = QDate(self.year, self.month, self.days_in_month).toString("yyyy-MM-dd")
+    def _snapshot(self):
+        return get_puantaj_snapshot(
+            self.db, int(self.contract_id), self.month_key, str(self.service_type), getattr(self, "_st_values", None)
+        )
 
+    def _load_existing_entries(self):
         row_index_plan: dict[tuple[int, str], list[int]] = {}
         row_index_time: dict[tuple[int, str], list[int]] = {}
         for idx, meta in enumerate(self._row_meta):
@@ -3190,61 +2956,17 @@ class BulkAttendanceDialog(QDialog):
             if tb_time:
                 row_index_time.setdefault((rid, tb_time), []).append(int(idx))
 
-        rows = []
-        try:
-            conn = self.db.connect()
-            cursor = conn.cursor()
-            # line_no support (fallback to old schema if needed)
+        snap = self._snapshot()
+        rows = snap.entries(str(self.service_type))
+        alloc_rows = snap.allocations(str(self.service_type))
+        price_rows = snap.prices(str(self.service_type))
+
+        price_map = {}
+        for rpid, tblock, price in price_rows or []:
             try:
-                cursor.execute(
-                    """
-                    SELECT route_params_id, trip_date, time_block, line_no, qty, COALESCE(time_text,'')
-                    FROM trip_entries
-                    WHERE contract_id = ?
-                      AND service_type = ?
-                      AND trip_date BETWEEN ? AND ?
-                    ORDER BY route_params_id, time_block, trip_date, line_no
-                    """,
-                    (int(self.contract_id), str(self.service_type), start_date, end_date),
-                )
-                rows = cursor.fetchall()
+                price_map[(int(rpid or 0), str(tblock or ""))] = float(price or 0.0)
             except Exception:
-                cursor.execute(
-                    """
-                    SELECT route_params_id, trip_date, time_block, 0 as line_no, qty, COALESCE(time_text,'')
-                    FROM trip_entries
-                    WHERE contract_id = ?
-                      AND service_type = ?
-                      AND trip_date BETWEEN ? AND ?
-                    """,
-                    (int(self.contract_id), str(self.service_type), start_date, end_date),
-                )
-                rows = cursor.fetchall()
-            conn.close()
-        except Exception:
-            rows = []
-
-        alloc_rows = []
-        try:
-            alloc_rows = self.db.get_trip_allocations_for_range(self.contract_id, self.service_type, start_date, end_date)
-        except Exception:
-            alloc_rows = []
-
-        if not rows:
-            rows = []
-
-        price_rows = []
-        try:
-            price_rows = self.db.get_trip_prices_for_month(self.contract_id, self.month_key, self.service_type)
-        except Exception:
-            price_rows = []
-
-        price_map = {}
-        for rpid, tblock, price in price_rows or []:
-            try:
-                price_map[(int(rpid or 0), str(tblock or ""))] = float(price or 0.0)
-            except Exception:
-                price_map[(int(rpid or 0), str(tblock or ""))] = 0.0
+                price_map[(int(rpid or 0), str(tblock or ""))] = 0.0
 
         route_default_price = {}
         for (rpid, _tb), pr in price_map.items():
@@ -3257,54 +2979,17 @@ class BulkAttendanceDialog(QDialog):
             except Exception:
                 route_default_price[int(rpid)] = 0.0
 
-        def _norm_route_name(s: str) -> str:
-            txt = (s or "").strip().lower()
-            if not txt:
-                return ""
-            txt = re.sub(r"\s+", "", txt)
-            txt = re.sub(r"[^0-9a-zçğıöşü]", "", txt)
-            return txt
-
-        def _norm_route_variants(s: str):
-            base = _norm_route_name(s)
-            out = []
-            if base:
-                out.append(base)
-                if base.endswith("v") and len(base) > 1:
-                    out.append(base[:-1])
-                else:
-                    out.append(base + "v")
-            uniq = []
-            seen = set()
-            for x in out:
-                if x and x not in seen:
-                    seen.add(x)
-                    uniq.append(x)
-            return uniq
-
         contract_price_by_name = {}
         contract_price_by_norm = {}
         contract_price_by_name_mt = {}
         contract_price_by_norm_mt = {}
         ambiguous_names = set()
         try:
-            conn = self.db.connect()
-            cursor = conn.cursor()
-            cursor.execute(
-                "SELECT COALESCE(price_matrix_json,'') FROM contracts WHERE id = ? LIMIT 1",
-                (int(self.contract_id),),
-            )
-            row = cursor.fetchone()
-            conn.close()
-            price_json = (row[0] if row else "") or ""
+            parsed = self.db.get_contract_price_matrix_rows(int(self.contract_id), service_type=str(self.service_type))
         except Exception:
-            price_json = ""
+            parsed = []
 
-        if price_json:
-            try:
-                parsed = self.db.parse_contract_price_matrix_rows(str(price_json or ""), service_type=str(self.service_type))
-            except Exception:
-                parsed = []
+        if parsed:
             if isinstance(parsed, list):
                 for rec in parsed:
                     guz = str((rec or {}).get("guzergah") or "").strip().lower()
@@ -3317,7 +3002,7 @@ class BulkAttendanceDialog(QDialog):
                     ).strip()
                     if st and st.lower() != str(self.service_type).strip().lower():
                         continue
-                    mt = self._extract_movement_type(rec or {})
+                    mt = extract_movement_type(rec or {})
                     try:
                         pr = float((rec or {}).get("fiyat") or 0.0)
                     except Exception:
@@ -3331,7 +3016,7 @@ class BulkAttendanceDialog(QDialog):
                     else:
                         contract_price_by_name[guz] = pr
 
-                    for ng in _norm_route_variants(guz):
+                    for ng in route_key_variants(guz):
                         if not ng:
                             continue
                         if ng in contract_price_by_norm:
@@ -3340,7 +3025,7 @@ class BulkAttendanceDialog(QDialog):
                             contract_price_by_norm[ng] = pr
 
                     contract_price_by_name_mt[(guz, mt)] = pr
-                    for ng in _norm_route_variants(guz):
+                    for ng in route_key_variants(guz):
                         nk = (ng, mt)
                         if ng and nk not in contract_price_by_norm_mt:
                             contract_price_by_norm_mt[nk] = pr
@@ -3366,6 +3051,9 @@ class BulkAttendanceDialog(QDialog):
                 rn = (rname or "").strip().lower()
                 if not rn:
                     continue
+                # route_key route_params'ta kalıcı tutulur; yoksa (eski satır şekli) burada hesaplanır.
+                rk = str(row[6] or "") if len(row) > 6 else ""
+                rk = rk or norm_route_key(rn)
                 mt_rn = (mt_r or "").strip().lower()
                 pr = None
                 if mt_rn and (rn, mt_rn) in contract_price_by_name_mt:
@@ -3373,7 +3061,7 @@ class BulkAttendanceDialog(QDialog):
                 elif rn in contract_price_by_name and rn not in ambiguous_names:
                     pr = float(contract_price_by_name.get(rn) or 0.0)
                 else:
-                    for nrn in _norm_route_variants(rn):
+                    for nrn in route_key_variants(rk):
                         if mt_rn:
                             nk = (nrn, mt_rn)
                             if nrn and nk in contract_price_by_norm_mt:
@@ -3383,7 +3071,7 @@ class BulkAttendanceDialog(QDialog):
                             pr = float(contract_price_by_norm.get(nrn) or 0.0)
                             break
                     if pr is None:
-                        nrn0 = _norm_route_name(rn)
+                        nrn0 = rk
                         if nrn0:
                             if mt_rn:
                                 for (k_norm, k_mt), v_pr in contract_price_by_norm_mt.items():
@@ -3403,27 +3091,7 @@ class BulkAttendanceDialog(QDialog):
         if not rows and not price_map and not route_default_price and not route_price_by_id:
             pass
 
-        plan_map = {}
-        try:
-            connp = self.db.connect()
-            curp = connp.cursor()
-            curp.execute(
-                """
-                SELECT route_params_id, time_block, vehicle_id, driver_id
-                FROM trip_plan
-                WHERE contract_id = ? AND month = ? AND service_type = ?
-                """,
-                (int(self.contract_id), str(self.month_key), str(self.service_type)),
-            )
-            for rid, tb, vid, did in curp.fetchall() or []:
-                plan_map[(int(rid or 0), str(tb or ""))] = (str(vid) if vid is not None else "", str(did) if did is not None else "")
-            connp.close()
-        except Exception:
-            try:
-                connp.close()
-            except Exception:
-                pass
-            plan_map = {}
+        plan_map = snap.plan_map(str(self.service_type))
 
         try:
             self.table.blockSignals(True)
@@ -3573,107 +3241,12 @@ class BulkAttendanceDialog(QDialog):
             except Exception:
                 pass
 
-    def _save(self):
-        soru = QMessageBox.question(
-            self,
-            "Onay",
-            "Puantaj kaydedilsin mi?",
-            QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No,
-        )
-        if soru != QMessageBox.StandardButton.Yes:
-            return
-
-        self._saving = True
-        try:
-            self.btn_save.setEnabled(False)
-        except Exception:
-            pass
-        try:
-            self.table.setEnabled(False)
-        except Exception:
-            pass
-
-        start_date = QDate(self.year, self.month, 1).toString("yyyy-MM-dd")
-        end_date = QDate(self.year, self.month, self.days_in_month).toString("yyyy-MM-dd")
-
-        existing_entries = set()
-        existing_prices = set()
-        existing_allocations = set()
-        try:
-            conn0 = self.db.connect()
-            cur0 = conn0.cursor()
-            try:
-                cur0.execute(
-                    """
-                    SELECT route_params_id, trip_date, time_block, line_no
-                    FROM trip_entries
-                    WHERE contract_id=? AND service_type=? AND trip_date BETWEEN ? AND ?
-                    """,
-                    (int(self.contract_id), str(self.service_type), start_date, end_date),
-                )
-                for rid0, d0, tb0, ln0 in cur0.fetchall() or []:
-                    existing_entries.add((int(rid0 or 0), str(d0 or ""), str(tb0 or ""), int(ln0 or 0)))
-            except Exception:
-                cur0.execute(
-                    """
-                    SELECT route_params_id, trip_date, time_block
-                    FROM trip_entries
-                    WHERE contract_id=? AND service_type=? AND trip_date BETWEEN ? AND ?
-                    """,
-                    (int(self.contract_id), str(self.service_type), start_date, end_date),
-                )
-                for rid0, d0, tb0 in cur0.fetchall() or []:
-                    existing_entries.add((int(rid0 or 0), str(d0 or ""), str(tb0 or ""), 0))
-
-            cur0.execute(
-                """
-                SELECT route_params_id, time_block
-                FROM trip_prices
-                WHERE contract_id=? AND month=? AND service_type=?
-                """,
-                (int(self.contract_id), str(self.month_key), str(self.service_type)),
-            )
-            for rid0, tb0 in cur0.fetchall() or []:
-                existing_prices.add((int(rid0 or 0), str(tb0 or "")))
-
-            try:
-                cur0.execute(
-                    """
-                    SELECT route_params_id, trip_date, time_block, line_no
-                    FROM trip_allocations
-                    WHERE contract_id=? AND service_type=? AND trip_date BETWEEN ? AND ?
-                    """,
-                    (int(self.contract_id), str(self.service_type), start_date, end_date),
-                )
-                for rid0, d0, tb0, ln0 in cur0.fetchall() or []:
-                    existing_allocations.add((int(rid0 or 0), str(d0 or ""), str(tb0 or ""), int(ln0 or 0)))
-            except Exception:
-                cur0.execute(
-                    """
-                    SELECT route_params_id, trip_date, time_block
-                    FROM trip_allocations
-                    WHERE contract_id=? AND service_type=? AND trip_date BETWEEN ? AND ?
-                    """,
-                    (int(self.contract_id), str(self.service_type), start_date, end_date),
-                )
-                for rid0, d0, tb0 in cur0.fetchall() or []:
-                    existing_allocations.add((int(rid0 or 0), str(d0 or ""), str(tb0 or ""), 0))
-            conn0.close()
-        except Exception:
-            existing_entries = set()
-            existing_prices = set()
-            existing_allocations = set()
-
-        now = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        price_rows = []
-        entry_rows = []
-        alloc_rows = []
-
+    def _collect_puantaj_rows(self) -> list[PuantajRow]:
+        """Tablo satırlarını kayıt servisine verilecek PuantajRow listesine çevirir."""
+        rows = []
         for r in range(self.table.rowCount()):
-            rid = None
             it_route = self.table.item(r, 1)
-            if it_route is not None:
-                rid = it_route.data(Qt.ItemDataRole.UserRole)
+            rid = it_route.data(Qt.ItemDataRole.UserRole) if it_route is not None else None
             if not rid:
                 continue
 
@@ -3684,294 +3257,85 @@ class BulkAttendanceDialog(QDialog):
             except Exception:
                 line_no = 0
             plan_tb = str((meta or {}).get("plan_time_block") or "").strip()
-            planned_key_tb = plan_tb if plan_tb else str(time_block)
-            is_planned = (int(rid), str(planned_key_tb)) in (self._planned_keys or set())
+            is_planned = (int(rid), plan_tb or time_block) in (self._planned_keys or set())
 
-            time_text = ""
             it_time = self.table.item(r, self._col_time_text)
-            if it_time is not None:
-                time_text = (it_time.text() or "").strip()
+            time_text = (it_time.text() or "").strip() if it_time is not None else ""
 
             it_v = self.table.item(r, self._col_vehicle)
             it_d = self.table.item(r, self._col_driver)
-            vehicle_id = it_v.data(Qt.ItemDataRole.UserRole) if it_v is not None else None
-            driver_id = it_d.data(Qt.ItemDataRole.UserRole) if it_d is not None else None
 
             p_item = self.table.item(r, self._col_price)
-            p_txt = ((p_item.text() if p_item else "") or "").strip()
             try:
-                price = self._parse_tr_float(p_txt)
+                price = self._parse_tr_float(((p_item.text() if p_item else "") or "").strip())
             except Exception:
                 price = 0.0
 
-            if price != 0.0 or (int(rid), time_block) in existing_prices:
-                price_rows.append(
-                    (
-                        int(self.contract_id),
-                        int(rid),
-                        str(self.month_key),
-                        str(self.service_type),
-                        str(time_block),
-                        float(price),
-                        now,
-                    )
-                )
-
+            qty = []
+            overrides = {}
             for day in range(1, self.days_in_month + 1):
-                col = self._day_start + (day - 1)
-                it = self.table.item(r, col)
+                it = self.table.item(r, self._day_start + (day - 1))
                 val = (it.text() or "").strip() if it else ""
-                qty = int(val) if val.isdigit() else 0
+                qty.append(int(val) if val.isdigit() else 0)
                 trip_date = QDate(self.year, self.month, day).toString("yyyy-MM-dd")
-                key = (int(rid), str(trip_date), str(time_block), int(line_no))
-                if is_planned or qty != 0 or key in existing_entries:
-                    entry_rows.append(
-                        (
-                            int(self.contract_id),
-                            int(rid),
-                            str(trip_date),
-                            str(self.service_type),
-                            str(time_block),
-                            int(line_no),
-                            int(qty),
-                            str(time_text),
-                            now,
-                            now,
-                        )
-                    )
+                override = self._alloc_override_map.get((int(rid), time_block, trip_date, line_no))
+                if override:
+                    overrides[trip_date] = override
+
+            rows.append(
+                PuantajRow(
+                    route_params_id=int(rid),
+                    time_block=time_block,
+                    line_no=line_no,
+                    time_text=time_text,
+                    vehicle_id=it_v.data(Qt.ItemDataRole.UserRole) if it_v is not None else None,
+                    driver_id=it_d.data(Qt.ItemDataRole.UserRole) if it_d is not None else None,
+                    price=price,
+                    qty=qty,
+                    planned=is_planned,
+                    overrides=overrides,
+                )
+            )
+        return rows
 
-                key2 = (int(rid), str(trip_date), str(time_block), int(line_no))
-                if is_planned or qty != 0 or key2 in existing_allocations:
-                    override = self._alloc_override_map.get((int(rid), str(time_block), str(trip_date), int(line_no))) or {}
-                    v2 = override.get("vehicle_id", vehicle_id)
-                    d2 = override.get("driver_id", driver_id)
-                    note2 = (override.get("note") or "").strip()
-                    alloc_rows.append(
-                        (
-                            int(self.contract_id),
-                            int(rid),
-                            str(trip_date),
-                            str(self.service_type),
-                            str(time_block),
-                            int(line_no),
-                            d2,
-                            v2,
-                            float(qty),
-                            str(time_text),
-                            note2,
-                            now,
-                            now,
-                        )
-                    )
+    @profiled("puantaj.save")
+    def _save(self):
+        soru = QMessageBox.question(
+            self,
+            "Onay",
+            "Puantaj kaydedilsin mi?",
+            QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No,
+        )
+        if soru != QMessageBox.StandardButton.Yes:
+            return
 
+        self._saving = True
         try:
-            conn = self.db.connect()
-            cur = conn.cursor()
-            cur.execute("BEGIN")
-
-            try:
-                def _parse_hhmm_to_minutes(s: str):
-                    t = str(s or "").strip()
-                    if not t:
-                        return None
-                    parts = t.split(":")
-                    if len(parts) != 2:
-                        return None
-                    if (not parts[0].isdigit()) or (not parts[1].isdigit()):
-                        return None
-                    hh = int(parts[0])
-                    mm = int(parts[1])
-                    if hh < 0 or hh > 23 or mm < 0 or mm > 59:
-                        return None
-                    return hh * 60 + mm
-
-                def _parse_range_minutes(tb: str, tt: str):
-                    txt = str(tt or "").strip() or str(tb or "").strip()
-                    if not txt:
-                        return None, None
-                    if "-" in txt:
-                        left, right = (txt.split("-", 1) + [""])[:2]
-                        m1 = _parse_hhmm_to_minutes(left.strip())
-                        m2 = _parse_hhmm_to_minutes(right.strip())
-                        if m1 is None or m2 is None:
-                            return None, None
-                        if m2 == m1:
-                            return m1, (m1 + 15) % 1440
-                        return m1, m2
-                    m = _parse_hhmm_to_minutes(txt)
-                    if m is None:
-                        return None, None
-                    return m, (m + 15) % 1440
-
-                def _segments(s: int, e: int):
-                    if s == e:
-                        return [(s, (s + 1) % 1440)]
-                    if s < e:
-                        return [(s, e)]
-                    return [(s, 1440), (0, e)]
-
-                def _overlap(a1: int, a2: int, b1: int, b2: int):
-                    for s1, e1 in _segments(int(a1), int(a2)):
-                        for s2, e2 in _segments(int(b1), int(b2)):
-                            if max(s1, s2) < min(e1, e2):
-                                return True
-                    return False
-
-                local_by_vehicle = {}
-                local_by_driver = {}
-                for row in alloc_rows or []:
-                    try:
-                        c_id, rid, tdate, st, tb, ln, did, vid, q, tt, nt, ca, ua = row
-                    except Exception:
-                        continue
-                    try:
-                        if float(q or 0) <= 0:
-                            continue
-                    except Exception:
-                        continue
-                    s_m, e_m = _parse_range_minutes(str(tb or ""), str(tt or ""))
-                    if s_m is None or e_m is None:
-                        continue
-
-                    key_date = str(tdate)
-                    if vid is not None and str(vid).strip():
-                        local_by_vehicle.setdefault((key_date, str(vid)), []).append((int(s_m), int(e_m), int(rid), str(tb or ""), int(ln or 0)))
-                    if did is not None and str(did).strip():
-                        local_by_driver.setdefault((key_date, str(did)), []).append((int(s_m), int(e_m), int(rid), str(tb or ""), int(ln or 0)))
-
-                for (dkey, vkey), rr in (local_by_vehicle or {}).items():
-                    rr2 = sorted(rr, key=lambda x: (x[0], x[1]))
-                    for i in range(len(rr2)):
-                        for j in range(i + 1, len(rr2)):
-                            if _overlap(rr2[i][0], rr2[i][1], rr2[j][0], rr2[j][1]):
-                                raise RuntimeError("vehicle_conflict")
-                            if rr2[j][0] > rr2[i][1] and rr2[i][0] < rr2[i][1]:
-                                break
+            self.btn_save.setEnabled(False)
+        except Exception:
+            pass
+        try:
+            self.table.setEnabled(False)
+        except Exception:
+            pass
 
-                for (dkey, drkey), rr in (local_by_driver or {}).items():
-                    rr2 = sorted(rr, key=lambda x: (x[0], x[1]))
-                    for i in range(len(rr2)):
-                        for j in range(i + 1, len(rr2)):
-                            if _overlap(rr2[i][0], rr2[i][1], rr2[j][0], rr2[j][1]):
-                                raise RuntimeError("driver_conflict")
-                            if rr2[j][0] > rr2[i][1] and rr2[i][0] < rr2[i][1]:
-                                break
+        try:
+            result = save_puantaj(self.db, self.contract_id, self.month_key, self.service_type, self._collect_puantaj_rows())
+        except Exception:
+            result = PuantajSaveResult(error="write")
+        finally:
+            self._saving = False
 
-                for row in alloc_rows or []:
-                    try:
-                        c_id, rid, tdate, st, tb, ln, did, vid, q, tt, nt, ca, ua = row
-                    except Exception:
-                        continue
-                    try:
-                        if float(q or 0) <= 0:
-                            continue
-                    except Exception:
-                        continue
-                    if (vid is None or not str(vid).strip()) and (did is None or not str(did).strip()):
-                        continue
-                    conflict = self.db.find_allocation_conflict(
-                        contract_id=int(self.contract_id),
-                        trip_date=str(tdate),
-                        service_type=str(self.service_type),
-                        time_block=str(tb),
-                        time_text=str(tt or ""),
-                        vehicle_id=vid,
-                        driver_id=did,
-                        exclude_route_params_id=int(rid),
-                        exclude_time_block=str(tb),
-                        exclude_line_no=int(ln or 0),
-                    )
-                    if conflict:
-                        raise RuntimeError("db_conflict")
-            except RuntimeError:
+        if not result.ok:
+            if result.error == "conflict":
                 QMessageBox.critical(self, "Çakışma", "Aynı gün içinde araç/şoför saat çakışması olduğu için kayıt yapılamadı.")
-                raise
-            except Exception:
-                pass
-
-            if price_rows:
-                cur.executemany(
-                    """
-                    INSERT INTO trip_prices (
-                        contract_id, route_params_id, month, service_type, time_block, price, updated_at
-                    ) VALUES (?,?,?,?,?,?,?)
-                    ON CONFLICT(contract_id, route_params_id, month, service_type, time_block)
-                    DO UPDATE SET price=excluded.price, updated_at=excluded.updated_at
-                    """,
-                    price_rows,
-                )
-
-            if entry_rows:
-                cur.executemany(
-                    """
-                    INSERT INTO trip_entries (
-                        contract_id, route_params_id, trip_date, service_type, time_block, line_no,
-                        qty, time_text, created_at, updated_at
-                    ) VALUES (?,?,?,?,?,?,?,?,?,?)
-                    ON CONFLICT(contract_id, route_params_id, trip_date, service_type, time_block, line_no)
-                    DO UPDATE SET qty=excluded.qty, time_text=excluded.time_text, updated_at=excluded.updated_at
-                    """,
-                    entry_rows,
-                )
-
-            if alloc_rows:
-                cur.executemany(
-                    """
-                    INSERT INTO trip_allocations (
-                        contract_id, route_params_id, trip_date, service_type, time_block, line_no,
-                        driver_id, vehicle_id, qty, time_text, note, created_at, updated_at
-                    ) VALUES (?,?,?,?,?,?,?,?,?,?,?,?,?)
-                    ON CONFLICT(contract_id, route_params_id, trip_date, service_type, time_block, line_no)
-                    DO UPDATE SET
-                        driver_id=excluded.driver_id,
-                        vehicle_id=excluded.vehicle_id,
-                        qty=excluded.qty,
-                        time_text=excluded.time_text,
-                        note=excluded.note,
-                        updated_at=excluded.updated_at
-                    """,
-                    alloc_rows,
-                )
-
-            try:
-                warned = set()
-                for row in alloc_rows or []:
-                    try:
-                        c_id, rid, tdate, st, tb, ln, did, vid, q, tt, nt, ca, ua = row
-                    except Exception:
-                        continue
-                    try:
-                        if float(q or 0) <= 0:
-                            continue
-                    except Exception:
-                        continue
-                    if vid is None or not str(vid).strip():
-                        continue
-                    k = (str(tdate), str(vid))
-                    if k in warned:
-                        continue
-                    warned.add(k)
-                    mv = int(self.db.get_vehicle_movements_for_day(int(self.contract_id), str(tdate), vid) or 0)
-                    if mv > 8:
-                        QMessageBox.warning(self, "Uyarı", f"Bu araç için {tdate} tarihinde hareket sayısı {mv} oldu (limit: 8).")
-            except Exception:
-                pass
-
-            conn.commit()
-            conn.close()
-        except Exception:
-            try:
-                conn.rollback()
-            except Exception:
-                pass
-            try:
-                conn.close()
-            except Exception:
-                pass
             QMessageBox.critical(self, "Hata", "Bazı kayıtlar yazılamadı.")
             return
-        finally:
-            self._saving = False
+
+        for tdate, _vid, mv in result.movement_warnings:
+            QMessageBox.warning(
+                self, "Uyarı", f"Bu araç için {tdate} tarihinde hareket sayısı {mv} oldu (limit: {VEHICLE_MOVEMENT_LIMIT})."
+            )
 
         if bool(getattr(self, "_embedded", False)):
             try:
@@ -4052,6 +3416,7 @@ class PlanTrackingDialog(QDialog):
         lay.addLayout(footer)
         self.setLayout(lay)
 
+        self._loader = AsyncLoader(self)
         self._load()
         self._apply_compact_sizing()
 
@@ -4113,118 +3478,19 @@ class PlanTrackingDialog(QDialog):
             pass
 
     def _load(self):
-        days_in_month = QDate(self.year, self.month, 1).daysInMonth()
-        start_date = QDate(self.year, self.month, 1).toString("yyyy-MM-dd")
-        end_date = QDate(self.year, self.month, days_in_month).toString("yyyy-MM-dd")
-
-        month_key = _norm_month_key(str(self.ctx.month))
-
-        planned_keys: set[tuple[int, str]] = set()
-        try:
-            conn = self.db.connect()
-            cursor = conn.cursor()
-            placeholders = ",".join(["?"] * len(self.service_type_values))
-            cursor.execute(
-                f"""
-                SELECT route_params_id, time_block
-                FROM trip_plan
-                WHERE contract_id = ?
-                  AND month = ?
-                  AND service_type IN ({placeholders})
-                """,
-                (int(self.ctx.contract_id), str(month_key), *self.service_type_values),
-            )
-            rows = cursor.fetchall() or []
-
-            if not rows:
-                try:
-                    cursor.execute(
-                        """
-                        SELECT route_params_id, time_block
-                        FROM trip_plan
-                        WHERE contract_id = ?
-                          AND month = ?
-                        """,
-                        (int(self.ctx.contract_id), str(month_key)),
-                    )
-                    rows = cursor.fetchall() or []
-                except Exception:
-                    rows = []
-
-            conn.close()
-            planned_keys = {
-                (int(r[0] or 0), str(r[1] or ""))
-                for r in rows
-                if int(r[0] or 0) and str(r[1] or "")
-            }
-        except Exception:
-            try:
-                conn.close()
-            except Exception:
-                pass
-            planned_keys = set()
-
-        planned_per_day = len(planned_keys)
+        db = self.db
+        ctx = self.ctx
+        st_values = list(self.service_type_values)
+        self._loader.request(
+            lambda: db.get_plan_tracking_daily(int(ctx.contract_id), str(ctx.month), st_values),
+            self._fill,
+        )
 
-        actual_per_day = {d: 0.0 for d in range(1, days_in_month + 1)}
-        try:
-            conn2 = self.db.connect()
-            cur2 = conn2.cursor()
-            placeholders = ",".join(["?"] * len(self.service_type_values))
-            if planned_keys:
-                cur2.execute(
-                    f"""
-                    SELECT trip_date, route_params_id, time_block, COALESCE(SUM(qty),0)
-                    FROM trip_entries
-                    WHERE contract_id = ?
-                      AND service_type IN ({placeholders})
-                      AND trip_date BETWEEN ? AND ?
-                    GROUP BY trip_date, route_params_id, time_block
-                    """,
-                    (int(self.ctx.contract_id), *self.service_type_values, start_date, end_date),
-                )
-                for trip_date, rid, tb, qty_sum in (cur2.fetchall() or []):
-                    try:
-                        rid_i = int(rid or 0)
-                        tb_s = str(tb or "")
-                        if (rid_i, tb_s) not in planned_keys:
-                            continue
-                        qd = QDate.fromString(str(trip_date or ""), "yyyy-MM-dd")
-                        if not qd.isValid():
-                            continue
-                        day = int(qd.day())
-                        actual_per_day[day] = float(actual_per_day.get(day, 0) or 0) + float(qty_sum or 0)
-                    except Exception:
-                        continue
-            else:
-                # Bu ay için plan yoksa bile girilmiş puantaj değerlerini gün gün göster.
-                cur2.execute(
-                    f"""
-                    SELECT trip_date, COALESCE(SUM(qty),0)
-                    FROM trip_entries
-                    WHERE contract_id = ?
-                      AND service_type IN ({placeholders})
-                      AND trip_date BETWEEN ? AND ?
-                    GROUP BY trip_date
-                    """,
-                    (int(self.ctx.contract_id), *self.service_type_values, start_date, end_date),
-                )
-                for trip_date, qty_sum in (cur2.fetchall() or []):
-                    try:
-                        qd = QDate.fromString(str(trip_date or ""), "yyyy-MM-dd")
-                        if not qd.isValid():
-                            continue
-                        day = int(qd.day())
-                        actual_per_day[day] = float(actual_per_day.get(day, 0) or 0) + float(qty_sum or 0)
-                    except Exception:
-                        continue
-            conn2.close()
-        except Exception:
-            try:
-                conn2.close()
-            except Exception:
-                pass
+    def _fill(self, tracking):
+        days_in_month = QDate(self.year, self.month, 1).daysInMonth()
+        planned_per_day, actual_per_day = tracking
 
+        self.table.setUpdatesEnabled(False)
         self.table.setRowCount(0)
         for day in range(1, days_in_month + 1):
             actual = float(actual_per_day.get(day, 0) or 0)
@@ -4257,3 +3523,107 @@ class PlanTrackingDialog(QDialog):
             if missing > 0:
                 it_m.setBackground(QColor("#f8d7da"))
             self.table.setItem(row, 3, it_m)
+
+        self.table.setUpdatesEnabled(True)
+        self._apply_compact_sizing()
+
+
+class PlanVarianceDialog(QDialog):
+    """Seçili ay için tüm sözleşmelerin plan / gerçekleşen sapma raporu (trip_daily_agg)."""
+
+    _HEADERS = ["Müşteri", "Sözleşme", "Hizmet", "Planlanan", "Gerçekleşen", "Eksik", "Plan Dışı", "Sapma %"]
+
+    def __init__(self, parent: QWidget, db: DatabaseManager, month: str, user_text: str = ""):
+        super().__init__(parent)
+        self.db = db
+        self.month = str(month or "").strip()
+        self.user_text = str(user_text or "")
+
+        self.setWindowTitle(f"Plan Sapma Raporu - {self.month}")
+        self.setSizeGripEnabled(True)
+        self.resize(900, 560)
+
+        self.table = QTableWidget(self)
+        self.table.setEditTriggers(QAbstractItemView.EditTrigger.NoEditTriggers)
+        self.table.setSelectionBehavior(QAbstractItemView.SelectionBehavior.SelectRows)
+        self.table.setSelectionMode(QAbstractItemView.SelectionMode.SingleSelection)
+        self.table.verticalHeader().setVisible(False)
+        self.table.setAlternatingRowColors(True)
+        self.table.setColumnCount(len(self._HEADERS))
+        self.table.setHorizontalHeaderLabels(self._HEADERS)
+        try:
+            self.table.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeMode.ResizeToContents)
+            self.table.horizontalHeader().setSectionResizeMode(0, QHeaderView.ResizeMode.Stretch)
+        except Exception:
+            pass
+
+        self.lbl_status = QLabel("Yükleniyor...", self)
+
+        btn_excel = QPushButton("Excel'e Aktar")
+        btn_excel.clicked.connect(self._export_excel)
+        btn_close = QPushButton("Kapat")
+        btn_close.clicked.connect(self.accept)
+
+        lay = QVBoxLayout()
+        lay.addWidget(self.table)
+        footer = QHBoxLayout()
+        footer.addWidget(self.lbl_status)
+        footer.addStretch(1)
+        footer.addWidget(btn_excel)
+        footer.addWidget(btn_close)
+        lay.addLayout(footer)
+        self.setLayout(lay)
+
+        self._loader = AsyncLoader(self)
+        db_ = self.db
+        month_ = self.month
+        self._loader.request(lambda: db_.get_plan_variance_report(month_), self._fill)
+
+    @staticmethod
+    def _fmt(val: float) -> str:
+        v = float(val or 0)
+        return str(int(v)) if v.is_integer() else f"{v:.2f}"
+
+    def _fill(self, rows):
+        rows = rows or []
+        self.table.setUpdatesEnabled(False)
+        self.table.setRowCount(0)
+        tot_planned = 0.0
+        tot_actual = 0.0
+        for rec in rows:
+            r = self.table.rowCount()
+            self.table.insertRow(r)
+            vals = [
+                str(rec.get("customer_title") or ""),
+                str(rec.get("contract_number") or rec.get("contract_id") or ""),
+                str(rec.get("service_type") or ""),
+                self._fmt(rec.get("planned")),
+                self._fmt(rec.get("actual")),
+                self._fmt(rec.get("missing")),
+                self._fmt(rec.get("unplanned")),
+                f"{float(rec.get('variance_pct') or 0):.1f}",
+            ]
+            for c, txt in enumerate(vals):
+                it = QTableWidgetItem(txt)
+                if c >= 3:
+                    it.setTextAlignment(Qt.AlignmentFlag.AlignCenter)
+                if c == 5 and float(rec.get("missing") or 0) > 0:
+                    it.setBackground(QColor("#f8d7da"))
+                self.table.setItem(r, c, it)
+            tot_planned += float(rec.get("planned") or 0)
+            tot_actual += float(rec.get("actual") or 0)
+        self.table.setUpdatesEnabled(True)
+
+        if not rows:
+            self.lbl_status.setText("Bu dönem için plan / puantaj kaydı yok.")
+        else:
+            pct = ((tot_actual - tot_planned) / tot_planned * 100.0) if tot_planned else 0.0
+            self.lbl_status.setText(
+                f"Planlanan: {self._fmt(tot_planned)} | Gerçekleşen: {self._fmt(tot_actual)} | Sapma: {pct:.1f}%"
+            )
+
+    def _export_excel(self):
+        if int(self.table.rowCount()) <= 0:
+            QMessageBox.information(self, "Bilgi", "Excel'e aktarılacak satır yok.")
+            return
+        create_excel(self.table, report_title=f"Plan Sapma - {self.month}", username=self.user_text, parent=self)
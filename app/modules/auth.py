@@ -9,18 +9,17 @@ except ImportError:
 from PyQt6.QtWidgets import QDialog, QMessageBox, QGraphicsOpacityEffect
 from PyQt6.QtCore import QPropertyAnimation, QPoint, QEasingCurve, QSequentialAnimationGroup, QParallelAnimationGroup, Qt, QUrl
 from PyQt6.QtMultimedia import QMediaPlayer, QAudioOutput
-from PyQt6 import uic
 from PyQt6.QtCore import QTimer
 import ui.icons.context_rc
-from config import get_ui_path, BASE_DIR
+from config import BASE_DIR
+from app.core.forms import load_ui
 from app.core.db_manager import DatabaseManager
 
 class AuthApp(QDialog):
     def __init__(self):
         super().__init__()
         # 1. UI Yükleme (Yeni yol yapısı)
-        ui_path = get_ui_path("auth_window.ui")
-        uic.loadUi(ui_path, self)
+        load_ui("auth_window.ui", self)
         
         self.db = DatabaseManager()
         self.deneme_hakki = 3
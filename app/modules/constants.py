@@ -1,15 +1,18 @@
 from PyQt6.QtWidgets import QWidget, QListWidgetItem, QMessageBox, QTableWidgetItem
 from PyQt6.QtCore import Qt, pyqtSignal, QTime
-from PyQt6 import uic, QtCore
+from PyQt6 import QtCore
 import ui.icons.context_rc 
-from config import get_ui_path
+from app.core import motion
+from app.core.forms import load_ui
 
 class ConstantsApp(QWidget):
     onoff_settings_changed = pyqtSignal(int, int)
+    # mod ("auto" / "full" / "reduced"), yavaş kare eşiği (ms)
+    motion_settings_changed = pyqtSignal(str, int)
 
     def __init__(self, db_manager, parent=None):
         super().__init__(parent)
-        uic.loadUi(get_ui_path("constants_window.ui"), self)
+        load_ui("constants_window.ui", self)
         self.setObjectName("main_form")
         self.db = db_manager
 
@@ -209,6 +212,31 @@ class ConstantsApp(QWidget):
 
         self._set_time_ms(self.time_online, online_ms)
         self._set_time_ms(self.time_warning, warn_ms)
+        self._load_motion_settings()
+
+    def _load_motion_settings(self):
+        if not hasattr(self, "cmb_motion"):
+            return
+        if self.cmb_motion.count() == 0:
+            self.cmb_motion.addItem("Otomatik", motion.MODE_AUTO)
+            self.cmb_motion.addItem("Tam", motion.MODE_FULL)
+            self.cmb_motion.addItem("Azaltılmış", motion.MODE_REDUCED)
+
+        try:
+            rows = self.db.get_constants(motion.CONST_MODE)
+            mode = str(rows[0][1]).strip().lower() if rows else motion.MODE_AUTO
+        except Exception:
+            mode = motion.MODE_AUTO
+        idx = self.cmb_motion.findData(mode)
+        self.cmb_motion.setCurrentIndex(idx if idx >= 0 else 0)
+
+        if hasattr(self, "spin_slow_frame"):
+            try:
+                rows = self.db.get_constants(motion.CONST_SLOW_FRAME_MS)
+                slow_ms = int(rows[0][1]) if rows else motion.DEFAULT_SLOW_FRAME_MS
+            except Exception:
+                slow_ms = motion.DEFAULT_SLOW_FRAME_MS
+            self.spin_slow_frame.setValue(slow_ms)
 
     def _save_onoff_settings(self):
         if not hasattr(self, "time_online") or not hasattr(self, "time_warning"):
@@ -226,15 +254,25 @@ class ConstantsApp(QWidget):
             QMessageBox.warning(self, "Uyarı", "Uyarı süresi online süresinden küçük olmalıdır.")
             return
 
+        mode = motion.MODE_AUTO
+        if hasattr(self, "cmb_motion"):
+            mode = str(self.cmb_motion.currentData() or motion.MODE_AUTO)
+        slow_ms = motion.DEFAULT_SLOW_FRAME_MS
+        if hasattr(self, "spin_slow_frame"):
+            slow_ms = int(self.spin_slow_frame.value())
+
         try:
             self._upsert_single_constant("onoff_online_ms", str(int(online_ms)))
             self._upsert_single_constant("onoff_warning_ms", str(int(warn_ms)))
+            self._upsert_single_constant(motion.CONST_MODE, mode)
+            self._upsert_single_constant(motion.CONST_SLOW_FRAME_MS, str(int(slow_ms)))
         except Exception:
             QMessageBox.warning(self, "Uyarı", "Ayarlar kaydedilemedi.")
             return
 
         try:
             self.onoff_settings_changed.emit(int(online_ms), int(warn_ms))
+            self.motion_settings_changed.emit(mode, int(slow_ms))
         except Exception:
             pass
 
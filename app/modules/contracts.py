@@ -1,17 +1,16 @@
-from PyQt6 import uic
 from PyQt6.QtCore import QDate, Qt, QRegularExpression
 from PyQt6.QtGui import QIntValidator, QRegularExpressionValidator
 from PyQt6.QtGui import QColor
 from PyQt6.QtWidgets import QDialog, QWidget, QMessageBox, QTableWidgetItem, QHeaderView
 from app.core.db_manager import DatabaseManager
-from config import get_ui_path
+from app.core.forms import load_ui
 import json
 from datetime import datetime
 
 class ContractsApp(QWidget):
     def __init__(self, user_data=None, parent=None):
         super().__init__(parent)
-        uic.loadUi(get_ui_path("contracts_window.ui"), self)
+        load_ui("contracts_window.ui", self)
         self.setObjectName("main_form")
         self.db = DatabaseManager()
         self.user_data = user_data or {}
@@ -679,24 +678,7 @@ class ContractsApp(QWidget):
             self.cmb_tarife_service_type.blockSignals(True)
             self.cmb_tarife_service_type.clear()
             self.cmb_tarife_service_type.addItem("Seçiniz...", None)
-            conn = self.db.connect()
-            if not conn:
-                return
-            try:
-                cur = conn.cursor()
-                cur.execute(
-                    """
-                    SELECT DISTINCT COALESCE(service_type,'')
-                    FROM route_params
-                    WHERE contract_id=?
-                      AND COALESCE(service_type,'') <> ''
-                    ORDER BY service_type
-                    """,
-                    (int(contract_id),),
-                )
-                service_types = [str(r[0]) for r in (cur.fetchall() or []) if r and r[0]]
-            finally:
-                conn.close()
+            service_types = self.db.get_route_directory(int(contract_id)).service_types()
             for st in service_types:
                 self.cmb_tarife_service_type.addItem(str(st), str(st))
 
@@ -915,7 +897,7 @@ class ContractsApp(QWidget):
 
         dlg = QDialog(self)
         try:
-            uic.loadUi(get_ui_path("hat_dialog.ui"), dlg)
+            load_ui("hat_dialog.ui", dlg)
         except Exception as e:
             QMessageBox.critical(self, "Hata", f"hat_dialog.ui yüklenemedi:\n{str(e)}")
             return
@@ -1230,7 +1212,8 @@ class ContractsApp(QWidget):
             k = details.get("kdv_orani")
             self.txt_kdv_orani.setText("" if k is None else str(int(float(k) or 0)))
 
-        # İş kalemleri (fiyat matrisi json) cache'e alınır
+        # İş kalemleri (fiyat matrisi json) cache'e alınır; kayıtta olduğu gibi geri yazılır.
+        # Aramalar contract_price_items üzerinden yapılır.
         pm = details.get("price_matrix_json")
         if pm:
             try:
@@ -1488,6 +1471,21 @@ class ContractsApp(QWidget):
             self.btn_kaydet.setText("KAYDET")
         self._update_kdv_total()
 
+    def refresh_on_enter(self):
+        """Ana menüden önbellekteki sayfaya dönülürken (veri değiştiyse) çağrılır; form korunur."""
+        if hasattr(self, "cmb_musteri"):
+            selected = self.cmb_musteri.currentData()
+            self.cmb_musteri.blockSignals(True)
+            try:
+                self.cmb_musteri.clear()
+                self.cmb_musteri.addItem("Seçiniz...")
+                self._load_customers()
+                idx = self.cmb_musteri.findData(selected) if selected is not None else 0
+                self.cmb_musteri.setCurrentIndex(max(0, idx))
+            finally:
+                self.cmb_musteri.blockSignals(False)
+        self.load_table()
+
     def load_table(self):
         tbl = self._get_contracts_table()
         if tbl is None:
@@ -1,10 +1,9 @@
 from PyQt6.QtWidgets import QWidget, QMessageBox, QTableWidget, QTableWidgetItem, QHeaderView, QSizePolicy
 from PyQt6.QtCore import Qt, QRegularExpression
 from PyQt6.QtGui import QRegularExpressionValidator
-from PyQt6 import uic
 
 from app.core.db_manager import DatabaseManager
-from config import get_ui_path
+from app.core.forms import load_ui
 
 
 def tr_upper(text):
@@ -15,7 +14,7 @@ def tr_upper(text):
 class CustomersApp(QWidget):
     def __init__(self, user_data=None, parent=None):
         super().__init__(parent)
-        uic.loadUi(get_ui_path("customers_window.ui"), self)
+        load_ui("customers_window.ui", self)
         self.setObjectName("main_form")
         try:
             self.setAttribute(Qt.WidgetAttribute.WA_StyledBackground, True)
@@ -166,6 +165,10 @@ class CustomersApp(QWidget):
                 pass
         self.cmb_ilce.blockSignals(False)
 
+    def refresh_on_enter(self):
+        """Ana menüden önbellekteki sayfaya dönülürken (veri değiştiyse) çağrılır; form korunur."""
+        self.load_data()
+
     def load_data(self):
         headers = ["MÜŞ.KODU", "MÜŞ.TÜRÜ", "KİŞİLİK", "FİRMA/UNVAN", "VERGİ/TCKN", "İL", "İLÇE", "TELEFON", "E-POSTA", "DURUM"]
         if not hasattr(self, "tableView"):
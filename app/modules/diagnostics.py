@@ -0,0 +1,102 @@
+from PyQt6.QtWidgets import (
+    QDialog, QVBoxLayout, QHBoxLayout, QTabWidget, QTableWidget, QTableWidgetItem,
+    QPushButton, QLabel, QHeaderView, QAbstractItemView,
+)
+from PyQt6.QtCore import Qt
+
+from app.core import profiler
+
+
+def _hist_text(hist, buckets) -> str:
+    # [3, 1, 0, ...] -> "≤1:3 ≤5:1 ..." (boş kovalar atlanır)
+    labels = [f"≤{b}" for b in buckets] + [f">{buckets[-1]}"]
+    return " ".join(f"{lbl}:{n}" for lbl, n in zip(labels, hist or []) if n)
+
+
+class DiagnosticsDialog(QDialog):
+    """SATTUP_PROFILE açıkken toplanan sorgu / metot / ekran süreleri."""
+
+    def __init__(self, parent=None, top: int = 100):
+        super().__init__(parent)
+        self.setWindowTitle("Tanılama - Performans")
+        self.resize(1100, 620)
+        self._top = int(top)
+
+        layout = QVBoxLayout(self)
+        self.lbl_info = QLabel(self)
+        layout.addWidget(self.lbl_info)
+
+        self.tabs = QTabWidget(self)
+        self.tbl_queries = self._make_table(["Max ms", "Ort. ms", "Toplam ms", "Adet", "Satır", "Dağılım", "Metotlar", "Sorgu"])
+        self.tbl_methods = self._make_table(["Toplam ms", "Ort. ms", "Max ms", "Adet", "Sorgu", "İfade", "Metot"])
+        self.tbl_actions = self._make_table(["Max ms", "Ort. ms", "Adet", "Sorgu", "Dağılım", "İşlem"])
+        self.tbl_n1 = self._make_table(["Tekrar", "Çerçeve", "Sorgu"])
+        self.tabs.addTab(self.tbl_queries, "Yavaş Sorgular")
+        self.tabs.addTab(self.tbl_methods, "Metotlar")
+        self.tabs.addTab(self.tbl_actions, "Ekran İşlemleri")
+        self.tabs.addTab(self.tbl_n1, "N+1 Şüphesi")
+        layout.addWidget(self.tabs, 1)
+
+        btns = QHBoxLayout()
+        btns.addStretch(1)
+        btn_refresh = QPushButton("Yenile", self)
+        btn_reset = QPushButton("Sıfırla", self)
+        btn_close = QPushButton("Kapat", self)
+        btn_refresh.clicked.connect(self.refresh)
+        btn_reset.clicked.connect(self._reset)
+        btn_close.clicked.connect(self.accept)
+        for b in (btn_refresh, btn_reset, btn_close):
+            btns.addWidget(b)
+        layout.addLayout(btns)
+
+        self.refresh()
+
+    def _make_table(self, headers) -> QTableWidget:
+        tbl = QTableWidget(0, len(headers), self)
+        tbl.setHorizontalHeaderLabels(headers)
+        tbl.setEditTriggers(QAbstractItemView.EditTrigger.NoEditTriggers)
+        tbl.setSelectionBehavior(QAbstractItemView.SelectionBehavior.SelectRows)
+        tbl.verticalHeader().setVisible(False)
+        hh = tbl.horizontalHeader()
+        hh.setSectionResizeMode(QHeaderView.ResizeMode.ResizeToContents)
+        hh.setStretchLastSection(True)
+        return tbl
+
+    def _fill(self, tbl: QTableWidget, rows):
+        tbl.setRowCount(0)
+        tbl.setRowCount(len(rows))
+        for r, values in enumerate(rows):
+            for c, v in enumerate(values):
+                item = QTableWidgetItem(str(v))
+                if isinstance(v, (int, float)):
+                    item.setTextAlignment(Qt.AlignmentFlag.AlignRight | Qt.AlignmentFlag.AlignVCenter)
+                if c == len(values) - 1:
+                    item.setToolTip(str(v))
+                tbl.setItem(r, c, item)
+
+    def refresh(self):
+        snap = profiler.snapshot(self._top)
+        buckets = snap["buckets_ms"]
+        if snap["enabled"]:
+            self.lbl_info.setText(f"Profil açık. Günlük: {profiler.PROFILE_LOG_PATH}")
+        else:
+            self.lbl_info.setText("Profil kapalı. Ölçüm için uygulamayı SATTUP_PROFILE=1 ile başlatın.")
+
+        self._fill(self.tbl_queries, [
+            (q["max_ms"], q["avg_ms"], q["total_ms"], q["count"], q["rows"],
+             _hist_text(q["hist"], buckets), ", ".join(q["methods"]), q["fingerprint"])
+            for q in snap["queries"]
+        ])
+        self._fill(self.tbl_methods, [
+            (m["total_ms"], m["avg_ms"], m["max_ms"], m["count"], m["queries"], m["statements"], m["name"])
+            for m in snap["methods"]
+        ])
+        self._fill(self.tbl_actions, [
+            (a["max_ms"], a["avg_ms"], a["count"], a["queries"], _hist_text(a["hist"], buckets), a["name"])
+            for a in snap["actions"]
+        ])
+        self._fill(self.tbl_n1, [(n["count"], n["frame"], n["fingerprint"]) for n in snap["n_plus_one"]])
+
+    def _reset(self):
+        profiler.reset()
+        self.refresh()
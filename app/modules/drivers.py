@@ -1,20 +1,23 @@
-from PyQt6 import uic
 from PyQt6.QtCore import QDate, Qt
 from PyQt6.QtWidgets import QWidget, QMessageBox, QListWidgetItem
 
+from app.core import doc_store
 from app.core.db_manager import DatabaseManager
-from config import get_ui_path
+from config import BASE_DIR
+from app.core.forms import load_ui
 
 
 class DriversApp(QWidget):
     def __init__(self, user_data=None, db_manager=None, parent=None):
         super().__init__(parent)
-        uic.loadUi(get_ui_path("drivers_window.ui"), self)
+        load_ui("drivers_window.ui", self)
         self.setObjectName("main_form")
 
         self.user_data = user_data or {}
         self.db = db_manager if db_manager else DatabaseManager()
         self._selected_personel_kodu = None
+        # Belge görüntüsü ekranda düzenlenmiyor; kayıtta silinmesin diye mevcut değer korunur.
+        self._resim_yolu = ""
 
         self._init_ui()
         self._init_combos()
@@ -63,6 +66,10 @@ class DriversApp(QWidget):
         if hasattr(self, "list_suruculer"):
             self.list_suruculer.itemClicked.connect(self._driver_selected)
 
+    def refresh_on_enter(self):
+        """Ana menüden önbellekteki sayfaya dönülürken (veri değiştiyse) çağrılır; form korunur."""
+        self._load_drivers_list()
+
     def _load_drivers_list(self):
         if not hasattr(self, "list_suruculer"):
             return
@@ -96,6 +103,7 @@ class DriversApp(QWidget):
             self.txt_kan_grubu.setText(str(p_data.get("kan_grubu", "")))
 
         s_data = self.db.get_surucu_belgeleri(self._selected_personel_kodu)
+        self._resim_yolu = str((s_data or {}).get("resim_yolu") or "")
         if s_data:
             if hasattr(self, "cmb_ehliyet_sinifi"):
                 self.cmb_ehliyet_sinifi.setCurrentText(s_data.get("ehliyet_sinifi") or "Seçiniz...")
@@ -173,7 +181,7 @@ class DriversApp(QWidget):
             "psikoteknik_tarihi": self.date_psikoteknik_tarihi.date().toString("yyyy-MM-dd") if hasattr(self, "date_psikoteknik_tarihi") else None,
             "sertifika_durumu": 1 if hasattr(self, "radio_sertifika_var") and self.radio_sertifika_var.isChecked() else 0,
             "sertifika_metni": self.txt_sertifikalar.toPlainText() if hasattr(self, "txt_sertifikalar") else "",
-            "resim_yolu": "",
+            "resim_yolu": self._stored_image_path(),
         }
 
         if self.db.save_surucu_belgeleri(data):
@@ -181,6 +189,18 @@ class DriversApp(QWidget):
         else:
             QMessageBox.critical(self, "Hata", "Kayıt sırasında hata oluştu.")
 
+    def _stored_image_path(self) -> str:
+        # Eski kayıtlardaki dosya yolu hâlâ geçerliyse belge deposuna alınır (dosya taşınsa da kaybolmaz).
+        path = self._resim_yolu
+        try:
+            stored = doc_store.adopt(path, legacy_base=BASE_DIR)
+        except Exception as e:
+            print(f"Sürücü belge görüntüsü depoya alınamadı: {e}")
+            stored = None
+        if stored is not None:
+            self._resim_yolu = stored.path
+        return self._resim_yolu
+
     def _delete_documents(self):
         p_kodu = (self.txt_personel_kodu.text() or "").strip() if hasattr(self, "txt_personel_kodu") else ""
         if not p_kodu:
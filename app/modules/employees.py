@@ -1,14 +1,16 @@
 from PyQt6.QtWidgets import QWidget, QMessageBox, QTableWidget, QTableWidgetItem, QHeaderView, QSizePolicy, QLineEdit, QComboBox, QLayout, QFileDialog
 from PyQt6.QtCore import Qt, QRegularExpression, QSize
-from PyQt6 import uic
 from PyQt6.QtGui import QIntValidator, QRegularExpressionValidator, QPixmap
+from app.core import doc_store
+from app.core.async_loader import AsyncLoader
 from app.core.db_manager import DatabaseManager
+from app.utils import thumbnail_cache
 import ui.icons.context_rc
 
-from config import get_ui_path, BASE_DIR
+from config import BASE_DIR
+from app.core.forms import load_ui
 import os
 import re
-import shutil
 
 def tr_upper(text):
     """Türkçe karakterleri (i-İ, ı-I) doğru şekilde büyük harfe çevirir."""
@@ -19,7 +21,7 @@ class EmployeesApp(QWidget):
 
     def __init__(self, user_data=None, parent=None): # Ebeveyn kuralı gereği parent=None ekledik
         super().__init__(parent)
-        uic.loadUi(get_ui_path("employees_window.ui"), self)
+        load_ui("employees_window.ui", self)
         self.setObjectName("main_form")
         try:
             self.setAttribute(Qt.WidgetAttribute.WA_StyledBackground, True)
@@ -42,6 +44,10 @@ class EmployeesApp(QWidget):
 
         self.photo_path = ""
         self._loaded_tckn = ""
+        # Fotoğraf önizlemesi arka planda küçük resimden yüklenir (bkz. thumbnail_cache)
+        self._photo_loader = AsyncLoader(self)
+        # Seçilen fotoğraf belge deposuna arka planda (özet + kopya) alınır
+        self._doc_loader = AsyncLoader(self)
         if hasattr(self, "lbl_photo"):
             self.lbl_photo.setCursor(Qt.CursorShape.PointingHandCursor)
             self.lbl_photo.mousePressEvent = self._on_photo_clicked
@@ -126,83 +132,56 @@ class EmployeesApp(QWidget):
         if not file_path:
             return
 
-        stored_path = self._store_employee_photo(file_path)
-        if not stored_path:
-            return
-
-        self.photo_path = stored_path
-        self._set_photo_preview(self._resolve_photo_path(stored_path))
+        self._store_employee_photo(file_path)
 
     def _resolve_photo_path(self, stored_path: str) -> str:
         if not stored_path:
             return ""
-        if os.path.isabs(stored_path):
-            return stored_path
-        return os.path.normpath(os.path.join(BASE_DIR, stored_path))
+        # Depo yolu ("store:...") ya da eski assets/photos altındaki göreli yol
+        return os.path.normpath(doc_store.resolve_path(stored_path, legacy_base=BASE_DIR))
 
-    def _store_employee_photo(self, src_path: str) -> str:
+    def _store_employee_photo(self, src_path: str) -> None:
         if not src_path:
-            return ""
+            return
+        if not os.path.exists(src_path):
+            QMessageBox.warning(self, "Hata", "Seçilen fotoğraf dosyası bulunamadı.")
+            return
 
-        try:
-            if not os.path.exists(src_path):
-                QMessageBox.warning(self, "Hata", "Seçilen fotoğraf dosyası bulunamadı.")
-                return ""
+        def _stored(stored):
+            self.photo_path = stored.path
+            self._set_photo_preview(self._resolve_photo_path(stored.path))
 
-            abs_src = os.path.abspath(src_path)
-            assets_photos_dir = os.path.join(BASE_DIR, "assets", "photos")
-            os.makedirs(assets_photos_dir, exist_ok=True)
+        def _failed(err):
+            QMessageBox.critical(self, "Hata", f"Fotoğraf kaydedilirken hata oluştu:\n{str(err)}")
 
-            abs_assets_photos_dir = os.path.abspath(assets_photos_dir)
-            try:
-                in_assets = os.path.commonpath([abs_src, abs_assets_photos_dir]) == abs_assets_photos_dir
-            except ValueError:
-                in_assets = False
-
-            if in_assets:
-                rel_existing = os.path.relpath(abs_src, BASE_DIR)
-                return rel_existing.replace("\\", "/")
-
-            ext = os.path.splitext(src_path)[1] or ".jpg"
-            kodu = (self.current_kodu or "").strip() or (self.txt_personel_kodu.text().strip() if hasattr(self, "txt_personel_kodu") else "")
-            base_name = re.sub(r"[^A-Za-z0-9_-]", "_", kodu) if kodu else "employee"
-
-            file_name = f"{base_name}{ext.lower()}"
-            dest_path = os.path.join(assets_photos_dir, file_name)
-
-            i = 1
-            while os.path.exists(dest_path):
-                file_name = f"{base_name}_{i}{ext.lower()}"
-                dest_path = os.path.join(assets_photos_dir, file_name)
-                i += 1
-
-            shutil.copy2(src_path, dest_path)
-            rel_path = os.path.relpath(dest_path, BASE_DIR)
-            return rel_path.replace("\\", "/")
-        except Exception as e:
-            QMessageBox.critical(self, "Hata", f"Fotoğraf kaydedilirken hata oluştu:\n{str(e)}")
-            return ""
+        # İçerik adresli depo: aynı fotoğraf tekrar seçilirse yeniden kopyalanmaz. Başka kayda geçilir
+        # ya da form temizlenirse (cancel) sonuç atılır.
+        self._doc_loader.request(lambda: doc_store.put_file(src_path), _stored, _failed)
 
     def _set_photo_preview(self, file_path: str):
         if not hasattr(self, "lbl_photo"):
             return
 
-        pixmap = QPixmap(file_path)
-        if pixmap.isNull():
-            return
+        def _show(pixmap):
+            if pixmap is None:
+                self.lbl_photo.setPixmap(QPixmap(":/resim/Photo.png"))
+                self.lbl_photo.setAlignment(Qt.AlignmentFlag.AlignCenter)
+                return
 
-        target_size = self.lbl_photo.size()
-        if target_size.width() <= 0 or target_size.height() <= 0:
-            target_size = QSize(150, 200)
+            target_size = self.lbl_photo.size()
+            if target_size.width() <= 0 or target_size.height() <= 0:
+                target_size = QSize(150, 200)
 
-        scaled = pixmap.scaled(
-            target_size,
-            Qt.AspectRatioMode.KeepAspectRatio,
-            Qt.TransformationMode.SmoothTransformation,
-        )
+            scaled = pixmap.scaled(
+                target_size,
+                Qt.AspectRatioMode.KeepAspectRatio,
+                Qt.TransformationMode.SmoothTransformation,
+            )
+
+            self.lbl_photo.setPixmap(scaled)
+            self.lbl_photo.setAlignment(Qt.AlignmentFlag.AlignCenter)
 
-        self.lbl_photo.setPixmap(scaled)
-        self.lbl_photo.setAlignment(Qt.AlignmentFlag.AlignCenter)
+        thumbnail_cache.request_thumbnail(self._photo_loader, file_path, _show)
 
     def _relax_ui_constraints(self):
         layout = self.layout()
@@ -245,6 +224,10 @@ class EmployeesApp(QWidget):
     def sizeHint(self):
         return QSize(0, 0)
 
+    def refresh_on_enter(self):
+        """Ana menüden önbellekteki sayfaya dönülürken (veri değiştiyse) çağrılır; form korunur."""
+        self.load_data()
+
     def load_data(self):
         """Tabloyu kurumsal renklere boyar, sütun genişliklerini sabitler ve verileri yükler"""
         # 1. Başlık ve Temel Ayarlar
@@ -766,6 +749,10 @@ class EmployeesApp(QWidget):
             self.clear_form()
 
     def save(self):
+        if self._doc_loader.is_busy():
+            QMessageBox.information(self, "Bilgi", "Fotoğraf kaydediliyor, lütfen birkaç saniye sonra tekrar deneyin.")
+            return
+
         # 1. Değerleri al
         ad_soyad = self.txt_ad_soyad.text().strip()
         tckn = self.txt_tckn.text().strip()
@@ -874,6 +861,8 @@ class EmployeesApp(QWidget):
 
         # Fotoğrafı sıfırla
         self.photo_path = ""
+        self._photo_loader.cancel()
+        self._doc_loader.cancel()
         if hasattr(self, "lbl_photo"):
             self.lbl_photo.setPixmap(QPixmap(":/resim/Photo.png"))
             self.lbl_photo.setAlignment(Qt.AlignmentFlag.AlignCenter)
@@ -930,6 +919,7 @@ class EmployeesApp(QWidget):
 
         self.current_kodu = p_kodu
         self._loaded_tckn = str(personel.get("tckn") or "").strip()
+        self._doc_loader.cancel()
 
         # Widget -> DB kolon haritası üzerinden doldur
         for ui_obj, db_col in self.fields.items():
@@ -966,6 +956,7 @@ class EmployeesApp(QWidget):
         if self.photo_path:
             self._set_photo_preview(self._resolve_photo_path(self.photo_path))
         else:
+            self._photo_loader.cancel()
             if hasattr(self, "lbl_photo"):
                 self.lbl_photo.setPixmap(QPixmap(":/resim/Photo.png"))
                 self.lbl_photo.setAlignment(Qt.AlignmentFlag.AlignCenter)
\ No newline at end of file
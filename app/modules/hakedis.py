@@ -2,22 +2,30 @@ from __future__ import annotations
 
 import json
 import os
-import re
 from datetime import datetime
 
-from PyQt6 import uic
-from PyQt6.QtCore import Qt, QUrl
-from PyQt6.QtGui import QDesktopServices
+from PyQt6.QtCore import QSize, Qt, QUrl
+from PyQt6.QtGui import QDesktopServices, QIcon
 from PyQt6.QtWidgets import QFileDialog, QInputDialog, QMessageBox, QTableWidget, QTableWidgetItem, QWidget
 
+from app.core import doc_store
+from app.core.async_loader import AsyncLoader
 from app.core.db_manager import DatabaseManager
-from config import get_ui_path
+from app.core.profiler import profiled
+from app.services.hakedis import (
+    clear_ceza_reminders,
+    collect_ceza_reminder,
+    hakedis_has_ceza,
+    prepare_hakedis,
+    save_hakedis,
+)
+from app.core.forms import load_ui
 
 
 class HakedisApp(QWidget):
     def __init__(self, parent=None, user_data=None, db: DatabaseManager | None = None):
         super().__init__(parent)
-        uic.loadUi(get_ui_path("hakedis_window.ui"), self)
+        load_ui("hakedis_window.ui", self)
         self.setObjectName("main_form")
 
         self.user_data = user_data or {}
@@ -25,6 +33,11 @@ class HakedisApp(QWidget):
 
         self._ceza_reminder_ack: set[tuple[int, str, str]] = set()
 
+        # Belge deposu: yükleme (hash + kopya), küçük resimler ve eski belge taşıma işleri arka planda
+        self._doc_loader = AsyncLoader(self)
+        self._thumb_loader = AsyncLoader(self)
+        self._doc_loader.request(self.db.adopt_legacy_hakedis_docs, self._on_legacy_docs_adopted)
+
         try:
             tbl = getattr(self, "tbl_hakedis", None)
             if tbl is not None:
@@ -147,25 +160,8 @@ class HakedisApp(QWidget):
             if not contract_id:
                 return
 
-            conn = self.db.connect()
-            if not conn:
-                return
-            try:
-                cur = conn.cursor()
-                cur.execute(
-                    """
-                    SELECT DISTINCT COALESCE(service_type,'')
-                    FROM route_params
-                    WHERE contract_id=?
-                      AND COALESCE(service_type,'') <> ''
-                    ORDER BY service_type
-                    """,
-                    (int(contract_id),),
-                )
-                for (st,) in cur.fetchall() or []:
-                    cmb.addItem(str(st), str(st))
-            finally:
-                conn.close()
+            for st in self.db.get_route_directory(int(contract_id)).service_types():
+                cmb.addItem(str(st), str(st))
         finally:
             cmb.blockSignals(False)
 
@@ -329,11 +325,24 @@ class HakedisApp(QWidget):
         self.load_table()
         self._reselect_by_id(hid)
 
-    def load_table(self):
-        tbl = getattr(self, "tbl_hakedis", None)
-        if tbl is None:
-            return
+    def refresh_on_enter(self):
+        """Ana menüden önbellekteki sayfaya dönülürken (veri değiştiyse) çağrılır; filtreler korunur."""
+        hid = self._selected_hakedis_id()
+        cmb = getattr(self, "cmb_contract", None)
+        selected = cmb.currentData() if cmb is not None else None
+        self._fill_contracts()
+        if cmb is not None:
+            idx = cmb.findData(selected)
+            if idx >= 0:
+                cmb.blockSignals(True)
+                cmb.setCurrentIndex(idx)
+                cmb.blockSignals(False)
+        self.load_table()
+        if hid:
+            self._reselect_by_id(hid)
 
+    def _list_filters(self) -> dict:
+        """Liste filtreleri (DatabaseManager.list_hakedis / iter_hakedis_rows anahtar kelimeleri)."""
         contract_id = None
         period = None
         service_type = None
@@ -381,14 +390,21 @@ class HakedisApp(QWidget):
         except Exception:
             only_missing_docs = False
 
-        rows = self.db.list_hakedis(
-            contract_id=contract_id,
-            period=period,
-            service_type=service_type,
-            route_params_id=route_params_id,
-            status=status,
-            only_missing_docs=only_missing_docs,
-        )
+        return {
+            "contract_id": contract_id,
+            "period": period,
+            "service_type": service_type,
+            "route_params_id": route_params_id,
+            "status": status,
+            "only_missing_docs": only_missing_docs,
+        }
+
+    def load_table(self):
+        tbl = getattr(self, "tbl_hakedis", None)
+        if tbl is None:
+            return
+
+        rows = self.db.list_hakedis(**self._list_filters())
 
         tbl.setRowCount(0)
         for r_idx, row in enumerate(rows):
@@ -503,9 +519,11 @@ class HakedisApp(QWidget):
             return
         rows = self.db.get_hakedis_docs_ui_rows(int(hakedis_id))
         tbl.setRowCount(0)
+        tbl.setIconSize(QSize(32, 32))
+        thumb_jobs = []
         for r_idx, row in enumerate(rows or []):
             tbl.insertRow(r_idx)
-            # row: (id, doc_type, file_name, file_path, uploaded_at, description)
+            # row: (id, doc_type, file_name, file_path, uploaded_at, description, sha256, file_size)
             doc_id = None
             try:
                 doc_id = int(row[0])
@@ -516,7 +534,9 @@ class HakedisApp(QWidget):
             file_path = row[3] if len(row) > 3 else ""
             uploaded_at = row[4] if len(row) > 4 else ""
             desc = row[5] if len(row) > 5 else ""
-            vals = [doc_type, file_name, file_path, uploaded_at, desc]
+            sha = str(row[6] or "") if len(row) > 6 else ""
+            size = int(row[7] or 0) if len(row) > 7 else 0
+            vals = [doc_type, file_name, doc_store.resolve_path(file_path), uploaded_at, desc]
 
             for c_idx, val in enumerate(vals):
                 if c_idx >= tbl.columnCount():
@@ -526,21 +546,55 @@ class HakedisApp(QWidget):
                     if doc_id is not None:
                         it.setData(Qt.ItemDataRole.UserRole + 1, int(doc_id))
                     it.setData(Qt.ItemDataRole.UserRole + 2, str(file_path or ""))
+                elif c_idx == 1 and size:
+                    it.setToolTip(f"{size / 1024:,.0f} KB\nSHA-256: {sha}")
                 tbl.setItem(r_idx, c_idx, it)
+            if doc_id is not None and file_path:
+                thumb_jobs.append((int(doc_id), str(file_path), sha))
 
-    def _month_range(self, ym: str):
-        # ym: YYYY-MM
-        try:
-            d0 = datetime.strptime(str(ym).strip() + "-01", "%Y-%m-%d")
-        except Exception:
-            return None, None
-        if d0.month == 12:
-            d1 = datetime(d0.year + 1, 1, 1)
-        else:
-            d1 = datetime(d0.year, d0.month + 1, 1)
-        start = d0.strftime("%Y-%m-%d")
-        end = (d1 - __import__("datetime").timedelta(days=1)).strftime("%Y-%m-%d")
-        return start, end
+        self._request_doc_thumbnails(int(hakedis_id), thumb_jobs)
+
+    def _on_legacy_docs_adopted(self, count):
+        # Eski belgeler depoya taşındıysa açık liste yeni yollarla yenilenir
+        hid = self._selected_hakedis_id()
+        if count and hid:
+            self._load_docs(int(hid))
+
+    def _request_doc_thumbnails(self, hakedis_id: int, jobs: list):
+        """Küçük resimleri arka planda üretir (önbellekte varsa doğrudan okunur). Yalnızca okur."""
+        if not jobs:
+            self._thumb_loader.cancel()
+            return
+
+        def _work():
+            out = []
+            for doc_id, path, sha in jobs:
+                try:
+                    out.append((doc_id, path, doc_store.thumbnail_for(path, sha)))
+                except Exception as e:
+                    print(f"Belge önizleme hatası ({doc_id}): {e}")
+            return out
+
+        self._thumb_loader.request(_work, lambda res: self._apply_doc_thumbnails(hakedis_id, res))
+
+    def _apply_doc_thumbnails(self, hakedis_id: int, results):
+        tbl = getattr(self, "tbl_docs", None)
+        if tbl is None or self._selected_hakedis_id() != int(hakedis_id):
+            return
+        by_id = {int(doc_id): (path, thumb) for doc_id, path, thumb in (results or [])}
+        for r in range(tbl.rowCount()):
+            it0 = tbl.item(r, 0)
+            doc_id = it0.data(Qt.ItemDataRole.UserRole + 1) if it0 else None
+            if doc_id is None or int(doc_id) not in by_id:
+                continue
+            path, thumb = by_id[int(doc_id)]
+            it0.setData(Qt.ItemDataRole.UserRole + 2, str(path or ""))
+            it_path = tbl.item(r, 2)
+            if it_path is not None:
+                it_path.setText(doc_store.resolve_path(path))
+            it_name = tbl.item(r, 1)
+            if thumb and it_name is not None:
+                it_name.setIcon(QIcon(thumb))
 
     def _parse_money(self, txt: str) -> float:
         s = str(txt or "").strip()
@@ -672,22 +726,41 @@ class HakedisApp(QWidget):
         file_path, _ = QFileDialog.getOpenFileName(self, "Belge seç", "", "Tüm Dosyalar (*.*)")
         if not file_path:
             return
+        if self._doc_loader.is_busy():
+            self._set_status("Önceki belge hâlâ ekleniyor, lütfen bekleyin")
+            return
 
         file_name = os.path.basename(file_path)
         uploaded_at = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        doc_id = self.db.add_hakedis_doc(
-            int(hid),
-            str(doc_type),
-            str(file_name),
-            str(file_path),
-            str(uploaded_at),
-            str(desc or ""),
-        )
-        if not doc_id:
-            self._set_status("Belge eklenemedi")
-            return
-        self._set_status("Belge eklendi")
-        self._load_docs(int(hid))
+
+        def _stored(stored):
+            # Tekrar kontrolü tekil indeksle (hakedis_id, sha256) yapılır; önce sorgulayıp sonra
+            # eklemek art arda iki eklemede yarışa açıktı.
+            doc_id = self.db.add_hakedis_doc(
+                int(hid),
+                str(doc_type),
+                str(file_name),
+                stored.path,
+                str(uploaded_at),
+                str(desc or ""),
+                sha256=stored.sha256,
+                file_size=stored.size,
+            )
+            if not doc_id:
+                if self.db.find_hakedis_doc_by_hash(int(hid), stored.sha256):
+                    self._set_status("Bu belge bu hakedişe zaten ekli")
+                else:
+                    self._set_status("Belge eklenemedi")
+                return
+            self._set_status("Belge eklendi (depoda zaten vardı)" if stored.deduplicated else "Belge eklendi")
+            if self._selected_hakedis_id() == int(hid):
+                self._load_docs(int(hid))
+
+        def _failed(err):
+            self._set_status(f"Belge depoya eklenemedi: {err}")
+
+        self._set_status("Belge depoya ekleniyor...")
+        self._doc_loader.request(lambda: doc_store.put_file(file_path), _stored, _failed)
 
     def remove_selected_docs(self):
         hid = self._selected_hakedis_id()
@@ -733,7 +806,7 @@ class HakedisApp(QWidget):
 
     def open_selected_doc(self):
         _doc_id, path = self._selected_doc_meta()
-        path = str(path or "").strip()
+        path = doc_store.resolve_path(path)
         if not path:
             self._set_status("Açmak için belge seçmelisin")
             return
@@ -772,7 +845,7 @@ class HakedisApp(QWidget):
 
     def export_excel(self):
         try:
-            from app.utils.excel_utils import create_excel
+            from app.utils.excel_utils import ask_excel_file, start_excel_export
         except Exception as e:
             QMessageBox.critical(self, "Hata", f"Excel modülü yüklenemedi:\n{str(e)}")
             return
@@ -782,8 +855,21 @@ class HakedisApp(QWidget):
             QMessageBox.warning(self, "Uyarı", "Tablo bulunamadı!")
             return
 
-        export_table = self._build_export_table_from(tbl)
-        create_excel(export_table, report_title="Hakediş Listesi", username="Admin", parent=self)
+        report_title = "Hakediş Listesi"
+        file_name = ask_excel_file(self, report_title)
+        if not file_name:
+            return
+
+        # Satırlar tablodan değil, listeyle aynı sorgudan thread'de okunur (tutarlar sayı hücresi olur).
+        headers = []
+        for c in range(tbl.columnCount()):
+            h = tbl.horizontalHeaderItem(c)
+            headers.append(h.text() if h else "")
+        filters = self._list_filters()
+        start_excel_export(
+            self, file_name, headers, lambda: self.db.iter_hakedis_rows(**filters),
+            report_title=report_title, total_rows=tbl.rowCount(),
+        )
 
     def export_pdf(self):
         try:
@@ -800,8 +886,9 @@ class HakedisApp(QWidget):
         export_table = self._build_export_table_from(tbl)
         create_pdf(export_table, report_title="Hakediş Listesi", username="Admin", parent=self)
 
+    @profiled("hakedis.calculate_hakedis")
     def calculate_hakedis(self):
-        # MVP hesaplama: trip_allocations + trip_prices kullanarak kalem üret
+        # Hesap app.services.hakedis'te; burada yalnızca seçim, onay soruları ve gösterim var.
         contract_id = None
         period = None
         service_type = None
@@ -840,204 +927,28 @@ class HakedisApp(QWidget):
             self._set_status("Hesaplama için Sözleşme + Dönem + Hizmet Türü seçmelisin")
             return
 
-        start_date, end_date = self._month_range(str(period))
-        if not start_date or not end_date:
-            self._set_status("Dönem formatı hatalı (YYYY-MM bekleniyor)")
+        try:
+            calc = prepare_hakedis(self.db, int(contract_id), str(period), str(service_type), route_params_id)
+        except ValueError as e:
+            self._set_status(str(e))
             return
 
-        allocations = self.db.get_trip_allocations_for_range(
-            contract_id=int(contract_id),
-            service_type=str(service_type),
-            start_date=str(start_date),
-            end_date=str(end_date),
-        )
-
-        # If CEZA deduction is already applied for this period, skip reminder popup.
-        # Also clear reminder tokens to avoid prompting again after app restart.
-        try:
-            connx = self.db.connect()
-            if connx:
-                try:
-                    curx = connx.cursor()
-                    curx.execute(
-                        """
-                        SELECT id
-                        FROM hakedis
-                        WHERE contract_id=?
-                          AND period=?
-                          AND service_type=?
-                          AND (
-                                (route_params_id IS NULL AND ? IS NULL)
-                             OR route_params_id=?
-                          )
-                        ORDER BY id DESC
-                        LIMIT 1
-                        """,
-                        (
-                            int(contract_id),
-                            str(period),
-                            str(service_type),
-                            (int(route_params_id) if route_params_id is not None else None),
-                            (int(route_params_id) if route_params_id is not None else None),
-                        ),
-                    )
-                    row = curx.fetchone()
-                    existing_hid = int(row[0]) if row and row[0] is not None else None
-                    has_ceza = False
-                    if existing_hid:
-                        curx.execute(
-                            """
-                            SELECT COUNT(1)
-                            FROM hakedis_deductions
-                            WHERE hakedis_id=?
-                              AND UPPER(COALESCE(deduction_type,'')) LIKE '%CEZA%'
-                            """,
-                            (int(existing_hid),),
-                        )
-                        cnt = int((curx.fetchone() or [0])[0] or 0)
-                        has_ceza = cnt > 0
-
-                    if has_ceza:
-                        ceza_flag0 = "__CEZA_HATIRLAT__"
-                        curx.execute(
-                            """
-                            SELECT route_params_id, trip_date, time_block, line_no, COALESCE(note,'')
-                            FROM trip_allocations
-                            WHERE contract_id = ?
-                              AND service_type = ?
-                              AND trip_date BETWEEN ? AND ?
-                              AND COALESCE(note,'') LIKE ?
-                            """,
-                            (
-                                int(contract_id),
-                                str(service_type),
-                                str(start_date),
-                                str(end_date),
-                                f"%{ceza_flag0}%",
-                            ),
-                        )
-                        rows0 = curx.fetchall() or []
-                        for rid0, d0, tb0, ln0, note0 in rows0:
-                            try:
-                                new_note = " ".join(str(note0 or "").replace(str(ceza_flag0), "").split()).strip()
-                            except Exception:
-                                new_note = ""
-                            curx.execute(
-                                """
-                                UPDATE trip_allocations
-                                SET note = ?, updated_at = ?
-                                WHERE contract_id = ?
-                                  AND service_type = ?
-                                  AND route_params_id = ?
-                                  AND trip_date = ?
-                                  AND time_block = ?
-                                  AND line_no = ?
-                                """,
-                                (
-                                    str(new_note),
-                                    datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-                                    int(contract_id),
-                                    str(service_type),
-                                    int(rid0 or 0),
-                                    str(d0 or ""),
-                                    str(tb0 or ""),
-                                    int(ln0 or 0),
-                                ),
-                            )
-                        connx.commit()
-                        try:
-                            self._ceza_reminder_ack.add((int(contract_id), str(period), str(service_type)))
-                        except Exception:
-                            pass
-                finally:
-                    try:
-                        connx.close()
-                    except Exception:
-                        pass
-        except Exception:
-            pass
+        # Bu dönem için CEZA kesintisi zaten uygulanmışsa hatırlatıcı token'larını temizle; tekrar sorulmaz.
+        ack_key = (int(contract_id), str(period), str(service_type))
+        if hakedis_has_ceza(self.db, int(contract_id), str(period), str(service_type), route_params_id):
+            clear_ceza_reminders(self.db, int(contract_id), str(service_type), calc.start_date, calc.end_date)
+            self._ceza_reminder_ack.add(ack_key)
 
         # --- TAŞERON CEZA HATIRLATICI (Puantaj popup checkbox) ---
         # Puantaj tarafında note içine __CEZA_HATIRLAT__ token'ı eklenir.
         # Hesapla/Oluştur'a basınca kullanıcıya ceza kesimini hatırlat.
-        try:
-            ack_key = (int(contract_id), str(period), str(service_type))
-            if ack_key in (self._ceza_reminder_ack or set()):
-                raise Exception("skip_reminder")
-
-            ceza_flag = "__CEZA_HATIRLAT__"
-            flagged: dict[int, set[str]] = {}  # supplier_customer_id -> {yyyy-mm-dd}
-            unknown_supplier_dates: set[str] = set()
-            unknown_vehicle_dates: set[tuple[int, str]] = set()  # (vehicle_id, yyyy-mm-dd)
-            any_flagged_dates: set[str] = set()
-
-            for rec in allocations or []:
-                try:
-                    _route_params_id, trip_date, _time_block, _line_no, vehicle_id, _driver_id, _qty, _time_text, note = rec
-                except Exception:
-                    continue
-                if ceza_flag not in str(note or ""):
-                    continue
-                any_flagged_dates.add(str(trip_date))
-                try:
-                    v_id = int(vehicle_id or 0)
-                except Exception:
-                    v_id = 0
-                if v_id <= 0:
-                    continue
-
-                try:
-                    arac_turu, supplier_customer_id = self.db.get_vehicle_subcontract_meta(int(v_id))
-                except Exception:
-                    arac_turu, supplier_customer_id = None, None
-
-                try:
-                    at = str(arac_turu or "").strip().upper()
-                    at2 = at.replace("Ş", "S").replace("İ", "I").replace("Ğ", "G").replace("Ü", "U").replace("Ö", "O").replace("Ç", "C")
-                    # accept variations: 'TAŞERON ARACI', 'TAŞERON ARAÇ', 'TAŞERON', etc.
-                    is_sub = ("TASERON" in at2) and ("ARAC" in at2 or "ARACI" in at2)
-                except Exception:
-                    is_sub = False
-                if not is_sub:
-                    unknown_vehicle_dates.add((int(v_id), str(trip_date)))
-                    continue
-
-                try:
-                    s_id = int(supplier_customer_id or 0)
-                except Exception:
-                    s_id = 0
-                if s_id <= 0:
-                    unknown_supplier_dates.add(str(trip_date))
-                    continue
-                flagged.setdefault(int(s_id), set()).add(str(trip_date))
-
-            if flagged or unknown_supplier_dates or unknown_vehicle_dates or any_flagged_dates:
-                lines = []
-                for s_id in sorted(flagged.keys()):
-                    dates = sorted(flagged.get(s_id) or set())
-                    sample = ", ".join(dates[:8])
-                    more = "" if len(dates) <= 8 else f" ...(+{len(dates) - 8})"
-                    lines.append(f"Taşeron ID {int(s_id)}: {sample}{more}")
-                if unknown_supplier_dates:
-                    dates = sorted(unknown_supplier_dates)
-                    sample = ", ".join(dates[:8])
-                    more = "" if len(dates) <= 8 else f" ...(+{len(dates) - 8})"
-                    lines.append(f"(Taşeron ID bulunamadı): {sample}{more}")
-                if unknown_vehicle_dates:
-                    pairs = sorted(list(unknown_vehicle_dates))
-                    sample = ", ".join([f"{vid}@{dt}" for vid, dt in pairs[:8]])
-                    more = "" if len(pairs) <= 8 else f" ...(+{len(pairs) - 8})"
-                    lines.append(f"(Taşeron araç tespit edilemedi): {sample}{more}")
-                if (not flagged) and (not unknown_supplier_dates) and (not unknown_vehicle_dates) and any_flagged_dates:
-                    dates = sorted(any_flagged_dates)
-                    sample = ", ".join(dates[:8])
-                    more = "" if len(dates) <= 8 else f" ...(+{len(dates) - 8})"
-                    lines.append(f"(Ceza hatırlat işaretli): {sample}{more}")
-
+        if ack_key not in (self._ceza_reminder_ack or set()):
+            reminder = collect_ceza_reminder(self.db, calc.allocations)
+            if reminder:
                 msg = (
                     "Puantaj'da bazı taşeron seferlerinde 'ceza hatırlat' işaretli.\n"
                     "Hakediş'te CEZA kesimini eklemek ister misin?\n\n"
-                    + "\n".join(lines)
+                    + "\n".join(reminder.lines())
                     + "\n\nDevam edilsin mi?"
                 )
                 ans = QMessageBox.question(
@@ -1050,418 +961,39 @@ class HakedisApp(QWidget):
                     self._set_status("Hesaplama iptal edildi (ceza hatırlatıcı)")
                     return
                 apply_ceza_after_calc = True
-                try:
-                    self._ceza_reminder_ack.add(ack_key)
-                except Exception:
-                    pass
-
-                # Persist acknowledgement: clear reminder token from DB so it won't show again after reopening module.
-                try:
-                    conn = self.db.connect()
-                    if conn:
-                        try:
-                            cur = conn.cursor()
-                            cur.execute(
-                                """
-                                SELECT route_params_id, trip_date, time_block, line_no, COALESCE(note,'')
-                                FROM trip_allocations
-                                WHERE contract_id = ?
-                                  AND service_type = ?
-                                  AND trip_date BETWEEN ? AND ?
-                                  AND COALESCE(note,'') LIKE ?
-                                """,
-                                (
-                                    int(contract_id),
-                                    str(service_type),
-                                    str(start_date),
-                                    str(end_date),
-                                    f"%{ceza_flag}%",
-                                ),
-                            )
-                            rows = cur.fetchall() or []
-                            for rid0, d0, tb0, ln0, note0 in rows:
-                                try:
-                                    new_note = " ".join(str(note0 or "").replace(str(ceza_flag), "").split()).strip()
-                                except Exception:
-                                    new_note = ""
-                                cur.execute(
-                                    """
-                                    UPDATE trip_allocations
-                                    SET note = ?, updated_at = ?
-                                    WHERE contract_id = ?
-                                      AND service_type = ?
-                                      AND route_params_id = ?
-                                      AND trip_date = ?
-                                      AND time_block = ?
-                                      AND line_no = ?
-                                    """,
-                                    (
-                                        str(new_note),
-                                        datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-                                        int(contract_id),
-                                        str(service_type),
-                                        int(rid0 or 0),
-                                        str(d0 or ""),
-                                        str(tb0 or ""),
-                                        int(ln0 or 0),
-                                    ),
-                                )
-                            conn.commit()
-                        finally:
-                            try:
-                                conn.close()
-                            except Exception:
-                                pass
-                except Exception:
-                    pass
-        except Exception:
-            # reminder should never break calculation
-            pass
+                self._ceza_reminder_ack.add(ack_key)
+                clear_ceza_reminders(self.db, int(contract_id), str(service_type), calc.start_date, calc.end_date)
+
+        if calc.missing_price_keys:
+            sample = sorted(calc.missing_price_keys)[:10]
+            sample_txt = "\n".join([f"- rota_id={rid} time_block={tb}" for rid, tb in sample])
+            n_missing = len(calc.missing_price_keys)
+            more = "" if n_missing <= 10 else f"\n... (+{n_missing - 10} adet daha)"
+            msg = (
+                "Bazı seferlerde fiyat bulunamadı (unit_price=0).\n"
+                "Bu kalemler 0 tutarla hesaplanacak. Devam edilsin mi?\n\n"
+                f"Örnekler:\n{sample_txt}{more}"
+            )
+            ans = QMessageBox.question(
+                self,
+                "Eksik Fiyat",
+                msg,
+                QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No,
+            )
+            if ans != QMessageBox.StandardButton.Yes:
+                self._set_status("Hesaplama iptal edildi (eksik fiyat)")
+                return
 
-        hakedis_id = self.db.upsert_hakedis_header(
-            contract_id=int(contract_id),
-            period=str(period),
-            service_type=str(service_type),
-            route_params_id=int(route_params_id) if route_params_id is not None else None,
-            status="TASLAK",
-        )
+        result = save_hakedis(self.db, calc)
+        hakedis_id = result.hakedis_id
         if not hakedis_id:
             self._set_status("Hakediş başlığı oluşturulamadı")
             return
-
-        def _norm_route_name(s: str) -> str:
-            txt = (s or "").strip().lower()
-            if not txt:
-                return ""
-            txt = re.sub(r"\s+", "", txt)
-            txt = re.sub(r"[^0-9a-zçğıöşü]", "", txt)
-            return txt
-
-        def _extract_movement_type(rec: dict) -> str:
-            if not isinstance(rec, dict):
-                return ""
-            raw = (
-                rec.get("movement_type_norm")
-                or rec.get("pricing_category")
-                or rec.get("gidis_gelis")
-                or rec.get("movement_type")
-                or rec.get("hareket_turu")
-                or rec.get("hareket")
-                or rec.get("hareketTuru")
-                or rec.get("hareket_tipi")
-                or rec.get("tip")
-                or ""
-            )
-            s = str(raw or "").strip().lower()
-            if "mesai" in s:
-                return "fazla mesai"
-            if "paket" in s or (("sabah" in s) and ("akşam" in s or "aksam" in s)):
-                return "sabah-akşam"
-            if "cift" in s or "çift" in s:
-                return "tek servis"
-            if "tek" in s:
-                return "tek servis"
-            if s == "teks" or s == "tekservis":
-                return "tek servis"
-            return s
-
-        # Fallback price map: route_params_id -> base price from contracts.price_matrix_json
-        route_price_by_id: dict[int, float] = {}
-        try:
-            route_rows = self.db.get_route_params_for_contract(int(contract_id), str(service_type))
-        except Exception:
-            route_rows = []
-
-        price_json = ""
-        try:
-            price_json = self.db.get_contract_price_matrix_json(int(contract_id))
-        except Exception:
-            price_json = ""
-
-        contract_price_by_name_mt: dict[tuple[str, str], float] = {}
-        contract_price_by_norm_mt: dict[tuple[str, str], float] = {}
-        contract_price_by_name: dict[str, float] = {}
-        contract_price_by_norm: dict[str, float] = {}
-        contract_ay_by_name_mt: dict[tuple[str, str], float] = {}
-        contract_ay_by_norm_mt: dict[tuple[str, str], float] = {}
-        contract_ay_by_name: dict[str, float] = {}
-        contract_ay_by_norm: dict[str, float] = {}
-        ambiguous_names: set[str] = set()
-
-        if price_json:
-            try:
-                parsed = self.db.parse_contract_price_matrix_rows(str(price_json or ""), service_type=str(service_type))
-            except Exception:
-                parsed = []
-            if isinstance(parsed, list):
-                for rec in parsed:
-                    guz = str((rec or {}).get("guzergah") or "").strip().lower()
-                    if not guz:
-                        continue
-                    st = str((rec or {}).get("_service_type") or (rec or {}).get("service_type") or "").strip()
-                    if st and st.lower() != str(service_type).strip().lower():
-                        continue
-                    mt = _extract_movement_type(rec or {})
-                    try:
-                        pr = float((rec or {}).get("fiyat") or 0.0)
-                    except Exception:
-                        pr = 0.0
-
-                    ay_raw = (rec or {}).get("alt_yuklenici_fiyat")
-                    if ay_raw is None:
-                        ay_raw = (rec or {}).get("ay_fiyati")
-                    try:
-                        ay = float(ay_raw or 0.0)
-                    except Exception:
-                        ay = 0.0
-
-                    if guz in contract_price_by_name:
-                        ambiguous_names.add(guz)
-                    else:
-                        contract_price_by_name[guz] = pr
-
-                    if guz in contract_ay_by_name:
-                        ambiguous_names.add(guz)
-                    else:
-                        contract_ay_by_name[guz] = ay
-
-                    ng = _norm_route_name(guz)
-                    if ng:
-                        if ng in contract_price_by_norm:
-                            ambiguous_names.add(guz)
-                        else:
-                            contract_price_by_norm[ng] = pr
-
-                        if ng in contract_ay_by_norm:
-                            ambiguous_names.add(guz)
-                        else:
-                            contract_ay_by_norm[ng] = ay
-
-                    contract_price_by_name_mt[(guz, mt)] = pr
-                    if ng:
-                        contract_price_by_norm_mt[(ng, mt)] = pr
-
-                    contract_ay_by_name_mt[(guz, mt)] = ay
-                    if ng:
-                        contract_ay_by_norm_mt[(ng, mt)] = ay
-
-        if route_rows and (contract_price_by_name_mt or contract_price_by_norm_mt or contract_price_by_name or contract_price_by_norm):
-            for rr in route_rows or []:
-                try:
-                    rid = int(rr[0] or 0)
-                    rname = str(rr[1] if len(rr) > 1 else "").strip().lower()
-                    mt_r = str(rr[4] if len(rr) > 4 else "").strip().lower()
-                except Exception:
-                    continue
-                if rid <= 0 or not rname:
-                    continue
-
-                pr = None
-                if mt_r and (rname, mt_r) in contract_price_by_name_mt:
-                    pr = float(contract_price_by_name_mt.get((rname, mt_r)) or 0.0)
-                elif rname in contract_price_by_name and rname not in ambiguous_names:
-                    pr = float(contract_price_by_name.get(rname) or 0.0)
-                else:
-                    nrn = _norm_route_name(rname)
-                    if mt_r and nrn and (nrn, mt_r) in contract_price_by_norm_mt:
-                        pr = float(contract_price_by_norm_mt.get((nrn, mt_r)) or 0.0)
-                    elif nrn and nrn in contract_price_by_norm and rname not in ambiguous_names:
-                        pr = float(contract_price_by_norm.get(nrn) or 0.0)
-
-                if pr is not None:
-                    route_price_by_id[int(rid)] = float(pr or 0.0)
-
-        # Fallback subcontract price map: route_params_id -> base subcontract unit price (A.Y. FİYATI)
-        route_ay_by_id: dict[int, float] = {}
-        if route_rows and (contract_ay_by_name_mt or contract_ay_by_norm_mt or contract_ay_by_name or contract_ay_by_norm):
-            for rr in route_rows or []:
-                try:
-                    rid = int(rr[0] or 0)
-                    rname = str(rr[1] if len(rr) > 1 else "").strip().lower()
-                    mt_r = str(rr[4] if len(rr) > 4 else "").strip().lower()
-                except Exception:
-                    continue
-                if rid <= 0 or not rname:
-                    continue
-
-                ayv = None
-                if mt_r and (rname, mt_r) in contract_ay_by_name_mt:
-                    ayv = float(contract_ay_by_name_mt.get((rname, mt_r)) or 0.0)
-                elif rname in contract_ay_by_name and rname not in ambiguous_names:
-                    ayv = float(contract_ay_by_name.get(rname) or 0.0)
-                else:
-                    nrn = _norm_route_name(rname)
-                    if mt_r and nrn and (nrn, mt_r) in contract_ay_by_norm_mt:
-                        ayv = float(contract_ay_by_norm_mt.get((nrn, mt_r)) or 0.0)
-                    elif nrn and nrn in contract_ay_by_norm and rname not in ambiguous_names:
-                        ayv = float(contract_ay_by_norm.get(nrn) or 0.0)
-
-                if ayv is not None:
-                    route_ay_by_id[int(rid)] = float(ayv or 0.0)
-
-        # price map: (route_params_id, time_block) -> price
-        prices = self.db.get_trip_prices_for_month(int(contract_id), str(period), str(service_type))
-        price_map = {(int(rid), str(tb)): float(p or 0) for rid, tb, p in (prices or [])}
-
-        items = []
-        missing_price_keys: set[tuple[int, str]] = set()
-        for rid, trip_date, time_block, line_no, vehicle_id, driver_id, qty, time_text, note in allocations or []:
-            try:
-                rid_int = int(rid)
-            except Exception:
-                continue
-            if route_params_id is not None and int(route_params_id) != rid_int:
-                continue
-
-            qty_f = float(qty or 0)
-            unit_price = float(price_map.get((rid_int, str(time_block)), 0) or 0)
-            if unit_price <= 0:
-                try:
-                    unit_price = float(route_price_by_id.get(int(rid_int), 0.0) or 0.0)
-                except Exception:
-                    unit_price = 0.0
-            if qty_f > 0 and unit_price <= 0:
-                try:
-                    missing_price_keys.add((int(rid_int), str(time_block or "")))
-                except Exception:
-                    pass
-            amount = float(qty_f * unit_price)
-
-            items.append(
-                {
-                    "item_date": str(trip_date or ""),
-                    "route_params_id": rid_int,
-                    "vehicle_id": vehicle_id,
-                    "driver_id": driver_id,
-                    "work_type": str(time_block or ""),
-                    "quantity": qty_f,
-                    "unit_price": unit_price,
-                    "amount": amount,
-                    "description": str(time_text or ""),
-                    "source_trip_id": None,
-                }
-            )
-
-        # --- GİDER: TAŞERON ARACI kalemlerini aynı sözleşmenin A.Y. FİYATI alanından hesapla ---
-        # Model: her taşeron (supplier_customer_id) için ayrı bir gider hakedişi oluştur.
-        subcontract_items_by_supplier: dict[int, list[dict]] = {}
-        subcontract_missing_supplier: set[int] = set()  # vehicle_id
-        subcontract_missing_ay_price: set[tuple[int, str]] = set()  # (route_params_id, time_block)
-
-        for rid, trip_date, time_block, line_no, vehicle_id, driver_id, qty, time_text, note in allocations or []:
-            if vehicle_id is None:
-                continue
-            try:
-                arac_turu, supplier_customer_id = self.db.get_vehicle_subcontract_meta(int(vehicle_id))
-            except Exception:
-                arac_turu, supplier_customer_id = ("", None)
-
-            at = str(arac_turu or "").strip().upper()
-            if at != "TAŞERON ARACI" and at != "TASERON ARACI":
-                continue
-
-            if supplier_customer_id is None:
-                try:
-                    subcontract_missing_supplier.add(int(vehicle_id))
-                except Exception:
-                    pass
-                continue
-
-            try:
-                rid_int = int(rid)
-            except Exception:
-                continue
-
-            qty_f = float(qty or 0)
-            try:
-                unit_price = float(route_ay_by_id.get(int(rid_int), 0.0) or 0.0)
-            except Exception:
-                unit_price = 0.0
-
-            if qty_f > 0 and unit_price <= 0:
-                try:
-                    subcontract_missing_ay_price.add((int(rid_int), str(time_block or "")))
-                except Exception:
-                    pass
-
-            amount = float(qty_f * unit_price)
-
-            subcontract_items_by_supplier.setdefault(int(supplier_customer_id), []).append(
-                {
-                    "item_date": str(trip_date or ""),
-                    "route_params_id": int(rid_int),
-                    "vehicle_id": vehicle_id,
-                    "driver_id": driver_id,
-                    "work_type": str(time_block or ""),
-                    "quantity": qty_f,
-                    "unit_price": unit_price,
-                    "amount": amount,
-                    "description": str(time_text or ""),
-                    "source_trip_id": None,
-                }
-            )
-
-        if missing_price_keys:
-            try:
-                sample = sorted(missing_price_keys)[:10]
-                sample_txt = "\n".join([f"- rota_id={rid} time_block={tb}" for rid, tb in sample])
-                more = "" if len(missing_price_keys) <= 10 else f"\n... (+{len(missing_price_keys) - 10} adet daha)"
-                msg = (
-                    "Bazı seferlerde fiyat bulunamadı (unit_price=0).\n"
-                    "Bu kalemler 0 tutarla hesaplanacak. Devam edilsin mi?\n\n"
-                    f"Örnekler:\n{sample_txt}{more}"
-                )
-                ans = QMessageBox.question(
-                    self,
-                    "Eksik Fiyat",
-                    msg,
-                    QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No,
-                )
-                if ans != QMessageBox.StandardButton.Yes:
-                    self._set_status("Hesaplama iptal edildi (eksik fiyat)")
-                    return
-            except Exception:
-                pass
-
-        ok = self.db.replace_hakedis_items(int(hakedis_id), items)
-        if not ok:
+        if not result.items_saved:
             self._set_status("Kalemler kaydedilemedi")
             return
 
-        self.db.update_hakedis_totals(int(hakedis_id))
-
-        created_expense_headers = 0
-        for supplier_id, sub_items in (subcontract_items_by_supplier or {}).items():
-            sub_hakedis_id = None
-            try:
-                sub_hakedis_id = self.db.upsert_hakedis_header(
-                    contract_id=int(contract_id),
-                    period=str(period),
-                    service_type=f"{str(service_type)}|TAŞERON",
-                    route_params_id=-int(supplier_id),
-                    status="TASLAK",
-                )
-            except Exception:
-                sub_hakedis_id = None
-            if not sub_hakedis_id:
-                continue
-            try:
-                self.db.replace_hakedis_items(int(sub_hakedis_id), sub_items)
-                self.db.update_hakedis_totals(int(sub_hakedis_id))
-            except Exception:
-                pass
-            created_expense_headers += 1
-
-        warn_parts = []
-        if subcontract_missing_supplier:
-            warn_parts.append(
-                f"Alt Yüklenici seçilmemiş TAŞERON ARACI var: {len(subcontract_missing_supplier)} adet (Araçlar modülünde Alt Yük. seçiniz)."
-            )
-        if subcontract_missing_ay_price:
-            warn_parts.append(
-                f"Bazı taşeron satırlarında A.Y. FİYATI bulunamadı: {len(subcontract_missing_ay_price)} adet. (Sözleşme > İş Kalemleri ekranında A.Y. FİYATI giriniz)"
-            )
-
+        warn_parts = calc.expense_warnings()
         if warn_parts:
             try:
                 QMessageBox.warning(self, "Gider Hakedişi Uyarı", "\n\n".join(warn_parts))
@@ -1469,7 +1001,7 @@ class HakedisApp(QWidget):
                 pass
 
         self._set_status(
-            f"Hesaplandı: {len(items)} gelir kalemi, {created_expense_headers} taşeron gider hakedişi oluşturuldu"
+            f"Hesaplandı: {len(calc.items)} gelir kalemi, {result.expense_headers} taşeron gider hakedişi oluşturuldu"
         )
         self.load_table()
         self._reselect_by_id(hakedis_id)
@@ -6,47 +6,26 @@ from PyQt5 import QtWidgets, QtGui, QtCore
 from PyQt6.QtCore import QDate
 from PyQt6.QtWidgets import QMainWindow, QScrollArea, QSizePolicy, QGraphicsOpacityEffect, QLabel, QGraphicsColorizeEffect, QFrame, QMessageBox, QComboBox, QPushButton, QGraphicsBlurEffect
 from PyQt6.QtWidgets import QDialog, QHBoxLayout, QVBoxLayout
-from PyQt6.QtGui import QPixmap, QIcon, QColor, QFontMetrics
+from PyQt6.QtGui import QPixmap, QIcon, QColor, QFontMetrics, QKeySequence, QShortcut, QPainter, QPalette
 from PyQt6.QtCore import QSize
 from PyQt6.QtCore import Qt, QTimer, QPropertyAnimation, QEasingCurve, QSequentialAnimationGroup, QEvent, QPoint, QRect, QParallelAnimationGroup, QUrl, QVariantAnimation
-from PyQt6.QtMultimedia import QMediaPlayer, QAudioOutput
-
-from PyQt6 import uic
-from config import ASSETS_DIR, ICONS_PATH, get_ui_path
-from app.modules.users import UsersApp
-from app.modules.employees import EmployeesApp
-from app.modules.customers import CustomersApp
-from app.modules.vehicles import VehiclesApp
-from app.modules.drivers import DriversApp
-from app.modules.repairs import RepairsApp
-from app.modules.constants import ConstantsApp
-from app.modules.routes import RoutesApp
-from app.modules.trips import TripsGridApp
-from app.modules.attendance import AttendanceApp
-
-
-def _prev_month_key(month_key: str) -> str | None:
-    try:
-        y_str, m_str = str(month_key).split("-", 1)
-        y = int(y_str)
-        m = int(m_str)
-        if m <= 1:
-            return f"{y - 1:04d}-12"
-        return f"{y:04d}-{m - 1:02d}"
-    except Exception:
-        return None
-
-
-def _prev_month_same_year(month_key: str) -> str | None:
-    try:
-        y_str, m_str = str(month_key).split("-", 1)
-        y = int(y_str)
-        m = int(m_str)
-        if m <= 1:
-            return None
-        return f"{y:04d}-{m - 1:02d}"
-    except Exception:
-        return None
+
+from config import ASSETS_DIR, ICONS_PATH
+from app.core.forms import load_ui
+from app.core import motion, page_cache, profiler, startup
+from app.core.cache import LRUCache
+from app.core.idle_monitor import IdleMonitor
+from app.core.profiler import profiled
+from app.services.periods import check_period_close, copy_month_template, prev_month_same_year, template_copy_source
+
+# Başlık animasyonundaki harf görüntüleri: (font, harf, boyut, renk, dpr) -> QPixmap
+_TITLE_GLYPHS = LRUCache(maxsize=512)
+
+# Oturum açılınca boşta önceden kurulan sayfa sayısı (en çok kullanılanlar; geçmiş yoksa varsayılan sıra)
+PAGE_WARMUP_COUNT = 3
+PAGE_WARMUP_DEFAULT = ("employees", "vehicles", "contracts")
+PAGE_WARMUP_DELAY_MS = 1500
+PAGE_WARMUP_STEP_MS = 400
 
 
 class PeriodSelectDialog(QDialog):
@@ -150,7 +129,7 @@ class DownComboBox(QComboBox):
 class MainMenuApp(QMainWindow):
     def __init__(self, user_data=None, start_passive: bool = False, offline_timeout_ms: int = 120000):
         super().__init__()
-        uic.loadUi(get_ui_path("main_window.ui"), self)
+        load_ui("main_window.ui", self)
         self.user_data = user_data
        
         try:
@@ -177,8 +156,10 @@ class MainMenuApp(QMainWindow):
         self._session_active = False
         self._offline_timeout_ms = int(offline_timeout_ms or 0)
         self._offline_warning_ms = 30000
-        self._offline_timer = None
-        self._offline_warn_timer = None
+        # Boşta kalma: girdiler yalnızca zaman damgası yazar, eşik tembel kontrol edilir
+        self._idle = IdleMonitor(self)
+        self._idle.warning.connect(self._on_offline_warning_start)
+        self._idle.timeout.connect(self._on_offline_timeout)
         self._offline_countdown_timer = None
         self._offline_sound_loop_timer = None
         self._offline_warning_dialog = None
@@ -188,6 +169,7 @@ class MainMenuApp(QMainWindow):
         self._offline_warning_pulse_anim = None
         self._footer_user_label = None
         self._footer_user_timer = None
+        self._footer_user_text = None
         self._welcome_overlay = None
         self._welcome_dismissed = False
         self._welcome_year_label = None
@@ -225,6 +207,28 @@ class MainMenuApp(QMainWindow):
         self._title_anim_timers = []
         self._title_anim_running = False
         self._title_text_last = ""
+        self._title_glyph_color = None
+        self._toast_hide_timer = None
+        # Animasyon bütçesi: RDP / yavaş makinede geçişler anında yapılır (constants: ui_motion_mode)
+        self._motion = motion.MotionPolicy(self)
+        self._motion.changed.connect(self._on_motion_mode_changed)
+        # Açılan modül sayfaları mainStack'te LRU ile saklanır; çıkışta (oturum kapanınca) silinir
+        self._pages = page_cache.PageCache(self.mainStack)
+        # Isınmaya aday sayfalar: dönem seçimi gerektirmeyen ekranlar
+        self._page_builders = {
+            "employees": self._build_employees_page,
+            "customers": self._build_customers_page,
+            "vehicles": self._build_vehicles_page,
+            "drivers": self._build_drivers_page,
+            "repairs": self._build_repairs_page,
+            "contracts": self._build_contracts_page,
+            "routes": self._build_routes_page,
+            "payments": self._build_payments_page,
+        }
+        self._page_warmup_queue = []
+        self._page_warmup_timer = QTimer(self)
+        self._page_warmup_timer.setSingleShot(True)
+        self._page_warmup_timer.timeout.connect(self._warm_next_page)
 
         if hasattr(self, "lbl_logo") and self.lbl_logo is not None:
             pix = QPixmap(os.path.join(ASSETS_DIR, "images", "logo-w.png"))
@@ -260,9 +264,11 @@ class MainMenuApp(QMainWindow):
         # Startup'ta dönem/ay seçimi istemiyoruz. Zorunlu dönem seçimi sadece
         # Puantaj modülüne girerken PeriodSelectDialog ile yapılır.
         self._load_onoff_settings_from_db()
+        self._load_motion_settings_from_db()
         self.set_mode(active=not bool(start_passive))
 
         self._setup_session_toggle()
+        self._setup_diagnostics_shortcut()
 
         # İlk açılışta da full title animasyonu
         try:
@@ -272,6 +278,22 @@ class MainMenuApp(QMainWindow):
         except Exception:
             pass
 
+    def _setup_diagnostics_shortcut(self):
+        # Tanılama paneli yalnızca SATTUP_PROFILE açıkken (Ctrl+Shift+D)
+        if not profiler.ENABLED:
+            return
+        try:
+            self._diagnostics_shortcut = QShortcut(QKeySequence("Ctrl+Shift+D"), self)
+            self._diagnostics_shortcut.activated.connect(self.open_diagnostics)
+        except Exception:
+            pass
+
+    def open_diagnostics(self):
+        from app.modules.diagnostics import DiagnosticsDialog
+
+        dlg = DiagnosticsDialog(self)
+        dlg.exec()
+
     def _setup_session_toggle(self):
         btn = None
         try:
@@ -363,6 +385,10 @@ class MainMenuApp(QMainWindow):
         if self._offline_player is not None and self._offline_audio_output is not None:
             return
         try:
+            # QtMultimedia (medya arka ucu / eklentileri) ilk kullanımda yüklenir; açılışta
+            # main.py'deki ertelenmiş aşama pencere gösterildikten sonra çağırır.
+            from PyQt6.QtMultimedia import QAudioOutput, QMediaPlayer
+
             self._offline_audio_output = QAudioOutput()
             self._offline_player = QMediaPlayer()
             self._offline_player.setAudioOutput(self._offline_audio_output)
@@ -395,20 +421,6 @@ class MainMenuApp(QMainWindow):
         except Exception:
             return
 
-    def _ensure_offline_timer(self):
-        if self._offline_timer is not None:
-            return
-        self._offline_timer = QTimer(self)
-        self._offline_timer.setSingleShot(True)
-        self._offline_timer.timeout.connect(self._on_offline_timeout)
-
-    def _ensure_offline_warn_timer(self):
-        if self._offline_warn_timer is not None:
-            return
-        self._offline_warn_timer = QTimer(self)
-        self._offline_warn_timer.setSingleShot(True)
-        self._offline_warn_timer.timeout.connect(self._on_offline_warning_start)
-
     def _ensure_offline_countdown_timer(self):
         if self._offline_countdown_timer is not None:
             return
@@ -430,19 +442,8 @@ class MainMenuApp(QMainWindow):
             return
         self._offline_warning_active = False
         self._hide_offline_warning_dialog()
-        self._ensure_offline_timer()
-        self._ensure_offline_warn_timer()
-        try:
-            self._offline_timer.start(self._offline_timeout_ms)
-        except Exception:
-            pass
-
         warn_before = int(getattr(self, "_offline_warning_ms", 30000) or 0)
-        warn_ms = max(0, int(self._offline_timeout_ms) - warn_before)
-        try:
-            self._offline_warn_timer.start(warn_ms)
-        except Exception:
-            pass
+        self._idle.start(int(self._offline_timeout_ms), warn_before)
 
         self._start_footer_user_timer()
         self._update_footer_user_label()
@@ -493,12 +494,51 @@ class MainMenuApp(QMainWindow):
         except Exception:
             return
 
+    def _load_motion_settings_from_db(self):
+        try:
+            from app.core.db_manager import DatabaseManager
+
+            db = DatabaseManager()
+            mode = motion.MODE_AUTO
+            slow_ms = motion.DEFAULT_SLOW_FRAME_MS
+            try:
+                rows = db.get_constants(motion.CONST_MODE)
+                if rows:
+                    mode = str(rows[0][1] or "")
+            except Exception:
+                pass
+            try:
+                rows = db.get_constants(motion.CONST_SLOW_FRAME_MS)
+                if rows:
+                    slow_ms = int(rows[0][1])
+            except Exception:
+                pass
+            self.set_motion_policy(mode, slow_ms)
+        except Exception:
+            return
+
+    def set_motion_policy(self, mode: str, slow_frame_ms: int):
+        self._motion.configure(mode, slow_frame_ms)
+
+    def _on_motion_mode_changed(self, reduced: bool):
+        if not reduced:
+            return
+        # Süren efektleri bitir; sonraki geçişler anında yapılır.
+        try:
+            for btn in list(self._hover_anims.keys()):
+                try:
+                    self._hover_anims[btn].stop()
+                except Exception:
+                    pass
+            self._hover_anims = {}
+            for btn in getattr(self, "_menu_buttons", []):
+                btn.setGraphicsEffect(None)
+        except Exception:
+            pass
+
     def _stop_offline_timer(self):
         try:
-            if self._offline_timer is not None:
-                self._offline_timer.stop()
-            if self._offline_warn_timer is not None:
-                self._offline_warn_timer.stop()
+            self._idle.stop()
             if self._offline_countdown_timer is not None:
                 self._offline_countdown_timer.stop()
             if self._footer_user_timer is not None:
@@ -566,53 +606,32 @@ class MainMenuApp(QMainWindow):
             return
 
         if not self._session_active:
-            try:
-                self._footer_user_label.setText("")
-            except Exception:
-                pass
-            return
-
-        username = self._get_current_username()
-
-        remaining_ms = 0
-        try:
-            if self._offline_timer is not None:
-                remaining_ms = int(self._offline_timer.remainingTime())
-        except Exception:
-            remaining_ms = 0
-
-        time_txt = self._format_ms_as_hhmmss(remaining_ms)
-        if username:
-            txt = f"{username}  |  {time_txt}"
+            txt = ""
         else:
-            txt = f"{time_txt}"
+            # Simge durumundayken kimse görmüyor; geri gelince ilk tikte güncellenir.
+            if self.isMinimized():
+                return
+            username = self._get_current_username()
+            time_txt = self._format_ms_as_hhmmss(self._idle.remaining_ms())
+            if username:
+                txt = f"{username}  |  {time_txt}"
+            else:
+                txt = f"{time_txt}"
+        if txt == self._footer_user_text:
+            return
         try:
             self._footer_user_label.setText(txt)
+            self._footer_user_text = txt
         except Exception:
             pass
 
-    def _reset_offline_timer(self):
-        if not self._session_active:
-            return
-        self._start_offline_timer()
-
     def eventFilter(self, obj, event):
+        # Yalnızca menü butonlarına kurulu (hover animasyonu); boşta kalma takibi IdleMonitor'da.
         try:
-            if obj in getattr(self, "_menu_buttons", []):
-                if event.type() == QEvent.Type.Enter:
-                    self._animate_menu_hover(obj, entering=True)
-                elif event.type() == QEvent.Type.Leave:
-                    self._animate_menu_hover(obj, entering=False)
-
-            if self._session_active:
-                if not self._offline_warning_active:
-                    if event.type() in (
-                        QEvent.Type.MouseButtonPress,
-                        QEvent.Type.MouseButtonRelease,
-                        QEvent.Type.KeyPress,
-                        QEvent.Type.Wheel,
-                    ):
-                        self._reset_offline_timer()
+            t = event.type()
+            if t == QEvent.Type.Enter or t == QEvent.Type.Leave:
+                if obj in self._menu_button_texts:
+                    self._animate_menu_hover(obj, entering=(t == QEvent.Type.Enter))
         except Exception:
             pass
         return super().eventFilter(obj, event)
@@ -692,6 +711,8 @@ class MainMenuApp(QMainWindow):
             return
 
     def _pulse_offline_warning_dialog(self):
+        if self._motion.reduced:
+            return
         try:
             dlg = self._offline_warning_dialog
             if dlg is None:
@@ -834,13 +855,7 @@ class MainMenuApp(QMainWindow):
 
     def _on_offline_go_offline(self):
         try:
-            if self._offline_timer is not None:
-                self._offline_timer.stop()
-        except Exception:
-            pass
-        try:
-            if self._offline_warn_timer is not None:
-                self._offline_warn_timer.stop()
+            self._idle.stop()
         except Exception:
             pass
         try:
@@ -1090,36 +1105,23 @@ class MainMenuApp(QMainWindow):
             except Exception:
                 selected_month = None
 
-            def _prev_month_key(month_key: str) -> str | None:
-                try:
-                    y_str, m_str = str(month_key).split("-", 1)
-                    yy = int(y_str)
-                    mm = int(m_str)
-                    if mm <= 1:
-                        return f"{yy - 1:04d}-12"
-                    return f"{yy:04d}-{mm - 1:02d}"
-                except Exception:
-                    return None
-
-            if selected_month and not db.month_has_operational_template(str(selected_month)):
-                prev = _prev_month_key(str(selected_month))
-                if prev and db.month_has_operational_template(prev):
-                    ok = QMessageBox.question(
-                        None,
-                        "Şablon Kopyalama",
-                        f"{selected_month} dönemi için şablon bulunamadı.\n\n{prev} dönemindeki şablonlar kopyalansın mı?",
-                        QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No,
-                    )
-                    if ok == QMessageBox.StandardButton.Yes:
-                        done = db.copy_month_operational_template(prev, str(selected_month))
-                        if not done:
-                            QMessageBox.warning(None, "Uyarı", "Şablon kopyalama yapılamadı.")
-                else:
-                    QMessageBox.information(
-                        None,
-                        "Bilgi",
-                        f"{selected_month} dönemi için şablon bulunamadı ve kopyalanacak önceki dönem yok.",
-                    )
+            needs_template, prev = template_copy_source(db, str(selected_month or ""))
+            if needs_template and prev:
+                ok = QMessageBox.question(
+                    None,
+                    "Şablon Kopyalama",
+                    f"{selected_month} dönemi için şablon bulunamadı.\n\n{prev} dönemindeki şablonlar kopyalansın mı?",
+                    QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No,
+                )
+                if ok == QMessageBox.StandardButton.Yes:
+                    if not copy_month_template(db, prev, str(selected_month)):
+                        QMessageBox.warning(None, "Uyarı", "Şablon kopyalama yapılamadı.")
+            elif needs_template:
+                QMessageBox.information(
+                    None,
+                    "Bilgi",
+                    f"{selected_month} dönemi için şablon bulunamadı ve kopyalanacak önceki dönem yok.",
+                )
         except Exception:
             pass
 
@@ -1146,6 +1148,12 @@ class MainMenuApp(QMainWindow):
             return
 
     def _clear_stack_to_main(self):
+        self._cancel_page_warmup()
+        try:
+            # Önbellekteki sayfalar oturum verisi taşır; oturum kapanınca tutulmaz
+            self._pages.clear()
+        except Exception:
+            pass
         try:
             if hasattr(self, "mainStack") and self.mainStack is not None:
                 for i in reversed(range(self.mainStack.count())):
@@ -1181,7 +1189,7 @@ class MainMenuApp(QMainWindow):
             except Exception:
                 app = None
             if app is not None:
-                app.installEventFilter(self)
+                self._idle.install(app)
         except Exception:
             pass
 
@@ -1197,6 +1205,7 @@ class MainMenuApp(QMainWindow):
             except Exception:
                 pass
             self._start_offline_timer()
+            self._schedule_page_warmup()
         else:
             self._stop_offline_timer()
             self._clear_stack_to_main()
@@ -1352,6 +1361,8 @@ class MainMenuApp(QMainWindow):
             pass
 
     def _animate_menu_hover(self, btn, entering: bool):
+        if self._motion.reduced:
+            return
         try:
             eff = btn.graphicsEffect()
             if eff is None or eff.metaObject().className() != "QGraphicsDropShadowEffect":
@@ -1418,6 +1429,21 @@ class MainMenuApp(QMainWindow):
             return
 
     def _transition_between_pages(self, prev_widget, new_widget):
+        if self._motion.reduced:
+            # Efektsiz geçiş: yeni sayfa hemen görünür, eski sayfada efekt kalmasın
+            for w in (prev_widget, new_widget):
+                try:
+                    if w is not None and w.graphicsEffect() is not None:
+                        w.setGraphicsEffect(None)
+                except Exception:
+                    pass
+            try:
+                if new_widget is not None:
+                    new_widget.setVisible(True)
+            except Exception:
+                pass
+            return
+        self._motion.probe()
         try:
             if prev_widget is None or new_widget is None:
                 if new_widget is not None:
@@ -1569,6 +1595,12 @@ class MainMenuApp(QMainWindow):
         # Aynı text tekrar tekrar geliyorsa bile animasyon yapabilsin diye last'i sadece info için tutuyoruz
         self._title_text_last = text or ""
 
+        if self._motion.reduced:
+            self._title_anim_running = False
+            self._clear_title_letter_items()
+            self.lbl_title.setText(text)
+            return
+
         self._title_anim_running = True
         self._clear_title_letter_items()
 
@@ -1588,6 +1620,7 @@ class MainMenuApp(QMainWindow):
         # Her harf aynı sağ başlangıç noktasından gelsin (senin çizdiğin şema gibi)
         start_x = max(0, self._title_anim_layer.width() + 40)
         glow_color = QColor("#FFE101")
+        glyph_color = self._title_letter_color()
 
         x = 0
         idx = 0
@@ -1599,9 +1632,9 @@ class MainMenuApp(QMainWindow):
             w = max(6, fm.horizontalAdvance(ch))
             h = max(fm.height(), 10)
 
+            # Harf bir kez çizilip önbellekten kullanılır (her geçişte metin yerleşimi yapılmaz)
             lbl = QLabel(self._title_anim_layer)
-            lbl.setText(ch)
-            lbl.setFont(self.lbl_title.font())
+            lbl.setPixmap(self._title_glyph(ch, w + 2, h, glyph_color))
             lbl.resize(w + 2, h)
             target_pos = QPoint(x, base_y)
             start_pos = QPoint(start_x, base_y)
@@ -1701,6 +1734,41 @@ class MainMenuApp(QMainWindow):
         end_timer.start(total_ms)
         self._title_anim_timers.append(end_timer)
 
+    def _title_letter_color(self) -> QColor:
+        # Harf label'larının stil sayfasından aldığı yazı rengi (bir kez okunur)
+        if self._title_glyph_color is None:
+            probe = QLabel(self._title_anim_layer)
+            try:
+                probe.ensurePolished()
+                self._title_glyph_color = QColor(probe.palette().color(QPalette.ColorRole.WindowText))
+            finally:
+                probe.deleteLater()
+        return self._title_glyph_color
+
+    def _title_glyph(self, ch: str, w: int, h: int, color: QColor) -> QPixmap:
+        font = self.lbl_title.font()
+        try:
+            dpr = float(self.devicePixelRatioF() or 1.0)
+        except Exception:
+            dpr = 1.0
+        key = (font.key(), ch, int(w), int(h), int(color.rgba()), dpr)
+        pix = _TITLE_GLYPHS.get(key)
+        if pix is not None:
+            return pix
+        pix = QPixmap(QSize(max(1, int(w * dpr + 0.999)), max(1, int(h * dpr + 0.999))))
+        pix.setDevicePixelRatio(dpr)
+        pix.fill(Qt.GlobalColor.transparent)
+        painter = QPainter(pix)
+        try:
+            painter.setRenderHint(QPainter.RenderHint.TextAntialiasing, True)
+            painter.setFont(font)
+            painter.setPen(color)
+            painter.drawText(QRect(0, 0, int(w), int(h)), int(Qt.AlignmentFlag.AlignLeft | Qt.AlignmentFlag.AlignVCenter), ch)
+        finally:
+            painter.end()
+        _TITLE_GLYPHS.put(key, pix)
+        return pix
+
     def _ensure_title_underline(self):
         if self._title_underline is not None:
             return
@@ -1730,6 +1798,8 @@ class MainMenuApp(QMainWindow):
             self._title_underline.setGeometry(QRect(x, y, w, h))
 
     def _animate_title_underline(self):
+        if self._motion.reduced:
+            return
         self._ensure_title_underline()
         if self._title_underline is None or not hasattr(self, "lbl_title") or self.lbl_title is None:
             return
@@ -1852,6 +1922,8 @@ class MainMenuApp(QMainWindow):
     def _pulse_title(self):
         if not hasattr(self, "lbl_title") or self.lbl_title is None:
             return
+        if self._motion.reduced:
+            return
 
         try:
             eff = self.lbl_title.graphicsEffect()
@@ -1929,6 +2001,10 @@ class MainMenuApp(QMainWindow):
             y = max(margin, parent.height() - self._toast.height() - margin)
             target_pos = QPoint(x, y)
 
+            if self._motion.reduced:
+                self._show_toast_static(target_pos)
+                return
+
             eff = self._toast.graphicsEffect()
             if not isinstance(eff, QGraphicsOpacityEffect):
                 eff = QGraphicsOpacityEffect(self._toast)
@@ -2012,6 +2088,24 @@ class MainMenuApp(QMainWindow):
         except Exception:
             return
 
+    def _show_toast_static(self, target_pos):
+        # Azaltılmış hareket: opaklık efekti / kayma yok, süre dolunca gizlenir.
+        if self._toast_anim is not None:
+            try:
+                self._toast_anim.stop()
+            except Exception:
+                pass
+            self._toast_anim = None
+        self._toast.setGraphicsEffect(None)
+        self._toast.move(target_pos)
+        self._toast.setVisible(True)
+        self._toast.raise_()
+        if self._toast_hide_timer is None:
+            self._toast_hide_timer = QTimer(self)
+            self._toast_hide_timer.setSingleShot(True)
+            self._toast_hide_timer.timeout.connect(lambda: self._toast.setVisible(False))
+        self._toast_hide_timer.start(1650)
+
     def _set_active_menu_button(self, active_btn):
         for btn in getattr(self, "_menu_buttons", []):
             try:
@@ -2047,7 +2141,7 @@ class MainMenuApp(QMainWindow):
             target = QRect(2, top_left.y() + 6, 6, max(10, btn.height() - 12))
             self._active_indicator.setVisible(True)
 
-            if not animate:
+            if not animate or self._motion.reduced:
                 self._active_indicator.setGeometry(target)
                 return
 
@@ -2097,6 +2191,8 @@ class MainMenuApp(QMainWindow):
 
     def _animate_page_intro(self, widget):
         """Premium: küçük translate + fade-in (bounce yok, controlled easing)."""
+        if self._motion.reduced:
+            return
         try:
             if widget is None:
                 return
@@ -2164,6 +2260,8 @@ class MainMenuApp(QMainWindow):
             return
 
     def _animate_widget_fade_in(self, widget):
+        if self._motion.reduced:
+            return
         try:
             effect = widget.graphicsEffect()
             if not isinstance(effect, QGraphicsOpacityEffect):
@@ -2215,6 +2313,8 @@ class MainMenuApp(QMainWindow):
     def _pulse_toggle_button(self):
         if not hasattr(self, "btn_menu_toggle") or self.btn_menu_toggle is None:
             return
+        if self._motion.reduced:
+            return
 
         btn = self.btn_menu_toggle
         try:
@@ -2282,6 +2382,7 @@ class MainMenuApp(QMainWindow):
 
         self._sidebar_is_collapsed = collapsed
         target_width = self._sidebar_collapsed_width if collapsed else self._sidebar_expanded_width
+        animate = bool(animate) and not self._motion.reduced
 
         if hasattr(self, "btn_menu_toggle") and self.btn_menu_toggle is not None:
             self.btn_menu_toggle.setText("»" if collapsed else "☰")
@@ -2336,6 +2437,12 @@ class MainMenuApp(QMainWindow):
                 btn.setIconSize(QSize(22, 22))
 
     def _sidebar_apply_text_stagger(self, collapsed: bool):
+        if self._motion.reduced:
+            for btn in getattr(self, "_menu_buttons", []):
+                full_text = self._menu_button_texts.get(btn, "")
+                btn.setText("" if collapsed else full_text)
+                btn.setToolTip(full_text if collapsed else "")
+            return
         try:
             btns = list(getattr(self, "_menu_buttons", []) or [])
             if not btns:
@@ -2468,70 +2575,74 @@ class MainMenuApp(QMainWindow):
             if isinstance(icon_path, str) and os.path.exists(icon_path):
                 btn.setIcon(QIcon(icon_path))
             else:
+                startup.ensure_resources()
                 btn.setIcon(QIcon(fallback))
             btn.setIconSize(QSize(22, 22))
     
-    def open_users(self):
-    # 1. Eğer halihazırda bir modül varsa temizle (isteğe bağlı)
-        for i in reversed(range(self.mainStack.count())): 
-            widget = self.mainStack.widget(i)
-            if widget.objectName() != "page_main": # Ana sayfa hariç temizle
-                self.mainStack.removeWidget(widget)
-                widget.deleteLater()
-
-        # 2. UsersApp'i oluştur
-        self.users_module = UsersApp()
-        
-        # 3. ÖNEMLİ: Pencere özelliklerini sıfırla ki popup gibi davranmasın
-        self.users_module.setWindowFlags(Qt.WindowType.Widget) 
-        
-        # 4. mainStack'e ekle ve o sayfaya geç
-        self.mainStack.addWidget(self.users_module)
-        self.mainStack.setCurrentWidget(self.users_module)
+    # ------------------------- sayfa önbelleği -------------------------
+    def _scroll_page(self, module):
+        """Modülü mainStack'e eklenecek QScrollArea'ya sarar.
 
-    # Diğerleri için şimdilik terminale yazı yazdırıyoruz, hata vermezler.
-    def open_employees(self):
-        
-        
-        # 1. Eski modülleri güvenli bir şekilde temizle (Ana sayfa hariç)
-        for i in reversed(range(self.mainStack.count())):
-            widget = self.mainStack.widget(i)
-            if widget and widget.objectName() != "page_main":
-                self.mainStack.removeWidget(widget)
-                widget.setParent(None)
-                widget.deleteLater()
-
-        # 2. Yeni modülü oluştur
-        self.employees_module = EmployeesApp(user_data=self.user_data)
+        Bazı ekranların UI'ı minimumSizeHint'i büyütebiliyor; bunu ana pencereye taşırmamak için
+        modül ScrollArea içinde küçülebilir (Ignored) tutulur.
+        """
         # QStackedWidget içinde popup gibi davranmaması için Widget flag
-        self.employees_module.setWindowFlags(Qt.WindowType.Widget)
-        self.employees_module.setMinimumSize(0, 0)
-        self.employees_module.setMinimumWidth(0)
-        self.employees_module.setMinimumHeight(0)
-        # ScrollArea içinde küçülebilsin (layout minimumSizeHint büyüklüğünü dayatmasın)
-        self.employees_module.setSizePolicy(QSizePolicy.Policy.Ignored, QSizePolicy.Policy.Ignored)
-
-        # Personel UI bazı makinelerde minimumSizeHint'i büyütebiliyor.
-        # Bunu ana pencereye taşırmamak için QScrollArea içine alıyoruz.
-        self.employees_scroll = QScrollArea()
-        self.employees_scroll.setWidgetResizable(True)
-        self.employees_scroll.setFrameShape(QScrollArea.Shape.NoFrame)
-        self.employees_scroll.setWidget(self.employees_module)
-        self.employees_scroll.setMinimumSize(0, 0)
-        self.employees_scroll.setMinimumWidth(0)
-        self.employees_scroll.setMinimumHeight(0)
-        self.employees_scroll.setSizePolicy(QSizePolicy.Policy.Expanding, QSizePolicy.Policy.Expanding)
-
-        self.mainStack.addWidget(self.employees_scroll)
-        self.mainStack.setCurrentWidget(self.employees_scroll)
-        
-        # 3. İLK TIKLAMADA TAM OTURMASI İÇİN SİHİRLİ DOKUNUŞ
-        # Pencere zaten Maximized ise, layout'u yeniden hesaplamaya zorla
+        module.setWindowFlags(Qt.WindowType.Widget)
+        module.setMinimumSize(0, 0)
+        module.setMinimumWidth(0)
+        module.setMinimumHeight(0)
+        module.setSizePolicy(QSizePolicy.Policy.Ignored, QSizePolicy.Policy.Ignored)
+
+        scroll = QScrollArea()
+        scroll.setWidgetResizable(True)
+        scroll.setFrameShape(QScrollArea.Shape.NoFrame)
+        scroll.setWidget(module)
+        scroll.setMinimumSize(0, 0)
+        scroll.setMinimumWidth(0)
+        scroll.setMinimumHeight(0)
+        scroll.setSizePolicy(QSizePolicy.Policy.Expanding, QSizePolicy.Policy.Expanding)
+        return scroll
+
+    def _get_page(self, key: str, build):
+        """Önbellekteki sayfa (gerekirse tazelenmiş); yoksa build() -> (container, module) ile kurulur."""
+        page = self._pages.get(key)
+        if page is not None and self._pages.is_stale(page):
+            refresh = getattr(page.module, "refresh_on_enter", None)
+            if callable(refresh):
+                try:
+                    refresh()
+                    self._pages.mark_fresh(page)
+                except Exception:
+                    traceback.print_exc()
+                    self._pages.drop(key)
+                    page = None
+            else:
+                self._pages.drop(key)
+                page = None
+        if page is None:
+            container, module = build()
+            page = self._pages.put(key, container, module)
+        return page
+
+    def _open_page(self, key: str, build, usage_name: str | None = None):
+        self._cancel_page_warmup()
+        # Çıkılan sayfa kendi değişikliklerini zaten gösteriyor; damgası burada güncellenir.
+        try:
+            leaving = self._pages.find(self.mainStack.currentWidget())
+            if leaving is not None and leaving.key != key:
+                self._pages.mark_fresh(leaving)
+        except Exception:
+            pass
+
+        page = self._get_page(key, build)
+        self.mainStack.setCurrentWidget(page.container)
+        page_cache.record_open(usage_name or key)
+
+        # İlk tıklamada tam oturması için layout'u yeniden hesaplamaya zorla
         self.layout().activate()
 
-        # Personel UI bazı makinelerde ana pencerenin minimumSize değerini büyütebiliyor.
-        # Bu da Windows tarafında setGeometry uyarıları + sağa kayma gibi davranışlara yol açıyor.
-        # Bu yüzden minimum size kısıtını temizliyoruz.
+        # Bazı ekranlar ana pencerenin minimumSize değerini büyütebiliyor; Windows tarafında
+        # setGeometry uyarıları + sağa kayma olmasın diye minimum size kısıtını temizliyoruz.
         self.setMinimumSize(0, 0)
         if self.centralWidget() is not None:
             self.centralWidget().setMinimumSize(0, 0)
@@ -2544,239 +2655,185 @@ class MainMenuApp(QMainWindow):
         # Maximized durumunu bir sonraki event loop turunda tekrar uygula.
         QTimer.singleShot(0, self._force_maximized)
         QTimer.singleShot(50, self._force_maximized)
+        return page
+
+    def _schedule_page_warmup(self):
+        """Oturum açılınca en çok kullanılan sayfaları boşta, tek tek kurar.
+
+        Qt widget'ları yalnızca GUI thread'inde oluşturulabildiği için kurulum arka plan thread'ine
+        alınamaz; bunun yerine her sayfa ayrı bir zamanlayıcı turunda kurulur, kullanıcı bir ekran
+        açarsa ya da modal pencere varsa ısınma durur / ertelenir.
+        """
+        self._cancel_page_warmup()
+        if PAGE_WARMUP_COUNT <= 0:
+            return
+        names = page_cache.most_used(list(self._page_builders.keys()), PAGE_WARMUP_COUNT, PAGE_WARMUP_DEFAULT)
+        self._page_warmup_queue = [n for n in names if n not in self._pages]
+        if self._page_warmup_queue:
+            self._page_warmup_timer.start(PAGE_WARMUP_DELAY_MS)
+
+    def _cancel_page_warmup(self):
+        self._page_warmup_queue = []
+        try:
+            self._page_warmup_timer.stop()
+        except Exception:
+            pass
+
+    @profiled("ui.page_warmup")
+    def _warm_next_page(self):
+        if not self._session_active or not self._page_warmup_queue:
+            self._page_warmup_queue = []
+            return
+        try:
+            from PyQt6.QtWidgets import QApplication
+
+            busy = QApplication.activeModalWidget() is not None or self.isMinimized()
+        except Exception:
+            busy = False
+        if busy:
+            self._page_warmup_timer.start(PAGE_WARMUP_STEP_MS * 4)
+            return
+        # Kullanıcının açtığı sayfalar ısınma yüzünden önbellekten atılmasın
+        if len(self._pages) >= self._pages.maxsize:
+            self._page_warmup_queue = []
+            return
+
+        name = self._page_warmup_queue.pop(0)
+        if name not in self._pages:
+            try:
+                container, module = self._page_builders[name]()
+                self._pages.put(name, container, module)
+            except Exception:
+                traceback.print_exc()
+        if self._page_warmup_queue:
+            self._page_warmup_timer.start(PAGE_WARMUP_STEP_MS)
+
+    def _build_users_page(self):
+        from app.modules.users import UsersApp
+
+        self.users_module = UsersApp()
+        # Pencere özelliklerini sıfırla ki popup gibi davranmasın
+        self.users_module.setWindowFlags(Qt.WindowType.Widget)
+        return self.users_module, self.users_module
+
+    def _build_employees_page(self):
+        from app.modules.employees import EmployeesApp
+
+        self.employees_module = EmployeesApp(user_data=self.user_data)
+        self.employees_scroll = self._scroll_page(self.employees_module)
+        return self.employees_scroll, self.employees_module
+
+    def _build_customers_page(self):
+        from app.modules.customers import CustomersApp
 
-    def open_customers(self):
-        # 1. Eski modülleri güvenli bir şekilde temizle (Ana sayfa hariç)
-        for i in reversed(range(self.mainStack.count())):
-            widget = self.mainStack.widget(i)
-            if widget and widget.objectName() != "page_main":
-                self.mainStack.removeWidget(widget)
-                widget.setParent(None)
-                widget.deleteLater()
-
-        # 2. Yeni modülü oluştur
         self.customers_module = CustomersApp(user_data=self.user_data)
-        self.customers_module.setWindowFlags(Qt.WindowType.Widget)
-        self.customers_module.setMinimumSize(0, 0)
-        self.customers_module.setMinimumWidth(0)
-        self.customers_module.setMinimumHeight(0)
-        self.customers_module.setSizePolicy(QSizePolicy.Policy.Ignored, QSizePolicy.Policy.Ignored)
-
-        self.customers_scroll = QScrollArea()
-        self.customers_scroll.setWidgetResizable(True)
-        self.customers_scroll.setFrameShape(QScrollArea.Shape.NoFrame)
-        self.customers_scroll.setWidget(self.customers_module)
-        self.customers_scroll.setMinimumSize(0, 0)
-        self.customers_scroll.setMinimumWidth(0)
-        self.customers_scroll.setMinimumHeight(0)
-        self.customers_scroll.setSizePolicy(QSizePolicy.Policy.Expanding, QSizePolicy.Policy.Expanding)
-
-        self.mainStack.addWidget(self.customers_scroll)
-        self.mainStack.setCurrentWidget(self.customers_scroll)
+        self.customers_scroll = self._scroll_page(self.customers_module)
+        return self.customers_scroll, self.customers_module
 
-        self.layout().activate()
-        self.setMinimumSize(0, 0)
-        if self.centralWidget() is not None:
-            self.centralWidget().setMinimumSize(0, 0)
-        if hasattr(self, "mainStack") and self.mainStack is not None:
-            self.mainStack.setMinimumSize(0, 0)
-            self.mainStack.setMinimumWidth(0)
-            self.mainStack.setSizePolicy(QSizePolicy.Policy.Expanding, QSizePolicy.Policy.Expanding)
+    def _build_vehicles_page(self):
+        from app.modules.vehicles import VehiclesApp
 
-        QTimer.singleShot(0, self._force_maximized)
-        QTimer.singleShot(50, self._force_maximized)
-    def open_vehicles(self):
-        # 1. Eski modülleri güvenli bir şekilde temizle (Ana sayfa hariç)
-        for i in reversed(range(self.mainStack.count())):
-            widget = self.mainStack.widget(i)
-            if widget and widget.objectName() != "page_main":
-                self.mainStack.removeWidget(widget)
-                widget.setParent(None)
-                widget.deleteLater()
-
-        # 2. Yeni modülü oluştur
         self.vehicles_module = VehiclesApp(user_data=self.user_data)
-        self.vehicles_module.setWindowFlags(Qt.WindowType.Widget)
-        self.vehicles_module.setMinimumSize(0, 0)
-        self.vehicles_module.setMinimumWidth(0)
-        self.vehicles_module.setMinimumHeight(0)
-        self.vehicles_module.setSizePolicy(QSizePolicy.Policy.Ignored, QSizePolicy.Policy.Ignored)
-
-        self.vehicles_scroll = QScrollArea()
-        self.vehicles_scroll.setWidgetResizable(True)
-        self.vehicles_scroll.setFrameShape(QScrollArea.Shape.NoFrame)
-        self.vehicles_scroll.setWidget(self.vehicles_module)
-        self.vehicles_scroll.setMinimumSize(0, 0)
-        self.vehicles_scroll.setMinimumWidth(0)
-        self.vehicles_scroll.setMinimumHeight(0)
-        self.vehicles_scroll.setSizePolicy(QSizePolicy.Policy.Expanding, QSizePolicy.Policy.Expanding)
-
-        self.mainStack.addWidget(self.vehicles_scroll)
-        self.mainStack.setCurrentWidget(self.vehicles_scroll)
+        self.vehicles_scroll = self._scroll_page(self.vehicles_module)
+        return self.vehicles_scroll, self.vehicles_module
 
-        self.layout().activate()
-        self.setMinimumSize(0, 0)
-        if self.centralWidget() is not None:
-            self.centralWidget().setMinimumSize(0, 0)
-        if hasattr(self, "mainStack") and self.mainStack is not None:
-            self.mainStack.setMinimumSize(0, 0)
-            self.mainStack.setMinimumWidth(0)
-            self.mainStack.setSizePolicy(QSizePolicy.Policy.Expanding, QSizePolicy.Policy.Expanding)
+    def _build_drivers_page(self):
+        from app.modules.drivers import DriversApp
 
-        QTimer.singleShot(0, self._force_maximized)
-        QTimer.singleShot(50, self._force_maximized)
-    def open_drivers(self):
-        # 1. Eski modülleri güvenli bir şekilde temizle (Ana sayfa hariç)
-        for i in reversed(range(self.mainStack.count())):
-            widget = self.mainStack.widget(i)
-            if widget and widget.objectName() != "page_main":
-                self.mainStack.removeWidget(widget)
-                widget.setParent(None)
-                widget.deleteLater()
-
-        # 2. Yeni modülü oluştur
         self.drivers_module = DriversApp(user_data=self.user_data)
-        self.drivers_module.setWindowFlags(Qt.WindowType.Widget)
-        self.drivers_module.setMinimumSize(0, 0)
-        self.drivers_module.setMinimumWidth(0)
-        self.drivers_module.setMinimumHeight(0)
-        self.drivers_module.setSizePolicy(QSizePolicy.Policy.Ignored, QSizePolicy.Policy.Ignored)
-
-        self.drivers_scroll = QScrollArea()
-        self.drivers_scroll.setWidgetResizable(True)
-        self.drivers_scroll.setFrameShape(QScrollArea.Shape.NoFrame)
-        self.drivers_scroll.setWidget(self.drivers_module)
-        self.drivers_scroll.setMinimumSize(0, 0)
-        self.drivers_scroll.setMinimumWidth(0)
-        self.drivers_scroll.setMinimumHeight(0)
-        self.drivers_scroll.setSizePolicy(QSizePolicy.Policy.Expanding, QSizePolicy.Policy.Expanding)
-
-        self.mainStack.addWidget(self.drivers_scroll)
-        self.mainStack.setCurrentWidget(self.drivers_scroll)
+        self.drivers_scroll = self._scroll_page(self.drivers_module)
+        return self.drivers_scroll, self.drivers_module
 
-        self.layout().activate()
-        self.setMinimumSize(0, 0)
-        if self.centralWidget() is not None:
-            self.centralWidget().setMinimumSize(0, 0)
-        if hasattr(self, "mainStack") and self.mainStack is not None:
-            self.mainStack.setMinimumSize(0, 0)
-            self.mainStack.setMinimumWidth(0)
-            self.mainStack.setSizePolicy(QSizePolicy.Policy.Expanding, QSizePolicy.Policy.Expanding)
+    def _build_repairs_page(self):
+        from app.modules.repairs import RepairsApp
 
-        QTimer.singleShot(0, self._force_maximized)
-        QTimer.singleShot(50, self._force_maximized)
-    def open_repairs(self):
-        # 1. Eski modülleri güvenli bir şekilde temizle (Ana sayfa hariç)
-        for i in reversed(range(self.mainStack.count())):
-            widget = self.mainStack.widget(i)
-            if widget and widget.objectName() != "page_main":
-                self.mainStack.removeWidget(widget)
-                widget.setParent(None)
-                widget.deleteLater()
-
-        # 2. Yeni modülü oluştur
         self.repairs_module = RepairsApp(user_data=self.user_data)
-        self.repairs_module.setWindowFlags(Qt.WindowType.Widget)
-        self.repairs_module.setMinimumSize(0, 0)
-        self.repairs_module.setMinimumWidth(0)
-        self.repairs_module.setMinimumHeight(0)
-        self.repairs_module.setSizePolicy(QSizePolicy.Policy.Ignored, QSizePolicy.Policy.Ignored)
-
-        self.repairs_scroll = QScrollArea()
-        self.repairs_scroll.setWidgetResizable(True)
-        self.repairs_scroll.setFrameShape(QScrollArea.Shape.NoFrame)
-        self.repairs_scroll.setWidget(self.repairs_module)
-        self.repairs_scroll.setMinimumSize(0, 0)
-        self.repairs_scroll.setMinimumWidth(0)
-        self.repairs_scroll.setMinimumHeight(0)
-        self.repairs_scroll.setSizePolicy(QSizePolicy.Policy.Expanding, QSizePolicy.Policy.Expanding)
-
-        self.mainStack.addWidget(self.repairs_scroll)
-        self.mainStack.setCurrentWidget(self.repairs_scroll)
-
-        self.layout().activate()
-        self.setMinimumSize(0, 0)
-        if self.centralWidget() is not None:
-            self.centralWidget().setMinimumSize(0, 0)
-        if hasattr(self, "mainStack") and self.mainStack is not None:
-            self.mainStack.setMinimumSize(0, 0)
-            self.mainStack.setMinimumWidth(0)
-            self.mainStack.setSizePolicy(QSizePolicy.Policy.Expanding, QSizePolicy.Policy.Expanding)
+        self.repairs_scroll = self._scroll_page(self.repairs_module)
+        return self.repairs_scroll, self.repairs_module
 
-        QTimer.singleShot(0, self._force_maximized)
-        QTimer.singleShot(50, self._force_maximized)
-
-    def open_contracts(self):
-        for i in reversed(range(self.mainStack.count())):
-            widget = self.mainStack.widget(i)
-            if widget and widget.objectName() != "page_main":
-                self.mainStack.removeWidget(widget)
-                widget.setParent(None)
-                widget.deleteLater()
+    def _build_contracts_page(self):
         from app.modules.contracts import ContractsApp
+
         self.contracts_module = ContractsApp(user_data=self.user_data)
-        self.contracts_module.setWindowFlags(Qt.WindowType.Widget)
-        self.contracts_module.setMinimumSize(0, 0)
-        self.contracts_module.setSizePolicy(QSizePolicy.Policy.Ignored, QSizePolicy.Policy.Ignored)
-        self.contracts_scroll = QScrollArea()
-        self.contracts_scroll.setWidgetResizable(True)
-        self.contracts_scroll.setFrameShape(QScrollArea.Shape.NoFrame)
-        self.contracts_scroll.setWidget(self.contracts_module)
-        self.contracts_scroll.setMinimumSize(0, 0)
-        self.contracts_scroll.setSizePolicy(QSizePolicy.Policy.Expanding, QSizePolicy.Policy.Expanding)
-        self.mainStack.addWidget(self.contracts_scroll)
-        self.mainStack.setCurrentWidget(self.contracts_scroll)
-        self.layout().activate()
-        self.setMinimumSize(0, 0)
-        if self.centralWidget() is not None:
-            self.centralWidget().setMinimumSize(0, 0)
-        if hasattr(self, "mainStack") and self.mainStack is not None:
-            self.mainStack.setMinimumSize(0, 0)
-            self.mainStack.setMinimumWidth(0)
-            self.mainStack.setSizePolicy(QSizePolicy.Policy.Expanding, QSizePolicy.Policy.Expanding)
-        QTimer.singleShot(0, self._force_maximized)
-        QTimer.singleShot(50, self._force_maximized)
-    def open_routes(self):
-        # 1. Eski modülleri güvenli bir şekilde temizle (Ana sayfa hariç)
-        for i in reversed(range(self.mainStack.count())):
-            widget = self.mainStack.widget(i)
-            if widget and widget.objectName() != "page_main":
-                self.mainStack.removeWidget(widget)
-                widget.setParent(None)
-                widget.deleteLater()
-
-        # 2. Yeni modülü oluştur
+        self.contracts_scroll = self._scroll_page(self.contracts_module)
+        return self.contracts_scroll, self.contracts_module
+
+    def _build_routes_page(self):
+        from app.modules.routes import RoutesApp
+
         self.routes_module = RoutesApp(user_data=self.user_data)
-        self.routes_module.setWindowFlags(Qt.WindowType.Widget)
-        self.routes_module.setMinimumSize(0, 0)
-        self.routes_module.setMinimumWidth(0)
-        self.routes_module.setMinimumHeight(0)
-        self.routes_module.setSizePolicy(QSizePolicy.Policy.Ignored, QSizePolicy.Policy.Ignored)
-
-        self.routes_scroll = QScrollArea()
-        self.routes_scroll.setWidgetResizable(True)
-        self.routes_scroll.setFrameShape(QScrollArea.Shape.NoFrame)
-        self.routes_scroll.setWidget(self.routes_module)
-        self.routes_scroll.setMinimumSize(0, 0)
-        self.routes_scroll.setMinimumWidth(0)
-        self.routes_scroll.setMinimumHeight(0)
-        self.routes_scroll.setSizePolicy(QSizePolicy.Policy.Expanding, QSizePolicy.Policy.Expanding)
-
-        self.mainStack.addWidget(self.routes_scroll)
-        self.mainStack.setCurrentWidget(self.routes_scroll)
+        self.routes_scroll = self._scroll_page(self.routes_module)
+        return self.routes_scroll, self.routes_module
 
-        self.layout().activate()
-        self.setMinimumSize(0, 0)
-        if self.centralWidget() is not None:
-            self.centralWidget().setMinimumSize(0, 0)
-        if hasattr(self, "mainStack") and self.mainStack is not None:
-            self.mainStack.setMinimumSize(0, 0)
-            self.mainStack.setMinimumWidth(0)
-            self.mainStack.setSizePolicy(QSizePolicy.Policy.Expanding, QSizePolicy.Policy.Expanding)
+    def _build_trips_page(self):
+        from app.modules.trips import TripsGridApp
 
-        QTimer.singleShot(0, self._force_maximized)
-        QTimer.singleShot(50, self._force_maximized)
+        self.trips_module = TripsGridApp(user_data=self.user_data)
+        self.trips_scroll = self._scroll_page(self.trips_module)
+        return self.trips_scroll, self.trips_module
+
+    def _build_attendance_page(self):
+        from app.modules.attendance import AttendanceApp
+
+        self.attendance_module = AttendanceApp(user_data=self.user_data, parent=self)
+        self.attendance_scroll = self._scroll_page(self.attendance_module)
+        return self.attendance_scroll, self.attendance_module
+
+    def _build_payments_page(self):
+        from app.core.db_manager import DatabaseManager
+        from app.modules.hakedis import HakedisApp
+
+        db_mng = DatabaseManager()
+        self.hakedis_module = HakedisApp(user_data=self.user_data, parent=self, db=db_mng)
+        self.hakedis_scroll = self._scroll_page(self.hakedis_module)
+        return self.hakedis_scroll, self.hakedis_module
+
+    def _build_constants_page(self):
+        from app.core.db_manager import DatabaseManager
+        from app.modules.constants import ConstantsApp
+
+        db_mng = DatabaseManager()
+        self.constants_module = ConstantsApp(db_manager=db_mng, parent=self)
+        try:
+            self.constants_module.onoff_settings_changed.connect(self.set_offline_policy)
+            self.constants_module.motion_settings_changed.connect(self.set_motion_policy)
+        except Exception:
+            pass
+        return self.constants_module, self.constants_module
+
+    @profiled("ui.open_users")
+    def open_users(self):
+        self._open_page("users", self._build_users_page)
+
+    @profiled("ui.open_employees")
+    def open_employees(self):
+        self._open_page("employees", self._build_employees_page)
+
+    @profiled("ui.open_customers")
+    def open_customers(self):
+        self._open_page("customers", self._build_customers_page)
+
+    @profiled("ui.open_vehicles")
+    def open_vehicles(self):
+        self._open_page("vehicles", self._build_vehicles_page)
 
+    @profiled("ui.open_drivers")
+    def open_drivers(self):
+        self._open_page("drivers", self._build_drivers_page)
+
+    @profiled("ui.open_repairs")
+    def open_repairs(self):
+        self._open_page("repairs", self._build_repairs_page)
+
+    @profiled("ui.open_contracts")
+    def open_contracts(self):
+        self._open_page("contracts", self._build_contracts_page)
+
+    @profiled("ui.open_routes")
+    def open_routes(self):
+        self._open_page("routes", self._build_routes_page)
+
+    @profiled("ui.open_trips")
     def open_trips(self):
         initial_month = str((self.user_data or {}).get("active_month") or "").strip() or None
         dlg = PeriodSelectDialog(parent=self, initial_month=initial_month)
@@ -2792,46 +2849,10 @@ class MainMenuApp(QMainWindow):
         except Exception:
             pass
 
-        # 1. Eski modülleri güvenli bir şekilde temizle (Ana sayfa hariç)
-        for i in reversed(range(self.mainStack.count())):
-            widget = self.mainStack.widget(i)
-            if widget and widget.objectName() != "page_main":
-                self.mainStack.removeWidget(widget)
-                widget.setParent(None)
-                widget.deleteLater()
-
-        # 2. Yeni modülü oluştur
-        self.trips_module = TripsGridApp(user_data=self.user_data)
-        self.trips_module.setWindowFlags(Qt.WindowType.Widget)
-        self.trips_module.setMinimumSize(0, 0)
-        self.trips_module.setMinimumWidth(0)
-        self.trips_module.setMinimumHeight(0)
-        self.trips_module.setSizePolicy(QSizePolicy.Policy.Ignored, QSizePolicy.Policy.Ignored)
-
-        self.trips_scroll = QScrollArea()
-        self.trips_scroll.setWidgetResizable(True)
-        self.trips_scroll.setFrameShape(QScrollArea.Shape.NoFrame)
-        self.trips_scroll.setWidget(self.trips_module)
-        self.trips_scroll.setMinimumSize(0, 0)
-        self.trips_scroll.setMinimumWidth(0)
-        self.trips_scroll.setMinimumHeight(0)
-        self.trips_scroll.setSizePolicy(QSizePolicy.Policy.Expanding, QSizePolicy.Policy.Expanding)
-
-        self.mainStack.addWidget(self.trips_scroll)
-        self.mainStack.setCurrentWidget(self.trips_scroll)
-
-        self.layout().activate()
-        self.setMinimumSize(0, 0)
-        if self.centralWidget() is not None:
-            self.centralWidget().setMinimumSize(0, 0)
-        if hasattr(self, "mainStack") and self.mainStack is not None:
-            self.mainStack.setMinimumSize(0, 0)
-            self.mainStack.setMinimumWidth(0)
-            self.mainStack.setSizePolicy(QSizePolicy.Policy.Expanding, QSizePolicy.Policy.Expanding)
-
-        QTimer.singleShot(0, self._force_maximized)
-        QTimer.singleShot(50, self._force_maximized)
+        # Sefer ekranı açılışta seçili döneme göre kurulur; önbellekte dönem başına ayrı sayfa tutulur.
+        self._open_page(f"trips:{selected_month}", self._build_trips_page, usage_name="trips")
 
+    @profiled("ui.open_attendance")
     def open_attendance(self):
         initial_month = str((self.user_data or {}).get("active_month") or "").strip() or None
         dlg = PeriodSelectDialog(parent=self, initial_month=initial_month)
@@ -2846,30 +2867,28 @@ class MainMenuApp(QMainWindow):
             from app.core.db_manager import DatabaseManager
 
             db = DatabaseManager()
-            if selected_month and not db.month_has_operational_template(str(selected_month)):
-                prev_for_template = _prev_month_same_year(str(selected_month))
-                if prev_for_template and db.month_has_operational_template(str(prev_for_template)):
-                    ok = QMessageBox.question(
-                        self,
-                        "Şablon Kopyalama",
-                        f"{selected_month} dönemi için şablon bulunamadı.\n\n"
-                        f"{prev_for_template} dönemindeki şablonlar kopyalansın mı?",
-                        QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No,
-                    )
-                    if ok == QMessageBox.StandardButton.Yes:
-                        done = db.copy_month_operational_template(str(prev_for_template), str(selected_month))
-                        if not done:
-                            QMessageBox.warning(self, "Uyarı", "Şablon kopyalama yapılamadı.")
-                else:
-                    QMessageBox.information(
-                        self,
-                        "Bilgi",
-                        f"{selected_month} dönemi için şablon bulunamadı ve kopyalanacak önceki dönem yok.",
-                    )
+            needs_template, prev_for_template = template_copy_source(db, selected_month, same_year=True)
+            if needs_template and prev_for_template:
+                ok = QMessageBox.question(
+                    self,
+                    "Şablon Kopyalama",
+                    f"{selected_month} dönemi için şablon bulunamadı.\n\n"
+                    f"{prev_for_template} dönemindeki şablonlar kopyalansın mı?",
+                    QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No,
+                )
+                if ok == QMessageBox.StandardButton.Yes:
+                    if not copy_month_template(db, prev_for_template, selected_month):
+                        QMessageBox.warning(self, "Uyarı", "Şablon kopyalama yapılamadı.")
+            elif needs_template:
+                QMessageBox.information(
+                    self,
+                    "Bilgi",
+                    f"{selected_month} dönemi için şablon bulunamadı ve kopyalanacak önceki dönem yok.",
+                )
         except Exception:
             pass
 
-        prev_month = _prev_month_same_year(selected_month)
+        prev_month = prev_month_same_year(selected_month)
         if prev_month and selected_month != (initial_month or ""):
             try:
                 from app.core.db_manager import DatabaseManager
@@ -2877,38 +2896,10 @@ class MainMenuApp(QMainWindow):
                 db = DatabaseManager()
                 close_state = db.get_period_close(str(prev_month)) or {}
                 is_closed = bool(int((close_state or {}).get("closed") or 0))
+                check = check_period_close(db, str(prev_month))
+                unlocked_cnt, pending_hakedis_cnt = check.unlocked_locks, check.pending_hakedis
 
                 if not is_closed:
-                    conn = db.connect()
-                    if conn:
-                        cur = conn.cursor()
-
-                        cur.execute(
-                            """
-                            SELECT COUNT(1)
-                            FROM trip_period_lock
-                            WHERE month = ? AND COALESCE(locked,0) = 0
-                            """,
-                            (str(prev_month),),
-                        )
-                        unlocked_cnt = int((cur.fetchone() or [0])[0] or 0)
-
-                        cur.execute(
-                            """
-                            SELECT COUNT(1)
-                            FROM hakedis
-                            WHERE period = ?
-                              AND UPPER(COALESCE(status,'')) NOT IN ('ONAYLANDI','FATURALANDI')
-                            """,
-                            (str(prev_month),),
-                        )
-                        pending_hakedis_cnt = int((cur.fetchone() or [0])[0] or 0)
-
-                        conn.close()
-                    else:
-                        unlocked_cnt = 0
-                        pending_hakedis_cnt = 0
-
                     msg = (
                         f"Seçilen dönem: {selected_month}\n\n"
                         f"Önceki dönem ({prev_month}) AY KAPATILMAMIŞ.\n\n"
@@ -2918,36 +2909,6 @@ class MainMenuApp(QMainWindow):
                     )
                     QMessageBox.warning(self, "Uyarı", msg)
                     return
-
-                conn = db.connect()
-                if conn:
-                    cur = conn.cursor()
-
-                    cur.execute(
-                        """
-                        SELECT COUNT(1)
-                        FROM trip_period_lock
-                        WHERE month = ? AND COALESCE(locked,0) = 0
-                        """,
-                        (str(prev_month),),
-                    )
-                    unlocked_cnt = int((cur.fetchone() or [0])[0] or 0)
-
-                    cur.execute(
-                        """
-                        SELECT COUNT(1)
-                        FROM hakedis
-                        WHERE period = ?
-                          AND UPPER(COALESCE(status,'')) NOT IN ('ONAYLANDI','FATURALANDI')
-                        """,
-                        (str(prev_month),),
-                    )
-                    pending_hakedis_cnt = int((cur.fetchone() or [0])[0] or 0)
-
-                    conn.close()
-                else:
-                    unlocked_cnt = 0
-                    pending_hakedis_cnt = 0
             except Exception:
                 unlocked_cnt = 0
                 pending_hakedis_cnt = 0
@@ -2969,120 +2930,18 @@ class MainMenuApp(QMainWindow):
         except Exception:
             pass
 
-        # 1. Eski modülleri güvenli bir şekilde temizle (Ana sayfa hariç)
-        for i in reversed(range(self.mainStack.count())):
-            widget = self.mainStack.widget(i)
-            if widget and widget.objectName() != "page_main":
-                self.mainStack.removeWidget(widget)
-                widget.setParent(None)
-                widget.deleteLater()
-
-        # 2. Yeni modülü oluştur
-        self.attendance_module = AttendanceApp(user_data=self.user_data, parent=self)
-        self.attendance_module.setWindowFlags(Qt.WindowType.Widget)
-        self.attendance_module.setMinimumSize(0, 0)
-        self.attendance_module.setMinimumWidth(0)
-        self.attendance_module.setMinimumHeight(0)
-        self.attendance_module.setSizePolicy(QSizePolicy.Policy.Ignored, QSizePolicy.Policy.Ignored)
-
-        self.attendance_scroll = QScrollArea()
-        self.attendance_scroll.setWidgetResizable(True)
-        self.attendance_scroll.setFrameShape(QScrollArea.Shape.NoFrame)
-        self.attendance_scroll.setWidget(self.attendance_module)
-        self.attendance_scroll.setMinimumSize(0, 0)
-        self.attendance_scroll.setMinimumWidth(0)
-        self.attendance_scroll.setMinimumHeight(0)
-        self.attendance_scroll.setSizePolicy(QSizePolicy.Policy.Expanding, QSizePolicy.Policy.Expanding)
-
-        self.mainStack.addWidget(self.attendance_scroll)
-        self.mainStack.setCurrentWidget(self.attendance_scroll)
-
-        self.layout().activate()
-        self.setMinimumSize(0, 0)
-        if self.centralWidget() is not None:
-            self.centralWidget().setMinimumSize(0, 0)
-        if hasattr(self, "mainStack") and self.mainStack is not None:
-            self.mainStack.setMinimumSize(0, 0)
-            self.mainStack.setMinimumWidth(0)
-            self.mainStack.setSizePolicy(QSizePolicy.Policy.Expanding, QSizePolicy.Policy.Expanding)
-
-        QTimer.singleShot(0, self._force_maximized)
-        QTimer.singleShot(50, self._force_maximized)
+        # Puantaj ekranı dönem başına ayrı sayfa olarak önbellekte tutulur.
+        self._open_page(f"attendance:{selected_month}", self._build_attendance_page, usage_name="attendance")
 
+    @profiled("ui.open_payments")
     def open_payments(self):
-        for i in reversed(range(self.mainStack.count())):
-            widget = self.mainStack.widget(i)
-            if widget and widget.objectName() != "page_main":
-                self.mainStack.removeWidget(widget)
-                widget.setParent(None)
-                widget.deleteLater()
+        self._open_page("payments", self._build_payments_page)
 
-        from app.core.db_manager import DatabaseManager
-        from app.modules.hakedis import HakedisApp
-
-        db_mng = DatabaseManager()
-        self.hakedis_module = HakedisApp(user_data=self.user_data, parent=self, db=db_mng)
-        self.hakedis_module.setWindowFlags(Qt.WindowType.Widget)
-        self.hakedis_module.setMinimumSize(0, 0)
-        self.hakedis_module.setMinimumWidth(0)
-        self.hakedis_module.setMinimumHeight(0)
-        self.hakedis_module.setSizePolicy(QSizePolicy.Policy.Ignored, QSizePolicy.Policy.Ignored)
-
-        self.hakedis_scroll = QScrollArea()
-        self.hakedis_scroll.setWidgetResizable(True)
-        self.hakedis_scroll.setFrameShape(QScrollArea.Shape.NoFrame)
-        self.hakedis_scroll.setWidget(self.hakedis_module)
-        self.hakedis_scroll.setMinimumSize(0, 0)
-        self.hakedis_scroll.setMinimumWidth(0)
-        self.hakedis_scroll.setMinimumHeight(0)
-        self.hakedis_scroll.setSizePolicy(QSizePolicy.Policy.Expanding, QSizePolicy.Policy.Expanding)
-
-        self.mainStack.addWidget(self.hakedis_scroll)
-        self.mainStack.setCurrentWidget(self.hakedis_scroll)
-
-        self.layout().activate()
-        self.setMinimumSize(0, 0)
-        if self.centralWidget() is not None:
-            self.centralWidget().setMinimumSize(0, 0)
-        if hasattr(self, "mainStack") and self.mainStack is not None:
-            self.mainStack.setMinimumSize(0, 0)
-            self.mainStack.setMinimumWidth(0)
-            self.mainStack.setSizePolicy(QSizePolicy.Policy.Expanding, QSizePolicy.Policy.Expanding)
-
-        QTimer.singleShot(0, self._force_maximized)
-        QTimer.singleShot(50, self._force_maximized)
     def open_finance(self): print("Mali Yönetim modülü açılıyor...")
-    def open_constants(self):
-        for i in reversed(range(self.mainStack.count())):
-            widget = self.mainStack.widget(i)
-            if widget and widget.objectName() != "page_main":
-                self.mainStack.removeWidget(widget)
-                widget.setParent(None)
-                widget.deleteLater()
-
-        # 2. ÖNCE VERİTABANI NESNESİNİ OLUŞTURUYORUZ (Bu eksikti)
-        from app.core.db_manager import DatabaseManager
-        db_mng = DatabaseManager() 
-        
-        # 3. MODÜLÜ AÇIYORUZ
-        from app.modules.constants import ConstantsApp
-        # Dosya adını senin istediğin gibi "constants_window.ui" olarak bıraktım
-        self.constants_module = ConstantsApp(db_manager=db_mng, parent=self) 
-
-        try:
-            self.constants_module.onoff_settings_changed.connect(self.set_offline_policy)
-        except Exception:
-            pass
-        
-        self.mainStack.addWidget(self.constants_module)
-        self.mainStack.setCurrentWidget(self.constants_module)
-
-
-
-
-
-
 
+    @profiled("ui.open_constants")
+    def open_constants(self):
+        self._open_page("constants", self._build_constants_page)
 
     def open_reports(self): print("Raporlar modülü açılıyor...")
     def open_settings(self): print("Ayarlar modülü açılıyor...")
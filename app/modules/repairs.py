@@ -1,4 +1,3 @@
-from PyQt6 import uic
 from PyQt6.QtCore import Qt, QDate, QRegularExpression
 from PyQt6.QtGui import QRegularExpressionValidator
 from PyQt6.QtWidgets import (
@@ -14,13 +13,13 @@ from PyQt6.QtWidgets import (
 )
 
 from app.core.db_manager import DatabaseManager
-from config import get_ui_path
+from app.core.forms import load_ui
 
 
 class RepairsApp(QWidget):
     def __init__(self, user_data=None, db_manager=None, parent=None):
         super().__init__(parent)
-        uic.loadUi(get_ui_path("repairs_window.ui"), self)
+        load_ui("repairs_window.ui", self)
         self.setObjectName("main_form")
 
         self.user_data = user_data or {}
@@ -110,6 +109,20 @@ class RepairsApp(QWidget):
                 self.cmb_firma_adi.addItem(value, _id)
             self.cmb_firma_adi.blockSignals(False)
 
+    def refresh_on_enter(self):
+        """Ana menüden önbellekteki sayfaya dönülürken (veri değiştiyse) çağrılır; seçimler korunur."""
+        combos = [getattr(self, n, None) for n in ("cmb_arac", "cmb_bakim_turu", "cmb_firma_adi")]
+        combos = [c for c in combos if c is not None]
+        selected = [c.currentData() for c in combos]
+        self._load_combos()
+        for cmb, data in zip(combos, selected):
+            idx = cmb.findData(data)
+            if idx >= 0:
+                cmb.blockSignals(True)
+                cmb.setCurrentIndex(idx)
+                cmb.blockSignals(False)
+        self._load_table()
+
     def _load_table(self):
         if not hasattr(self, "table_bakim"):
             return
@@ -1,20 +1,20 @@
 
 import json
-import re
 
-from PyQt6 import uic
 from PyQt6.QtCore import Qt, QDate
 from PyQt6.QtGui import QColor, QStandardItem, QStandardItemModel
 from PyQt6.QtWidgets import QDialog, QMessageBox, QTableWidgetItem, QWidget, QHeaderView
 
 from app.core.db_manager import DatabaseManager
-from config import get_ui_path
+from app.core.route_directory import invalidate_route_directory
+from app.core.route_names import extract_movement_type, norm_route_key, split_legacy_route_name
+from app.core.forms import load_ui
 
 
 class RoutesApp(QWidget):
     def __init__(self, user_data=None, parent=None):
         super().__init__(parent)
-        uic.loadUi(get_ui_path("routes_window.ui"), self)
+        load_ui("routes_window.ui", self)
         self.setObjectName("main_form")
 
         # Yeni UI'da tablo ismi table_rotalar. Eski kod table_rota bekliyor olabilir.
@@ -33,8 +33,6 @@ class RoutesApp(QWidget):
         self._selected_contract_end = ""
         self._selected_contract_type = ""
 
-        self._contract_route_km_map = {}
-
         self._opening_indibindi_dialog = False
 
         self._contract_model = QStandardItemModel(self)
@@ -46,23 +44,13 @@ class RoutesApp(QWidget):
             self.list_kalemler.setModel(self._kalem_model)
 
         self._ensure_routes_table()
+        # Mesafe matrisi dosyası değiştiyse yüklenir; durak satırı olmayan güzergahlar işlenir.
+        self.db.refresh_route_catalog()
         self._init_tables()
         self._init_buttons()
         self._setup_connections()
         self._load_customers()
 
-    def _split_legacy_route_name(self, route_name: str, movement_type: str) -> tuple[str, str]:
-        rn = str(route_name or "").strip()
-        mt = str(movement_type or "").strip()
-        try:
-            if (not mt) and " - " in rn:
-                p1, p2 = rn.split(" - ", 1)
-                rn = p1.strip()
-                mt = p2.strip()
-        except Exception:
-            pass
-        return rn, mt
-
     def _ensure_routes_table(self):
         conn = None
         try:
@@ -112,6 +100,16 @@ class RoutesApp(QWidget):
             except Exception:
                 pass
 
+    def _route_params_changed(self, contract_id=None, route_ids=None):
+        # Paylaşılan güzergah dizini (puantaj / hakediş ekranları da kullanır) yeniden yüklensin.
+        cid = contract_id or self._selected_contract_id
+        invalidate_route_directory(int(cid) if cid else None)
+        # Durak satırları (türetilen km) yalnızca yazılan güzergahlar için güncellenir.
+        if route_ids:
+            self.db.sync_route_stops(route_ids=route_ids)
+        elif cid:
+            self.db.sync_route_stops(contract_id=int(cid))
+
     def _init_tables(self):
         # Yeni UI tek tablo: table_rotalar (veya table_rota alias)
         if hasattr(self, "table_rotalar") or hasattr(self, "table_rota"):
@@ -334,38 +332,12 @@ class RoutesApp(QWidget):
         rid = None
         stops = ""
 
-        rn_in, mt_in = self._split_legacy_route_name(route_name, movement_type)
-        legacy_name = ""
-        try:
-            if (mt_in or "").strip():
-                legacy_name = f"{rn_in} - {mt_in}".strip()
-        except Exception:
-            legacy_name = ""
-        try:
-            conn = self.db.connect()
-            cursor = conn.cursor()
-            cursor.execute(
-                """
-                SELECT id, COALESCE(stops,''), COALESCE(movement_type,''), COALESCE(route_name,'')
-                FROM route_params
-                WHERE contract_id = ? AND (COALESCE(route_name,'') = ? OR COALESCE(route_name,'') = ?)
-                ORDER BY id DESC
-                """,
-                (int(contract_id), str(rn_in or "").strip(), str(legacy_name or "").strip()),
-            )
-            rows = cursor.fetchall() or []
-            conn.close()
-        except Exception:
-            rows = []
+        rn_in, mt_in = split_legacy_route_name(route_name, movement_type)
+        rows = self.db.find_route_params_by_key(int(contract_id), rn_in, mt_in)
 
         for r_id, r_stops, r_mt, r_rn in rows:
-            mt_db_raw = str(r_mt or "").strip()
-            rn_db_raw = str(r_rn or "").strip()
-            rn_db, mt_db = self._split_legacy_route_name(rn_db_raw, mt_db_raw)
+            _rn_db, mt_db = split_legacy_route_name(r_rn, r_mt)
 
-            # route_name uyuşması şart (normalize edilmiş)
-            if str(rn_db or "").strip() != str(rn_in or "").strip():
-                continue
             if mt_in and mt_db != mt_in:
                 continue
             rid = int(r_id)
@@ -382,35 +354,14 @@ class RoutesApp(QWidget):
         contract_id = int(self._selected_contract_id)
         contract_type = (self._selected_contract_type or "").strip()
 
-        def _extract_movement_type(rec: dict) -> str:
-            if not isinstance(rec, dict):
-                return ""
-            raw = (
-                rec.get("gidis_gelis")
-                or rec.get("movement_type")
-                or rec.get("hareket_turu")
-                or rec.get("hareket")
-                or rec.get("hareketTuru")
-                or rec.get("hareket_tipi")
-                or rec.get("tip")
-                or ""
-            )
-            return str(raw or "").strip()
-
         kalem_list = []
         inferred_mt_by_route = {}
         try:
-            conn = self.db.connect()
-            cursor = conn.cursor()
-            cursor.execute("SELECT price_matrix_json FROM contracts WHERE id = ?", (contract_id,))
-            row = cursor.fetchone()
-            conn.close()
-            price_json = row[0] if row else ""
-            parsed = json.loads(price_json) if price_json else []
+            parsed = self.db.get_contract_price_items(int(contract_id))
             if isinstance(parsed, list):
                 for e in parsed:
                     guz = str((e or {}).get("guzergah") or "").strip()
-                    hareket = _extract_movement_type(e or {})
+                    hareket = extract_movement_type(e or {}, normalize=False)
                     km = (e or {}).get("km")
                     if guz:
                         kalem_list.append({"route_name": guz, "movement_type": hareket, "km": km})
@@ -422,23 +373,10 @@ class RoutesApp(QWidget):
 
         if not kalem_list:
             try:
-                conn = self.db.connect()
-                cursor = conn.cursor()
-                cursor.execute(
-                    """
-                    SELECT COALESCE(route_name,''), COALESCE(movement_type,'')
-                    FROM route_params
-                    WHERE contract_id = ?
-                    ORDER BY id ASC
-                    """,
-                    (contract_id,),
-                )
-                rows = cursor.fetchall()
-                conn.close()
-                for rname, mtype in rows:
-                    rn = str(rname or "").strip()
+                for e in self.db.get_route_directory(int(contract_id)).routes():
+                    rn = e.route_name.strip()
                     if rn:
-                        kalem_list.append({"route_name": rn, "movement_type": str(mtype or "").strip(), "km": None})
+                        kalem_list.append({"route_name": rn, "movement_type": e.movement_type.strip(), "km": None})
             except Exception:
                 kalem_list = []
 
@@ -475,6 +413,7 @@ class RoutesApp(QWidget):
                         updated = True
                 if updated:
                     conn.commit()
+                    self._route_params_changed(contract_id)
                 conn.close()
 
                 # listeyi güncel DB verisiyle normalize etmek için mtype boş satırları tekrar oku
@@ -499,44 +438,16 @@ class RoutesApp(QWidget):
             uniq.append({"route_name": rn, "movement_type": mt, "km": (k or {}).get("km")})
         kalem_list = uniq
 
-        def _norm_name(s: str) -> str:
-            s2 = str(s or "").strip().casefold()
-            s2 = re.sub(r"\s+", " ", s2)
-            s2 = re.sub(r"[^0-9a-zA-ZğüşöçıİĞÜŞÖÇ]", "", s2)
-            return s2
-
         existing_keys = set()
         try:
-            conn = self.db.connect()
-            cursor = conn.cursor()
-            cursor.execute(
-                """
-                SELECT COALESCE(route_name,''), COALESCE(movement_type,'')
-                FROM route_params
-                WHERE contract_id = ?
-                """,
-                (contract_id,),
-            )
-            for rname, mtype in cursor.fetchall() or []:
-                rn0 = str(rname or "").strip()
-                mt0 = str(mtype or "").strip()
+            for e in self.db.get_route_directory(int(contract_id)).routes():
+                rn0, mt0 = split_legacy_route_name(e.route_name, e.movement_type)
                 if not rn0:
                     continue
-                # Legacy: route_name içine " - " ile hareket türü gömülmüş olabilir
-                if not mt0 and " - " in rn0:
-                    p1, p2 = rn0.split(" - ", 1)
-                    rn0 = p1.strip()
-                    mt0 = p2.strip()
-
-                nk = (_norm_name(rn0), _norm_name(mt0))
+                nk = (norm_route_key(rn0), norm_route_key(mt0))
                 if nk[0]:
                     existing_keys.add(nk)
-            conn.close()
         except Exception:
-            try:
-                conn.close()
-            except Exception:
-                pass
             existing_keys = set()
         for k in kalem_list:
             rn = str((k or {}).get("route_name") or "").strip()
@@ -546,7 +457,7 @@ class RoutesApp(QWidget):
             it.setEditable(False)
 
             try:
-                if (_norm_name(rn), _norm_name(mt)) in existing_keys:
+                if (norm_route_key(rn), norm_route_key(mt)) in existing_keys:
                     it.setForeground(QColor(0, 128, 0))
                 else:
                     it.setForeground(QColor(200, 0, 0))
@@ -591,7 +502,7 @@ class RoutesApp(QWidget):
     def _open_indibindi_dialog(self, route_name: str, movement_type: str, service_type: str):
         dlg = QDialog(self)
         try:
-            uic.loadUi(get_ui_path("indibindi_dialog.ui"), dlg)
+            load_ui("indibindi_dialog.ui", dlg)
         except Exception as e:
             QMessageBox.critical(self, "Hata", f"indibindi_dialog.ui yüklenemedi:\n{str(e)}")
             return
@@ -666,12 +577,8 @@ class RoutesApp(QWidget):
             it1.setData(Qt.ItemDataRole.UserRole + 202, (movement_type or "").strip())
             it2 = QTableWidgetItem("")
             km_txt = ""
-            try:
-                km_val = self._contract_route_km_map.get(str(route_name or "").strip().lower())
-                if km_val is not None and str(km_val).strip() != "":
-                    km_txt = str(km_val)
-            except Exception:
-                km_txt = ""
+            if existing_rid is not None:
+                km_txt = self._derived_route_km_text(self.db.get_route_km_map(route_ids=[int(existing_rid)]), existing_rid)
             it3 = QTableWidgetItem(km_txt)
             it3.setTextAlignment(Qt.AlignmentFlag.AlignRight | Qt.AlignmentFlag.AlignVCenter)
             tbl.setItem(r, 0, it0)
@@ -734,22 +641,16 @@ class RoutesApp(QWidget):
             return
 
         try:
-            conn = self.db.connect()
-            cursor = conn.cursor()
-            cursor.execute(
-                """
-                SELECT id, COALESCE(service_type,''), COALESCE(route_name,''), COALESCE(movement_type,''), COALESCE(stops,''), distance_km
-                FROM route_params
-                WHERE contract_id = ?
-                ORDER BY id ASC
-                """,
-                (int(self._selected_contract_id),),
-            )
-            rows = cursor.fetchall()
-            conn.close()
+            rows = [
+                (e.id, e.service_type, e.route_name, e.movement_type, e.stops, e.distance_km)
+                for e in self.db.get_route_directory(int(self._selected_contract_id)).routes()
+            ]
         except Exception:
             rows = []
 
+        # Durak matrisinden türetilen km, elle girilen değerin önüne geçer.
+        derived_km = self.db.get_route_km_map(contract_id=int(self._selected_contract_id))
+
         tbl.blockSignals(True)
         for rid, stype, rname, mtype, stops, km in rows:
             r = tbl.rowCount()
@@ -762,7 +663,7 @@ class RoutesApp(QWidget):
 
             rn0 = str(rname or "").strip()
             mv0 = str(mtype or "").strip()
-            rn, mv = self._split_legacy_route_name(rn0, mv0)
+            rn, mv = split_legacy_route_name(rn0, mv0)
             disp = f"{rn} - {mv}" if mv else rn
             it1 = QTableWidgetItem(disp)
             it1.setFlags(it1.flags() & ~Qt.ItemFlag.ItemIsEditable)
@@ -771,12 +672,7 @@ class RoutesApp(QWidget):
 
             it2 = QTableWidgetItem(str(stops or ""))
             km_txt = "" if km is None else str(km)
-            try:
-                km2 = self._contract_route_km_map.get(str(rn or "").strip().lower())
-                if km2 is not None and str(km2).strip() != "":
-                    km_txt = str(km2)
-            except Exception:
-                pass
+            km_txt = self._derived_route_km_text(derived_km, rid) or km_txt
             it3 = QTableWidgetItem(km_txt)
             it3.setTextAlignment(Qt.AlignmentFlag.AlignRight | Qt.AlignmentFlag.AlignVCenter)
             tbl.setItem(r, 0, it0)
@@ -955,6 +851,7 @@ class RoutesApp(QWidget):
                         it0.setData(Qt.ItemDataRole.UserRole + 101, int(new_id))
 
             conn.commit()
+            self._route_params_changed(contract_id)
             QMessageBox.information(self, "Başarılı", "Kayıt tamamlandı.")
         except Exception as e:
             try:
@@ -1010,6 +907,7 @@ class RoutesApp(QWidget):
             for rid in ids:
                 cursor.execute("DELETE FROM route_params WHERE id = ?", (rid,))
             conn.commit()
+            self._route_params_changed(route_ids=ids)
         except Exception as e:
             try:
                 if conn is not None:
@@ -1047,7 +945,6 @@ class RoutesApp(QWidget):
                 self._selected_contract_type = ((row[0] or "").strip() if row else "")
             except Exception:
                 self._selected_contract_type = ""
-            self._contract_route_km_map = self._get_contract_route_km_map(int(self._selected_contract_id))
             return
 
         if not self._selected_contract_id or not hasattr(self, "table_rota"):
@@ -1062,7 +959,7 @@ class RoutesApp(QWidget):
             conn = self.db.connect()
             cursor = conn.cursor()
             cursor.execute(
-                "SELECT contract_type, price_matrix_json FROM contracts WHERE id = ?",
+                "SELECT contract_type FROM contracts WHERE id = ?",
                 (int(self._selected_contract_id),),
             )
             row = cursor.fetchone()
@@ -1071,17 +968,12 @@ class RoutesApp(QWidget):
             row = None
 
         contract_type = ""
-        price_json = ""
         if row:
             contract_type = (row[0] or "").strip()
-            price_json = row[1] or ""
         self._selected_contract_type = contract_type
 
-        guzergah_list = []
         try:
-            parsed = json.loads(price_json) if price_json else []
-            if isinstance(parsed, list):
-                guzergah_list = parsed
+            guzergah_list = self.db.get_contract_price_items(int(self._selected_contract_id))
         except Exception:
             guzergah_list = []
 
@@ -1144,46 +1036,24 @@ class RoutesApp(QWidget):
             return "DİĞER"
         return s
 
-    def _get_contract_route_km_map(self, contract_id: int) -> dict:
-        """contracts.price_matrix_json içinden güzergah -> km map'i."""
-        out = {}
+    def _derived_route_km_text(self, km_map: dict, rid) -> str:
+        """Durak matrisinden tam hesaplanabilen güzergah km'si; eksik çift varsa boş."""
         try:
-            conn = self.db.connect()
-            cursor = conn.cursor()
-            cursor.execute("SELECT price_matrix_json FROM contracts WHERE id = ?", (int(contract_id),))
-            row = cursor.fetchone()
-            conn.close()
-            price_json = row[0] if row else ""
-            parsed = json.loads(price_json) if price_json else []
+            rec = (km_map or {}).get(int(rid))
         except Exception:
-            parsed = []
-
-        if isinstance(parsed, list):
-            for e in parsed:
-                guz = str((e or {}).get("guzergah") or "").strip()
-                km = (e or {}).get("km")
-                if not guz:
-                    continue
-                if km is None or km == "":
-                    continue
-                out[guz.lower()] = km
-        return out
+            rec = None
+        if not rec or not rec.get("complete"):
+            return ""
+        km = float(rec.get("km") or 0)
+        return str(int(km)) if km.is_integer() else f"{km:.2f}"
 
     def _get_saved_route_details_map(self, contract_id: int, contract_type: str):
         details = {}
         try:
-            conn = self.db.connect()
-            cursor = conn.cursor()
-            cursor.execute(
-                """
-                SELECT service_type, route_name, start_point, stops, distance_km
-                FROM route_params
-                WHERE contract_id = ?
-                """,
-                (int(contract_id),),
-            )
-            rows = cursor.fetchall()
-            conn.close()
+            rows = [
+                (e.service_type, e.route_name, e.start_point, e.stops, e.distance_km)
+                for e in self.db.get_route_directory(int(contract_id)).routes()
+            ]
         except Exception:
             rows = []
 
@@ -1199,19 +1069,10 @@ class RoutesApp(QWidget):
     def _fallback_rota_from_saved_routes(self, contract_id: int, contract_type: str):
         rows = []
         try:
-            conn = self.db.connect()
-            cursor = conn.cursor()
-            cursor.execute(
-                """
-                SELECT route_name, start_point, stops, distance_km, service_type
-                FROM route_params
-                WHERE contract_id = ?
-                ORDER BY id ASC
-                """,
-                (int(contract_id),),
-            )
-            db_rows = cursor.fetchall()
-            conn.close()
+            db_rows = [
+                (e.route_name, e.start_point, e.stops, e.distance_km, e.service_type)
+                for e in self.db.get_route_directory(int(contract_id)).routes()
+            ]
         except Exception:
             db_rows = []
 
@@ -1296,14 +1157,10 @@ class RoutesApp(QWidget):
         if not self._selected_contract_id:
             return keys
         try:
-            conn = self.db.connect()
-            cursor = conn.cursor()
-            cursor.execute(
-                "SELECT service_type, route_name FROM route_params WHERE contract_id = ?",
-                (int(self._selected_contract_id),),
-            )
-            rows = cursor.fetchall()
-            conn.close()
+            rows = [
+                (e.service_type, e.route_name)
+                for e in self.db.get_route_directory(int(self._selected_contract_id)).routes()
+            ]
         except Exception:
             rows = []
         for st, rn in rows:
@@ -1558,6 +1415,7 @@ class RoutesApp(QWidget):
                     if id_item is not None:
                         id_item.setData(Qt.ItemDataRole.UserRole + 101, new_id)
             conn.commit()
+            self._route_params_changed()
             for r in pending_rows:
                 item0 = self.table_son.item(r, 0)
                 if item0 is not None:
@@ -1618,6 +1476,7 @@ class RoutesApp(QWidget):
                 for rid in ids_to_delete:
                     cursor.execute("DELETE FROM route_params WHERE id = ?", (rid,))
                 conn.commit()
+                self._route_params_changed(route_ids=ids_to_delete)
             except Exception as e:
                 try:
                     if conn is not None:
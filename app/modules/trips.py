@@ -1,29 +1,40 @@
 import re
 from datetime import datetime
 
-from PyQt6 import uic
 from PyQt6.QtCore import QDate, QTime, Qt, QTimer
 
 from PyQt6.QtGui import QColor, QStandardItem, QStandardItemModel
 from PyQt6.QtWidgets import (
     QAbstractItemView,
-    QComboBox,
+    QCheckBox,
     QDialog,
+    QHBoxLayout,
     QHeaderView,
     QInputDialog,
+    QLabel,
     QMenu,
     QMessageBox,
+    QPushButton,
+    QTableWidget,
     QTableWidgetItem,
+    QVBoxLayout,
     QWidget,
 )
 
+from app.core.assignment import propose_assignments
+from app.core.async_loader import AsyncLoader
 from app.core.db_manager import DatabaseManager
-from config import get_ui_path
+from app.core.profiler import profiled
+from app.core.lookup_models import LookupComboDelegate, LookupListModel, bind_lookup_combo
+from app.core.puantaj_snapshot import invalidate_puantaj_snapshots
+from app.core.time_blocks import split_time_block
+from app.services.trip_plan import fill_route_plan, save_plan_rows
+from app.core.forms import load_ui
 
 class TripsGridApp(QWidget):
     def __init__(self, user_data=None, db_manager=None, parent=None):
         super().__init__(parent)
-        uic.loadUi(get_ui_path("trips_grid_window.ui"), self)
+        load_ui("trips_grid_window.ui", self)
         self.setObjectName("main_form")
 
         if hasattr(self, "table_sefer") and not hasattr(self, "tbl_grid"):
@@ -38,6 +49,12 @@ class TripsGridApp(QWidget):
         self._selected_route_map = {}
         self._vehicle_map = {}
         self._driver_map = {}
+        # Araç/şoför seçimleri için tek paylaşımlı model (combo'lar ve atama tablosu editörü).
+        self._vehicle_model = LookupListModel(self)
+        self._driver_model = LookupListModel(self)
+        # Sadece aktif (sözleşme, ay, hizmet tipi) bağlamının planı tutulur.
+        self._plan_map_cache_key = None
+        self._plan_map_cache = {}
 
         self._assignment_ready = False
         self._last_kalem_warn_key = None
@@ -121,6 +138,8 @@ class TripsGridApp(QWidget):
                 self._driver_map[str(kod)] = str(ad)
         except Exception:
             self._driver_map = {}
+        self._vehicle_model.set_items(self._vehicle_map)
+        self._driver_model.set_items(self._driver_map)
 
     def _resolve_contract_id(self):
         if self._selected_contract_id not in (None, ""):
@@ -163,7 +182,10 @@ class TripsGridApp(QWidget):
 
         return None
 
-    def _load_plan_map(self, contract_id: int, month: str, service_type: str):
+    def _load_plan_map(self, contract_id: int, month: str, service_type: str, use_cache: bool = True):
+        key = (int(contract_id), str(month), str(service_type))
+        if use_cache and self._plan_map_cache_key == key:
+            return self._plan_map_cache
         plan = {}
         try:
             conn = self.db.connect()
@@ -182,8 +204,14 @@ class TripsGridApp(QWidget):
             rows = []
         for rid, tb, vid, did, note in rows:
             plan[(str(rid), str(tb or ""))] = {"vehicle_id": vid, "driver_id": did, "note": note}
+        self._plan_map_cache_key = key
+        self._plan_map_cache = plan
         return plan
 
+    def _invalidate_plan_map(self):
+        self._plan_map_cache_key = None
+        self._plan_map_cache = {}
+
     def _parse_time(self, s: str):
         m = re.match(r"^(\d{1,2}):(\d{2})$", (s or "").strip())
         if not m:
@@ -203,17 +231,6 @@ class TripsGridApp(QWidget):
     def _apply_default_times_to_widgets(self):
         pass
 
-    def _split_time_block(self, tb: str):
-        tbs = (tb or "").strip()
-        if not tbs:
-            return "", ""
-        if "-" in tbs:
-            a, b = (tbs.split("-", 1) + [""])[:2]
-            return (a or "").strip(), (b or "").strip()
-        if ":" in tbs:
-            return tbs, ""
-        return tbs, ""
-
     def _delete_plan_for_context(self, contract_id: int, month: str, service_type: str):
         conn = None
         try:
@@ -227,6 +244,8 @@ class TripsGridApp(QWidget):
                 (int(contract_id), str(month), str(service_type)),
             )
             conn.commit()
+            invalidate_puantaj_snapshots(int(contract_id), str(month))
+            self._invalidate_plan_map()
         except Exception as e:
             try:
                 if conn is not None:
@@ -269,6 +288,36 @@ class TripsGridApp(QWidget):
                 if self._tbl_grid_cols.get(k) is not None:
                     h.setSectionResizeMode(int(self._tbl_grid_cols[k]), QHeaderView.ResizeMode.ResizeToContents)
 
+        if hasattr(self, "tbl_alloc"):
+            # Araç/şoför kolonları: hücre başına combo yerine paylaşımlı modelli delegate editörü.
+            self._alloc_vehicle_delegate = LookupComboDelegate(self._vehicle_model, self.tbl_alloc)
+            self._alloc_driver_delegate = LookupComboDelegate(self._driver_model, self.tbl_alloc)
+            self.tbl_alloc.setItemDelegateForColumn(2, self._alloc_vehicle_delegate)
+            self.tbl_alloc.setItemDelegateForColumn(3, self._alloc_driver_delegate)
+            self.tbl_alloc.setEditTriggers(
+                QAbstractItemView.EditTrigger.DoubleClicked
+                | QAbstractItemView.EditTrigger.SelectedClicked
+                | QAbstractItemView.EditTrigger.AnyKeyPressed
+            )
+
+    def _set_alloc_lookup(self, row: int, col: int, code):
+        model = self._vehicle_model if int(col) == 2 else self._driver_model
+        it = self.tbl_alloc.item(row, col)
+        if it is None:
+            it = QTableWidgetItem()
+            self.tbl_alloc.setItem(row, col, it)
+        code_s = None if code in (None, "") else str(code)
+        if code_s is not None and model.row_for_code(code_s) < 0:
+            code_s = None
+        it.setData(Qt.ItemDataRole.UserRole, code_s)
+        it.setText(model.label_for(code_s) if code_s is not None else "Seçiniz...")
+
+    def _alloc_lookup_code(self, row: int, col: int):
+        it = self.tbl_alloc.item(row, col)
+        if it is None:
+            return None
+        return it.data(Qt.ItemDataRole.UserRole)
+
     def _resolve_tbl_grid_columns(self):
         if not hasattr(self, "tbl_grid"):
             return {}
@@ -353,6 +402,8 @@ class TripsGridApp(QWidget):
             self.btn_satir_sil.clicked.connect(self._delete_selected_table_rows)
         if hasattr(self, "btn_delete_all"):
             self.btn_delete_all.clicked.connect(self._delete_all_table_rows)
+        if hasattr(self, "btn_plan_oner"):
+            self.btn_plan_oner.clicked.connect(self._open_plan_proposal)
 
     def _load_static_filters(self):
         if hasattr(self, "cmb_service_type"):
@@ -365,53 +416,6 @@ class TripsGridApp(QWidget):
             self.cmb_service_type.addItem("DİĞER", "DİĞER")
             self.cmb_service_type.blockSignals(False)
 
-    def _ensure_route_params_table(self):
-        conn = None
-        try:
-            conn = self.db.connect()
-            if conn is None:
-                return
-            cursor = conn.cursor()
-            cursor.execute(
-                """
-                CREATE TABLE IF NOT EXISTS route_params (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    contract_id INTEGER NOT NULL,
-                    contract_number TEXT,
-                    start_date TEXT,
-                    end_date TEXT,
-                    service_type TEXT,
-                    route_name TEXT,
-                    movement_type TEXT,
-                    start_point TEXT,
-                    stops TEXT,
-                    distance_km REAL,
-                    created_at TEXT,
-                    FOREIGN KEY (contract_id) REFERENCES contracts (id)
-                )
-                """
-            )
-            try:
-                cursor.execute("PRAGMA table_info(route_params)")
-                cols = {row[1] for row in cursor.fetchall()}
-                if "movement_type" not in cols:
-                    cursor.execute("ALTER TABLE route_params ADD COLUMN movement_type TEXT")
-            except Exception:
-                pass
-            conn.commit()
-        except Exception:
-            try:
-                if conn is not None:
-                    conn.rollback()
-            except Exception:
-                pass
-        finally:
-            try:
-                if conn is not None:
-                    conn.close()
-            except Exception:
-                pass
-
     def _load_customers(self):
         if not hasattr(self, "cmb_musteri"):
             return
@@ -500,7 +504,6 @@ class TripsGridApp(QWidget):
         return v
 
     def _load_kalemler_from_contract(self, contract_id: int, service_type: str):
-        self._ensure_route_params_table()
         self._selected_route_map = {}
         self._kalem_model.clear()
 
@@ -509,19 +512,13 @@ class TripsGridApp(QWidget):
         if not st_values:
             self._apply_kalem_filter()
             return
-        placeholders = ",".join(["?" for _ in st_values])
         try:
-            conn = self.db.connect()
-            cursor = conn.cursor()
-            q = (
-                "SELECT id, COALESCE(route_name,''), COALESCE(stops,''), COALESCE(movement_type,''), distance_km "
-                "FROM route_params "
-                f"WHERE contract_id = ? AND service_type IN ({placeholders}) AND COALESCE(route_name,'') <> '' "
-                "ORDER BY id ASC"
-            )
-            cursor.execute(q, tuple([int(contract_id)] + st_values))
-            rows = cursor.fetchall()
-            conn.close()
+            # Sözleşmenin güzergah dizini ekranlar arasında paylaşılır; seçim değişince yeniden sorgulanmaz.
+            rows = [
+                (e.id, e.route_name, e.stops, e.movement_type, e.distance_km)
+                for e in self.db.get_route_directory(int(contract_id)).routes(st_values)
+                if e.route_name
+            ]
         except Exception as e:
             rows = []
             key = ("kalem_sql", int(contract_id), str(service_type))
@@ -610,7 +607,7 @@ class TripsGridApp(QWidget):
 
         dlg = QDialog(self)
         try:
-            uic.loadUi(get_ui_path("trips_dialog.ui"), dlg)
+            load_ui("trips_dialog.ui", dlg)
         except Exception as e:
             QMessageBox.critical(self, "Hata", f"trips_dialog.ui yüklenemedi:\n{str(e)}")
             return
@@ -639,19 +636,15 @@ class TripsGridApp(QWidget):
                 cmb_v.setFixedWidth(200)
             except Exception:
                 pass
-            cmb_v.clear()
-            cmb_v.addItem("Seçiniz...", None)
-            for vcode, plate in self._vehicle_map.items():
-                cmb_v.addItem(str(plate), str(vcode))
+            bind_lookup_combo(cmb_v, self._vehicle_model)
+            cmb_v.setCurrentIndex(0)
         if cmb_d is not None:
             try:
                 cmb_d.setFixedWidth(200)
             except Exception:
                 pass
-            cmb_d.clear()
-            cmb_d.addItem("Seçiniz...", None)
-            for did, name in self._driver_map.items():
-                cmb_d.addItem(str(name), str(did))
+            bind_lookup_combo(cmb_d, self._driver_model)
+            cmb_d.setCurrentIndex(0)
 
         def _pair(chk: str, g: str, c: str):
             return (
@@ -723,7 +716,7 @@ class TripsGridApp(QWidget):
                         tb2 = f"{g2}-{c2}" if (g2 or c2) else ""
                     if not tb2:
                         continue
-                    g_s, c_s = self._split_time_block(str(tb2 or ""))
+                    g_s, c_s = split_time_block(str(tb2 or ""))
                     if g_s or c_s:
                         existing_pairs.append((g_s, c_s))
                     if existing_vid is None:
@@ -750,7 +743,7 @@ class TripsGridApp(QWidget):
                     (contract_id, int(route_id), month, service_type),
                 )
                 for tb, vid, did in cur.fetchall() or []:
-                    g_s, c_s = self._split_time_block(str(tb or ""))
+                    g_s, c_s = split_time_block(str(tb or ""))
                     if g_s or c_s:
                         existing_pairs.append((g_s, c_s))
                     if existing_vid is None and vid not in (None, ""):
@@ -1062,7 +1055,7 @@ class TripsGridApp(QWidget):
                     tb_s = f"{g_txt}-{c_txt}" if (g_txt or c_txt) else ""
                 if not tb_s:
                     continue
-                g_s, c_s = self._split_time_block(tb_s)
+                g_s, c_s = split_time_block(tb_s)
                 if g_s and self._parse_time(g_s) is None:
                     QMessageBox.warning(self, "Uyarı", f"Saat formatı geçersiz: {g_s} (HH:MM)")
                     return
@@ -1096,6 +1089,8 @@ class TripsGridApp(QWidget):
                     ),
                 )
             conn.commit()
+            invalidate_puantaj_snapshots(int(contract_id), str(month))
+            self._invalidate_plan_map()
             QMessageBox.information(self, "Başarılı", "Sefer planı kaydedildi.")
         except Exception as e:
             try:
@@ -1166,7 +1161,8 @@ class TripsGridApp(QWidget):
                     f"Hizmet Tipi: {service_type}",
                 )
 
-        plan_map = self._load_plan_map(int(contract_id), month, str(service_type))
+        # Grid yenilemesi DB'den okur (başka ekranların yazdıkları da gelsin); seçim/not işlemleri önbelleği kullanır.
+        plan_map = self._load_plan_map(int(contract_id), month, str(service_type), use_cache=False)
 
         planned_rids = set()
         try:
@@ -1211,7 +1207,7 @@ class TripsGridApp(QWidget):
             rota_disp = " | ".join(rota_parts)
 
             tb_s = str(tb or "")
-            g_txt, c_txt = self._split_time_block(str(tb_s))
+            g_txt, c_txt = split_time_block(str(tb_s))
 
             vid = rec.get("vehicle_id")
             did = rec.get("driver_id")
@@ -1434,31 +1430,15 @@ class TripsGridApp(QWidget):
             it_tb.setFlags(it_tb.flags() & ~Qt.ItemFlag.ItemIsEditable)
             self.tbl_alloc.setItem(row, 1, it_tb)
 
-            cmb_v = QComboBox()
-            cmb_v.addItem("Seçiniz...", None)
-            for vcode, plate in self._vehicle_map.items():
-                cmb_v.addItem(plate, vcode)
-            self.tbl_alloc.setCellWidget(row, 2, cmb_v)
-
-            cmb_d = QComboBox()
-            cmb_d.addItem("Seçiniz...", None)
-            for did, name in self._driver_map.items():
-                cmb_d.addItem(name, did)
-            self.tbl_alloc.setCellWidget(row, 3, cmb_d)
-
+            vid = None
+            did = None
             if plan_map is not None:
                 rec = plan_map.get((str(route_id), tb))
                 if rec is not None:
                     vid = str(rec.get("vehicle_id") or "")
                     did = str(rec.get("driver_id") or "")
-                    if vid:
-                        idx = cmb_v.findData(vid)
-                        if idx >= 0:
-                            cmb_v.setCurrentIndex(idx)
-                    if did:
-                        idx = cmb_d.findData(did)
-                        if idx >= 0:
-                            cmb_d.setCurrentIndex(idx)
+            self._set_alloc_lookup(row, 2, vid)
+            self._set_alloc_lookup(row, 3, did)
 
         self._refresh_note_from_selection()
 
@@ -1488,18 +1468,10 @@ class TripsGridApp(QWidget):
             QMessageBox.information(self, "Bilgi", "Önce grid'den hücre seçip EKLE'ye basınız.")
             return
         for r in range(self.tbl_alloc.rowCount()):
-            if vid:
-                cmb_v = self.tbl_alloc.cellWidget(r, 2)
-                if cmb_v is not None:
-                    idx = cmb_v.findData(str(vid))
-                    if idx >= 0:
-                        cmb_v.setCurrentIndex(idx)
-            if did:
-                cmb_d = self.tbl_alloc.cellWidget(r, 3)
-                if cmb_d is not None:
-                    idx = cmb_d.findData(str(did))
-                    if idx >= 0:
-                        cmb_d.setCurrentIndex(idx)
+            if vid and self._vehicle_model.row_for_code(vid) > 0:
+                self._set_alloc_lookup(r, 2, vid)
+            if did and self._driver_model.row_for_code(did) > 0:
+                self._set_alloc_lookup(r, 3, did)
 
     def _alloc_clear_selected_rows(self):
         if self._is_current_locked():
@@ -1519,6 +1491,7 @@ class TripsGridApp(QWidget):
                 self._upsert_plan(str(route_id), str(tb), None, None, note=None)
         self._reload_grid()
 
+    @profiled("trips.save_from_alloc_table")
     def _save_from_alloc_table(self):
         if self._is_current_locked():
             QMessageBox.information(self, "Bilgi", "Bu dönem kilitli. Değişiklik yapılamaz.")
@@ -1527,27 +1500,27 @@ class TripsGridApp(QWidget):
             QMessageBox.information(self, "Bilgi", "Kaydedilecek satır yok. Grid'den hücre seçip EKLE'ye basınız.")
             return
 
-        single_route_id = None
-        single_vid = None
-        single_did = None
+        if not self._selected_contract_id or not self._service_type():
+            return
+        contract_id = int(self._selected_contract_id)
+        month = self._month_key()
+        service_type = str(self._service_type())
+
+        rows = []
         for r in range(self.tbl_alloc.rowCount()):
             route_item = self.tbl_alloc.item(r, 0)
             route_id = route_item.data(Qt.ItemDataRole.UserRole + 1) if route_item else None
             tb = route_item.data(Qt.ItemDataRole.UserRole + 2) if route_item else None
             if not route_id or not tb:
                 continue
-            cmb_v = self.tbl_alloc.cellWidget(r, 2)
-            cmb_d = self.tbl_alloc.cellWidget(r, 3)
-            vid = cmb_v.currentData() if cmb_v is not None else None
-            did = cmb_d.currentData() if cmb_d is not None else None
-            self._upsert_plan(str(route_id), str(tb), vid, did, note=None)
+            rows.append((int(route_id), str(tb), self._alloc_lookup_code(r, 2), self._alloc_lookup_code(r, 3)))
 
-            if self.tbl_alloc.rowCount() == 1:
-                single_route_id = str(route_id)
-                single_vid = vid
-                single_did = did
+        if save_plan_rows(self.db, contract_id, month, service_type, rows) < 0:
+            QMessageBox.critical(self, "Hata", "Plan kaydedilemedi.")
+            return
+        self._invalidate_plan_map()
 
-        if self.tbl_alloc.rowCount() == 1 and single_route_id and (single_vid or single_did):
+        if self.tbl_alloc.rowCount() == 1 and len(rows) == 1 and (rows[0][2] or rows[0][3]):
             reply = QMessageBox.question(
                 self,
                 "Onay",
@@ -1556,13 +1529,9 @@ class TripsGridApp(QWidget):
                 QMessageBox.StandardButton.No,
             )
             if reply == QMessageBox.StandardButton.Yes:
-                if self._selected_contract_id and self._service_type():
-                    month = self._month_key()
-                    tbs = self._time_blocks_for_context(int(self._selected_contract_id), month, str(self._service_type()))
-                    for tb in tbs:
-                        if not tb:
-                            continue
-                        self._upsert_plan(single_route_id, str(tb), single_vid, single_did, note=None)
+                rid, _tb, vid, did = rows[0]
+                fill_route_plan(self.db, contract_id, month, service_type, rid, vid, did)
+                self._invalidate_plan_map()
         self._reload_grid()
 
     def _apply_lock_ui(self, locked: bool):
@@ -1574,6 +1543,7 @@ class TripsGridApp(QWidget):
             "btn_note_save",
             "btn_note_clear",
             "btn_save",
+            "btn_plan_oner",
         ]:
             if hasattr(self, name):
                 getattr(self, name).setEnabled(not locked)
@@ -1603,6 +1573,7 @@ class TripsGridApp(QWidget):
             )
             conn.commit()
             conn.close()
+            invalidate_puantaj_snapshots(int(contract_id), str(month))
         except Exception as e:
             QMessageBox.critical(self, "Hata", f"Kilit işlemi başarısız:\n{str(e)}")
             return
@@ -1657,6 +1628,8 @@ class TripsGridApp(QWidget):
             )
             conn.commit()
             conn.close()
+            invalidate_puantaj_snapshots(int(contract_id), str(month))
+            self._invalidate_plan_map()
         except Exception as e:
             QMessageBox.critical(self, "Hata", f"Kayıt hatası:\n{str(e)}")
 
@@ -1710,4 +1683,184 @@ class TripsGridApp(QWidget):
             return
         self.txt_note.setPlainText("")
         self._upsert_plan(key[0], key[1], vehicle_id=None, driver_id=None, note="")
-        self._reload_grid()
\ No newline at end of file
+        self._reload_grid()
+
+    # ------------------------- plan proposal -------------------------
+    def _open_plan_proposal(self):
+        if not self._selected_contract_id or not self._service_type():
+            QMessageBox.information(self, "Bilgi", "Önce sözleşme ve hizmet tipi seçiniz.")
+            return
+        if self._is_current_locked():
+            QMessageBox.information(self, "Bilgi", "Bu dönem kilitli. Değişiklik yapılamaz.")
+            return
+        self._load_vehicle_driver_maps()
+        contract_id = int(self._selected_contract_id)
+        month = self._month_key()
+        service_type = str(self._service_type())
+        dlg = PlanProposalDialog(
+            self,
+            self.db,
+            contract_id,
+            month,
+            service_type,
+            vehicle_map=self._vehicle_map,
+            driver_map=self._driver_map,
+        )
+        if dlg.exec() != QDialog.DialogCode.Accepted:
+            return
+        changes = dlg.changed_assignments()
+        if not changes:
+            return
+        n = self.db.apply_plan_assignments(contract_id, month, service_type, changes)
+        self._invalidate_plan_map()
+        self._reload_grid()
+        QMessageBox.information(self, "Bilgi", f"{n} plan satırına araç/şoför atandı.")
+
+
+class PlanProposalDialog(QDialog):
+    """Otomatik araç/şoför atama önizlemesi; kullanıcı onaylamadan plana yazılmaz."""
+
+    _HEADERS = ["Güzergah", "Saat", "Kapasite", "Araç", "Şoför", "Durum"]
+
+    def __init__(
+        self,
+        parent: QWidget,
+        db: DatabaseManager,
+        contract_id: int,
+        month: str,
+        service_type: str,
+        vehicle_map: dict | None = None,
+        driver_map: dict | None = None,
+    ):
+        super().__init__(parent)
+        self.db = db
+        self.contract_id = int(contract_id)
+        self.month = str(month or "")
+        self.service_type = str(service_type or "")
+        self.vehicle_map = dict(vehicle_map or {})
+        self.driver_map = dict(driver_map or {})
+        self._slots = []
+        self._result = None
+
+        self.setWindowTitle(f"Plan Önerisi - {self.month} / {self.service_type}")
+        self.setSizeGripEnabled(True)
+        self.resize(900, 560)
+
+        self.table = QTableWidget(self)
+        self.table.setEditTriggers(QAbstractItemView.EditTrigger.NoEditTriggers)
+        self.table.setSelectionBehavior(QAbstractItemView.SelectionBehavior.SelectRows)
+        self.table.verticalHeader().setVisible(False)
+        self.table.setAlternatingRowColors(True)
+        self.table.setColumnCount(len(self._HEADERS))
+        self.table.setHorizontalHeaderLabels(self._HEADERS)
+        try:
+            self.table.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeMode.ResizeToContents)
+            self.table.horizontalHeader().setSectionResizeMode(0, QHeaderView.ResizeMode.Stretch)
+        except Exception:
+            pass
+
+        self.chk_keep = QCheckBox("Mevcut atamaları koru", self)
+        self.chk_keep.setChecked(True)
+        self.chk_keep.toggled.connect(self._load)
+        self.lbl_status = QLabel("Hesaplanıyor...", self)
+
+        self.btn_apply = QPushButton("Uygula")
+        self.btn_apply.setEnabled(False)
+        self.btn_apply.clicked.connect(self.accept)
+        btn_close = QPushButton("Vazgeç")
+        btn_close.clicked.connect(self.reject)
+
+        lay = QVBoxLayout()
+        lay.addWidget(self.chk_keep)
+        lay.addWidget(self.table)
+        footer = QHBoxLayout()
+        footer.addWidget(self.lbl_status)
+        footer.addStretch(1)
+        footer.addWidget(self.btn_apply)
+        footer.addWidget(btn_close)
+        lay.addLayout(footer)
+        self.setLayout(lay)
+
+        self._loader = AsyncLoader(self)
+        self._load()
+
+    def _load(self, *_args):
+        self.btn_apply.setEnabled(False)
+        self.lbl_status.setText("Hesaplanıyor...")
+        db_ = self.db
+        cid, month, st = self.contract_id, self.month, self.service_type
+        keep = bool(self.chk_keep.isChecked())
+        drivers = list(self.driver_map.items())
+
+        def _work():
+            slots = db_.get_plan_slots_for_assignment(cid, month, [st])
+            busy_v, busy_d = db_.get_plan_busy_resources(month, cid, [st])
+            veh = db_.get_araclar_list_with_capacity(only_active=True) or []
+            res = propose_assignments(
+                [dict(x) for x in slots],
+                veh,
+                drivers,
+                busy_vehicles=busy_v,
+                busy_drivers=busy_d,
+                keep_existing=keep,
+            )
+            return slots, res
+
+        self._loader.request(_work, self._fill)
+
+    def _fill(self, payload):
+        slots, res = payload
+        self._slots = slots or []
+        self._result = res
+        reasons = {(int(rid), str(tb)): why for rid, tb, why in (res.unassigned or [])}
+        replaced = {(int(rid), str(tb)): why for rid, tb, why in (res.replaced or [])}
+
+        self.table.setUpdatesEnabled(False)
+        self.table.setRowCount(0)
+        for sl in self._slots:
+            key = (int(sl["route_params_id"]), str(sl["time_block"]))
+            vid, did = res.assignments.get(key, (None, None))
+            changed = (vid, did) != (sl.get("vehicle_id"), sl.get("driver_id"))
+            cap = float(sl.get("required_capacity") or 0)
+            vals = [
+                str(sl.get("route_name") or sl["route_params_id"]),
+                str(sl["time_block"]),
+                str(int(cap)) if cap.is_integer() else f"{cap:.1f}",
+                self.vehicle_map.get(str(vid), str(vid or "")) if vid else "",
+                self.driver_map.get(str(did), str(did or "")) if did else "",
+                reasons.get(key)
+                or (f"Değiştirildi ({replaced[key]})" if key in replaced else ("Yeni" if changed else "Değişmedi")),
+            ]
+            r = self.table.rowCount()
+            self.table.insertRow(r)
+            for c, txt in enumerate(vals):
+                it = QTableWidgetItem(txt)
+                if key in reasons:
+                    it.setBackground(QColor("#f8d7da"))
+                elif key in replaced:
+                    it.setBackground(QColor("#fff3cd"))
+                elif changed:
+                    it.setBackground(QColor("#d4edda"))
+                self.table.setItem(r, c, it)
+        self.table.setUpdatesEnabled(True)
+
+        n_changed = len(self.changed_assignments())
+        self.lbl_status.setText(
+            f"{len(self._slots)} slot | {res.vehicles_used} araç, {res.drivers_used} şoför | "
+            f"ölü zaman {res.dead_minutes} dk | {len(reasons)} atanamadı | "
+            f"{len(replaced)} mevcut atama korunamadı | {n_changed} değişiklik"
+        )
+        self.btn_apply.setEnabled(n_changed > 0)
+
+    def changed_assignments(self) -> dict:
+        if self._result is None:
+            return {}
+        out = {}
+        for sl in self._slots:
+            key = (int(sl["route_params_id"]), str(sl["time_block"]))
+            if key not in self._result.assignments:
+                continue
+            vid, did = self._result.assignments[key]
+            if (vid, did) != (sl.get("vehicle_id"), sl.get("driver_id")):
+                out[key] = (vid, did)
+        return out
@@ -2,15 +2,14 @@ import os
 from PyQt6.QtWidgets import QWidget, QMessageBox, QTableWidgetItem, QHeaderView, QAbstractItemView, QSizePolicy
 from PyQt6.QtCore import Qt 
 
-from PyQt6 import uic
 from app.core.db_manager import DatabaseManager
-from config import get_ui_path
+from app.core.forms import load_ui
 
 class UsersApp(QWidget):
     def __init__(self, dbManager=None, main_app_instance=None):
         super().__init__()
         # 1. Arayüzü Yükle
-        uic.loadUi(get_ui_path("users_window.ui"), self)
+        load_ui("users_window.ui", self)
         self.setObjectName("main_form")
         self.setSizePolicy(QSizePolicy.Policy.Expanding, QSizePolicy.Policy.Expanding)
         self.db = dbManager if dbManager else DatabaseManager()
@@ -40,6 +39,10 @@ class UsersApp(QWidget):
         self.btn_new.clicked.connect(self.clear_form)
         self.table_users.itemDoubleClicked.connect(self.on_row_selected)
 
+    def refresh_on_enter(self):
+        """Ana menüden önbellekteki sayfaya dönülürken (veri değiştiyse) çağrılır; form korunur."""
+        self.load_data()
+
     def load_data(self):
         """db_manager üzerinden kullanıcıları çeker ve tabloya doldur."""
         self.table_users.setRowCount(0)
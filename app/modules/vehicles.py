@@ -2,10 +2,11 @@ import os
 from PyQt6.QtWidgets import (QMessageBox, QFileDialog, QWidget, QTableWidget, QTableWidgetItem, QHeaderView)
 from PyQt6.QtCore import QDate, Qt, QRegularExpression
 from PyQt6.QtGui import QPixmap, QRegularExpressionValidator
-from PyQt6 import uic
 
+from app.core.async_loader import AsyncLoader
 from app.core.db_manager import DatabaseManager
-from config import get_ui_path
+from app.utils import thumbnail_cache
+from app.core.forms import load_ui
 
 import ui.icons.context_rc
 
@@ -19,13 +20,14 @@ def _normalize_plate(text: str) -> str:
 class VehiclesApp(QWidget):
     def __init__(self, user_data=None, parent=None):
         super().__init__(parent)
-        uic.loadUi(get_ui_path("vehicles_window.ui"), self)
+        load_ui("vehicles_window.ui", self)
         self.setObjectName("main_form")
 
         self.db = DatabaseManager()
         self.user_data = user_data
         self.current_code = None
         self._photo_path = ""
+        self._photo_loader = AsyncLoader(self)
 
         if hasattr(self, "txt_arac_kodu"):
             self.txt_arac_kodu.setReadOnly(True)
@@ -207,6 +209,19 @@ class VehiclesApp(QWidget):
             self.cmb_model.addItem(value)
         self.cmb_model.blockSignals(False)
 
+    def refresh_on_enter(self):
+        """Ana menüden önbellekteki sayfaya dönülürken (veri değiştiyse) çağrılır; form korunur."""
+        cmb = getattr(self, "cmb_alt_yuklenici", None)
+        selected = cmb.currentData() if cmb is not None else None
+        self._load_subcontractor_customers()
+        if cmb is not None:
+            idx = cmb.findData(selected)
+            if idx >= 0:
+                cmb.blockSignals(True)
+                cmb.setCurrentIndex(idx)
+                cmb.blockSignals(False)
+        self.load_data()
+
     def load_data(self):
         if not hasattr(self, "tableView"):
             return
@@ -478,6 +493,7 @@ class VehiclesApp(QWidget):
             self.chk_arac_cam.setChecked(False)
         self._init_dates()
         self._assign_next_code()
+        self._photo_loader.cancel()
         if hasattr(self, "lbl_arac_foto"):
             self.lbl_arac_foto.setPixmap(QPixmap())
             self.lbl_arac_foto.setText("Araç Foto Yükle...")
@@ -584,24 +600,27 @@ class VehiclesApp(QWidget):
         if not hasattr(self, "lbl_arac_foto"):
             return
         if not self._photo_path or not os.path.exists(self._photo_path):
+            self._photo_loader.cancel()
             self.lbl_arac_foto.setPixmap(QPixmap())
             self.lbl_arac_foto.setText("Araç Foto Yükle...")
             return
 
-        pix = QPixmap(self._photo_path)
-        if pix.isNull():
-            self.lbl_arac_foto.setPixmap(QPixmap())
-            self.lbl_arac_foto.setText("Araç Foto Yükle...")
-            return
+        def _show(pix):
+            if pix is None:
+                self.lbl_arac_foto.setPixmap(QPixmap())
+                self.lbl_arac_foto.setText("Araç Foto Yükle...")
+                return
 
-        self.lbl_arac_foto.setText("")
-        self.lbl_arac_foto.setPixmap(
-            pix.scaled(
-                self.lbl_arac_foto.size(),
-                Qt.AspectRatioMode.KeepAspectRatio,
-                Qt.TransformationMode.SmoothTransformation,
+            self.lbl_arac_foto.setText("")
+            self.lbl_arac_foto.setPixmap(
+                pix.scaled(
+                    self.lbl_arac_foto.size(),
+                    Qt.AspectRatioMode.KeepAspectRatio,
+                    Qt.TransformationMode.SmoothTransformation,
+                )
             )
-        )
+
+        thumbnail_cache.request_thumbnail(self._photo_loader, self._photo_path, _show)
 
     def toggle_active_selected(self):
         code = self._get_selected_vehicle_code()
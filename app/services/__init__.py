@@ -0,0 +1,5 @@
+"""Qt'den bağımsız iş akışları (puantaj kaydı, hakediş hesabı, plan kaydı, dönem işlemleri).
+
+Fonksiyonlar bir DatabaseManager ve düz veri alır; ekranlar yalnızca girdiyi toplayıp sonucu
+gösterir. Böylece aynı akışlar arka plan işçilerinde, toplu işlerde ve ölçümlerde çalıştırılabilir.
+"""
@@ -0,0 +1,456 @@
+"""Hakediş hesabı: trip_allocations + trip_prices (+ sözleşme fiyat matrisi) -> hakediş kalemleri.
+
+prepare_hakedis() yalnızca okur ve kalemleri hesaplar; save_hakedis() başlık/kalem/toplamları ve
+taşeron gider hakedişlerini yazar. Arada ekran kullanıcıya eksik fiyat / ceza hatırlatıcısını sorar.
+"""
+
+from dataclasses import dataclass, field
+from datetime import datetime
+
+from app.core.puantaj_snapshot import invalidate_puantaj_snapshots
+from app.core.route_names import extract_movement_type, norm_route_key
+from app.services.periods import month_range
+
+CEZA_FLAG = "__CEZA_HATIRLAT__"
+SUBCONTRACT_SERVICE_SUFFIX = "|TAŞERON"
+
+
+@dataclass
+class HakedisCalculation:
+    contract_id: int
+    period: str
+    service_type: str
+    route_params_id: int | None = None
+    start_date: str = ""
+    end_date: str = ""
+    # (route_params_id, trip_date, time_block, line_no, vehicle_id, driver_id, qty, time_text, note)
+    allocations: list = field(default_factory=list)
+    items: list = field(default_factory=list)
+    missing_price_keys: set = field(default_factory=set)  # (route_params_id, time_block)
+    subcontract_items_by_supplier: dict = field(default_factory=dict)  # supplier_customer_id -> [item]
+    subcontract_missing_supplier: set = field(default_factory=set)  # vehicle_id
+    subcontract_missing_ay_price: set = field(default_factory=set)  # (route_params_id, time_block)
+
+    def expense_warnings(self) -> list[str]:
+        out = []
+        if self.subcontract_missing_supplier:
+            out.append(
+                f"Alt Yüklenici seçilmemiş TAŞERON ARACI var: {len(self.subcontract_missing_supplier)} adet (Araçlar modülünde Alt Yük. seçiniz)."
+            )
+        if self.subcontract_missing_ay_price:
+            out.append(
+                f"Bazı taşeron satırlarında A.Y. FİYATI bulunamadı: {len(self.subcontract_missing_ay_price)} adet. (Sözleşme > İş Kalemleri ekranında A.Y. FİYATI giriniz)"
+            )
+        return out
+
+
+@dataclass
+class HakedisSaveResult:
+    hakedis_id: int | None = None
+    items_saved: bool = False
+    expense_headers: int = 0
+
+
+@dataclass
+class CezaReminder:
+    flagged: dict = field(default_factory=dict)  # supplier_customer_id -> {yyyy-mm-dd}
+    unknown_supplier_dates: set = field(default_factory=set)
+    unknown_vehicle_dates: set = field(default_factory=set)  # (vehicle_id, yyyy-mm-dd)
+    any_flagged_dates: set = field(default_factory=set)
+
+    def __bool__(self):
+        return bool(self.flagged or self.unknown_supplier_dates or self.unknown_vehicle_dates or self.any_flagged_dates)
+
+    def lines(self) -> list[str]:
+        def _sample(values, fmt=str):
+            values = sorted(values)
+            more = "" if len(values) <= 8 else f" ...(+{len(values) - 8})"
+            return ", ".join(fmt(v) for v in values[:8]) + more
+
+        out = []
+        for s_id in sorted(self.flagged):
+            out.append(f"Taşeron ID {int(s_id)}: {_sample(self.flagged.get(s_id) or set())}")
+        if self.unknown_supplier_dates:
+            out.append(f"(Taşeron ID bulunamadı): {_sample(self.unknown_supplier_dates)}")
+        if self.unknown_vehicle_dates:
+            out.append(f"(Taşeron araç tespit edilemedi): {_sample(self.unknown_vehicle_dates, lambda p: f'{p[0]}@{p[1]}')}")
+        if not self.flagged and not self.unknown_supplier_dates and not self.unknown_vehicle_dates and self.any_flagged_dates:
+            out.append(f"(Ceza hatırlat işaretli): {_sample(self.any_flagged_dates)}")
+        return out
+
+
+class _SubcontractMeta:
+    """Araç başına (arac_turu, supplier_customer_id); her araç bir kez sorgulanır."""
+
+    def __init__(self, db):
+        self.db = db
+        self._cache: dict[int, tuple] = {}
+
+    def get(self, vehicle_id) -> tuple:
+        try:
+            vid = int(vehicle_id)
+        except Exception:
+            return ("", None)
+        if vid not in self._cache:
+            try:
+                self._cache[vid] = tuple(self.db.get_vehicle_subcontract_meta(vid))
+            except Exception:
+                self._cache[vid] = ("", None)
+        return self._cache[vid]
+
+
+def _is_subcontract_type(arac_turu) -> bool:
+    at = str(arac_turu or "").strip().upper()
+    at2 = at.replace("Ş", "S").replace("İ", "I").replace("Ğ", "G").replace("Ü", "U").replace("Ö", "O").replace("Ç", "C")
+    # 'TAŞERON ARACI', 'TAŞERON ARAÇ', ... varyasyonları
+    return ("TASERON" in at2) and ("ARAC" in at2 or "ARACI" in at2)
+
+
+# ------------------------- Fiyat eşleştirme -------------------------
+class _PriceIndex:
+    """Sözleşme fiyat matrisinden ad / normalize ad (+ hareket türü) bazlı fiyat sözlükleri."""
+
+    def __init__(self):
+        self.by_name_mt: dict[tuple[str, str], float] = {}
+        self.by_norm_mt: dict[tuple[str, str], float] = {}
+        self.by_name: dict[str, float] = {}
+        self.by_norm: dict[str, float] = {}
+
+    def __bool__(self):
+        return bool(self.by_name_mt or self.by_norm_mt or self.by_name or self.by_norm)
+
+    def add(self, guz: str, ng: str, mt: str, value: float, ambiguous: set):
+        if guz in self.by_name:
+            ambiguous.add(guz)
+        else:
+            self.by_name[guz] = value
+        if ng:
+            if ng in self.by_norm:
+                ambiguous.add(guz)
+            else:
+                self.by_norm[ng] = value
+            self.by_norm_mt[(ng, mt)] = value
+        self.by_name_mt[(guz, mt)] = value
+
+    def lookup(self, rname: str, nrn: str, mt_r: str, ambiguous: set):
+        if mt_r and (rname, mt_r) in self.by_name_mt:
+            return float(self.by_name_mt.get((rname, mt_r)) or 0.0)
+        if rname in self.by_name and rname not in ambiguous:
+            return float(self.by_name.get(rname) or 0.0)
+        if mt_r and nrn and (nrn, mt_r) in self.by_norm_mt:
+            return float(self.by_norm_mt.get((nrn, mt_r)) or 0.0)
+        if nrn and nrn in self.by_norm and rname not in ambiguous:
+            return float(self.by_norm.get(nrn) or 0.0)
+        return None
+
+
+def route_price_maps(db, contract_id: int, service_type: str) -> tuple[dict[int, float], dict[int, float]]:
+    """Yedek fiyatlar: route_params_id -> sözleşme birim fiyatı, route_params_id -> A.Y. FİYATI."""
+    try:
+        route_rows = db.get_route_params_for_contract(int(contract_id), str(service_type))
+    except Exception:
+        route_rows = []
+    try:
+        parsed = db.get_contract_price_matrix_rows(int(contract_id), service_type=str(service_type))
+    except Exception:
+        parsed = []
+
+    prices, ay_prices = _PriceIndex(), _PriceIndex()
+    ambiguous: set[str] = set()
+    st_lower = str(service_type).strip().lower()
+    for rec in parsed if isinstance(parsed, list) else []:
+        rec = rec or {}
+        guz = str(rec.get("guzergah") or "").strip().lower()
+        if not guz:
+            continue
+        st = str(rec.get("_service_type") or rec.get("service_type") or "").strip()
+        if st and st.lower() != st_lower:
+            continue
+        mt = extract_movement_type(rec)
+        try:
+            pr = float(rec.get("fiyat") or 0.0)
+        except Exception:
+            pr = 0.0
+        ay_raw = rec.get("alt_yuklenici_fiyat")
+        if ay_raw is None:
+            ay_raw = rec.get("ay_fiyati")
+        try:
+            ay = float(ay_raw or 0.0)
+        except Exception:
+            ay = 0.0
+        ng = norm_route_key(guz)
+        prices.add(guz, ng, mt, pr, ambiguous)
+        ay_prices.add(guz, ng, mt, ay, ambiguous)
+
+    price_by_id: dict[int, float] = {}
+    ay_by_id: dict[int, float] = {}
+    if not route_rows or not (prices or ay_prices):
+        return price_by_id, ay_by_id
+    for rr in route_rows:
+        try:
+            rid = int(rr[0] or 0)
+            rname = str(rr[1] if len(rr) > 1 else "").strip().lower()
+            mt_r = str(rr[4] if len(rr) > 4 else "").strip().lower()
+            nrn = str(rr[6] if len(rr) > 6 else "") or norm_route_key(rname)
+        except Exception:
+            continue
+        if rid <= 0 or not rname:
+            continue
+        pr = prices.lookup(rname, nrn, mt_r, ambiguous) if prices else None
+        if pr is not None:
+            price_by_id[rid] = float(pr or 0.0)
+        ayv = ay_prices.lookup(rname, nrn, mt_r, ambiguous) if ay_prices else None
+        if ayv is not None:
+            ay_by_id[rid] = float(ayv or 0.0)
+    return price_by_id, ay_by_id
+
+
+def _item(trip_date, rid: int, vehicle_id, driver_id, time_block, qty: float, unit_price: float, time_text) -> dict:
+    return {
+        "item_date": str(trip_date or ""),
+        "route_params_id": int(rid),
+        "vehicle_id": vehicle_id,
+        "driver_id": driver_id,
+        "work_type": str(time_block or ""),
+        "quantity": qty,
+        "unit_price": unit_price,
+        "amount": float(qty * unit_price),
+        "description": str(time_text or ""),
+        "source_trip_id": None,
+    }
+
+
+# ------------------------- Hesap / kayıt -------------------------
+def prepare_hakedis(db, contract_id: int, period: str, service_type: str, route_params_id: int | None = None) -> HakedisCalculation:
+    """Gelir kalemlerini ve taşeron gider kalemlerini hesaplar; DB'ye yazmaz."""
+    calc = HakedisCalculation(int(contract_id), str(period), str(service_type), route_params_id)
+    start_date, end_date = month_range(str(period))
+    if not start_date or not end_date:
+        raise ValueError("Dönem formatı hatalı (YYYY-MM bekleniyor)")
+    calc.start_date, calc.end_date = start_date, end_date
+
+    calc.allocations = db.get_trip_allocations_for_range(
+        contract_id=int(contract_id),
+        service_type=str(service_type),
+        start_date=str(start_date),
+        end_date=str(end_date),
+    ) or []
+
+    route_price_by_id, route_ay_by_id = route_price_maps(db, contract_id, service_type)
+    prices = db.get_trip_prices_for_month(int(contract_id), str(period), str(service_type))
+    price_map = {(int(rid), str(tb)): float(p or 0) for rid, tb, p in (prices or [])}
+    meta = _SubcontractMeta(db)
+
+    for rid, trip_date, time_block, _line_no, vehicle_id, driver_id, qty, time_text, _note in calc.allocations:
+        try:
+            rid_int = int(rid)
+        except Exception:
+            continue
+        qty_f = float(qty or 0)
+
+        if route_params_id is None or int(route_params_id) == rid_int:
+            unit_price = float(price_map.get((rid_int, str(time_block)), 0) or 0)
+            if unit_price <= 0:
+                unit_price = float(route_price_by_id.get(rid_int, 0.0) or 0.0)
+            if qty_f > 0 and unit_price <= 0:
+                calc.missing_price_keys.add((rid_int, str(time_block or "")))
+            calc.items.append(_item(trip_date, rid_int, vehicle_id, driver_id, time_block, qty_f, unit_price, time_text))
+
+        # GİDER: TAŞERON ARACI kalemleri sözleşmenin A.Y. FİYATI alanından; taşeron başına ayrı hakediş.
+        if vehicle_id is None:
+            continue
+        arac_turu, supplier_customer_id = meta.get(vehicle_id)
+        at = str(arac_turu or "").strip().upper()
+        if at != "TAŞERON ARACI" and at != "TASERON ARACI":
+            continue
+        if supplier_customer_id is None:
+            try:
+                calc.subcontract_missing_supplier.add(int(vehicle_id))
+            except Exception:
+                pass
+            continue
+        ay_price = float(route_ay_by_id.get(rid_int, 0.0) or 0.0)
+        if qty_f > 0 and ay_price <= 0:
+            calc.subcontract_missing_ay_price.add((rid_int, str(time_block or "")))
+        calc.subcontract_items_by_supplier.setdefault(int(supplier_customer_id), []).append(
+            _item(trip_date, rid_int, vehicle_id, driver_id, time_block, qty_f, ay_price, time_text)
+        )
+    return calc
+
+
+def save_hakedis(db, calc: HakedisCalculation) -> HakedisSaveResult:
+    """Gelir hakedişini (TASLAK) ve taşeron başına gider hakedişlerini yazar."""
+    res = HakedisSaveResult()
+    res.hakedis_id = db.upsert_hakedis_header(
+        contract_id=int(calc.contract_id),
+        period=str(calc.period),
+        service_type=str(calc.service_type),
+        route_params_id=int(calc.route_params_id) if calc.route_params_id is not None else None,
+        status="TASLAK",
+    )
+    if not res.hakedis_id:
+        return res
+
+    res.items_saved = bool(db.replace_hakedis_items(int(res.hakedis_id), calc.items))
+    if not res.items_saved:
+        return res
+    db.update_hakedis_totals(int(res.hakedis_id))
+
+    for supplier_id, sub_items in (calc.subcontract_items_by_supplier or {}).items():
+        try:
+            sub_hakedis_id = db.upsert_hakedis_header(
+                contract_id=int(calc.contract_id),
+                period=str(calc.period),
+                service_type=f"{str(calc.service_type)}{SUBCONTRACT_SERVICE_SUFFIX}",
+                route_params_id=-int(supplier_id),
+                status="TASLAK",
+            )
+        except Exception:
+            sub_hakedis_id = None
+        if not sub_hakedis_id:
+            continue
+        try:
+            db.replace_hakedis_items(int(sub_hakedis_id), sub_items)
+            db.update_hakedis_totals(int(sub_hakedis_id))
+        except Exception:
+            pass
+        res.expense_headers += 1
+    return res
+
+
+# ------------------------- Taşeron ceza hatırlatıcı -------------------------
+def collect_ceza_reminder(db, allocations) -> CezaReminder:
+    """Puantajda ceza hatırlat işareti (note içinde CEZA_FLAG) taşıyan seferleri taşerona göre gruplar."""
+    rem = CezaReminder()
+    meta = _SubcontractMeta(db)
+    for rec in allocations or []:
+        try:
+            _rid, trip_date, _tb, _ln, vehicle_id, _did, _qty, _tt, note = rec
+        except Exception:
+            continue
+        if CEZA_FLAG not in str(note or ""):
+            continue
+        rem.any_flagged_dates.add(str(trip_date))
+        try:
+            v_id = int(vehicle_id or 0)
+        except Exception:
+            v_id = 0
+        if v_id <= 0:
+            continue
+        arac_turu, supplier_customer_id = meta.get(v_id)
+        if not _is_subcontract_type(arac_turu):
+            rem.unknown_vehicle_dates.add((v_id, str(trip_date)))
+            continue
+        try:
+            s_id = int(supplier_customer_id or 0)
+        except Exception:
+            s_id = 0
+        if s_id <= 0:
+            rem.unknown_supplier_dates.add(str(trip_date))
+            continue
+        rem.flagged.setdefault(s_id, set()).add(str(trip_date))
+    return rem
+
+
+def hakedis_has_ceza(db, contract_id: int, period: str, service_type: str, route_params_id: int | None = None) -> bool:
+    """Bu bağlamın son hakedişinde CEZA kesintisi var mı?"""
+    conn = db.connect()
+    if not conn:
+        return False
+    rp = int(route_params_id) if route_params_id is not None else None
+    try:
+        cur = conn.cursor()
+        cur.execute(
+            """
+            SELECT id
+            FROM hakedis
+            WHERE contract_id=?
+              AND period=?
+              AND service_type=?
+              AND (
+                    (route_params_id IS NULL AND ? IS NULL)
+                 OR route_params_id=?
+              )
+            ORDER BY id DESC
+            LIMIT 1
+            """,
+            (int(contract_id), str(period), str(service_type), rp, rp),
+        )
+        row = cur.fetchone()
+        if not row or row[0] is None:
+            return False
+        cur.execute(
+            """
+            SELECT COUNT(1)
+            FROM hakedis_deductions
+            WHERE hakedis_id=?
+              AND UPPER(COALESCE(deduction_type,'')) LIKE '%CEZA%'
+            """,
+            (int(row[0]),),
+        )
+        return int((cur.fetchone() or [0])[0] or 0) > 0
+    except Exception:
+        return False
+    finally:
+        conn.close()
+
+
+def clear_ceza_reminders(db, contract_id: int, service_type: str, start_date: str, end_date: str) -> int:
+    """Hatırlatıcı işaretini notlardan siler (tekrar sorulmasın). Güncellenen satır sayısı döner."""
+    conn = db.connect()
+    if not conn:
+        return 0
+    try:
+        cur = conn.cursor()
+        cur.execute(
+            """
+            SELECT route_params_id, trip_date, time_block, line_no, COALESCE(note,'')
+            FROM trip_allocations
+            WHERE contract_id = ?
+              AND service_type = ?
+              AND trip_date BETWEEN ? AND ?
+              AND COALESCE(note,'') LIKE ?
+            """,
+            (int(contract_id), str(service_type), str(start_date), str(end_date), f"%{CEZA_FLAG}%"),
+        )
+        rows = cur.fetchall() or []
+        if not rows:
+            return 0
+        now = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        cur.executemany(
+            """
+            UPDATE trip_allocations
+            SET note = ?, updated_at = ?
+            WHERE contract_id = ?
+              AND service_type = ?
+              AND route_params_id = ?
+              AND trip_date = ?
+              AND time_block = ?
+              AND line_no = ?
+            """,
+            [
+                (
+                    " ".join(str(note0 or "").replace(CEZA_FLAG, "").split()).strip(),
+                    now,
+                    int(contract_id),
+                    str(service_type),
+                    int(rid0 or 0),
+                    str(d0 or ""),
+                    str(tb0 or ""),
+                    int(ln0 or 0),
+                )
+                for rid0, d0, tb0, ln0, note0 in rows
+            ],
+        )
+        conn.commit()
+        invalidate_puantaj_snapshots(int(contract_id))
+        return len(rows)
+    except Exception as e:
+        try:
+            conn.rollback()
+        except Exception:
+            pass
+        print(f"Ceza hatırlatıcı temizleme hatası: {e}")
+        return 0
+    finally:
+        conn.close()
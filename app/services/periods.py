@@ -0,0 +1,120 @@
+"""Dönem (ay) işlemleri: ay anahtarları, şablon kopyalama ve ay kapatma kontrolü."""
+
+import calendar
+from dataclasses import dataclass
+
+
+def prev_month_key(month_key: str) -> str | None:
+    """"2026-01" -> "2025-12"; geçersizse None."""
+    try:
+        y_str, m_str = str(month_key).split("-", 1)
+        y, m = int(y_str), int(m_str)
+        if m <= 1:
+            return f"{y - 1:04d}-12"
+        return f"{y:04d}-{m - 1:02d}"
+    except Exception:
+        return None
+
+
+def prev_month_same_year(month_key: str) -> str | None:
+    """Aynı yıl içindeki önceki ay; Ocak için None."""
+    try:
+        y_str, m_str = str(month_key).split("-", 1)
+        y, m = int(y_str), int(m_str)
+        if m <= 1:
+            return None
+        return f"{y:04d}-{m - 1:02d}"
+    except Exception:
+        return None
+
+
+def month_range(month_key: str) -> tuple[str | None, str | None]:
+    """"2026-02" -> ("2026-02-01", "2026-02-28"); geçersizse (None, None)."""
+    try:
+        y_str, m_str = str(month_key).strip().split("-", 1)
+        y, m = int(y_str), int(m_str)
+        last = calendar.monthrange(y, m)[1]
+    except Exception:
+        return None, None
+    return f"{y:04d}-{m:02d}-01", f"{y:04d}-{m:02d}-{last:02d}"
+
+
+# ------------------------- Şablon kopyalama -------------------------
+def template_copy_source(db, month: str, same_year: bool = False) -> tuple[bool, str | None]:
+    """(şablon_gerekli, kaynak_ay). Seçilen ayın şablonu varsa (False, None) döner.
+
+    Şablon yoksa önceki ay (same_year=True ise yalnızca aynı yıl içinde) şablonluysa kaynak olarak
+    döner; kopyalanacak ay yoksa (True, None).
+    """
+    month = str(month or "").strip()
+    if not month or db.month_has_operational_template(month):
+        return False, None
+    prev = prev_month_same_year(month) if same_year else prev_month_key(month)
+    if prev and db.month_has_operational_template(str(prev)):
+        return True, str(prev)
+    return True, None
+
+
+def copy_month_template(db, from_month: str, to_month: str) -> bool:
+    return bool(db.copy_month_operational_template(str(from_month), str(to_month)))
+
+
+# ------------------------- Ay kapatma -------------------------
+@dataclass
+class PeriodCloseCheck:
+    month: str
+    unlocked_locks: int = 0
+    pending_hakedis: int = 0
+    ok: bool = True
+
+    @property
+    def can_close(self) -> bool:
+        return self.ok and self.unlocked_locks == 0 and self.pending_hakedis == 0
+
+
+def check_period_close(db, month: str) -> PeriodCloseCheck:
+    """Ay kapatmayı engelleyen kayıtları sayar: kilitlenmemiş dönem ve onaylanmamış hakediş."""
+    res = PeriodCloseCheck(str(month))
+    conn = db.connect()
+    if not conn:
+        res.ok = False
+        return res
+    try:
+        cur = conn.cursor()
+        cur.execute(
+            """
+            SELECT COUNT(1)
+            FROM trip_period_lock
+            WHERE month = ? AND COALESCE(locked,0) = 0
+            """,
+            (str(month),),
+        )
+        res.unlocked_locks = int((cur.fetchone() or [0])[0] or 0)
+        cur.execute(
+            """
+            SELECT COUNT(1)
+            FROM hakedis
+            WHERE period = ?
+              AND UPPER(COALESCE(status,'')) NOT IN ('ONAYLANDI','FATURALANDI')
+            """,
+            (str(month),),
+        )
+        res.pending_hakedis = int((cur.fetchone() or [0])[0] or 0)
+    except Exception as e:
+        print(f"Ay kapatma kontrol hatası: {e}")
+        res.ok = False
+    finally:
+        conn.close()
+    return res
+
+
+def close_period(db, month: str, user_id: int = 0, note: str = "") -> tuple[bool, PeriodCloseCheck]:
+    """Kontrol geçerse ayı kapatır. (kapatıldı_mı, kontrol_sonucu) döner."""
+    check = check_period_close(db, month)
+    if not check.can_close:
+        return False, check
+    try:
+        ok = bool(db.set_period_closed(str(month), int(user_id or 0), str(note or "")))
+    except Exception:
+        ok = False
+    return ok, check
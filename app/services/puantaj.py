@@ -0,0 +1,317 @@
+"""Puantaj (trip_entries / trip_prices / trip_allocations) kaydı ve araç/şoför çakışma kontrolü.
+
+Toplu puantaj ekranı tabloyu PuantajRow listesine çevirir; yazılacak satırların üretimi,
+çakışma kontrolü ve tek transaction'lık kayıt burada yapılır.
+"""
+
+import calendar
+from dataclasses import dataclass, field
+from datetime import datetime
+
+from app.core.puantaj_snapshot import invalidate_puantaj_snapshots
+from app.core.time_blocks import IntervalIndex, parse_time_block
+
+VEHICLE_MOVEMENT_LIMIT = 8
+
+
+@dataclass
+class PuantajRow:
+    """Puantaj tablosunun bir satırı (güzergah + saat dilimi + sıra)."""
+
+    route_params_id: int
+    time_block: str = "GUN"
+    line_no: int = 0
+    time_text: str = ""
+    vehicle_id: object = None
+    driver_id: object = None
+    price: float = 0.0
+    # Ayın günlerine göre adet; qty[0] ayın 1'i.
+    qty: list = field(default_factory=list)
+    # Plan'da olan satırlar adet 0 olsa da yazılır.
+    planned: bool = False
+    # trip_date -> {"vehicle_id", "driver_id", "note"}: güne özel araç/şoför değişikliği.
+    overrides: dict = field(default_factory=dict)
+
+
+@dataclass
+class ExistingKeys:
+    entries: set = field(default_factory=set)  # (rid, trip_date, time_block, line_no)
+    prices: set = field(default_factory=set)  # (rid, time_block)
+    allocations: set = field(default_factory=set)  # (rid, trip_date, time_block, line_no)
+
+
+@dataclass
+class PuantajSaveResult:
+    ok: bool = False
+    # "conflict" (araç/şoför saat çakışması) ya da "write" (yazma hatası)
+    error: str = ""
+    conflict: str = ""
+    entries: int = 0
+    prices: int = 0
+    allocations: int = 0
+    # (trip_date, vehicle_id, hareket_sayısı): limit aşılan araç-günler
+    movement_warnings: list = field(default_factory=list)
+
+
+def _month_days(month: str) -> tuple[int, int, int]:
+    y_str, m_str = str(month).split("-", 1)
+    y, m = int(y_str), int(m_str)
+    return y, m, calendar.monthrange(y, m)[1]
+
+
+def _keys_with_line(cur, table: str, params: tuple) -> set:
+    out = set()
+    try:
+        cur.execute(
+            f"""
+            SELECT route_params_id, trip_date, time_block, line_no
+            FROM {table}
+            WHERE contract_id=? AND service_type=? AND trip_date BETWEEN ? AND ?
+            """,
+            params,
+        )
+        for rid, d, tb, ln in cur.fetchall() or []:
+            out.add((int(rid or 0), str(d or ""), str(tb or ""), int(ln or 0)))
+    except Exception:
+        # line_no kolonu olmayan eski şema
+        cur.execute(
+            f"""
+            SELECT route_params_id, trip_date, time_block
+            FROM {table}
+            WHERE contract_id=? AND service_type=? AND trip_date BETWEEN ? AND ?
+            """,
+            params,
+        )
+        for rid, d, tb in cur.fetchall() or []:
+            out.add((int(rid or 0), str(d or ""), str(tb or ""), 0))
+    return out
+
+
+def load_existing_keys(db, contract_id: int, month: str, service_type: str) -> ExistingKeys:
+    """Ayın mevcut kayıt anahtarları; adet 0'a çekilen satırların da üzerine yazılması için."""
+    keys = ExistingKeys()
+    y, m, days = _month_days(month)
+    start_date, end_date = f"{y:04d}-{m:02d}-01", f"{y:04d}-{m:02d}-{days:02d}"
+    conn = db.connect()
+    if not conn:
+        return keys
+    try:
+        cur = conn.cursor()
+        params = (int(contract_id), str(service_type), start_date, end_date)
+        keys.entries = _keys_with_line(cur, "trip_entries", params)
+        cur.execute(
+            """
+            SELECT route_params_id, time_block
+            FROM trip_prices
+            WHERE contract_id=? AND month=? AND service_type=?
+            """,
+            (int(contract_id), str(month), str(service_type)),
+        )
+        for rid, tb in cur.fetchall() or []:
+            keys.prices.add((int(rid or 0), str(tb or "")))
+        keys.allocations = _keys_with_line(cur, "trip_allocations", params)
+    except Exception:
+        keys = ExistingKeys()
+    finally:
+        conn.close()
+    return keys
+
+
+def build_write_rows(contract_id: int, month: str, service_type: str, rows, existing: ExistingKeys, now: str | None = None):
+    """PuantajRow listesinden (price_rows, entry_rows, alloc_rows) executemany parametreleri üretir."""
+    now = now or datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    y, m, days = _month_days(month)
+    cid = int(contract_id)
+    st = str(service_type)
+    price_rows, entry_rows, alloc_rows = [], [], []
+
+    for row in rows or []:
+        rid = int(row.route_params_id or 0)
+        if not rid:
+            continue
+        tb = str(row.time_block or "GUN")
+        ln = int(row.line_no or 0)
+        tt = str(row.time_text or "")
+        price = float(row.price or 0.0)
+
+        if price != 0.0 or (rid, tb) in existing.prices:
+            price_rows.append((cid, rid, str(month), st, tb, price, now))
+
+        qtys = list(row.qty or [])
+        for day in range(1, days + 1):
+            try:
+                qty = int(qtys[day - 1] or 0)
+            except Exception:
+                qty = 0
+            trip_date = f"{y:04d}-{m:02d}-{day:02d}"
+            key = (rid, trip_date, tb, ln)
+            if row.planned or qty != 0 or key in existing.entries:
+                entry_rows.append((cid, rid, trip_date, st, tb, ln, qty, tt, now, now))
+            if row.planned or qty != 0 or key in existing.allocations:
+                override = (row.overrides or {}).get(trip_date) or {}
+                vid = override.get("vehicle_id", row.vehicle_id)
+                did = override.get("driver_id", row.driver_id)
+                note = str(override.get("note") or "").strip()
+                alloc_rows.append((cid, rid, trip_date, st, tb, ln, did, vid, float(qty), tt, note, now, now))
+
+    return price_rows, entry_rows, alloc_rows
+
+
+def _active_allocations(alloc_rows):
+    for row in alloc_rows or []:
+        try:
+            _cid, rid, tdate, _st, tb, ln, did, vid, q, tt, _nt, _ca, _ua = row
+            if float(q or 0) <= 0:
+                continue
+        except Exception:
+            continue
+        yield int(rid), str(tdate), str(tb or ""), int(ln or 0), did, vid, str(tt or "")
+
+
+def _has_code(code) -> bool:
+    return code is not None and bool(str(code).strip())
+
+
+def find_local_conflict(alloc_rows) -> str:
+    """Kaydedilecek satırların kendi aralarındaki çakışma: "vehicle_conflict" / "driver_conflict" / ""."""
+    index: dict[tuple[str, str, str], IntervalIndex] = {}
+    for rid, tdate, tb, ln, did, vid, tt in _active_allocations(alloc_rows):
+        blk = parse_time_block(tb, tt)
+        if blk is None:
+            continue
+        for kind, code in (("vehicle", vid), ("driver", did)):
+            if not _has_code(code):
+                continue
+            idx = index.setdefault((kind, tdate, str(code)), IntervalIndex())
+            if idx.overlapping(blk):
+                return f"{kind}_conflict"
+            idx.add(blk, (rid, tb, ln))
+    return ""
+
+
+def find_db_conflict(db, contract_id: int, service_type: str, alloc_rows):
+    """Aynı sözleşme ve hizmet tipindeki diğer DB kayıtlarıyla ilk araç/şoför çakışması; yoksa None.
+
+    Satırın kendi kaydı (güzergah, saat, sıra) hariç tutulur; başka sözleşmeler kontrol edilmez.
+    """
+    for rid, tdate, tb, ln, did, vid, tt in _active_allocations(alloc_rows):
+        if not _has_code(vid) and not _has_code(did):
+            continue
+        conflict = db.find_allocation_conflict(
+            contract_id=int(contract_id),
+            trip_date=tdate,
+            service_type=str(service_type),
+            time_block=tb,
+            time_text=tt,
+            vehicle_id=vid,
+            driver_id=did,
+            exclude_route_params_id=rid,
+            exclude_time_block=tb,
+            exclude_line_no=ln,
+        )
+        if conflict:
+            return conflict
+    return None
+
+
+def vehicle_movement_warnings(db, contract_id: int, alloc_rows, limit: int = VEHICLE_MOVEMENT_LIMIT) -> list:
+    out = []
+    seen = set()
+    for _rid, tdate, _tb, _ln, _did, vid, _tt in _active_allocations(alloc_rows):
+        if not _has_code(vid) or (tdate, str(vid)) in seen:
+            continue
+        seen.add((tdate, str(vid)))
+        try:
+            mv = int(db.get_vehicle_movements_for_day(int(contract_id), tdate, vid) or 0)
+        except Exception:
+            continue
+        if mv > int(limit):
+            out.append((tdate, vid, mv))
+    return out
+
+
+def save_puantaj(db, contract_id: int, month: str, service_type: str, rows, movement_limit: int = VEHICLE_MOVEMENT_LIMIT) -> PuantajSaveResult:
+    """Ayın puantajını tek transaction'da yazar; çakışma varsa hiçbir şey yazılmaz."""
+    res = PuantajSaveResult()
+    existing = load_existing_keys(db, contract_id, month, service_type)
+    price_rows, entry_rows, alloc_rows = build_write_rows(contract_id, month, service_type, rows, existing)
+
+    try:
+        conflict = find_local_conflict(alloc_rows)
+        if not conflict and find_db_conflict(db, contract_id, service_type, alloc_rows):
+            conflict = "db_conflict"
+    except Exception:
+        conflict = ""
+    if conflict:
+        res.error, res.conflict = "conflict", conflict
+        return res
+
+    conn = db.connect()
+    if not conn:
+        res.error = "write"
+        return res
+    try:
+        cur = conn.cursor()
+        cur.execute("BEGIN")
+        if price_rows:
+            cur.executemany(
+                """
+                INSERT INTO trip_prices (
+                    contract_id, route_params_id, month, service_type, time_block, price, updated_at
+                ) VALUES (?,?,?,?,?,?,?)
+                ON CONFLICT(contract_id, route_params_id, month, service_type, time_block)
+                DO UPDATE SET price=excluded.price, updated_at=excluded.updated_at
+                """,
+                price_rows,
+            )
+        if entry_rows:
+            cur.executemany(
+                """
+                INSERT INTO trip_entries (
+                    contract_id, route_params_id, trip_date, service_type, time_block, line_no,
+                    qty, time_text, created_at, updated_at
+                ) VALUES (?,?,?,?,?,?,?,?,?,?)
+                ON CONFLICT(contract_id, route_params_id, trip_date, service_type, time_block, line_no)
+                DO UPDATE SET qty=excluded.qty, time_text=excluded.time_text, updated_at=excluded.updated_at
+                """,
+                entry_rows,
+            )
+        if alloc_rows:
+            cur.executemany(
+                """
+                INSERT INTO trip_allocations (
+                    contract_id, route_params_id, trip_date, service_type, time_block, line_no,
+                    driver_id, vehicle_id, qty, time_text, note, created_at, updated_at,
+                    start_min, end_min, wraps
+                ) VALUES (?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?)
+                ON CONFLICT(contract_id, route_params_id, trip_date, service_type, time_block, line_no)
+                DO UPDATE SET
+                    driver_id=excluded.driver_id,
+                    vehicle_id=excluded.vehicle_id,
+                    qty=excluded.qty,
+                    time_text=excluded.time_text,
+                    note=excluded.note,
+                    updated_at=excluded.updated_at,
+                    start_min=excluded.start_min,
+                    end_min=excluded.end_min,
+                    wraps=excluded.wraps
+                """,
+                [(*row, *db.time_block_columns(str(row[4] or ""), str(row[9] or ""))) for row in alloc_rows],
+            )
+        conn.commit()
+    except Exception as e:
+        try:
+            conn.rollback()
+        except Exception:
+            pass
+        print(f"Puantaj kayıt hatası: {e}")
+        res.error = "write"
+        return res
+    finally:
+        conn.close()
+
+    invalidate_puantaj_snapshots(int(contract_id), str(month))
+    res.ok = True
+    res.prices, res.entries, res.allocations = len(price_rows), len(entry_rows), len(alloc_rows)
+    res.movement_warnings = vehicle_movement_warnings(db, contract_id, alloc_rows, movement_limit)
+    return res
@@ -0,0 +1,79 @@
+"""Aylık trip_plan kaydı (güzergah + saat dilimi -> araç / şoför)."""
+
+from datetime import datetime
+
+from app.core.puantaj_snapshot import invalidate_puantaj_snapshots
+from app.core.time_blocks import tb_sort_key
+
+
+def save_plan_rows(db, contract_id: int, month: str, service_type: str, rows) -> int:
+    """rows: [(route_params_id, time_block, vehicle_id, driver_id), ...] tek transaction'da yazılır.
+
+    Mevcut satırların notu korunur. Yazılan satır sayısı döner; hata durumunda -1.
+    """
+    now = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    params = [
+        (int(contract_id), int(rid), str(month), str(service_type), str(tb), vid, did, now, now)
+        for rid, tb, vid, did in (rows or [])
+        if rid and str(tb or "").strip()
+    ]
+    if not params:
+        return 0
+    conn = db.connect()
+    if not conn:
+        return -1
+    try:
+        cur = conn.cursor()
+        cur.executemany(
+            """
+            INSERT INTO trip_plan (
+                contract_id, route_params_id, month, service_type, time_block,
+                vehicle_id, driver_id, note, created_at, updated_at
+            ) VALUES (?, ?, ?, ?, ?, ?, ?, NULL, ?, ?)
+            ON CONFLICT(contract_id, route_params_id, month, service_type, time_block)
+            DO UPDATE SET vehicle_id=excluded.vehicle_id, driver_id=excluded.driver_id, updated_at=excluded.updated_at
+            """,
+            params,
+        )
+        conn.commit()
+    except Exception as e:
+        try:
+            conn.rollback()
+        except Exception:
+            pass
+        print(f"Plan kayıt hatası: {e}")
+        return -1
+    finally:
+        conn.close()
+    invalidate_puantaj_snapshots(int(contract_id), str(month))
+    return len(params)
+
+
+def plan_time_blocks(db, contract_id: int, month: str, service_type: str) -> list[str]:
+    """Bağlamın (sözleşme + ay + hizmet tipi) planındaki saat dilimleri, gün sırasıyla."""
+    conn = db.connect()
+    if not conn:
+        return []
+    try:
+        cur = conn.cursor()
+        cur.execute(
+            """
+            SELECT DISTINCT time_block
+            FROM trip_plan
+            WHERE contract_id=? AND month=? AND service_type=? AND COALESCE(time_block,'') <> ''
+            """,
+            (int(contract_id), str(month), str(service_type)),
+        )
+        return sorted((str(r[0]) for r in cur.fetchall() or []), key=tb_sort_key)
+    except Exception:
+        return []
+    finally:
+        conn.close()
+
+
+def fill_route_plan(db, contract_id: int, month: str, service_type: str, route_params_id: int, vehicle_id, driver_id) -> int:
+    """Güzergahı bağlamdaki tüm saat dilimlerinde aynı araç/şoförle doldurur."""
+    blocks = plan_time_blocks(db, contract_id, month, service_type)
+    return save_plan_rows(
+        db, contract_id, month, service_type, [(int(route_params_id), tb, vehicle_id, driver_id) for tb in blocks]
+    )
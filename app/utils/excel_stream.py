@@ -0,0 +1,218 @@
+"""Akışlı (write_only) Excel yazıcı.
+
+Satırlar herhangi bir iterable'dan (sqlite3 cursor, tablo anlık görüntüsü, generator) tek tek
+okunup doğrudan dosyaya yazılır; bellekte hücre nesnesi biriktirilmez. Stiller çalışma kitabına
+bir kez NamedStyle olarak eklenir ve tüm hücreler bunları paylaşır.
+
+Hücre tipi değerin kendi tipinden gelir (int / float / date -> sayı / tarih hücresi). Metin
+değerler yalnızca çağıran sütun için tip bildirdiyse (column_types) dönüştürülür; ekran metni
+tahmin edilmez ("7.30", "5321234567" gibi değerler metin kalır).
+
+Qt'ye bağlı değildir; arka plan thread'inde çalıştırılabilir (bkz. excel_utils.start_excel_export).
+"""
+
+import os
+import re
+from datetime import date, datetime
+
+import openpyxl
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.drawing.image import Image as XLImage
+from openpyxl.styles import Alignment, Border, Font, NamedStyle, PatternFill, Side
+from openpyxl.utils import get_column_letter
+from openpyxl.worksheet.page import PageMargins
+from openpyxl.worksheet.worksheet import Worksheet
+
+from app.styles import COLORS, COMPANY_NAME, PATHS
+
+HEADER_ROW = 5
+PROGRESS_EVERY = 500
+
+# Sütun tipleri (column_types): "text", "int", "num" (Türkçe biçim: 1.234,56), "date" (31.01.2026 / 2026-01-31)
+COLUMN_TYPES = ("text", "int", "num", "date")
+
+_TR_NUM_RE = re.compile(r"^-?(?:\d{1,3}(?:\.\d{3})+|\d+)(?:,\d+)?$")
+_TR_DATE_RE = re.compile(r"^(\d{2})\.(\d{2})\.(\d{4})$")
+_ISO_DATE_RE = re.compile(r"^(\d{4})-(\d{2})-(\d{2})$")
+_CURRENCY_SUFFIXES = ("₺", "TL")
+
+
+class ExcelExportCancelled(Exception):
+    pass
+
+
+def typed_value(value, kind: str | None = None):
+    """(değer, stil_adı). Sayı / tarih tipi değerin kendisinden ya da sütunun bildirilen tipinden gelir.
+
+    kind "int" / "num" için metin Türkçe sayı biçiminde ("1.234,56", sonda ₺ / TL olabilir),
+    "date" için gg.aa.yyyy ya da yyyy-aa-gg olmalıdır; uymayan değer metin olarak yazılır.
+    """
+    if value is None:
+        return None, "sattup_text"
+    if isinstance(value, bool):
+        return int(value), "sattup_int"
+    if isinstance(value, int):
+        return value, "sattup_int"
+    if isinstance(value, float):
+        return value, "sattup_num"
+    if isinstance(value, (datetime, date)):
+        return value, "sattup_date"
+
+    text = str(value).strip()
+    if not text or kind in (None, "text"):
+        return text, "sattup_text"
+
+    if kind in ("int", "num"):
+        num = text
+        for suffix in _CURRENCY_SUFFIXES:
+            if num.endswith(suffix):
+                num = num[: -len(suffix)].strip()
+                break
+        if _TR_NUM_RE.match(num):
+            parsed = float(num.replace(".", "").replace(",", "."))
+            if kind == "int" and parsed.is_integer():
+                return int(parsed), "sattup_int"
+            return parsed, "sattup_num"
+    elif kind == "date":
+        m = _TR_DATE_RE.match(text)
+        parts = (m.group(3), m.group(2), m.group(1)) if m else None
+        if parts is None:
+            m = _ISO_DATE_RE.match(text)
+            parts = m.groups() if m else None
+        if parts is not None:
+            try:
+                return date(int(parts[0]), int(parts[1]), int(parts[2])), "sattup_date"
+            except ValueError:
+                pass
+    return text, "sattup_text"
+
+
+def _add_styles(wb) -> None:
+    side = Side(style="thin", color=COLORS["border"])
+    border = Border(left=side, right=side, top=side, bottom=side)
+    center = Alignment(horizontal="center", vertical="center")
+    styles = [
+        NamedStyle(
+            name="sattup_header",
+            font=Font(bold=True, color=COLORS["header_text"]),
+            fill=PatternFill(start_color=COLORS["header_fill"], end_color=COLORS["header_fill"], fill_type="solid"),
+            border=border,
+            alignment=center,
+        ),
+        NamedStyle(name="sattup_title", font=Font(bold=True, size=14), alignment=center),
+        NamedStyle(name="sattup_text", border=border, alignment=center),
+        NamedStyle(name="sattup_text_left", border=border, alignment=Alignment(horizontal="left", vertical="center")),
+        NamedStyle(name="sattup_int", border=border, alignment=center, number_format="0"),
+        NamedStyle(name="sattup_num", border=border, alignment=Alignment(horizontal="right", vertical="center"), number_format="#,##0.00"),
+        NamedStyle(name="sattup_date", border=border, alignment=center, number_format="DD.MM.YYYY"),
+    ]
+    for st in styles:
+        wb.add_named_style(st)
+
+
+def _style_arrays(ws) -> dict:
+    # Stil adı -> hazır StyleArray. write_only hücreler yazılır yazılmaz atıldığı için aynı dizi
+    # tüm hücrelerde paylaşılabilir; her hücrede isimli stil çözümlemesi yapılmaz.
+    out = {}
+    for name in ws.parent.named_styles:
+        if str(name).startswith("sattup_"):
+            proto = WriteOnlyCell(ws)
+            proto.style = name
+            out[name] = proto._style
+    return out
+
+
+def write_excel(
+    file_name: str,
+    headers,
+    rows,
+    report_title: str = "Rapor",
+    total_rows: int | None = None,
+    widths: dict | None = None,
+    left_columns=(),
+    progress=None,
+    is_cancelled=None,
+    column_types=None,
+) -> int:
+    """rows'u file_name'e yazar; yazılan satır sayısını döner.
+
+    widths: {1-tabanlı sütun: genişlik}; left_columns: sola yaslı metin sütunları (0-tabanlı).
+    column_types: sütun sırasıyla COLUMN_TYPES değerleri (0-tabanlı; eksik / None sütun metindir).
+    progress(yazılan, toplam) PROGRESS_EVERY satırda bir çağrılır; is_cancelled() True dönerse
+    dosya kaydedilmez ve ExcelExportCancelled fırlatılır.
+    """
+    headers = [str(h or "") for h in headers]
+    col_count = max(1, len(headers))
+    last_col = get_column_letter(col_count)
+    left_columns = set(left_columns or ())
+    widths = widths or {}
+    kinds = list(column_types or ())
+
+    wb = openpyxl.Workbook(write_only=True)
+    _add_styles(wb)
+    ws = wb.create_sheet("Rapor")
+
+    # Sayfa düzeni: yatay A4, genişlik tek sayfaya sığar (satır yazılmadan önce ayarlanmalı)
+    ws.page_setup.orientation = Worksheet.ORIENTATION_LANDSCAPE
+    ws.page_setup.paperSize = Worksheet.PAPERSIZE_A4
+    ws.sheet_properties.pageSetUpPr.fitToPage = True
+    ws.page_setup.fitToWidth = 1
+    ws.page_setup.fitToHeight = False
+    ws.print_options.horizontalCentered = True
+    ws.page_margins = PageMargins(left=0.4, right=0.4, top=0.5, bottom=0.5, header=0.3, footer=0.3)
+    for col_idx in range(1, col_count + 1):
+        ws.column_dimensions[get_column_letter(col_idx)].width = widths.get(col_idx, 15)
+    ws.freeze_panes = f"A{HEADER_ROW + 1}"
+
+    if os.path.exists(PATHS["logo"]):
+        try:
+            img = XLImage(PATHS["logo"])
+            img.width = 120
+            img.height = 50
+            ws.add_image(img, "A1")
+        except Exception:
+            pass
+
+    ws.append([])
+    title = WriteOnlyCell(ws, value=f"{COMPANY_NAME} - {report_title}")
+    title.style = "sattup_title"
+    ws.append([title])
+    ws.merged_cells.add(f"A2:{last_col}2")
+    ws.append([])
+    ws.append([])
+
+    header_cells = []
+    for h in headers:
+        cell = WriteOnlyCell(ws, value=h)
+        cell.style = "sattup_header"
+        header_cells.append(cell)
+    ws.append(header_cells)
+
+    written = 0
+    total = int(total_rows or 0)
+    style_arrays = _style_arrays(ws)
+    for row in rows:
+        out = []
+        for c, raw in enumerate(row):
+            value, style = typed_value(raw, kinds[c] if c < len(kinds) else None)
+            if style == "sattup_text" and c in left_columns:
+                style = "sattup_text_left"
+            cell = WriteOnlyCell(ws, value=value)
+            cell._style = style_arrays[style]
+            out.append(cell)
+        ws.append(out)
+        written += 1
+        if written % PROGRESS_EVERY == 0:
+            if is_cancelled is not None and is_cancelled():
+                raise ExcelExportCancelled()
+            if progress is not None:
+                progress(written, max(total, written))
+
+    ws.print_area = f"A1:{last_col}{HEADER_ROW + written}"
+    ws.print_title_rows = f"{HEADER_ROW}:{HEADER_ROW}"
+    if is_cancelled is not None and is_cancelled():
+        raise ExcelExportCancelled()
+    wb.save(file_name)
+    if progress is not None:
+        progress(written, max(total, written))
+    return written
@@ -0,0 +1,101 @@
+import os
+import threading
+from PyQt6.QtCore import QObject, QRunnable, QThreadPool, Qt, pyqtSignal
+from PyQt6.QtWidgets import QMessageBox, QProgressDialog
+
+# Çalışan dışa aktarımlar (QRunnable'lar bitene kadar referans tutulur)
+_RUNNING: set = set()
+
+
+class _ExportSignals(QObject):
+    progress = pyqtSignal(int, int)
+    # yazılan satır, hata
+    finished = pyqtSignal(object, object)
+
+
+class _ExportTask(QRunnable):
+    def __init__(self, fn):
+        super().__init__()
+        self.fn = fn
+        self.cancel_event = threading.Event()
+        self.signals = _ExportSignals()
+        self.setAutoDelete(False)
+
+    def run(self):
+        try:
+            written = self.fn(self.signals.progress.emit, self.cancel_event.is_set)
+        except Exception as e:
+            self.signals.finished.emit(None, e)
+            return
+        self.signals.finished.emit(written, None)
+
+
+def table_snapshot(table_widget):
+    """QTableWidget başlık ve hücre değerleri (GUI thread'inde alınır; yazma işi thread'de yapılır).
+
+    Hücreye setData ile sayı konmuşsa sayı olarak, değilse metin olarak alınır.
+    """
+    col_count = table_widget.columnCount()
+    headers = []
+    for c in range(col_count):
+        h = table_widget.horizontalHeaderItem(c)
+        headers.append(h.text() if h else "")
+    rows = []
+    for r in range(table_widget.rowCount()):
+        row = []
+        for c in range(col_count):
+            item = table_widget.item(r, c)
+            if item is None:
+                row.append("")
+                continue
+            val = item.data(Qt.ItemDataRole.EditRole)
+            row.append(val if isinstance(val, (int, float)) and not isinstance(val, bool) else item.text())
+        rows.append(tuple(row))
+    return headers, rows
+
+
+def start_export(parent, file_name, run, kind="Excel", total_rows=None, on_done=None, open_file=True):
+    """run(progress, is_cancelled) -> yazılan satır; arka planda çalışır, ilerleme penceresi gösterir.
+
+    run worker thread'inde çağrılır; widget'lara dokunmamalı. is_cancelled() True olunca bir
+    istisnayla çıkabilir; iptal edilen işin sonucu / hatası gösterilmez.
+    """
+    total = int(total_rows or 0)
+    dlg = QProgressDialog(f"{kind} dosyası hazırlanıyor...", "İptal", 0, max(total, 0), parent)
+    dlg.setWindowTitle(kind)
+    dlg.setWindowModality(Qt.WindowModality.WindowModal)
+    dlg.setMinimumDuration(400)
+    dlg.setAutoClose(False)
+    dlg.setAutoReset(False)
+    dlg.setValue(0)
+
+    task = _ExportTask(run)
+
+    def _on_progress(done, count):
+        if count > dlg.maximum():
+            dlg.setMaximum(count)
+        dlg.setValue(done)
+
+    def _on_finished(written, error):
+        _RUNNING.discard(task)
+        dlg.close()
+        if task.cancel_event.is_set():
+            return
+        if error is not None:
+            QMessageBox.critical(parent, "Hata", f"{kind} hatası:\n{error}")
+            return
+        if on_done is not None:
+            on_done(written)
+        QMessageBox.information(parent, "Başarılı", f"{kind} dosyası oluşturuldu:\n{file_name}")
+        if open_file:
+            try:
+                os.startfile(file_name)
+            except Exception:
+                pass
+
+    task.signals.progress.connect(_on_progress)
+    task.signals.finished.connect(_on_finished)
+    dlg.canceled.connect(task.cancel_event.set)
+    _RUNNING.add(task)
+    QThreadPool.globalInstance().start(task)
+    return task
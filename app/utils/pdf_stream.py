@@ -0,0 +1,278 @@
+"""Tablo raporları için PDF yazıcı (fpdf 1.7).
+
+Her dışa aktarımda DejaVu TTF'lerini add_font(uni=True) ile yeniden yüklemek ve logoları
+(alfa kanallı PNG, saf Python'la ayrıştırılıyor) her belgede yeniden okumak yerine:
+- font metrikleri assets/fonts altındaki .pkl önbelleklerinden süreç başına bir kez okunur,
+- filigran bir kez üretilir ve logo / filigran görüntü bilgisi süreç boyunca paylaşılır.
+Satırlar herhangi bir iterable'dan okunur; Qt'ye bağlı değildir, arka plan thread'inde çalışabilir
+(bkz. pdf_utils.start_pdf_export).
+"""
+
+import os
+import pickle
+import threading
+from datetime import datetime
+
+from fpdf import FPDF
+from PIL import Image
+
+from app.styles import COMPANY_NAME, FONTS, PATHS
+from config import CACHE_DIR
+
+FONT_FAMILY = "DejaVu"
+PAGE_BREAK_Y = 175
+PROGRESS_EVERY = 200
+DEFAULT_COL_WIDTH = 30
+
+_FONT_FILES = {"": FONTS["main"], "B": FONTS["bold"], "I": FONTS["italic"]}
+_LOCK = threading.Lock()
+# stil -> font sözlüğü (.pkl içeriği, yerel TTF yoluyla)
+_FONT_METRICS: dict | None = None
+# görüntü yolu -> fpdf'in ayrıştırdığı görüntü bilgisi
+_IMAGE_INFO: dict[str, dict] = {}
+_WATERMARK_PATH: str | None = None
+
+
+class PdfExportCancelled(Exception):
+    pass
+
+
+def _read_font(style: str, ttf: str) -> dict | None:
+    pkl = os.path.splitext(ttf)[0] + ".pkl"
+    font = None
+    try:
+        with open(pkl, "rb") as fh:
+            font = dict(pickle.load(fh))
+    except Exception:
+        font = None
+    if font is None:
+        # .pkl yoksa metrikleri fpdf çıkarır (ve yazılabiliyorsa .pkl olarak kaydeder).
+        scratch = FPDF()
+        scratch.add_font(FONT_FAMILY, style, ttf, uni=True)
+        font = dict(scratch.fonts[FONT_FAMILY.lower() + style])
+        font["originalsize"] = os.path.getsize(ttf)
+    # .pkl içindeki ttffile yolu üretildiği makineye ait; gömme sırasında yerel dosya okunmalı.
+    font["ttffile"] = ttf
+    font["unifilename"] = pkl if os.path.exists(pkl) else None
+    return font
+
+
+def font_metrics() -> dict:
+    """Stil ("", "B", "I") -> font sözlüğü; DejaVu yoksa boş."""
+    global _FONT_METRICS
+    with _LOCK:
+        if _FONT_METRICS is None:
+            out = {}
+            for style, name in _FONT_FILES.items():
+                ttf = os.path.join(PATHS["fonts"], name)
+                if not os.path.exists(ttf):
+                    continue
+                try:
+                    out[style] = _read_font(style, ttf)
+                except Exception as e:
+                    print(f"PDF font yükleme hatası ({name}): {e}")
+            _FONT_METRICS = out
+        return _FONT_METRICS
+
+
+def register_fonts(pdf: FPDF) -> str:
+    """Önbellekteki DejaVu fontlarını belgeye ekler; kullanılacak font ailesini döner.
+
+    fpdf 1.7 add_font(uni=True) ile aynı kayıtları üretir, yalnızca diskten okumaz.
+    Alt küme (subset) belgeye özeldir; diğer alanlar paylaşılır.
+    """
+    metrics = font_metrics()
+    if "" not in metrics:
+        return "Arial"
+    for style in ("", "B", "I"):
+        font = metrics.get(style) or metrics[""]
+        fontkey = FONT_FAMILY.lower() + style
+        if fontkey in pdf.fonts:
+            continue
+        pdf.fonts[fontkey] = {
+            "i": len(pdf.fonts) + 1,
+            "type": font["type"],
+            "name": font["name"],
+            "desc": font["desc"],
+            "up": font["up"],
+            "ut": font["ut"],
+            "cw": font["cw"],
+            "ttffile": font["ttffile"],
+            "fontkey": fontkey,
+            "subset": list(range(0, 57)) if hasattr(pdf, "str_alias_nb_pages") else list(range(0, 32)),
+            "unifilename": font["unifilename"],
+        }
+        pdf.font_files[fontkey] = {"length1": font["originalsize"], "type": "TTF", "ttffile": font["ttffile"]}
+        pdf.font_files[font["ttffile"]] = {"type": "TTF"}
+    return FONT_FAMILY
+
+
+def watermark_path() -> str | None:
+    """Soluk logo; assets'te yoksa CACHE_DIR'e bir kez üretilir."""
+    global _WATERMARK_PATH
+    with _LOCK:
+        if _WATERMARK_PATH is not None:
+            return _WATERMARK_PATH or None
+        path = ""
+        if os.path.exists(PATHS["logo_faded"]):
+            path = PATHS["logo_faded"]
+        elif os.path.exists(PATHS["logo"]):
+            try:
+                os.makedirs(CACHE_DIR, exist_ok=True)
+                target = os.path.join(CACHE_DIR, "logo_faded.png")
+                if not os.path.exists(target):
+                    with Image.open(PATHS["logo"]).convert("RGBA") as im:
+                        alpha = im.split()[3]
+                        # Opaklık %12 (yazılar net okunsun diye)
+                        alpha = alpha.point(lambda p: p * 0.12)
+                        im.putalpha(alpha)
+                        im.save(target)
+                path = target
+            except Exception as e:
+                print(f"Filigran oluşturulamadı: {e}")
+        _WATERMARK_PATH = path
+        return path or None
+
+
+class ReportPDF(FPDF):
+    """
+    - Header: Logo ve Başlık (En altta)
+    - Footer: Filigran + Alt Bilgi (En üstte, tablonun üzerine basar)
+    """
+    def __init__(self, orientation='L', unit='mm', format='A4', username="Admin", report_title="Rapor"):
+        super().__init__(orientation, unit, format)
+        self.username = username
+        self.report_title = report_title
+        self.active_font = "Arial"
+        self.printed_at = datetime.now().strftime("%d.%m.%Y %H:%M")
+        self.watermark = watermark_path()
+
+    def set_font_family(self, font_name):
+        self.active_font = font_name
+
+    def image(self, name, x=None, y=None, w=0, h=0, type='', link=''):
+        # Aynı görüntü her belgede yeniden ayrıştırılmasın: bilgi süreç boyunca paylaşılır.
+        if name not in self.images:
+            info = _IMAGE_INFO.get(name)
+            if info is not None:
+                info = dict(info)
+                info["i"] = len(self.images) + 1
+                self.images[name] = info
+        result = super().image(name, x, y, w, h, type, link)
+        if name not in _IMAGE_INFO and name in self.images:
+            _IMAGE_INFO[name] = dict(self.images[name])
+        return result
+
+    def header(self):
+        # --- 1. Sol Üst Logo ---
+        if os.path.exists(PATHS["logo"]):
+            self.image(PATHS["logo"], x=10, y=8, w=40)
+
+        # --- 2. Rapor Başlığı ---
+        self.set_xy(55, 15)
+        self.set_font(self.active_font, "B", 14)
+        self.cell(0, 10, f"{COMPANY_NAME} — {self.report_title}", align="C", ln=1)
+        self.ln(10)
+
+    def footer(self):
+        # --- 1. Filigran: footer sayfa içeriğinden sonra çizildiği için tablonun üzerine basılır ---
+        if self.watermark:
+            try:
+                img_w, img_h = 150, 60
+                self.image(self.watermark, x=self.w / 2 - img_w / 2, y=self.h / 2 - img_h / 2, w=img_w)
+            except Exception:
+                pass
+
+        # --- 2. Standart Footer Çizgi ve Yazıları ---
+        self.set_y(-15)
+        self.set_draw_color(0, 0, 0)
+        self.set_line_width(0.4)
+        self.line(10, self.get_y(), self.w - 10, self.get_y())
+
+        self.set_font(self.active_font, "I", 7)
+        self.set_text_color(0, 0, 0)
+
+        # Sol: Şirket Adı
+        self.set_xy(10, self.get_y() + 2)
+        self.cell(0, 8, COMPANY_NAME, align="L")
+
+        # Sağ: Bilgiler
+        footer_text = f"Raporlayan: {self.username} — {self.printed_at} — Sayfa {self.page_no()}/{{nb}}"
+        self.set_xy(0, self.get_y())
+        self.cell(0, 8, footer_text, align="R")
+
+
+def write_pdf(
+    file_name: str,
+    headers,
+    rows,
+    report_title: str = "Rapor",
+    username: str = "Admin",
+    col_widths=None,
+    left_columns=(3, 6),
+    total_rows: int | None = None,
+    progress=None,
+    is_cancelled=None,
+) -> int:
+    """rows'u yatay A4 tablo olarak file_name'e yazar; yazılan satır sayısını döner.
+
+    progress(yazılan, toplam) PROGRESS_EVERY satırda bir çağrılır; is_cancelled() True dönerse
+    dosya yazılmaz ve PdfExportCancelled fırlatılır.
+    """
+    headers = [str(h or "") for h in headers]
+    col_widths = list(col_widths or [])
+    widths = [col_widths[i] if i < len(col_widths) else DEFAULT_COL_WIDTH for i in range(len(headers))]
+    aligns = ["L" if i in set(left_columns or ()) else "C" for i in range(len(headers))]
+
+    pdf = ReportPDF(orientation="L", unit="mm", format="A4", username=username, report_title=report_title)
+    pdf.alias_nb_pages()
+    font = register_fonts(pdf)
+    pdf.set_font_family(font)
+    pdf.add_page()
+
+    def print_table_header():
+        pdf.set_font(font, "B", 9)
+        pdf.set_fill_color(60, 60, 60)
+        pdf.set_text_color(255, 255, 255)
+        for w, h in zip(widths, headers):
+            pdf.cell(w, 8, h, border=1, align="C", fill=True)
+        pdf.ln()
+        pdf.set_font(font, "", 8)
+        pdf.set_text_color(0, 0, 0)
+
+    print_table_header()
+
+    written = 0
+    total = int(total_rows or 0)
+    fill = False
+    row_height = 7
+    for row in rows:
+        if pdf.get_y() > PAGE_BREAK_Y:
+            pdf.add_page()
+            print_table_header()
+
+        # Zebra; filigran footer'da üstte olduğu için gri satırın üstüne basılır.
+        if fill:
+            pdf.set_fill_color(245, 245, 245)
+        else:
+            pdf.set_fill_color(255, 255, 255)
+        values = list(row)
+        for c, w in enumerate(widths):
+            v = values[c] if c < len(values) else ""
+            pdf.cell(w, row_height, "" if v is None else str(v), border=1, align=aligns[c], fill=True)
+        pdf.ln()
+        fill = not fill
+
+        written += 1
+        if written % PROGRESS_EVERY == 0:
+            if is_cancelled is not None and is_cancelled():
+                raise PdfExportCancelled()
+            if progress is not None:
+                progress(written, max(total, written))
+
+    if is_cancelled is not None and is_cancelled():
+        raise PdfExportCancelled()
+    pdf.output(file_name)
+    if progress is not None:
+        progress(written, max(total, written))
+    return written
@@ -0,0 +1,64 @@
+"""Fotoğraf önizlemeleri için disk + bellek küçük resim önbelleği.
+
+Personel / araç ekranlarında satır seçildikçe tam boy fotoğraf GUI thread'inde çözülmez:
+- bellek: (mutlak yol, mtime, boyut) -> QPixmap, LRU ile sınırlı, tüm ekranlarca paylaşılır,
+- disk: doc_store.thumbnail_for (CACHE_DIR/thumbs), arka plan thread'inde üretilir.
+Önbellekte yoksa iş ekranın AsyncLoader'ına verilir; hızlı gezinmede yalnızca son seçimin
+sonucu gösterilir.
+"""
+
+import os
+
+from PyQt6.QtGui import QPixmap
+
+from app.core import doc_store
+from app.core.async_loader import AsyncLoader
+from app.core.cache import LRUCache
+
+PREVIEW_SIZE = 256
+
+_PIXMAPS = LRUCache(maxsize=200)
+
+
+def cache_key(path: str, size: int = PREVIEW_SIZE):
+    try:
+        abs_path = os.path.abspath(path)
+        st = os.stat(abs_path)
+    except (OSError, TypeError, ValueError):
+        return None
+    return abs_path, int(st.st_mtime_ns), int(size)
+
+
+def request_thumbnail(loader: AsyncLoader, path: str, on_ready, size: int = PREVIEW_SIZE) -> None:
+    """on_ready(QPixmap | None) çağrılır: bellekte varsa hemen, yoksa arka planda üretildikten sonra."""
+    key = cache_key(path, size) if path else None
+    if key is None:
+        loader.cancel()
+        on_ready(None)
+        return
+    pix = _PIXMAPS.get(key)
+    if pix is not None:
+        # Bekleyen eski yükleme bu seçimi ezmesin
+        loader.cancel()
+        on_ready(pix)
+        return
+
+    abs_path = key[0]
+
+    def _done(thumb_path):
+        pix = QPixmap(thumb_path) if thumb_path else QPixmap()
+        if pix.isNull():
+            on_ready(None)
+            return
+        _PIXMAPS.put(key, pix)
+        on_ready(pix)
+
+    loader.request(
+        lambda: doc_store.thumbnail_for(abs_path, size=size),
+        _done,
+        lambda _e: on_ready(None),
+    )
+
+
+def clear() -> None:
+    _PIXMAPS.clear()
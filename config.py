@@ -1,11 +1,17 @@
+import json
 import os
 import sys
 import shutil
+import time
+from datetime import datetime
 
 # 1. Bytecode (.pycache) oluşumunu geliştirme aşamasında engelle
 sys.dont_write_bytecode = True
 
 # 2. Ana Dizin Tanımlama (C:\ASIL)
+# Uygulama sürümü (installer/SATTUP.iss MyAppVersion ile aynı tutulur; açılış günlüğüne yazılır)
+APP_VERSION = (os.environ.get("SATTUP_VERSION") or "").strip() or "1.0.0"
+
 try:
     _FROZEN = bool(getattr(sys, "frozen", False))
 except Exception:
@@ -58,32 +64,151 @@ APP_DIR = os.path.join(BASE_DIR, "app")
 UI_DIR = os.path.join(BASE_DIR, "ui")
 ASSETS_DIR = os.path.join(BASE_DIR, "assets")
 
-# DB her zaman yazılabilir bir yerde olsun
-if _FROZEN:
-    _portable_db_dir = os.path.join(_EXE_DIR, "database")
-    _appdata_db_dir = os.path.join(_local_appdata_dir(), "SATTUP", "database")
-    DATABASE_DIR = _portable_db_dir if _is_dir_writable(_portable_db_dir) else _appdata_db_dir
-else:
-    DATABASE_DIR = os.path.join(BASE_DIR, "database")
+# 4. Veri Dizini ve Kritik Dosya Yolları
+# DB her zaman yazılabilir bir yerde olsun. Paketlenmiş uygulamada bunun için EXE'nin yanındaki
+# klasöre deneme dosyası yazılır (ağ sürücüsünde yavaş); sonuç yerel ayar dosyasında saklanır ve
+# sonraki açılışlarda yalnızca klasör / DB varlığı kontrol edilir. Yollar ilk erişimde çözülür
+# (config.DB_PATH, from config import DB_PATH); config'i import etmek diske dokunmaz.
+_SETTINGS_FILE = os.path.join(_local_appdata_dir(), "SATTUP", "paths.json")
+_SETTINGS_FORMAT = 1
+# ad -> (ezen ortam değişkeni, taban, göreli yol). Taban "data": DATABASE_DIR; "log": günlük klasörü
+# (SATTUP_LOG_DIR, yoksa DB dosyasının yanındaki logs: SATTUP_DB_PATH ile başka bir DB açılınca
+# günlükler de onun yanına yazılır, kurulumun database/logs klasörüne değil).
+_DATA_PATHS = {
+    "DB_PATH": ("SATTUP_DB_PATH", "data", "asil_system.db"),
+    # Durak-durak mesafe matrisi (çevrimdışı hesaplanıp dosya olarak bırakılır)
+    "STOP_DISTANCES_PATH": ("SATTUP_STOP_DISTANCES", "data", "stop_distances.csv"),
+    # Tanılama / performans günlükleri (SATTUP_PROFILE=1 ile açılır)
+    "LOG_DIR": ("SATTUP_LOG_DIR", "log", ""),
+    "PROFILE_LOG_PATH": (None, "log", "profile.log"),
+    # Eşiği aşan SQLite ifadeleri (SATTUP_SLOW_QUERY_MS=<ms>); özet için db_slow_queries.py
+    "SLOW_QUERY_LOG_PATH": (None, "log", "slow_queries.log"),
+    # Açılış zaman çizelgesi (her açılışta bir JSON satırı); özet için startup_report.py
+    "STARTUP_LOG_PATH": ("SATTUP_STARTUP_LOG", "log", "startup.log"),
+    # Üretilen ara dosyalar (filigran, küçük resimler vb.); silinirse yeniden oluşturulur
+    "CACHE_DIR": (None, "data", "cache"),
+    # İçerik adresli belge deposu (hakediş belgeleri, personel fotoğrafları, sürücü belge görüntüleri)
+    "DOC_STORE_DIR": (None, "data", "store"),
+}
 
-# 4. Kritik Dosya Yolları
-_ENV_DB_PATH = (os.environ.get("SATTUP_DB_PATH") or "").strip()
-DB_PATH = _ENV_DB_PATH if _ENV_DB_PATH else os.path.join(DATABASE_DIR, "asil_system.db")
 
-if not _ENV_DB_PATH:
+def _read_settings_file() -> dict:
     try:
-        os.makedirs(DATABASE_DIR, exist_ok=True)
+        with open(_SETTINGS_FILE, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        return data if isinstance(data, dict) and data.get("format") == _SETTINGS_FORMAT else {}
     except Exception:
-        pass
+        return {}
+
+
+def _write_settings_file(data: dict) -> None:
+    try:
+        os.makedirs(os.path.dirname(_SETTINGS_FILE), exist_ok=True)
+        tmp = f"{_SETTINGS_FILE}.{os.getpid()}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False, indent=1)
+        os.replace(tmp, _SETTINGS_FILE)
+    except Exception as e:
+        print(f"Ayar dosyası yazılamadı: {e}")
+
+
+class _Settings:
+    """DATABASE_DIR ve ondan türeyen yolların tek seferlik, önbellekli çözümü.
+
+    source: "source" (kaynaktan çalışma, deneme yok), "cache" (ayar dosyası doğrulandı),
+    "probe" (yazılabilirlik denendi, ayar dosyası güncellendi). resolve_ms çözüm süresidir.
+    """
+
+    def __init__(self):
+        self._paths: dict[str, str] | None = None
+        self.source = ""
+        self.resolve_ms = 0.0
+
+    @property
+    def paths(self) -> dict[str, str]:
+        if self._paths is None:
+            started = time.perf_counter()
+            self._paths = self._resolve()
+            self.resolve_ms = (time.perf_counter() - started) * 1000.0
+        return self._paths
 
-    if _FROZEN:
+    def timing(self) -> dict:
+        self.paths
+        return {"source": self.source, "ms": round(self.resolve_ms, 1)}
+
+    def _resolve(self) -> dict[str, str]:
+        env_db = (os.environ.get("SATTUP_DB_PATH") or "").strip()
+        if _FROZEN:
+            database_dir = self._frozen_database_dir(check_db=not env_db)
+        else:
+            self.source = "source"
+            database_dir = os.path.join(BASE_DIR, "database")
+            if not env_db and not os.path.isdir(database_dir):
+                try:
+                    os.makedirs(database_dir, exist_ok=True)
+                except Exception:
+                    pass
+
+        log_dir = (os.environ.get("SATTUP_LOG_DIR") or "").strip() or os.path.join(
+            os.path.dirname(os.path.abspath(env_db)) if env_db else database_dir, "logs"
+        )
+        bases = {"data": database_dir, "log": log_dir}
+        paths = {"DATABASE_DIR": database_dir}
+        for name, (env_name, base, rel) in _DATA_PATHS.items():
+            env_value = (os.environ.get(env_name) or "").strip() if env_name else ""
+            paths[name] = env_value or (os.path.join(bases[base], rel) if rel else bases[base])
+        return paths
+
+    def _frozen_database_dir(self, check_db: bool) -> str:
+        # Ayar dosyası kurulum klasörüne göre tutulur (aynı makinede birden çok kurulum olabilir)
+        key = os.path.normcase(os.path.abspath(_EXE_DIR))
+        data = _read_settings_file()
+        entry = (data.get("installs") or {}).get(key) or {}
+        cached = entry.get("database_dir") or ""
+        refresh = (os.environ.get("SATTUP_SETTINGS_REFRESH") or "").strip() == "1"
+        if cached and not refresh and os.path.isdir(cached):
+            if not check_db or os.path.isfile(os.path.join(cached, "asil_system.db")):
+                self.source = "cache"
+                return cached
+
+        self.source = "probe"
+        portable_dir = os.path.join(_EXE_DIR, "database")
+        appdata_dir = os.path.join(_local_appdata_dir(), "SATTUP", "database")
+        database_dir = portable_dir if _is_dir_writable(portable_dir) else appdata_dir
         try:
-            if not os.path.exists(DB_PATH):
-                bundled_db = os.path.join(_RESOURCE_DIR, "database", "asil_system.db")
-                if os.path.exists(bundled_db):
-                    shutil.copy2(bundled_db, DB_PATH)
+            os.makedirs(database_dir, exist_ok=True)
         except Exception:
             pass
+        if check_db:
+            try:
+                db_path = os.path.join(database_dir, "asil_system.db")
+                if not os.path.exists(db_path):
+                    bundled_db = os.path.join(_RESOURCE_DIR, "database", "asil_system.db")
+                    if os.path.exists(bundled_db):
+                        shutil.copy2(bundled_db, db_path)
+            except Exception:
+                pass
+
+        data = _read_settings_file() or {"format": _SETTINGS_FORMAT}
+        data["format"] = _SETTINGS_FORMAT
+        data.setdefault("installs", {})[key] = {
+            "database_dir": database_dir,
+            "version": APP_VERSION,
+            "resolved_at": datetime.now().isoformat(timespec="seconds"),
+        }
+        _write_settings_file(data)
+        return database_dir
+
+
+settings = _Settings()
+
+
+def __getattr__(name):
+    # DATABASE_DIR, DB_PATH, CACHE_DIR, ... ilk erişimde çözülür
+    if name == "DATABASE_DIR" or name in _DATA_PATHS:
+        return settings.paths[name]
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
 
 UI_FILES_PATH = os.path.join(UI_DIR, "ui_files")
 ICONS_PATH = os.path.join(UI_DIR, "icons")
@@ -14,6 +14,11 @@ KEEP_TABLES = {
     "driver_documents",
     "arac_bakim",
     "constants",
+    # Durak kataloğu ve mesafe matrisi (stop_distances.csv'den yüklenir) referans veridir
+    "stops",
+    "stop_distances",
+    "stop_distance_source",
+    "schema_migrations",
     "sqlite_sequence",
 }
 
@@ -22,6 +27,8 @@ DELETE_TABLES = [
     "hakedis_docs",
     "hakedis_items",
     "hakedis",
+    # Türetilmiş tablolar kaynaklarından önce silinir
+    "trip_daily_agg",
     "trip_allocations",
     "trip_entries",
     "trip_plan",
@@ -30,8 +37,11 @@ DELETE_TABLES = [
     "trip_period_lock",
     "trips",
     "period_close",
+    "route_stop_sig",
+    "route_stops",
     "route_params",
     "contract_links",
+    "contract_price_items",
     "contracts",
 ]
 
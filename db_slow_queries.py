@@ -0,0 +1,123 @@
+"""Yavaş sorgu günlüğünü (SATTUP_SLOW_QUERY_MS) sorgu parmak izine göre özetler.
+
+Örnek:
+    python db_slow_queries.py
+    python db_slow_queries.py --table trip_allocations --scans
+    python db_slow_queries.py --path kopya/slow_queries.log --top 10
+"""
+
+import argparse
+import json
+import os
+import re
+from collections import Counter
+
+import config
+
+
+_SCAN_RE = re.compile(r"^SCAN (\w+)")
+
+
+def _log_files(path: str) -> list[str]:
+    # RotatingFileHandler: slow_queries.log, slow_queries.log.1 ... (eskiden yeniye okunur)
+    files = []
+    for i in range(9, 0, -1):
+        p = f"{path}.{i}"
+        if os.path.exists(p):
+            files.append(p)
+    if os.path.exists(path):
+        files.append(path)
+    return files
+
+
+def _read_entries(files: list[str]):
+    for p in files:
+        with open(p, encoding="utf-8", errors="replace") as fh:
+            for line in fh:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    yield json.loads(line)
+                except Exception:
+                    continue
+
+
+def _scanned_tables(plan) -> set[str]:
+    # "SCAN trip_allocations" tam tarama; "SCAN x USING (COVERING) INDEX" indeks üzerinde tarama.
+    out = set()
+    for detail in plan or []:
+        m = _SCAN_RE.match(str(detail))
+        if m and " USING " not in str(detail):
+            out.add(m.group(1))
+    return out
+
+
+def summarize(entries, table: str = "", scans_only: bool = False, min_ms: float = 0.0) -> list[dict]:
+    groups: dict[str, dict] = {}
+    for e in entries:
+        ms = float(e.get("ms") or 0)
+        if ms < min_ms:
+            continue
+        fp = str(e.get("fp") or e.get("sql") or "")
+        plan = e.get("plan") or []
+        scans = _scanned_tables(plan)
+        if table and table not in fp and table not in scans:
+            continue
+        if scans_only and not scans:
+            continue
+        g = groups.get(fp)
+        if g is None:
+            g = groups[fp] = {
+                "fp": fp, "count": 0, "total_ms": 0.0, "max_ms": 0.0, "rows": 0,
+                "plan": plan, "scans": set(), "origins": Counter(), "params": "", "last": "",
+            }
+        g["count"] += 1
+        g["total_ms"] += ms
+        g["rows"] += int(e.get("rows") or 0)
+        g["scans"] |= scans
+        origin = e.get("origin") or []
+        g["origins"][" < ".join(origin[:2]) if origin else str(e.get("method") or "-")] += 1
+        if ms >= g["max_ms"]:
+            g["max_ms"] = ms
+            g["params"] = str(e.get("params") or "")
+            g["plan"] = plan
+        g["last"] = str(e.get("ts") or g["last"])
+    out = list(groups.values())
+    out.sort(key=lambda g: g["total_ms"], reverse=True)
+    return out
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description="Yavaş sorgu günlüğü özeti")
+    ap.add_argument("--path", default=str(config.SLOW_QUERY_LOG_PATH), help="günlük dosyası (döndürülmüş .1 .. .9 dahil okunur)")
+    ap.add_argument("--top", type=int, default=20, help="gösterilecek sorgu sayısı")
+    ap.add_argument("--table", default="", help="yalnızca bu tabloyu içeren / tarayan sorgular (örn. trip_allocations, hakedis)")
+    ap.add_argument("--scans", action="store_true", help="yalnızca indekssiz tablo taraması (SCAN) içerenler")
+    ap.add_argument("--min-ms", type=float, default=0.0, help="bu süreden kısa kayıtları atla")
+    args = ap.parse_args()
+
+    files = _log_files(args.path)
+    print("LOG=", args.path)
+    if not files:
+        print("Günlük bulunamadı. Uygulamayı SATTUP_SLOW_QUERY_MS=<ms> ile çalıştırın.")
+        return
+
+    groups = summarize(_read_entries(files), table=args.table.strip(), scans_only=args.scans, min_ms=args.min_ms)
+    print(f"{len(groups)} farklı sorgu\n")
+    for i, g in enumerate(groups[: max(1, args.top)], 1):
+        avg = g["total_ms"] / g["count"] if g["count"] else 0.0
+        print(f"#{i} toplam={g['total_ms']:.1f}ms x{g['count']} ort={avg:.1f}ms max={g['max_ms']:.1f}ms satır={g['rows']} son={g['last']}")
+        if g["scans"]:
+            print(f"   TARAMA: {', '.join(sorted(g['scans']))}")
+        print(f"   {g['fp'][:400]}")
+        for detail in g["plan"] or []:
+            print(f"   plan: {detail}")
+        print(f"   en yavaş parametre: {g['params']}")
+        for origin, n in g["origins"].most_common(3):
+            print(f"   çağıran x{n}: {origin}")
+        print()
+
+
+if __name__ == "__main__":
+    main()
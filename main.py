@@ -1,6 +1,7 @@
 import sys
 import os
 import config
+from app.core import startup
 # 1. Bytecode (.pycache) oluşumunu engelle
 sys.dont_write_bytecode = True
 
@@ -12,20 +13,42 @@ from PyQt6.QtWidgets import QApplication
 from app.core.db_manager import DatabaseManager
 from app.modules.main_menu import MainMenuApp
 
-# Register Qt resources early so Designer stylesheets using ":/..." paths always work.
-import ui.icons.context_rc
+startup.mark("imports")
+
+
+def _warm_pdf_resources():
+    # PDF font metrikleri (.pkl) ve filigran ilk dışa aktarımda beklenmesin
+    from app.utils import pdf_stream
+
+    pdf_stream.font_metrics()
+    pdf_stream.watermark_path()
 
 
 def main():
     db = DatabaseManager()
+    startup.mark("database")
 
     app = QApplication(sys.argv)
+    startup.mark("qapplication")
 
     user_data = {}
     main_window = MainMenuApp(user_data=user_data, start_passive=True, offline_timeout_ms=120000)
+    startup.mark("main_window")
     main_window.showMaximized()
+    startup.mark("shown")
+
+    # İlk ekran için gerekmeyenler pencere gösterildikten sonra yüklenir.
+    # Qt kaynakları (":/..." yolları) bunları kullanan ekranlar tarafından da ayrıca kaydedilir.
+    pipeline = startup.StartupPipeline(main_window, step_ms=50)
+    pipeline.add("qt_resources", startup.ensure_resources)
+    pipeline.add("offline_audio", main_window._ensure_offline_audio)
+    pipeline.add("pdf_resources", _warm_pdf_resources, background=True)
+    if os.environ.get("SATTUP_STARTUP_EXIT"):
+        # startup_benchmark.py: zaman çizelgesi yazılınca uygulama kapanır
+        pipeline.done.connect(app.quit)
+    pipeline.start()
     sys.exit(app.exec())
 
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
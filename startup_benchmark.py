@@ -0,0 +1,114 @@
+"""Paketleme modlarının açılış süresini ölçer.
+
+Her hedef --runs kez başlatılır (SATTUP_STARTUP_EXIT=1: ertelenen açılış işleri bitince uygulama
+kendini kapatır). Ölçülenler:
+- duvar saati: süreç başlatma -> süreç çıkışı (onefile'ın geçici klasöre açılma süresi dahil),
+- uygulama içi zaman çizelgesi (app.core.startup): shown / interactive / deferred_done.
+İlk çalıştırma (soğuk; disk önbelleği boş olabilir) ayrı raporlanır, medyan / max sonrakilerden.
+
+Örnek:
+    python startup_benchmark.py source
+    python startup_benchmark.py dist/SATTUP/SATTUP.exe dist/SATTUP_full/SATTUP.exe dist/SATTUP_onefile.exe
+    python startup_benchmark.py --runs 10 --json sonuc.json source dist/SATTUP/SATTUP.exe
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+MARKS = ("imports", "main_window", "shown", "interactive", "deferred_done")
+
+
+def _command(target: str) -> list[str]:
+    if target == "source":
+        return [sys.executable, os.path.join(os.path.dirname(os.path.abspath(__file__)), "main.py")]
+    if target.endswith(".py"):
+        return [sys.executable, target]
+    return [os.path.abspath(target)]
+
+
+def _last_entry(path: str) -> dict:
+    try:
+        with open(path, encoding="utf-8") as fh:
+            lines = [ln for ln in fh if ln.strip()]
+        return json.loads(lines[-1]) if lines else {}
+    except Exception:
+        return {}
+
+
+def run_once(target: str, timeout: float) -> dict:
+    with tempfile.TemporaryDirectory(prefix="sattup_bench_") as tmp:
+        log_path = os.path.join(tmp, "startup.log")
+        env = dict(os.environ, SATTUP_STARTUP_EXIT="1", SATTUP_STARTUP_LOG=log_path)
+        started = time.perf_counter()
+        try:
+            proc = subprocess.run(_command(target), env=env, timeout=timeout, capture_output=True)
+            code = proc.returncode
+        except subprocess.TimeoutExpired:
+            code = None
+        wall_ms = (time.perf_counter() - started) * 1000.0
+        entry = _last_entry(log_path)
+    return {"wall_ms": wall_ms, "exit_code": code, "build": entry.get("build", "?"), "marks": entry.get("marks") or {}}
+
+
+def _median(values: list[float]) -> float:
+    if not values:
+        return 0.0
+    values = sorted(values)
+    mid = len(values) // 2
+    return values[mid] if len(values) % 2 else (values[mid - 1] + values[mid]) / 2.0
+
+
+def summarize(runs: list[dict]) -> dict:
+    ok = [r for r in runs if r["exit_code"] == 0 and r["marks"]]
+    warm = ok[1:] or ok
+    out = {
+        "runs": len(runs),
+        "failed": len(runs) - len(ok),
+        "build": ok[0]["build"] if ok else "?",
+        "cold_wall_ms": round(ok[0]["wall_ms"], 1) if ok else None,
+        "wall_ms": {"median": round(_median([r["wall_ms"] for r in warm]), 1), "max": round(max((r["wall_ms"] for r in warm), default=0.0), 1)},
+    }
+    for name in MARKS:
+        values = [float(r["marks"][name]) for r in warm if name in r["marks"]]
+        if values:
+            out[name] = {"median": round(_median(values), 1), "max": round(max(values), 1)}
+    return out
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description="Açılış süresi karşılaştırması (kaynak / onedir / onefile)")
+    ap.add_argument("targets", nargs="+", help='"source", main.py yolu ya da paketlenmiş EXE yolu')
+    ap.add_argument("--runs", type=int, default=5, help="hedef başına çalıştırma sayısı")
+    ap.add_argument("--timeout", type=float, default=120.0, help="tek çalıştırma için zaman aşımı (sn)")
+    ap.add_argument("--json", default="", help="sonuçları bu dosyaya da yaz")
+    args = ap.parse_args()
+
+    results = {}
+    for target in args.targets:
+        runs = [run_once(target, args.timeout) for _ in range(max(1, args.runs))]
+        results[target] = summarize(runs)
+
+    for target, s in results.items():
+        print(f"{target}  [{s['build']}]  {s['runs']} çalıştırma, {s['failed']} hatalı")
+        if s["cold_wall_ms"] is None:
+            print("   ölçüm yok (uygulama açılmadı ya da zaman çizelgesi yazılmadı)\n")
+            continue
+        print(f"   soğuk duvar saati   {s['cold_wall_ms']:8.1f}ms")
+        print(f"   duvar saati         medyan={s['wall_ms']['median']:8.1f}ms  max={s['wall_ms']['max']:8.1f}ms")
+        for name in MARKS:
+            if name in s:
+                print(f"   {name:<19} medyan={s[name]['median']:8.1f}ms  max={s[name]['max']:8.1f}ms")
+        print()
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as fh:
+            json.dump(results, fh, ensure_ascii=False, indent=2)
+
+
+if __name__ == "__main__":
+    main()
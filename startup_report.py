@@ -0,0 +1,79 @@
+"""Açılış zaman çizelgesi günlüğünü (STARTUP_LOG_PATH) sürümlere göre özetler.
+
+Örnek:
+    python startup_report.py
+    python startup_report.py --last 5
+    python startup_report.py --path kopya/startup.log
+"""
+
+import argparse
+import json
+import os
+from collections import OrderedDict
+
+import config
+
+
+def _read_entries(path: str):
+    if not os.path.exists(path):
+        return
+    with open(path, encoding="utf-8", errors="replace") as fh:
+        for line in fh:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                yield json.loads(line)
+            except Exception:
+                continue
+
+
+def _pct(values: list[float], p: float) -> float:
+    if not values:
+        return 0.0
+    values = sorted(values)
+    idx = min(len(values) - 1, max(0, int(round((len(values) - 1) * p))))
+    return float(values[idx])
+
+
+def summarize(entries) -> "OrderedDict[str, dict]":
+    """Sürüm -> {"runs", "marks": {ad: [ms]}, "stages": {ad: [ms]}} (ilk görülme sırasıyla)."""
+    out: OrderedDict[str, dict] = OrderedDict()
+    for e in entries:
+        version = str(e.get("version") or "?")
+        g = out.get(version)
+        if g is None:
+            g = out[version] = {"runs": 0, "marks": OrderedDict(), "stages": OrderedDict()}
+        g["runs"] += 1
+        for name, ms in (e.get("marks") or {}).items():
+            g["marks"].setdefault(name, []).append(float(ms or 0))
+        for st in e.get("stages") or []:
+            g["stages"].setdefault(str(st.get("name") or "?"), []).append(float(st.get("ms") or 0))
+    return out
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description="Açılış süresi özeti")
+    ap.add_argument("--path", default=str(config.STARTUP_LOG_PATH), help="startup.log yolu")
+    ap.add_argument("--last", type=int, default=0, help="yalnızca son N açılışı say")
+    args = ap.parse_args()
+
+    entries = list(_read_entries(args.path))
+    print("LOG=", args.path)
+    if not entries:
+        print("Günlük bulunamadı. Uygulamayı en az bir kez açın.")
+        return
+    if args.last > 0:
+        entries = entries[-args.last:]
+
+    for version, g in summarize(entries).items():
+        print(f"Sürüm {version}: {g['runs']} açılış")
+        for name, values in g["marks"].items():
+            print(f"   {name:<16} medyan={_pct(values, 0.5):8.1f}ms  p90={_pct(values, 0.9):8.1f}ms  max={max(values):8.1f}ms")
+        for name, values in g["stages"].items():
+            print(f"   aşama {name:<14} medyan={_pct(values, 0.5):8.1f}ms  p90={_pct(values, 0.9):8.1f}ms  max={max(values):8.1f}ms")
+        print()
+
+
+if __name__ == "__main__":
+    main()
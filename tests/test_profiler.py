@@ -0,0 +1,33 @@
+import logging
+
+from app.core import profiler
+
+
+def test_profiled_slot_ignores_extra_qt_argument(monkeypatch):
+    # clicked(bool) doğrudan bağlanınca PyQt checked argümanını da geçirir.
+    monkeypatch.setattr(profiler, "ENABLED", True)
+    monkeypatch.setattr(profiler, "_LOGGER", logging.getLogger("sattup.profile.test"))
+
+    class Screen:
+        calls = 0
+
+        @profiler.profiled("test.save")
+        def save(self):
+            self.calls += 1
+            return "ok"
+
+    screen = Screen()
+    assert screen.save(False) == "ok"
+    assert screen.save() == "ok"
+    assert screen.calls == 2
+
+
+def test_profiled_keeps_arguments_the_function_accepts(monkeypatch):
+    monkeypatch.setattr(profiler, "ENABLED", True)
+    monkeypatch.setattr(profiler, "_LOGGER", logging.getLogger("sattup.profile.test"))
+
+    @profiler.profiled("test.args")
+    def fn(a, *rest, flag=False):
+        return a, rest, flag
+
+    assert fn(1, 2, 3, flag=True) == (1, (2, 3), True)